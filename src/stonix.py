@@ -133,6 +133,11 @@ from stonix_resources.StateChgLogger import StateChgLogger
 from stonix_resources.logdispatcher import LogPriority, LogDispatcher
 from stonix_resources.program_arguments import ProgramArguments
 from stonix_resources.cli import Cli
+from stonix_resources.rulescheduler import RuleScheduler
+from stonix_resources.ruleindex import RuleIndex
+from stonix_resources.probecache import getprobecache
+from stonix_resources.confcache import getconfcache
+from stonix_resources.rulemetrics import getrulemetrics
 try:
     from stonix_resources.gui import GUI
     from PyQt4 import QtCore, QtGui
@@ -155,6 +160,9 @@ class Controller(Observable):
         self.pcf = False
         self.pcs = False
         self.list = False
+        self.jobs = 1
+        self.metrics = False
+        self.ruleentries = []
         if not self.safetycheck():
             self.logger.log(LogPriority.CRITICAL,
                             ['SafetyCheck',
@@ -185,6 +193,7 @@ class Controller(Observable):
         self.logger = LogDispatcher(self.environ)
         self.logger.log(LogPriority.DEBUG,
                         'Logging Started')
+        getrulemetrics().install(stats=self.metrics)
         self.tryacquirelock()
 
         if self.mode == 'gui':
@@ -249,7 +258,6 @@ class Controller(Observable):
                         ['OSType', self.environ.getostype()])
         self.logger.log(LogPriority.DEBUG,
                         ['OSVersion', self.environ.getosver()])
-        self.list = self.prog_args.getList()
         if self.list:
             self.__listrules()
 
@@ -265,15 +273,13 @@ class Controller(Observable):
     def getrules(self, config, environ):
         """
         Private method to process the stonix rules file to populate the rules.
-        @return: List of instantiated rule objects
+        A persisted RuleIndex is consulted first so that only the rules that
+        will actually be run are imported and instantiated. If no valid index
+        exists every rule is loaded once and the index is rebuilt.
 
         @return: list : a list of instantiated rule classes
         @author: D. Kennel
         """
-        instruleclasses = []
-        validrulefiles = []
-        initlist = ['__init__.py', '__init__.pyc', '__init__.pyo']
-
         stonixPath = self.environ.get_resources_path()
         self.logger.log(LogPriority.DEBUG,
                         ['STONIX Path:', str(stonixPath)])
@@ -288,25 +294,47 @@ class Controller(Observable):
             self.logger.log(LogPriority.DEBUG,
                             ['Sys Path Element:', str(path)])
 
-        rulefiles = os.listdir(str(rulesPath))
-        # print str(rulefiles)
-
-        for rfile in rulefiles:
-            if rfile in initlist:
+        ruleindex = RuleIndex(environ, self.logger)
+        entries = ruleindex.load()
+        if entries is None:
+            modulenames = ruleindex.getmodulenames()
+            self.logger.log(LogPriority.DEBUG,
+                            ['Module names:', str(modulenames)])
+            instruleclasses = self.__loadrules(modulenames, config, environ)
+            loaded = [rule.__class__.__module__.split('.')[-1]
+                      for rule in instruleclasses]
+            failed = [module for module in modulenames
+                      if module not in loaded]
+            self.ruleentries = ruleindex.build(instruleclasses, failed)
+            return instruleclasses
+
+        self.ruleentries = entries
+        modulenames = []
+        for entry in entries:
+            if not entry['applicable'] and not entry['dynamic']:
                 continue
-            else:
-                validrulefiles.append(rfile)
-        self.logger.log(LogPriority.DEBUG,
-                        ['validrulefiles:', str(validrulefiles)])
-
-        # This is a list comprehension to build a list of module names to
-        # import based on the names of valid rule files from stonix/rules
-        # destination list = [ *transform* *source* *filter* ]
-        modulenames = [mod.replace('.py', '') for mod in validrulefiles
-                        if re.search("\.py$", mod)]
+            if entry['rootrequired'] and not self.environ.geteuid() == 0:
+                continue
+            if self.list and not entry['dynamic']:
+                # Listing is answered from the index alone
+                continue
+            if self.runrule and not entry['name'] == self.runrule:
+                continue
+            modulenames.append(entry['module'])
         self.logger.log(LogPriority.DEBUG,
                         ['Module names:', str(modulenames)])
+        return self.__loadrules(modulenames, config, environ)
+
+    def __loadrules(self, modulenames, config, environ):
+        """
+        Private method to import the named rule modules and instantiate the
+        rule class each one contains.
 
+        @param modulenames: list of rule module names
+        @return: list : a list of instantiated rule classes
+        @author: D. Kennel
+        """
+        instruleclasses = []
         # The output of this section is a list of valid, fully qualified,
         # rule class names.
         classnames = []
@@ -448,103 +476,192 @@ class Controller(Observable):
                 rulename = rule.getrulename()
         return rulename
 
+    def __runphase(self, rule, phase):
+        """
+        Private method to run the report, fix or undo method of a rule while
+        recording its performance metrics, see RuleMetrics.
+
+        @param rule: rule instance
+        @param string phase : 'report', 'fix' or 'undo'
+        @return void :
+        """
+        with getrulemetrics().measure(rule.getrulename(), phase):
+            getattr(rule, phase)()
+
     def hardensystem(self):
         """
-        Call all rules in fix(harden) mode
+        Call all rules in fix(harden) mode. When more than one job has been
+        requested the report passes are run concurrently and the fix passes
+        for the non-compliant rules are then run one at a time in the normal
+        rule order.
 
         @return void :
         @author D. Kennel
         """
         self.numrulesrunning = self.numexecutingrules
         self.numrulescomplete = 0
-        for rule in self.installedrules:
-            self.currulenum = rule.getrulenum()
-            self.currulename = rule.getrulename()
-            try:
-                starttime = time.time()
-                rule.report()
-                if not rule.getrulesuccess():
-                    self.logger.log(LogPriority.ERROR,
-                                    [rule.getrulename(),
-                                     rule.getdetailedresults()])
-                elif not rule.iscompliant():
-                    rule.fix()
-                    if rule.getrulesuccess():
-                        rule.report()
-                        if not rule.getrulesuccess():
-                            self.logger.log(LogPriority.ERROR,
-                                            [rule.getrulename(),
-                                             rule.getdetailedresults()])
-                        elif not rule.iscompliant():
-                            self.logger.log(LogPriority.WARNING,
-                                            [rule.getrulename(),
-                                            rule.getdetailedresults()])
-                        else:
-                            self.logger.log(LogPriority.INFO,
-                                            [rule.getrulename(),
-                                            rule.getdetailedresults()])
+        if self.jobs > 1:
+            tofix = []
+
+            def reported(rule, error):
+                if error is not None:
+                    self.__rulecomplete(rule, error)
+                elif rule.getrulesuccess() and not rule.iscompliant():
+                    tofix.append(rule)
                 else:
-                    self.logger.log(LogPriority.INFO,
-                                    [rule.getrulename(),
-                                    rule.getdetailedresults()])
-                etime = time.time() - starttime
-                self.logger.log(LogPriority.DEBUG,
-                                [rule.getrulename(),
-                                'Elapsed Time: ' + str(etime)])
-            except (KeyboardInterrupt, SystemExit):
-            # User initiated exit
-                raise
-            except Exception:
-                trace = traceback.format_exc()
-                self.logger.log(LogPriority.ERROR, [rule.getrulename(),
-                                "Controller caught rule death: "
-                                + trace])
-            self.numrulescomplete = self.numrulescomplete + 1
-            self.set_dirty()
-            self.notify_check()
+                    self.__hardenrule(rule, True)
 
-    def auditsystem(self):
+            scheduler = RuleScheduler(self.logger, self.jobs)
+            scheduler.run(self.installedrules, self.__reportrule, reported)
+            tofix.sort(key=self.installedrules.index)
+            for rule in tofix:
+                self.__hardenrule(rule, True)
+        else:
+            for rule in self.installedrules:
+                self.__hardenrule(rule)
+
+    def __hardenrule(self, rule, reported=False):
         """
-        Call all rules in audit(report) mode
+        Private method to run a single rule through the report, fix, report
+        cycle used by hardensystem and update the progress counters.
 
+        @param rule: rule instance
+        @param bool reported: True if the initial report pass has already
+        been run for this rule.
         @return void :
-        @author D. Kennel
         """
-        self.numrulesrunning = self.numexecutingrules
-        self.numrulescomplete = 0
-        for rule in self.installedrules:
-            self.currulenum = rule.getrulenum()
-            self.currulename = rule.getrulename()
-            try:
-                starttime = time.time()
-                rule.report()
-                etime = time.time() - starttime
-                self.logger.log(LogPriority.DEBUG,
-                                [rule.getrulename(),
-                                'Elapsed Time: ' + str(etime)])
-            except (KeyboardInterrupt, SystemExit):
-                # User initiated exit
-                raise
-            except Exception:
-                trace = traceback.format_exc()
-                self.logger.log(LogPriority.ERROR, [rule.getrulename(),
-                                "Controller caught rule death: "
-                                + trace])
-            self.numrulescomplete = self.numrulescomplete + 1
+        self.currulenum = rule.getrulenum()
+        self.currulename = rule.getrulename()
+        try:
+            starttime = time.time()
+            if not reported:
+                self.__runphase(rule, 'report')
             if not rule.getrulesuccess():
                 self.logger.log(LogPriority.ERROR,
                                 [rule.getrulename(),
-                                rule.getdetailedresults()])
-            if not rule.iscompliant():
-                self.logger.log(LogPriority.WARNING,
-                                [rule.getrulename(),
-                                rule.getdetailedresults()])
+                                 rule.getdetailedresults()])
+            elif not rule.iscompliant():
+                getprobecache().setfixmode(True)
+                try:
+                    self.__runphase(rule, 'fix')
+                finally:
+                    getprobecache().setfixmode(False)
+                    self.statechglogger.commit()
+                if rule.getrulesuccess():
+                    self.__runphase(rule, 'report')
+                    if not rule.getrulesuccess():
+                        self.logger.log(LogPriority.ERROR,
+                                        [rule.getrulename(),
+                                         rule.getdetailedresults()])
+                    elif not rule.iscompliant():
+                        self.logger.log(LogPriority.WARNING,
+                                        [rule.getrulename(),
+                                        rule.getdetailedresults()])
+                    else:
+                        self.logger.log(LogPriority.INFO,
+                                        [rule.getrulename(),
+                                        rule.getdetailedresults()])
             else:
                 self.logger.log(LogPriority.INFO,
                                 [rule.getrulename(),
                                 rule.getdetailedresults()])
-            self.set_dirty()
-            self.notify_check()
+            etime = time.time() - starttime
+            self.logger.log(LogPriority.DEBUG,
+                            [rule.getrulename(),
+                            'Elapsed Time: ' + str(etime)])
+        except (KeyboardInterrupt, SystemExit):
+        # User initiated exit
+            raise
+        except Exception:
+            trace = traceback.format_exc()
+            self.logger.log(LogPriority.ERROR, [rule.getrulename(),
+                            "Controller caught rule death: "
+                            + trace])
+        self.numrulescomplete = self.numrulescomplete + 1
+        self.set_dirty()
+        self.notify_check()
+
+    def __rulecomplete(self, rule, error):
+        """
+        Private method to record a rule whose report pass died while being
+        run by the RuleScheduler.
+
+        @param rule: rule instance
+        @param string error: formatted traceback
+        @return void :
+        """
+        self.currulenum = rule.getrulenum()
+        self.currulename = rule.getrulename()
+        self.logger.log(LogPriority.ERROR, [rule.getrulename(),
+                        "Controller caught rule death: "
+                        + error])
+        self.numrulescomplete = self.numrulescomplete + 1
+        self.set_dirty()
+        self.notify_check()
+
+    def __reportrule(self, rule):
+        """
+        Private method that runs the report pass for a single rule. This may
+        be called on a RuleScheduler worker thread so it must not touch the
+        controller's state; the current rule and the progress counters are
+        updated by the completion callback on the controlling thread.
+        Exceptions are left for the scheduler to collect.
+
+        @param rule: rule instance
+        @return void :
+        """
+        starttime = time.time()
+        self.__runphase(rule, 'report')
+        etime = time.time() - starttime
+        self.logger.log(LogPriority.DEBUG,
+                        [rule.getrulename(),
+                        'Elapsed Time: ' + str(etime)])
+
+    def auditsystem(self):
+        """
+        Call all rules in audit(report) mode. When more than one job has been
+        requested the rules are run concurrently, see RuleScheduler.
+
+        @return void :
+        @author D. Kennel
+        """
+        self.numrulesrunning = self.numexecutingrules
+        self.numrulescomplete = 0
+        scheduler = RuleScheduler(self.logger, self.jobs)
+        scheduler.run(self.installedrules, self.__reportrule,
+                      self.__auditcomplete)
+
+    def __auditcomplete(self, rule, error):
+        """
+        Private method called on the controlling thread as each rule's report
+        pass finishes during auditsystem. Logs the results and updates the
+        progress counters.
+
+        @param rule: rule instance
+        @param string error: formatted traceback if the rule died or None
+        @return void :
+        """
+        self.currulenum = rule.getrulenum()
+        self.currulename = rule.getrulename()
+        if error is not None:
+            self.logger.log(LogPriority.ERROR, [rule.getrulename(),
+                            "Controller caught rule death: "
+                            + error])
+        self.numrulescomplete = self.numrulescomplete + 1
+        if not rule.getrulesuccess():
+            self.logger.log(LogPriority.ERROR,
+                            [rule.getrulename(),
+                            rule.getdetailedresults()])
+        if not rule.iscompliant():
+            self.logger.log(LogPriority.WARNING,
+                            [rule.getrulename(),
+                            rule.getdetailedresults()])
+        else:
+            self.logger.log(LogPriority.INFO,
+                            [rule.getrulename(),
+                            rule.getdetailedresults()])
+        self.set_dirty()
+        self.notify_check()
 
     def runruleharden(self, ruleid):
         """
@@ -569,7 +686,7 @@ class Controller(Observable):
                 else:
                     starttime = time.time()
                     try:
-                        rule.report()
+                        self.__runphase(rule, 'report')
                     except (KeyboardInterrupt, SystemExit):
                         # User initiated exit
                         raise
@@ -587,8 +704,9 @@ class Controller(Observable):
                                          'Rule failed: Rule config in unknown state. Skipping rule'])
                         self.numrulescomplete = self.numrulescomplete + 1
                     elif not rule.iscompliant():
+                        getprobecache().setfixmode(True)
                         try:
-                            rule.fix()
+                            self.__runphase(rule, 'fix')
                         except (KeyboardInterrupt, SystemExit):
                             # User initiated exit
                             raise
@@ -598,12 +716,14 @@ class Controller(Observable):
                                             [rule.getrulename(),
                                             "Controller caught rule death: "
                                             + trace])
+                        getprobecache().setfixmode(False)
+                        self.statechglogger.commit()
                         if not rule.getrulesuccess():
                             self.logger.log(LogPriority.ERROR,
                                             [rule.getrulename(),
                                              rule.getdetailedresults()])
                         try:
-                            rule.report()
+                            self.__runphase(rule, 'report')
                         except (KeyboardInterrupt, SystemExit):
                             # User initiated exit
                             raise
@@ -659,7 +779,7 @@ class Controller(Observable):
                 else:
                     starttime = time.time()
                     try:
-                        rule.report()
+                        self.__runphase(rule, 'report')
                     except (KeyboardInterrupt, SystemExit):
                         # User initiated exit
                         raise
@@ -701,8 +821,9 @@ class Controller(Observable):
         for rule in self.installedrules:
             self.currulenum = rule.getrulenum()
             self.currulename = rule.getrulename()
+            getprobecache().setfixmode(True)
             try:
-                rule.undo()
+                self.__runphase(rule, 'undo')
             except (KeyboardInterrupt, SystemExit):
                 # User initiated exit
                 raise
@@ -712,6 +833,8 @@ class Controller(Observable):
                                 [rule.getrulename(),
                                 "Controller caught rule death: "
                                 + trace])
+            getprobecache().setfixmode(False)
+            self.statechglogger.commit()
             self.numrulescomplete = self.numrulescomplete + 1
             if not rule.getrulesuccess():
                 self.logger.log(LogPriority.ERROR,
@@ -743,8 +866,9 @@ class Controller(Observable):
                     self.logger.log(LogPriority.ERROR,
                                     [rule.getrulename(), message])
                 else:
+                    getprobecache().setfixmode(True)
                     try:
-                        rule.undo()
+                        self.__runphase(rule, 'undo')
                     except (KeyboardInterrupt, SystemExit):
                         # User initiated exit
                         raise
@@ -754,6 +878,8 @@ class Controller(Observable):
                                         [rule.getrulename(),
                                         "Controller caught rule death: "
                                         + trace])
+                    getprobecache().setfixmode(False)
+                    self.statechglogger.commit()
                     self.numrulescomplete = self.numrulescomplete + 1
                     if not rule.getrulesuccess():
                         self.logger.log(LogPriority.ERROR,
@@ -797,8 +923,9 @@ class Controller(Observable):
             if rule.isdatabaserule():
                 self.currulenum = rule.getrulenum()
                 self.currulename = rule.getrulename()
+                getprobecache().setfixmode(True)
                 try:
-                    rule.fix()
+                    self.__runphase(rule, 'fix')
                 except (KeyboardInterrupt, SystemExit):
                     # User initiated exit
                     raise
@@ -808,6 +935,8 @@ class Controller(Observable):
                                     [rule.getrulename(),
                                     "Controller caught rule death: "
                                     + trace])
+                getprobecache().setfixmode(False)
+                self.statechglogger.commit()
                 self.numrulescomplete = self.numrulescomplete + 1
                 self.set_dirty()
                 self.notify_check()
@@ -1082,6 +1211,9 @@ ABORTING EXECUTION!"""
         self.environ.setinstallmode(self.prog_args.get_install())
         self.pcf = self.prog_args.getPrintConfigFull()
         self.pcs = self.prog_args.getPrintConfigSimple()
+        self.jobs = self.prog_args.getJobs()
+        self.list = self.prog_args.getList()
+        self.metrics = self.prog_args.getMetrics()
 
         if self.prog_args.get_update():
             # update(debug)
@@ -1130,11 +1262,22 @@ ABORTING EXECUTION!"""
         @return: void
         """
         rulelist = []
+        listed = []
         for rule in self.installedrules:
             rulenum = rule.getrulenum()
             rulename = rule.getrulename()
             rulestring = rulename + ' (' + str(rulenum) + ')'
             rulelist.append(rulestring)
+            listed.append(rulename)
+        # Rules answered from the RuleIndex were never instantiated
+        for entry in self.ruleentries:
+            if entry['dynamic'] or not entry['applicable'] or \
+               entry['name'] in listed:
+                continue
+            if entry['rootrequired'] and not self.environ.geteuid() == 0:
+                continue
+            rulestring = entry['name'] + ' (' + str(entry['number']) + ')'
+            rulelist.append(rulestring)
         rulelist.sort(key=str.lower)
         print "STONIX rules for this platform:"
         for rule in rulelist:
@@ -1217,6 +1360,17 @@ ABORTING EXECUTION!"""
                 self.logger.log(LogPriority.INFO,
                                 'No action specified. Please pass the -r, -f, or -u flag')
                 self.logger.closereports()
+        getprobecache().logstats(self.logger)
+        getconfcache().logstats(self.logger)
+        if self.metrics:
+            metricspath = os.path.join(self.environ.get_log_path(),
+                                       'stonix-metrics.json')
+            try:
+                getrulemetrics().writejson(metricspath)
+            except (IOError, OSError):
+                self.logger.log(LogPriority.ERROR,
+                                ['Controller', 'Could not write ' +
+                                 metricspath])
         self.releaselock()
 
 if __name__ == '__main__':
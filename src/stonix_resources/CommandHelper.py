@@ -32,11 +32,20 @@
 @change: 04/15/2014 ekkehard made logging more intelligent
 @change: 10/20/2014 ekkehard fix pep8 viloation
 '''
+import errno
+import os
+import Queue
 import re
+import select
+import signal
 import subprocess
+import threading
+import time
 import traceback
 import types
 from logdispatcher import LogPriority
+from probecache import getprobecache
+from rulemetrics import getrulemetrics
 
 
 class CommandHelper(object):
@@ -71,6 +80,16 @@ class CommandHelper(object):
 
         # set this to False if you need to run a command that has no return code
         self.wait = True
+        # seconds before a command is killed, None waits forever
+        self.timeout = None
+        self.timedout = False
+        # bytes of stdout and of stderr to keep, None keeps everything
+        self.maxoutput = None
+        self.truncated = False
+        # close inherited descriptors in the child, set for batch workers so
+        # concurrent children do not hold each other's pipes open. See also
+        # setclosefds().
+        self.closefds = False
 
 ###############################################################################
 
@@ -337,6 +356,51 @@ class CommandHelper(object):
                             str(logprioritytype) + "' specified!")
         return success
 
+###############################################################################
+
+    def setTimeout(self, timeout=None):
+        '''
+        Set the number of seconds a command may run before it and its process
+        group are killed. None (the default) waits for the command to finish.
+        @param self:essential if you override this definition
+        @param timeout int or float: seconds, or None
+        '''
+        self.timeout = timeout
+
+###############################################################################
+
+    def setOutputLimit(self, maxoutput=None):
+        '''
+        Cap the number of bytes of stdout and of stderr kept from a command.
+        Lines past the cap are read and thrown away, getTruncated() will
+        report True. None (the default) keeps all output.
+        @param self:essential if you override this definition
+        @param maxoutput int: bytes per stream, or None
+        '''
+        self.maxoutput = maxoutput
+
+###############################################################################
+
+    def getTruncated(self):
+        '''
+        Return True if output from the last command was dropped because of
+        the limit set by setOutputLimit().
+        @param self:essential if you override this definition
+        @return: bool
+        '''
+        return self.truncated
+
+###############################################################################
+
+    def getTimedOut(self):
+        '''
+        Return True if the last command was killed because it ran past the
+        timeout set by setTimeout().
+        @param self:essential if you override this definition
+        @return: bool
+        '''
+        return self.timedout
+
 ###############################################################################
 
     def setRegexFlag(self, flag):
@@ -351,16 +415,28 @@ class CommandHelper(object):
 
 ###############################################################################
 
-    def executeCommand(self, command=None):
+    def executeCommand(self, command=None, stdoutcallback=None,
+                       stderrcallback=None, pure=False):
         '''
         executeCommand (command) excecute the command for the CommandHelper
+        stdout and stderr are read as the command produces them so commands
+        with large output can not block on a full pipe. If a callback is
+        passed for a stream each line of that stream is handed to it as it
+        is read instead of being kept, which lets callers work through very
+        large listings in constant memory.
+        Pass pure=True for read only probes whose answer does not change
+        during a run, the result is then taken from and kept in the run's
+        ProbeCache. Any other command run while a rule is fixing clears the
+        ProbeCache.
         @param self:essential if you override this definition
         @param command string or list: command to set the command property to
+        @param stdoutcallback: callable taking one line of stdout
+        @param stderrcallback: callable taking one line of stderr
+        @param pure bool: True if the command only reads system state
         @return: bool indicating success or failure
         @author: ekkehard j. koch
         '''
         try:
-            commandobj = None
             success = True
             if (type(command) is not None):
                 success = self.setCommand(command)
@@ -372,25 +448,60 @@ class CommandHelper(object):
                                            "".join(self.command) + ")")
 
             if (success):
-                commandobj = subprocess.Popen(self.command,
-                               stdout=subprocess.PIPE,
-                               stderr=subprocess.PIPE,
-                               shell=self.shell)
-                if self.wait:
-                    commandobj.wait()
-
-                if commandobj is not None:
-
-                    self.stdout = commandobj.stdout.readlines()
-
-                    self.stderr = commandobj.stderr.readlines()
-                    self.output = self.stderr + self.stdout
-
-                    self.returncode = commandobj.returncode
-
-                    self.logdispatcher.log(self.logpriority,
-                                           "returncode: " +
-                                            str(self.returncode))
+                probecache = getprobecache()
+                if pure:
+                    cached = probecache.get(self.command)
+                else:
+                    cached = None
+                    if probecache.getfixmode():
+                        probecache.invalidate()
+                if cached is not None:
+                    getrulemetrics().count('probehits')
+                    self.logdispatcher.log(LogPriority.DEBUG,
+                                           "ProbeCache hit: " +
+                                           str(self.command))
+                    self.timedout = False
+                    self.truncated = False
+                    self.returncode, stdout, stderr = cached
+                    if stdoutcallback is not None:
+                        for line in stdout:
+                            stdoutcallback(line)
+                        stdout = []
+                    if stderrcallback is not None:
+                        for line in stderr:
+                            stderrcallback(line)
+                        stderr = []
+                    streamed = []
+                else:
+                    getrulemetrics().count('commands')
+                    stdout = []
+                    stderr = []
+                    streamed = self.__stream()
+                sizes = {"stdout": 0, "stderr": 0}
+                for stream, line in streamed:
+                    if stream == "stdout":
+                        callback = stdoutcallback
+                        capture = stdout
+                    else:
+                        callback = stderrcallback
+                        capture = stderr
+                    if callback is not None:
+                        callback(line)
+                    elif self.__keep(sizes, stream, line):
+                        capture.append(line)
+                self.stdout = stdout
+                self.stderr = stderr
+                self.output = self.stderr + self.stdout
+                if self.timedout:
+                    success = False
+                elif pure and cached is None and not self.truncated and \
+                        stdoutcallback is None and stderrcallback is None:
+                    probecache.put(self.command, self.returncode,
+                                   self.stdout, self.stderr)
+
+                self.logdispatcher.log(self.logpriority,
+                                       "returncode: " +
+                                        str(self.returncode))
         except (KeyboardInterrupt, SystemExit):
             raise
         except Exception, err:
@@ -398,22 +509,233 @@ class CommandHelper(object):
             messagestring = str(err) + " - " + str(traceback.format_exc())
             self.logdispatcher.log(LogPriority.DEBUG, messagestring)
             raise
-        else:
-            if commandobj is not None:
-                if commandobj.stdout is not None:
-                    commandobj.stdout.close()
-                if commandobj.stderr is not None:
-                    commandobj.stderr.close()
         finally:
-            logstring = "You should not see this. CommandHelper.executeCommand()"
-            if self.returncode is not None:
-                logstring = "returncode:(" + str(self.returncode) + ") output:(" + str(self.output) + "); command:(" + str(self.command) + ")"
-            else:
-                logstring = "returncode:(None) output:(" + str(self.output) + "); command:(" + str(self.command) + ")"
-            self.logdispatcher.log(LogPriority.DEBUG, logstring)
+            self.logdispatcher.log(LogPriority.DEBUG, self.__resultstring)
 
         return success
 
+###############################################################################
+
+    def executeBatch(self, commands, jobs=4, pure=False):
+        '''
+        executeBatch (commands) run a list of independent commands on up to
+        jobs worker threads and return one CommandResult per command in the
+        order the commands were passed. Intended for read only probes, the
+        commands may run in any order and at the same time. The timeout,
+        output limit and log priority of this CommandHelper apply to every
+        command. The state of this CommandHelper (getOutput() etc.) is not
+        changed.
+        @param self:essential if you override this definition
+        @param commands list: commands as accepted by executeCommand
+        @param jobs int: maximum number of commands run at the same time
+        @param pure bool: see executeCommand
+        @return: list of CommandResult
+        '''
+        results = [CommandResult(command) for command in commands]
+        if not results:
+            return results
+        tasks = Queue.Queue()
+        for result in results:
+            tasks.put(result)
+        try:
+            jobs = int(jobs)
+        except (TypeError, ValueError):
+            jobs = 1
+        numworkers = min(max(jobs, 1), len(results))
+        workers = []
+        for _ in range(numworkers):
+            worker = threading.Thread(target=self.__batchworker,
+                                      args=(tasks, pure))
+            worker.daemon = True
+            worker.start()
+            workers.append(worker)
+        for worker in workers:
+            # join with a timeout so KeyboardInterrupt reaches us
+            while worker.is_alive():
+                worker.join(0.5)
+        self.logdispatcher.log(LogPriority.DEBUG,
+                               "Ran batch of " + str(len(results)) +
+                               " commands on " + str(numworkers) +
+                               " workers in " +
+                               str(max([result.elapsed for result in
+                                        results])) + " seconds (longest)")
+        return results
+
+    def __batchworker(self, tasks, pure):
+        '''
+        executeBatch worker thread body. Each worker uses its own
+        CommandHelper so that no state is shared between threads.
+        '''
+        helper = CommandHelper(self.logdispatcher)
+        helper.setLogPriority(self.logpriority)
+        helper.wait = self.wait
+        helper.timeout = self.timeout
+        helper.maxoutput = self.maxoutput
+        helper.closefds = True
+        while True:
+            try:
+                result = tasks.get_nowait()
+            except Queue.Empty:
+                return
+            start = time.time()
+            try:
+                helper.executeCommand(result.command, pure=pure)
+                result.returncode = helper.getReturnCode()
+                result.stdout = helper.getOutput()
+                result.stderr = helper.getError()
+                result.timedout = helper.getTimedOut()
+            except Exception, err:
+                result.error = str(err)
+            result.elapsed = time.time() - start
+
+###############################################################################
+
+    def iterOutput(self, command=None):
+        '''
+        iterOutput (command) execute the command and yield each line of its
+        stdout as it is read. stderr is kept as usual and getReturnCode() is
+        valid once the iteration is finished. Stopping the iteration early
+        closes the pipes and reaps the command.
+        @param self:essential if you override this definition
+        @param command string or list: command to set the command property to
+        @return: generator of stdout lines
+        '''
+        if (type(command) is not None):
+            self.setCommand(command)
+        if (self.commandblank == True):
+            raise ValueError("Cannot Execute a blank command (" + \
+                             "".join(self.command) + ")")
+        sizes = {"stdout": 0, "stderr": 0}
+        try:
+            for stream, line in self.__stream():
+                if stream == "stdout":
+                    yield line
+                elif self.__keep(sizes, stream, line):
+                    self.stderr.append(line)
+            self.output = list(self.stderr)
+            self.logdispatcher.log(self.logpriority,
+                                   "returncode: " + str(self.returncode))
+        finally:
+            self.logdispatcher.log(LogPriority.DEBUG, self.__resultstring)
+
+###############################################################################
+
+    def __keep(self, sizes, stream, line):
+        '''
+        Account for a line of output against the output limit.
+        @return: bool True if the line should be kept
+        '''
+        if self.maxoutput is None:
+            return True
+        sizes[stream] += len(line)
+        if sizes[stream] > self.maxoutput:
+            self.truncated = True
+            return False
+        return True
+
+    def __resultstring(self):
+        '''
+        Debug summary of the last command. Passed to the logdispatcher
+        uncalled so the output is only turned into a string when debug
+        logging is on.
+        '''
+        if self.truncated:
+            note = " (truncated)"
+        elif self.timedout:
+            note = " (timed out)"
+        else:
+            note = ""
+        return "returncode:(" + str(self.returncode) + ") output:(" + \
+            str(self.output) + ")" + note + "; command:(" + \
+            str(self.command) + ")"
+
+    def __stream(self):
+        '''
+        Run the current command and yield (stream, line) tuples, stream being
+        "stdout" or "stderr", until both pipes are closed. Both pipes are
+        drained with select so the command can never block writing to one
+        while we wait on the other. Sets self.returncode when done.
+        '''
+        self.returncode = None
+        self.timedout = False
+        self.truncated = False
+        preexec = None
+        if self.timeout is not None:
+            # Own process group, so a timeout can kill a shell and anything
+            # it started.
+            preexec = os.setpgrp
+        commandobj = subprocess.Popen(self.command,
+                                      stdout=subprocess.PIPE,
+                                      stderr=subprocess.PIPE,
+                                      shell=self.shell,
+                                      close_fds=self.closefds or
+                                      CLOSEFDS['closefds'],
+                                      preexec_fn=preexec)
+        pending = {commandobj.stdout.fileno(): ["stdout", ""],
+                   commandobj.stderr.fileno(): ["stderr", ""]}
+        deadline = None
+        if self.timeout is not None:
+            deadline = time.time() + self.timeout
+        try:
+            while pending:
+                wait = None
+                if deadline is not None:
+                    wait = deadline - time.time()
+                    if wait <= 0:
+                        self.__kill(commandobj)
+                        break
+                try:
+                    ready = select.select(pending.keys(), [], [], wait)[0]
+                except select.error, err:
+                    if err.args[0] == errno.EINTR:
+                        continue
+                    raise
+                for fd in ready:
+                    stream, partial = pending[fd]
+                    data = os.read(fd, 65536)
+                    if not data:
+                        del pending[fd]
+                        if partial:
+                            yield stream, partial
+                        continue
+                    data = partial + data
+                    end = data.rfind("\n") + 1
+                    pending[fd][1] = data[end:]
+                    if end:
+                        for line in data[:end - 1].split("\n"):
+                            yield stream, line + "\n"
+            if self.wait or self.timedout:
+                self.returncode = commandobj.wait()
+            else:
+                self.returncode = commandobj.returncode
+        finally:
+            commandobj.stdout.close()
+            commandobj.stderr.close()
+            if self.wait and commandobj.returncode is None:
+                # Iteration was abandoned, the command will see a closed
+                # pipe.
+                commandobj.wait()
+
+    def __kill(self, commandobj):
+        '''
+        Kill a command that ran past its timeout along with its process
+        group. SIGTERM first, SIGKILL if it is still around a second later.
+        '''
+        self.timedout = True
+        self.logdispatcher.log(LogPriority.DEBUG,
+                               "Command timed out after " +
+                               str(self.timeout) + " seconds: " +
+                               str(self.command))
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            try:
+                os.killpg(commandobj.pid, sig)
+            except OSError:
+                pass
+            for _ in range(10):
+                if commandobj.poll() is not None:
+                    return
+                time.sleep(0.1)
+
 ###############################################################################
 
     def findInOutput(self, expression, searchgroup="output", dtype="list"):
@@ -514,3 +836,47 @@ class CommandHelper(object):
             self.logdispatcher.log(LogPriority.DEBUG, messagestring)
             raise
         return success
+
+
+CLOSEFDS = {'closefds': False}
+
+
+def setclosefds(closefds):
+    '''
+    Make every CommandHelper close inherited descriptors in the commands it
+    starts, as executeBatch workers always do. Set while commands may be
+    started from several threads at once, otherwise a child started on one
+    thread can hold the pipes of another thread's command open and keep its
+    reader waiting for EOF. Closing costs a close() per possible descriptor
+    on every spawn, so it is off by default.
+
+    @param closefds: bool
+    @return: bool - the previous setting
+    '''
+    previous = CLOSEFDS['closefds']
+    CLOSEFDS['closefds'] = bool(closefds)
+    return previous
+
+
+class CommandResult(object):
+    '''
+    The outcome of one command run by CommandHelper.executeBatch().
+    error holds the exception text if the command could not be run at all,
+    in which case returncode is None.
+    '''
+
+    def __init__(self, command):
+        self.command = command
+        self.returncode = None
+        self.stdout = []
+        self.stderr = []
+        self.elapsed = 0.0
+        self.timedout = False
+        self.error = None
+
+    def getOutputString(self):
+        '''
+        Return stdout as a single string.
+        @return: string
+        '''
+        return "".join(self.stdout)
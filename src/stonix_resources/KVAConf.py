@@ -27,8 +27,8 @@ Created on May 6, 2013
 '''
 from logdispatcher import LogPriority
 from stonixutilityfunctions import writeFile
-import traceback
-import re
+from confcache import getconfcache
+from collections import OrderedDict
 
 class KVAConf():
     '''This class checks files for correctness that consist of key:value pairs
@@ -51,17 +51,21 @@ class KVAConf():
     in which the dictionary would be in the form of: 
     {"blacklist:["bluetooth",
                  "rivafb",
-                 "hisax"]}'''
+                 "hisax"]}
+    The file is parsed once when it is read into an index of key -> the
+    line numbers and values it appears with, in file order.  Keys are
+    compared as literal strings, comments and blank lines never hold keys.'''
 ###############################################################################
     def __init__(self, path, tmpPath, intent, configType, logger):
         self.fixables = {}
         self.removeables = {}
         self.contents = []
+        self.index = OrderedDict()
         self.logger = logger
         self.path = path
         self.tmpPath = tmpPath
-        self.storeContents(self.path)
         self.configType = configType
+        self.storeContents(self.path)
         self.universal = "#The following lines were added by stonix\n"
         self.tempstring = ""
         self.intent = intent
@@ -141,156 +145,80 @@ class KVAConf():
 ###############################################################################
     def getOpenClosedValue(self, key, value):
         '''
-        Private inner method called by validate that populates self.fixables
-        and/or self.removeables lists.  self.fixables list will be populated
-        if configuration file has either the correct key but the wrong value
-        or the key is not there at all.  A key that is commented out will be 
-        considered not present. self.removeables list will be populated if 
-        configuration file has keys that are not desired.  The value of these
-        keys is irrelevant since the key shouldn't be there at all.  This 
-        method specifcally handles files with an equal sign separating the key 
-        and the val, both open and closed type
+        Private inner method called by validate for files with an equal sign
+        separating the key and the val, both open and closed type.  With an
+        intent of present, return True if the key is in the file and every
+        occurrence of it has the desired value.  A key that is commented out
+        will be considered not present.  With an intent of notpresent, return
+        True if the key appears in the file at all, the value is irrelevant
+        since the key shouldn't be there at all.
         @author: dwalker
         @param key: key in a dictionary passed from calling class
         @param val: value part in dictionary passed from calling class
         @return: Bool
         '''
-        if self.contents:
-            if self.intent == "present":  # self.data contains key val pairs we want in the file
-                found = False
-                for line in self.contents:
-                    if re.match('^#', line) or re.match(r'^\s*$', line):  # ignore if comment or blank line
-                        continue
-                    elif re.search("=", line):  # examine line if there is an = sign
-                        temp = line.split("=")  # split line into key val list [key, val]
-                        if re.match("^" + key + "$", temp[0].strip()):  # it contains the current key we're looking for
-                            if temp[1].strip() == value:  # and the value is correct
-                                found = True  # however we continue to make sure the key doesn't appear later in the file and have the wrong value
-                                continue
-                            else:  # the value is wrong so we break out of the loop.  Unecessary to continue, it will be fixed in the update
-                                found = False
-                                break
-                if found:  # return True or False value
-                    return True
-                else:
-                    return False
-            elif self.intent == "notpresent":  # self.data contains key val pairs we don't want in the file
-                found = True
-                for line in self.contents:
-                    if re.match("^#", line) or re.match(r'^\s*$', line):  # ignore if comment or blank line
-                        continue
-                    elif re.search("=", line):  # examine line if there is an = sign
-                        temp = line.split("=")  # split line into key val list [key, val]
-                        if re.match("^" + key + "$", temp[0].strip()):  # it contains the current key we're looking for
-                            found = True  # no need to check value, it's irrelevant
-                            break
-                return found
+        if self.intent == "present":
+            return self.__allequal(key, value)
+        elif self.intent == "notpresent":
+            return key in self.index
 ###############################################################################
     def getSpaceValue(self, key, value):
         '''
-        Private inner method called by validate that populates self.fixables
-        and/or self.removeables lists.  self.fixables list will be populated
-        if configuration file has either the correct key but the wrong value
-        or the key is not there at all.  A key that is commented out will be 
-        considered not present. self.removeables list will be populated if 
-        configuration file has keys that are not desired.This method 
-        specifcally handles files where a space separates key value pairs 
-        within the same line.
+        Private inner method called by validate for files where a space
+        separates key value pairs within the same line.  When the value is a
+        list the key may repeat, one line per item.  With an intent of
+        present, a string value is checked as in getOpenClosedValue() and a
+        list value returns the items missing from the file, or True if none
+        are.  With an intent of notpresent, a string value returns True if
+        the key appears at all and a list value returns the items found in
+        the file, or False if none are.
         @author: dwalker
         @param key: key in a dictionary passed from calling class
         @param val: value part in dictionary passed from calling class
+        @return: Bool or list
+        '''
+        if self.intent == "present":
+            if isinstance(value, list):
+                values = self.__values(key)
+                fixables = [item for item in value if str(item) not in values]
+                if fixables:
+                    return fixables
+                else:
+                    return True
+            return self.__allequal(key, value)
+        elif self.intent == "notpresent":
+            if isinstance(value, list):
+                values = self.__values(key)
+                fixables = [item for item in value if str(item) in values]
+                if fixables:
+                    return fixables
+                else:
+                    return False
+            return key in self.index
+###############################################################################
+    def __values(self, key):
+        '''
+        Private method returning the values key appears with, in file order.
+        @param key: string
+        @return: list
+        '''
+        return [value for _, value in self.index.get(key, [])]
+###############################################################################
+    def __allequal(self, key, value):
+        '''
+        Private method returning True if key appears in the file and every
+        occurrence has value.
+        @param key: string
+        @param value: string
         @return: Bool
         '''
-        fixables = []  # this fixables variable will be used for both desired and non desired keys
-        if self.contents:
-            if self.intent == "present":  # self.data contains key val pairs we want in the file
-                if isinstance(value, list):  # value can be a list in cases, see init pydoc
-                    for item in value:
-                        foundalready = False
-                        for line in self.contents:
-                            if re.match('^#', line) or re.match(r'^\s*$', line):  # ignore if comment or blank line
-                                continue
-                            elif re.search(key, line):  # we found the key, which in this case can be repeatable
-                                temp = line.strip()  # strip off all trailing and leading whitespace
-                                temp = re.sub("\s+", " ", temp)  # replace all whitespace with just one whitespace character
-                                temp = temp.split()  # separate contents into list separated by spaces
-                                if len(temp) > 0 and temp[0] == key:  # check to make sure key appears in beginning and has more than one item in the list
-                                    try:
-                                        if len(temp) > 2:  # this could indicate the file's format may be corrupted but that's not our issue
-                                            continue
-                                        elif temp[1] == item:  # value is correct
-                                            foundalready = True
-                                    except IndexError:
-                                        self.detailedresults += "Index error\n"
-                                        raise(self.detailedresults)
-                        if not foundalready:
-                            fixables.append(item)
-                    if fixables:
-                        return fixables
-                    else:
-                        return True
-                else:  # value must be a string, normal case
-                    found = False
-                    for line in self.contents:
-                        if re.match('^#', line) or re.match(r'^\s*$', line):  # ignore if comment or blank line
-                            continue
-                        elif re.search(key, line):  # the key is in this line
-                            temp = line.strip()  # strip off all trailing and leading whitespace
-                            temp = re.sub("\s+", " ", temp)  # replace all whitespace with just one whitespace character
-                            temp = temp.split()  # separate contents into list separated by spaces
-                            if len(temp) > 0 and temp[0] == key:  # check to make sure key appears in beginning and has more than one item in the list
-                                try:
-                                    if len(temp) > 2:
-                                        continue  # this could indicate the file's format may be corrupted but that's not our issue
-                                    elif temp[1] == value:  # the value is correct
-                                        found = True  # however we continue to make sure the key doesn't appear later in the file and have the wrong value
-                                        continue
-                                    else:  # the value is wrong so we break out of the loop.  Unecessary to continue, it will be fixed in the update
-                                        found = False
-                                        break
-                                except IndexError:
-                                    self.detailedresults += "Index error\n"
-                                    raise(self.detailedresults)
-                    return found
-            elif self.intent == "notpresent":  # self.data contains key val pairs we don't want in the file
-                if isinstance(value, list):  # value can be a list in cases, see init pydoc
-                    for item in value:
-                        foundalready = False
-                        for line in self.contents:
-                            if re.match('^#', line) or re.match(r'^\s*$', line):  # ignore if comment or blank line
-                                continue
-                            elif re.search(key, line):  # we found the key, which in this case can be repeatable
-                                temp = line.strip()  # strip off all trailing and leading whitespace
-                                temp = re.sub("\s+", " ", temp)  # replace all whitespace with just one whitespace character
-                                temp = temp.split()  # separate contents into list separated by spaces
-                                if len(temp) > 0 and temp[0] == key:  # check to make sure key appears in beginning and has more than one item in the list
-                                    try:
-                                        if len(temp) > 2:
-                                            continue  # this could indicate the file's format may be corrupted but that's not our issue
-                                        elif temp[1] == item:  # the value is correct
-                                            foundalready = True
-                                    except IndexError:
-                                        self.detailedresults += "Index error\n"
-                                        raise(self.detailedresults)
-                        if foundalready:
-                            fixables.append(item)
-                    if fixables:
-                        return fixables
-                    else:
-                        return True
-                else:  # value must be a string, normal case
-                    found = False
-                    for line in self.contents:
-                        if re.match('^#', line) or re.match(r'^\s*$', line):  # ignore is comment or blank line
-                            continue
-                        elif re.match("^" + key, line):  # we found the key
-                            temp = line.strip()  # strip off all trailing and leading whitespace
-                            temp = re.sub("\s+", " ", temp)  # replace all whitespace with just one whitespace character
-                            temp = temp.split()  # separate contents into list separated by spaces
-                            if re.match("^" + key + "$", temp[0]):  # a more specific check of the key in case is shares a similar key name with another key up to a point
-                                found = True
-                                break
-                    return found
+        values = self.__values(key)
+        if not values:
+            return False
+        for current in values:
+            if current != str(value):
+                return False
+        return True
 ###############################################################################
     def update(self, fixables, removeables):
         '''
@@ -323,46 +251,7 @@ class KVAConf():
         @param removeables: a dictionary of key val paris not desired in file
         @return: Bool
         '''
-        self.storeContents(self.path)  # re-read the contents of the desired file
-        contents = self.contents
-        if removeables:  # we have items that need to be removed from file
-            for key in removeables:
-                i = 0  # variable to keep our place in the list, will be used for removing items
-                for line in contents:
-                    if re.search("^#", line) or re.match("^\s*$", line):  # ignore if comment or blank line
-                        i += 1
-                    elif re.search("=", line.strip()):  # line contains an = sign
-                        temp = line.split("=")
-                        if re.match("^" + key + "$", temp[0].strip()):  # found the key
-                            contents.pop(i)  # not concerned with the value because we don't want the key either way
-                        i += 1
-                    else:
-                        i += 1
-        if fixables:  # we have items that either had the wrong value or don't exist in the file
-            for key in fixables:
-                i = 0  # variable to keep our place in the list, will be used for removing items
-                for line in contents:
-                    if re.search("^#", line) or re.match("^\s*$", line):  # ignore if comment or blank line
-                        i += 1
-                    elif re.search("=", line.strip()):  # line contains an = sign
-                        temp = line.split("=")
-                        if re.match("^" + key + "$", temp[0].strip()):  # found the key
-                            contents.pop(i)  # we pop it out but down below we add the correct line unlike above
-                        i += 1
-                    else:
-                        i += 1
-            self.contents = []
-            for line in contents:  # contents should now have a list of items we are ok with having in the file but will still be missing the fixables
-                self.contents.append(line)  # make self.contents contain the correct file contents before fixing
-            self.contents.append("\n" + self.universal)  # add our universal line to show line(s) were added by stonix to self.contents
-            for key in fixables:
-                if self.configType == "openeq":  # construct the appropriate line and add to bottom of self.contents
-                    temp = key + " = " + fixables[key] + "\n"
-                    self.contents.append(temp)
-                elif self.configType == "closedeq":
-                    temp = key + "=" + fixables[key] + "\n"
-                    self.contents.append(temp)
-        return True
+        return self.__rewrite(fixables, removeables)
 ###############################################################################
     def setSpaceValue(self, fixables, removeables):
         '''
@@ -376,72 +265,56 @@ class KVAConf():
         @param removeables: a dictionary of key val paris not desired in file
         @return: Bool
         '''
+        return self.__rewrite(fixables, removeables)
+###############################################################################
+    def __rewrite(self, fixables, removeables):
+        '''
+        Private method that re-reads the file and rebuilds self.contents in
+        one pass over it.  Every line of a removeable key is dropped, or for
+        a list value only the lines holding one of its items.  Every line of
+        a fixable key with a string value is dropped too and the correct
+        lines for all fixables are added at the bottom under self.universal.
+        @param fixables: a dictionary of key val pairs desired in file
+        @param removeables: a dictionary of key val pairs not desired in file
+        @return: Bool
+        '''
         self.storeContents(self.path)  # re-read the contents of the desired file
-        contents = self.contents
-        if removeables:  # we have items that need to be removed from file
-            for key, val in removeables.iteritems():
-                i = 0
-                if isinstance(val, list):  # we have a list where the key can repeat itself
-                    for key2, in val:
-                        for line in contents:
-                            if re.search("^#", line) or re.match("^\s*$", line):  # ignore comments and blank lines
-                                i += 1
-                            else:
-                                temp = line.strip()
-                                temp = re.sub("\s+", " ", temp)
-                                temp = line.split()
-                                if len(temp) > 2:
-                                    i += 1
-                                    continue
-                                elif re.search("^" + key + "$", temp[0]):
-                                    if re.search("^" + key2 + "$", temp[1]):
-                                        contents.pop(i)
-                                else:
-                                    i += 1
-                else:
-                    for line in contents:
-                        if re.search("^#", line) or re.match("^\s*$", line):  # ignore if comment or blank line
-                            i += 1
-                        elif re.search(key, line.strip()):
-                            temp = line.strip().split(" ")
-                            if re.match("^" + key + "$", temp[0].strip()):
-                                contents.pop(i)
-                        else:
-                            i += 1
-            self.contents = contents
+        drop = set()
+        for key, val in removeables.iteritems():
+            for lineno, current in self.index.get(key, []):
+                if not isinstance(val, list) or \
+                   current in [str(item) for item in val]:
+                    drop.add(lineno)
+        for key, val in fixables.iteritems():
+            if not isinstance(val, list):
+                for lineno, _ in self.index.get(key, []):
+                    drop.add(lineno)
+        contents = [line for lineno, line in enumerate(self.contents)
+                    if lineno not in drop]
         if fixables:
-            contents.append(self.universal)
-            listPresent = False
+            contents.append("\n" + self.universal)
             for key, val in fixables.iteritems():
                 if isinstance(val, list):
-                    listPresent = True
-                    for key2 in fixables[key]:
-                        contents.append(key + " " + key2 + "\n")
+                    for item in val:
+                        contents.append(self.__makeline(key, item))
                 else:
-                    i = 0
-                    for line in contents:
-                        if re.search("^#", line) or re.match("^\s*$", line):
-                            i += 1
-                        elif re.search(key, line):
-                            temp = line.strip().split()
-                            if re.match("^" + key + "$", temp[0].strip()):
-                                contents.pop(i)
-                            i += 1
-                        else:
-                            i += 1
-            if listPresent:
-                self.contents = contents
-                return True
-            else:
-                self.contents = []
-                for line in contents:  # reconstruct the self.contents list to contain the most updated list
-                    self.contents.append(line)
-                self.contents.append("\n" + self.universal)
-                if fixables:  # if there are fixables, we need to then add those, removeables have already been taken care of above
-                    for key in fixables:
-                        temp = key + " " + fixables[key] + "\n"
-                        self.contents.append(temp)
-                return True
+                    contents.append(self.__makeline(key, val))
+        self.setContents(contents)
+        return True
+###############################################################################
+    def __makeline(self, key, value):
+        '''
+        Private method to construct the file line for a key val pair in the
+        form self.configType calls for.
+        @param key: string
+        @param value: string
+        @return: str
+        '''
+        if self.configType == "openeq":
+            return key + " = " + str(value) + "\n"
+        elif self.configType == "closedeq":
+            return key + "=" + str(value) + "\n"
+        return key + " " + str(value) + "\n"
 ###############################################################################
     def commit(self):
         '''
@@ -452,30 +325,78 @@ class KVAConf():
         @author: dwalker
         @return: Bool
         '''
-        for line in self.contents:
-            self.tempstring += line
+        self.tempstring = "".join(self.contents)
         success = writeFile(self.tmpPath, self.tempstring, self.logger)
+        getconfcache().invalidate(self.tmpPath)
+        getconfcache().invalidate(self.path)
         return success
 ###############################################################################
     def storeContents(self, path):
         '''
         Private method that reads in the self.path variable's contents and 
-        stores in private variable self.contents.
+        stores in private variable self.contents, indexing it as it goes.
+        The parsed file comes from the run's ConfCache, so other rules
+        looking at the same unchanged file do not read and parse it again.
         @author: dwalker
         @param path: The path which contents need to be read 
         '''
-        try:
-            f = open(path, 'r')
-        except IOError:
-            self.detailedresults = "KVAConf: unable to open the" \
-"specified file"
-            self.detailedresults += traceback.format_exc()
+        document = getconfcache().get(path, "KVAConf " + str(self.configType),
+                                      self.parseDocument)
+        if document is None:
+            self.detailedresults = "KVAConf: unable to open the " + \
+                "specified file " + str(path)
             self.logger.log(LogPriority.DEBUG, self.detailedresults)
             return False
-        self.contents = []
-        for line in f:
-            self.contents.append(line)
-        f.close()
+        # the index is shared through the cache and never changed in place
+        self.contents = list(document[0])
+        self.index = document[1]
+###############################################################################
+    def setContents(self, contents):
+        '''
+        Private method that replaces self.contents and rebuilds the index of
+        key -> [(line number, value)] from it.
+        @param contents: list of lines
+        '''
+        self.contents, self.index = self.parseDocument(contents)
+###############################################################################
+    def parseDocument(self, contents):
+        '''
+        Private method that builds the index of key -> [(line number,
+        value)] for a list of lines.
+        @param contents: list of lines
+        @return: (contents, index) tuple
+        '''
+        index = OrderedDict()
+        for lineno, line in enumerate(contents):
+            keyval = self.parseLine(line)
+            if keyval is not None:
+                index.setdefault(keyval[0], []).append((lineno, keyval[1]))
+        return contents, index
+###############################################################################
+    def parseLine(self, line):
+        '''
+        Private method that splits one line of the file into its key and
+        value according to self.configType.  Surrounding whitespace is
+        dropped and, for space separated files, runs of whitespace in the
+        value are collapsed to one space.
+        @param line: string
+        @return: (key, value) tuple, None for comments, blank lines and
+            lines that hold no key
+        '''
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            return None
+        if self.configType in ("openeq", "closedeq"):
+            if "=" not in stripped:
+                return None
+            key, _, value = stripped.partition("=")
+            return key.strip(), value.strip()
+        elif self.configType == "space":
+            parts = stripped.split(None, 1)
+            if len(parts) == 1:
+                return parts[0], ""
+            return parts[0], " ".join(parts[1].split())
+        return None
 ###############################################################################
     def getValue(self):
         '''
@@ -26,6 +26,7 @@ Created on Jul 23, 2013
 @author: dwalker
 '''
 from logdispatcher import LogPriority
+from confcache import getconfcache
 import traceback
 import re
 
@@ -482,7 +483,10 @@ class KVATaggedConf():
         return True
 ###############################################################################
     def commit(self):
-        return self.writeFile(self.tmpPath, self.tempstring)
+        success = self.writeFile(self.tmpPath, self.tempstring)
+        getconfcache().invalidate(self.tmpPath)
+        getconfcache().invalidate(self.path)
+        return success
 ###############################################################################
     def writeFile(self, tmpfile, contents):
         '''write the string(contents) to the tmpfile'''
@@ -510,16 +514,12 @@ class KVATaggedConf():
         return True
 ###############################################################################
     def storeContents(self, path):
-        try:
-            f = open(path, 'r')
-        except IOError:
+        lines = getconfcache().getlines(path)
+        if lines is None:
             self.detailedresults = "KVATaggedConf: unable to open the " \
             "specified file"
-            self.detailedresults += traceback.format_exc()
             return False
-        for line in f:
-            self.contents.append(line)
-        f.close()
+        self.contents.extend(lines)
 ###############################################################################
     def checkConfigType(self):
         for item in self.contents:
@@ -31,6 +31,8 @@ import subprocess
 import os
 import re
 from logdispatcher import LogPriority
+from probecache import getprobecache
+from servicesnapshot import ServiceSnapshot
 
 
 class SHchkconfig(object):
@@ -52,6 +54,7 @@ class SHchkconfig(object):
             self.svc = '/sbin/service '
         else:
             self.svc = '/etc/init.d/'
+        self.snapshotdata = None
 
     def disableservice(self, service):
         '''
@@ -67,11 +70,13 @@ class SHchkconfig(object):
                                'SHchkconfig.disableservice: ' + service)
         ret = subprocess.call(self.cmd + service + ' off &> /dev/null',
                               shell=True, close_fds=True)
+        getprobecache().invalidate()
         if ret != 0:
             confsuccess = False
         if self.isrunning(service):
             ret2 = subprocess.call(self.svc + service + ' stop &> /dev/null',
                                    shell=True, close_fds=True)
+            getprobecache().invalidate()
             if ret2 != 0:
                 svcoff = False
         self.logdispatcher.log(LogPriority.DEBUG,
@@ -98,11 +103,13 @@ class SHchkconfig(object):
         svcon = True
         ret = subprocess.call(self.cmd + service + ' on &> /dev/null',
                               shell=True, close_fds=True)
+        getprobecache().invalidate()
         if ret != 0:
             confsuccess = False
         if not self.environment.getinstallmode():
             ret2 = subprocess.call(self.svc + service + ' start &> /dev/null',
                                    shell=True, close_fds=True)
+            getprobecache().invalidate()
             if ret2 != 0:
                 svcon = False
         self.logdispatcher.log(LogPriority.DEBUG,
@@ -122,6 +129,14 @@ class SHchkconfig(object):
         '''
         self.logdispatcher.log(LogPriority.DEBUG,
                                'SHchkconfig.auditservice: ' + service)
+        snapshot = self.getsnapshot()
+        if snapshot is not None:
+            enabled = snapshot.isenabled(service)
+            if enabled is not None:
+                self.logdispatcher.log(LogPriority.DEBUG,
+                                       'SHchkconfig.auditservice: ' + service +
+                                       ' ' + str(enabled) + ' (snapshot)')
+                return enabled
         chk = subprocess.Popen(self.cmd + '--list ' + service,
                                stdout=subprocess.PIPE,
                                stderr=subprocess.PIPE, shell=True,
@@ -176,6 +191,7 @@ class SHchkconfig(object):
         if not self.environment.getinstallmode():
             ret = subprocess.call(self.svc + service + ' reload &> /dev/null',
                                    shell=True, close_fds=True)
+            getprobecache().invalidate()
             self.logdispatcher.log(LogPriority.DEBUG,
                                'SHchkconfig.reloadservice ' + service + str(ret))
             if ret != 0:
@@ -192,10 +208,11 @@ class SHchkconfig(object):
         self.logdispatcher.log(LogPriority.DEBUG,
                                'SHchkconfig.listservices')
         svclist = []
-        chk = subprocess.Popen(self.cmd + '--list', stdout=subprocess.PIPE,
-                               stderr=subprocess.PIPE, shell=True,
-                               close_fds=True)
-        proclist = chk.stdout.readlines()
+        snapshot = self.getsnapshot()
+        if snapshot is not None:
+            proclist = snapshot.lines
+        else:
+            proclist = self.listall()
         for line in proclist:
             line = line.split()
             try:
@@ -206,3 +223,49 @@ class SHchkconfig(object):
         self.logdispatcher.log(LogPriority.DEBUG,
                                'SHchkconfig.listservices' + str(svclist))
         return svclist
+
+    def snapshot(self):
+        '''
+        Record the runlevel configuration of every SysV service with one
+        chkconfig --list call. auditservice() and listservices() are
+        answered from the snapshot until service state next changes. xinetd
+        services are not part of the snapshot and are still queried one at a
+        time.
+
+        @return: ServiceSnapshot
+        '''
+        self.logdispatcher.log(LogPriority.DEBUG,
+                               'SHchkconfig.snapshot')
+        enabled = {}
+        lines = self.listall()
+        for line in lines:
+            fields = line.split()
+            if len(fields) > 1 and re.search(r'^\d:(on|off)$', fields[1]):
+                enabled[fields[0]] = ':on' in line
+        self.snapshotdata = ServiceSnapshot(enabled, None, lines)
+        self.logdispatcher.log(LogPriority.DEBUG,
+                               'SHchkconfig.snapshot ' + str(len(enabled)) +
+                               ' services')
+        return self.snapshotdata
+
+    def getsnapshot(self):
+        '''
+        Return the current snapshot, None if there is none or it has gone
+        stale.
+
+        @return: ServiceSnapshot or None
+        '''
+        if self.snapshotdata is not None and not self.snapshotdata.isvalid():
+            self.snapshotdata = None
+        return self.snapshotdata
+
+    def listall(self):
+        '''
+        Return the output of chkconfig --list as a list of lines.
+
+        @return: list
+        '''
+        chk = subprocess.Popen(self.cmd + '--list', stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE, shell=True,
+                               close_fds=True)
+        return chk.communicate()[0].splitlines(True)
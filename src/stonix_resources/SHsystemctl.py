@@ -29,6 +29,13 @@ import subprocess
 import re
 import os
 from logdispatcher import LogPriority
+from probecache import getprobecache
+from servicesnapshot import ServiceSnapshot
+
+# unit file states for which systemctl is-enabled exits 0
+ENABLEDSTATES = ['enabled', 'enabled-runtime', 'static', 'indirect', 'alias',
+                 'generated', 'transient']
+UNITSUFFIXES = ('.service', '.socket', '.target', '.timer', '.path', '.mount')
 
 
 class SHsystemctl(object):
@@ -49,6 +56,7 @@ class SHsystemctl(object):
             self.cmd = '/usr/bin/systemctl '
         else:
             raise IOError('Cannot find systemctl command')
+        self.snapshotdata = None
 
     def disableservice(self, service):
         '''
@@ -64,11 +72,13 @@ class SHsystemctl(object):
         svcoff = True
         ret = subprocess.call(self.cmd + '-q disable ' + service + ' &> /dev/null',
                               shell=True, close_fds=True)
+        getprobecache().invalidate()
         if ret != 0:
             confsuccess = False
         if self.isrunning(service):
             ret2 = subprocess.call(self.cmd + 'stop ' + service + ' &> /dev/null',
                                    shell=True, close_fds=True)
+            getprobecache().invalidate()
             if ret2 != 0:
                 svcoff = False
         self.logdispatcher.log(LogPriority.DEBUG,
@@ -93,11 +103,13 @@ class SHsystemctl(object):
         svcon = True
         ret = subprocess.call(self.cmd + '-q enable ' + service + ' &> /dev/null',
                               shell=True, close_fds=True )
+        getprobecache().invalidate()
         if ret != 0:
             confsuccess = False
         if not self.environment.getinstallmode():
             ret2 = subprocess.call(self.cmd + 'start ' + service + ' &> /dev/null',
                                    shell=True, close_fds=True)
+            getprobecache().invalidate()
             if ret2 != 0:
                 svcon = False
         self.logdispatcher.log(LogPriority.DEBUG,
@@ -117,11 +129,17 @@ class SHsystemctl(object):
         '''
         self.logdispatcher.log(LogPriority.DEBUG,
                                'SHsystemctl.audit ' + service)
-        running = False
-        chk = subprocess.call(self.cmd + '-q is-enabled ' + service + ' &> /dev/null',
-                              shell=True, close_fds=True)
-        if chk == 0:
-            running = True
+        running = None
+        chk = 'snapshot'
+        snapshot = self.getsnapshot()
+        if snapshot is not None:
+            running = snapshot.isenabled(self.unitname(service))
+        if running is None:
+            running = False
+            chk = subprocess.call(self.cmd + '-q is-enabled ' + service + ' &> /dev/null',
+                                  shell=True, close_fds=True)
+            if chk == 0:
+                running = True
         self.logdispatcher.log(LogPriority.DEBUG,
                                'SHsystemctl.audit ' + service + ' ' + str(running) + str(chk))
         return running
@@ -137,17 +155,22 @@ class SHsystemctl(object):
         '''
         self.logdispatcher.log(LogPriority.DEBUG,
                                'SHsystemctl.isrunning ' + service)
-        running = False
-        chk = subprocess.Popen(self.cmd + '--no-pager show ' + service,
-                               stdout=subprocess.PIPE,
-                               stderr=subprocess.PIPE, shell=True,
-                               close_fds=True)
-        message = chk.stdout.readlines()
-        for line in message:
-            if re.search('SubState', line):
-                line = line.split('=')
-                if re.search('running', line[1]):
-                    running = True
+        running = None
+        snapshot = self.getsnapshot()
+        if snapshot is not None:
+            running = snapshot.isrunning(self.unitname(service))
+        if running is None:
+            running = False
+            chk = subprocess.Popen(self.cmd + '--no-pager show ' + service,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE, shell=True,
+                                   close_fds=True)
+            message = chk.communicate()[0].splitlines()
+            for line in message:
+                if re.search('SubState', line):
+                    line = line.split('=')
+                    if re.search('running', line[1]):
+                        running = True
         self.logdispatcher.log(LogPriority.DEBUG,
                                'SHsystemctl.isrunning ' + service + ' ' + str(running))
         return running
@@ -166,6 +189,7 @@ class SHsystemctl(object):
         if not self.environment.getinstallmode():
             ret = subprocess.call(self.cmd + 'reload-or-restart ' + service + ' &> /dev/null',
                                   shell=True, close_fds=True)
+            getprobecache().invalidate()
             self.logdispatcher.log(LogPriority.DEBUG,
                                'SHsystemctl.reload ' + service + str(ret))
         return True
@@ -179,17 +203,20 @@ class SHsystemctl(object):
         self.logdispatcher.log(LogPriority.DEBUG,
                                'SHsystemctl.listservices')
         svclist = []
-        chk = subprocess.Popen(self.cmd + '--no-pager --full -t service -a --no-legend',
-                               stdout=subprocess.PIPE,
-                               stderr=subprocess.PIPE, shell=True,
-                               close_fds=True)
-        proclist = chk.stdout.readlines()
+        snapshot = self.getsnapshot()
+        if snapshot is not None:
+            proclist = snapshot.lines
+        else:
+            proclist = self.query('--no-pager --full -t service -a --no-legend')
         for line in proclist:
             if re.search('units listed', line):
                 continue
             if re.search('^fsck', line):
                 continue
             line = line.split()
+            # failed units are flagged with a leading marker
+            if line and not line[0][0].isalnum():
+                line = line[1:]
             try:
                 svclist.append(line[0])
             except(IndexError):
@@ -201,4 +228,73 @@ class SHsystemctl(object):
         svclist = [service for service in svclist if service not in metaentries]
         self.logdispatcher.log(LogPriority.DEBUG,
                                'SHsystemctl.listservices ' + str(svclist))
-        return svclist
\ No newline at end of file
+        return svclist
+
+    def snapshot(self):
+        '''
+        Record the enabled state of every service unit file and the running
+        state of every loaded service unit with one list-unit-files and one
+        list-units call. auditservice(), isrunning() and listservices() are
+        answered from the snapshot until service state next changes.
+
+        @return: ServiceSnapshot
+        '''
+        self.logdispatcher.log(LogPriority.DEBUG,
+                               'SHsystemctl.snapshot')
+        enabled = {}
+        for line in self.query('--no-pager --no-legend --full ' +
+                               'list-unit-files -t service'):
+            fields = line.split()
+            if len(fields) >= 2:
+                enabled[fields[0]] = fields[1] in ENABLEDSTATES
+        running = {}
+        lines = self.query('--no-pager --full -t service -a --no-legend')
+        for line in lines:
+            fields = line.split()
+            # failed units are flagged with a leading marker
+            if fields and not fields[0][0].isalnum():
+                fields = fields[1:]
+            if len(fields) >= 4:
+                running[fields[0]] = 'running' in fields[3]
+        self.snapshotdata = ServiceSnapshot(enabled, running, lines)
+        self.logdispatcher.log(LogPriority.DEBUG,
+                               'SHsystemctl.snapshot ' + str(len(enabled)) +
+                               ' unit files, ' + str(len(running)) +
+                               ' units')
+        return self.snapshotdata
+
+    def getsnapshot(self):
+        '''
+        Return the current snapshot, None if there is none or it has gone
+        stale.
+
+        @return: ServiceSnapshot or None
+        '''
+        if self.snapshotdata is not None and not self.snapshotdata.isvalid():
+            self.snapshotdata = None
+        return self.snapshotdata
+
+    def unitname(self, service):
+        '''
+        Return the unit name systemctl uses for service, adding the
+        .service suffix systemctl assumes when none is given.
+
+        @param service: string
+        @return: string
+        '''
+        if service.endswith(UNITSUFFIXES):
+            return service
+        return service + '.service'
+
+    def query(self, args):
+        '''
+        Run systemctl with args and return its stdout as a list of lines.
+
+        @param args: string
+        @return: list
+        '''
+        chk = subprocess.Popen(self.cmd + args,
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE, shell=True,
+                               close_fds=True)
+        return chk.communicate()[0].splitlines(True)
@@ -35,6 +35,7 @@ import SHsvcadm
 import SHrcconf
 import SHlaunchd
 from logdispatcher import LogPriority
+from probecache import getprobecache
 
 
 class ServiceHelper(object):
@@ -328,6 +329,8 @@ class ServiceHelper(object):
                     servicesuccess = True
         else:
             servicesuccess = False
+        # Service state may have changed, cached probes are stale
+        getprobecache().invalidate()
 
         self.logdispatcher.log(LogPriority.DEBUG,
                                '-- END (' + service + ', ' + servicename +
@@ -378,6 +381,8 @@ class ServiceHelper(object):
                     servicesuccess = True
         else:
             servicesuccess = False
+        # Service state may have changed, cached probes are stale
+        getprobecache().invalidate()
 
         self.logdispatcher.log(LogPriority.DEBUG,
                                '-- END (' + service + ', ' + servicename +
@@ -528,12 +533,36 @@ class ServiceHelper(object):
                         servicesuccess = False
         else:
             servicesuccess = False
+        # Service state may have changed, cached probes are stale
+        getprobecache().invalidate()
 
         self.logdispatcher.log(LogPriority.DEBUG,
                                '-- END (' + service + ', ' + servicename +
                                ') = ' + str(servicesuccess))
         return servicesuccess
 
+    def snapshot(self):
+        '''
+        Take a bulk snapshot of the state of every service so that following
+        auditservice(), isrunning() and listservices() calls can be answered
+        without querying the service manager once per service. The snapshot
+        is dropped automatically as soon as any service state changes.
+        Backends without bulk support are left alone.
+
+        @return: bool, True if at least one backend took a snapshot
+        '''
+        taken = False
+        helpers = [self.svchelper]
+        if self.ishybrid:
+            helpers.append(self.secondary)
+        for helper in helpers:
+            if helper is not None and hasattr(helper, 'snapshot'):
+                helper.snapshot()
+                taken = True
+        self.logdispatcher.log(LogPriority.DEBUG,
+                               'Service snapshot taken: ' + str(taken))
+        return taken
+
     def listservices(self):
         '''
         List the services installed on the system.
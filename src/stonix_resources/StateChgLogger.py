@@ -27,18 +27,23 @@ Created on Aug 22, 2012
 
 @change: 2014/07/22 dkennel - Added -f flag to patch command call to eliminate
 prompt and wait issues during undo.
+@change: 2026/10/18 - Moved the event log from shelve to the SQLite backed
+EventStore. An existing shelve event log is migrated on first use.
+@change: 2026/10/18 - Archived file versions and undo diffs are kept in a
+content addressed BlobStore under the archive directory.
+@change: 2026/10/18 - Diffs are applied in process instead of with
+/usr/bin/patch.
 '''
-import shelve
 import shutil
 import os
 import re
 import traceback
-import filecmp
-import time
 import difflib
 import weakref
-import subprocess
 from logdispatcher import LogPriority
+from blobstore import BlobStore
+from patchapply import UnifiedPatch, PatchError
+from eventstore import EventStore
 
 
 class StateChgLogger(object):
@@ -66,7 +71,9 @@ class StateChgLogger(object):
         eventlog  (public)
 
          This is the location where the original copies of config files are
-         stored in case they are needed by system admins.
+         stored in case they are needed by system admins. Every version of an
+         archived file and the undo diffs are kept in the content addressed
+         archivestore below it.
 
         archive  (public)
 
@@ -83,19 +90,26 @@ class StateChgLogger(object):
         self.debug = self.environment.getdebugmode()
         self.diffdir = '/usr/share/stonix/diffdir'
         self.archive = '/usr/share/stonix/archive'
+        self.eventlogpath = '/usr/share/stonix/eventlog.sqlite'
+        # Size budget for the compressed archive store, in bytes
+        self.archivebudget = 100 * 1024 * 1024
+        self.legacyeventlog = '/usr/share/stonix/eventlog'
         self.privmode = True
         try:
             if not os.path.exists('/usr/share/stonix') and \
             self.environment.geteuid() == 0:
                 os.makedirs('/usr/share/stonix', 448)
             if self.environment.geteuid() == 0:
-                self.eventlog = shelve.open('/usr/share/stonix/eventlog', 'c',
-                                            None, True)
+                self.eventlog = EventStore(self.eventlogpath, self.logger)
+                self.eventlog.migrate(self.legacyeventlog)
             else:
                 self.privmode = False
             for node in [self.diffdir, self.archive]:
                 if not os.path.exists(node) and self.environment.geteuid() == 0:
                     os.makedirs(node, 448)
+            if self.environment.geteuid() == 0:
+                self.archivestore = BlobStore(self.archive, self.logger,
+                                              self.archivebudget)
         except(OSError):
             # We probably don't have privileges needed
             pass
@@ -159,32 +173,21 @@ are an end user please report a bug.''')
         newfiledata = newfilehandle.readlines()
         oldfilehandle.close()
         newfilehandle.close()
-        path, filename = os.path.split(oldfile)
-        self.logger.log(LogPriority.DEBUG,
-                        ['StateChgLogger',
-                         "Finding patch path elements: " + path + ' ' + filename])
-        patchpath = self.diffdir + path
-        patchdest = os.path.join(patchpath, filename)
-        patchdest = patchdest + ".patch-" + eventid
+        patchdata = ''.join(difflib.unified_diff(newfiledata, oldfiledata,
+                                                 fromfile=newfile,
+                                                 tofile=oldfile))
+        digest = self.archivestore.putdata(patchdata)
+        self.archivestore.addref('patch', oldfile, digest, eventid, True)
         self.logger.log(LogPriority.DEBUG,
                         ['StateChgLogger',
-                         "Complete path to patchfile: %s" % patchdest])
-        if not os.path.exists(patchpath):
-            os.makedirs(patchpath, 448)
-        patchhandle = open(patchdest, 'w')
-        for line in difflib.unified_diff(newfiledata, oldfiledata,
-                                         fromfile=newfile,
-                                         tofile=oldfile):
-            patchhandle.write(line)
-        patchhandle.close()
+                         "Stored patch for %s as %s" % (oldfile, digest)])
         return True
 
     def revertfilechanges(self, filename, eventid):
         """
         revertfilechanges removes changes made to complex configuration files
-        by stonix. It uses the patch utility and a diff file created by
-        recordfilechange to restore the configuration file without altering
-        other customizations.
+        by stonix. It applies the diff created by recordfilechange to restore
+        the configuration file without altering other customizations.
 
         @param string file : Path to the configuration file that should have
         changes made by stonix reverted to a pre-alteration state.
@@ -197,43 +200,89 @@ are an end user please report a bug.''')
             raise RuntimeError('''recordfilechange method called without privilege.
 If you are a rule developer you should guard against this. If you
 are an end user please report a bug.''')
-        fullpath = filename
-        path, filename = os.path.split(filename)
-        if self.debug:
-            self.logger.log(LogPriority.DEBUG,
+        return self.revertfilechain(filename, [eventid])
+
+    def revertfilechain(self, filename, eventids):
+        """
+        Revert several recorded changes to one file. The file is read once,
+        the diffs are applied in memory in the order given (newest change
+        first) and the file is written once. If a diff does not apply the
+        changes reverted up to that point are kept and False is returned.
+
+        @param string filename: Path to the configuration file
+        @param list eventids: event ids of the changes to revert, newest
+        first
+        @return: Bool for success
+        """
+        if not self.privmode:
+            raise RuntimeError('''revertfilechain method called without privilege.
+If you are a rule developer you should guard against this. If you
+are an end user please report a bug.''')
+        if not os.path.exists(filename):
+            self.logger.log(LogPriority.ERROR,
                             ['StateChgLogger.revert',
-                             "Finding patch path elements: " + path + ' ' + filename])
-        patchpath = self.diffdir + path
-        patchsource = os.path.join(patchpath, filename)
-        patchsource = patchsource + ".patch-" + eventid
+                             "Conf file not found, unable to revert: %s" % filename])
+            return False
+        rhandle = open(filename, 'r')
+        lines = rhandle.readlines()
+        rhandle.close()
+        original = lines
+        success = True
+        for eventid in eventids:
+            patchdata = self.getpatch(filename, eventid)
+            if patchdata is None:
+                self.logger.log(LogPriority.ERROR,
+                                ['StateChgLogger.revert',
+                                 "Patchfile not found, unable to revert: %s" % filename])
+                success = False
+                continue
+            try:
+                lines = UnifiedPatch(patchdata).apply(lines)
+            except PatchError, err:
+                self.logger.log(LogPriority.ERROR,
+                                ['StateChgLogger.revertfilechange',
+                                 "Problem patching: %s %s" % (filename, err)])
+                success = False
+                break
+        if lines != original:
+            whandle = open(filename, 'w')
+            whandle.writelines(lines)
+            whandle.close()
+        return success
+
+    def getpatch(self, filename, eventid):
+        """
+        Return the diff recorded by recordfilechange for a file and event,
+        or None if there is none.
+
+        @param string filename: Path to the configuration file
+        @param string eventid: The event id of the change
+        @return: string or None
+        """
+        digest = self.archivestore.latest('patch', filename, eventid)
+        if digest is not None:
+            try:
+                return self.archivestore.getdata(digest)
+            except KeyError:
+                self.logger.log(LogPriority.ERROR,
+                                ['StateChgLogger.revert',
+                                 "Patch missing from archive store: %s" % digest])
+                return None
+        # Changes recorded before the archive store was introduced
+        path, name = os.path.split(filename)
+        patchsource = os.path.join(self.diffdir + path, name) + \
+            ".patch-" + eventid
         if self.debug:
             self.logger.log(LogPriority.DEBUG,
                             ['StateChgLogger.revert',
                              "Complete path to patchfile: %s" % patchsource])
-
-        patchcmd = '/usr/bin/patch -p0 -u -f ' + fullpath + ' ' + patchsource
-        if self.environment.getosfamily() == 'solaris':
-            patchcmd = '/usr/bin/patch -p0 -u -i ' + patchsource + ' ' + fullpath
         if not os.path.exists(patchsource):
-            self.logger.log(LogPriority.ERROR,
-                            ['StateChgLogger.revert',
-                             "Patchfile not found, unable to revert: %s" % fullpath])
-            return False
-        if not os.path.exists(fullpath):
-            self.logger.log(LogPriority.ERROR,
-                            ['StateChgLogger.revert',
-                             "Conf file not found, unable to revert: %s" % fullpath])
-        if not os.path.exists('/usr/bin/patch'):
-            self.logger.log(LogPriority.ERROR,
-                            ['StateChgLogger.revert',
-                             "Patch utility not found, unable to revert: %s" % fullpath])
-            return False
-
-        patchproc = subprocess.call(patchcmd, shell=True)
-        if patchproc != 0:
-            self.logger.log(LogPriority.ERROR,
-                            ['StateChgLogger.revertfilechange',
-                             "Problem patching: %s" % fullpath])
+            return None
+        rhandle = open(patchsource, 'r')
+        try:
+            return rhandle.read()
+        finally:
+            rhandle.close()
 
     def recordfiledelete(self, filename, eventid):
         """
@@ -300,6 +349,23 @@ are an end user please report a bug.''')
             raise RuntimeError('''revertfiledelete method called without privilege.
 If you are a rule developer you should guard against this. If you
 are an end user please report a bug.''')
+        digest = self.archivestore.latest('archive', filepath)
+        if digest is not None:
+            self.logger.log(LogPriority.DEBUG,
+                            ['StateChgLogger.revertfiledelete',
+                             "Restoring " + filepath + " from " + digest])
+            try:
+                data = self.archivestore.getdata(digest)
+                whandle = open(filepath, 'wb')
+                whandle.write(data)
+                whandle.close()
+            except (IOError, KeyError):
+                self.logger.log(LogPriority.ERROR,
+                                ['StateChgLogger.revertfiledelete',
+                                 "Problem restoring file: " + traceback.format_exc()])
+                return False
+            return True
+        # Files archived before the archive store was introduced
         path, filename = os.path.split(filepath)
         self.logger.log(LogPriority.DEBUG,
                         ['StateChgLogger.revertfiledelete',
@@ -377,8 +443,7 @@ are an end user please report a bug.''')
             raise RuntimeError('''recordfilechange method called without privilege.
 If you are a rule developer you should guard against this. If you
 are an end user please report a bug.''')
-        self.eventlog[eventcode] = eventdict
-        self.eventlog.sync()
+        self.eventlog.put(eventcode, eventdict)
 
     def getchgevent(self, eventcode):
         """
@@ -395,9 +460,20 @@ are an end user please report a bug.''')
             raise RuntimeError('''recordfilechange method called without privilege.
 If you are a rule developer you should guard against this. If you
 are an end user please report a bug.''')
-        eventdict = self.eventlog[eventcode]
+        eventdict = self.eventlog.get(eventcode)
         return eventdict
 
+    def commit(self):
+        """
+        Commit the change events recorded since the last commit. Events are
+        committed in batches, at the latest when an event for another rule
+        is recorded. The Controller calls this after each rule's fix or undo
+        so that a rule's events are on disk before the next rule runs.
+        """
+        if not self.privmode:
+            return
+        self.eventlog.commit()
+
     def closelog(self):
         """
         Close the logfile. This prepares the StateChgLogger for going out of
@@ -410,6 +486,8 @@ are an end user please report a bug.''')
 If you are a rule developer you should guard against this. If you
 are an end user please report a bug.''')
         self.eventlog.close()
+        self.archivestore.prune()
+        self.archivestore.close()
 
     def archivefile(self, oldfile):
         """
@@ -448,17 +526,17 @@ are an end user please report a bug.''')
                              "Source file doesn't exist skipping backup."])
             return True
         if not os.path.exists(backupdest):
+            # Keep a plain copy of the original for the administrator
             self.logger.log(LogPriority.DEBUG,
                             ['StateChgLogger',
                              'Copying ' + oldfile + ' to ' + backupdest])
             shutil.copy(oldfile, backupdest)
-        else:
-            if not filecmp.cmp(oldfile, backupdest):
-                backupdest = backupdest + str(time.time())
-                self.logger.log(LogPriority.DEBUG,
-                                ['StateChgLogger',
-                                 'Copying ' + oldfile + ' to ' + backupdest])
-                shutil.copy(oldfile, backupdest)
+        digest = self.archivestore.putfile(oldfile)
+        if self.archivestore.latest('archive', oldfile) != digest:
+            self.logger.log(LogPriority.DEBUG,
+                            ['StateChgLogger',
+                             'Archived ' + oldfile + ' as ' + digest])
+            self.archivestore.addref('archive', oldfile, digest)
         return True
 
     def findrulechanges(self, ruleid):
@@ -489,18 +567,7 @@ are an end user please report a bug.''')
         self.logger.log(LogPriority.DEBUG,
                         ['StateChgLogger.findrulechanges',
                          "Searching for: %s" % ruleid])
-        for key in self.eventlog:
-            try:
-                keyruleid = key[0:4]
-                self.logger.log(LogPriority.DEBUG,
-                                ['StateChgLogger.findrulechanges',
-                                 "Comparing to keyruleid: %s" % keyruleid])
-                if keyruleid == myruleid:
-                    eventlist.append(key)
-            except(IndexError):
-                self.logger.log(LogPriority.ERROR,
-                                ['StateChgLogger.findrulechanges',
-                                 'Bad key detected in eventlog: ' + key])
+        eventlist = self.eventlog.findrule(myruleid)
         self.logger.log(LogPriority.DEBUG,
                         ['StateChgLogger.findrulechanges',
                          "returning eventlist: %s" % eventlist])
@@ -528,13 +595,24 @@ are an end user please report a bug.''')
         if not eventid or not type(eventid) == str:
             raise TypeError('Null eventid or wrong type')
         try:
-            del self.eventlog[eventid]
+            self.eventlog.delete(eventid)
         except(KeyError):
             # key was not found in the event log
-            return True
+            pass
         except Exception:
             self.logger.log(LogPriority.ERROR,
                             ['StateChgLogger.deleteentry',
                              'Error deleting ' + str(eventid) + ' ' + traceback.format_exc()])
             return False
+        try:
+            # The event's undo patches are no longer needed. The blobs are
+            # reclaimed by the one prune() closelog() runs, not a full gc
+            # scan per deleted event.
+            self.archivestore.dropref('patch', eventid)
+        except Exception:
+            self.logger.log(LogPriority.ERROR,
+                            ['StateChgLogger.deleteentry',
+                             'Error dropping patches for ' + str(eventid) +
+                             ' ' + traceback.format_exc()])
+            return False
         return True
@@ -0,0 +1,310 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+
+Created on Oct 18, 2026
+
+The AccountDB is a run scoped snapshot of the local account databases
+(/etc/passwd, /etc/shadow, /etc/group and /etc/master.passwd) and of the
+name service view of users and groups (pwd.getpwall(), grp.getgrall()).
+Each database is read and parsed once and indexed by name and by id. A
+cached copy is discarded as soon as the file's inode, size, mtime or ctime
+changes, or when a rule calls invalidate() after writing to it.
+
+Rules get the shared instance from Environment.getaccountdb().
+'''
+import grp
+import os
+import pwd
+import threading
+import traceback
+from logdispatcher import LogPriority
+
+PASSWD = '/etc/passwd'
+SHADOW = '/etc/shadow'
+GROUP = '/etc/group'
+MASTERPASSWD = '/etc/master.passwd'
+
+
+class AccountDB(object):
+    '''
+    Shared, lazily populated cache of the account databases.
+    '''
+
+    def __init__(self, logger=None):
+        '''
+        Constructor
+
+        @param logger: logdispatcher object, optional
+        '''
+        self.logger = logger
+        self.lock = threading.RLock()
+        # path -> dict(key, lines, entries, byname, byid)
+        self.files = {}
+        # 'pwd' or 'grp' -> dict(key, entries, byname, byid)
+        self.nss = {}
+
+    def __filekey(self, path):
+        '''
+        Return the identity of the file at path as it is now, or None if it
+        can't be stat'ed.
+        '''
+        try:
+            fstat = os.stat(path)
+        except OSError:
+            return None
+        return (fstat.st_dev, fstat.st_ino, fstat.st_size,
+                fstat.st_mtime, fstat.st_ctime)
+
+    def __getfile(self, path):
+        '''
+        Return the cache record for path, (re)reading the file if it has
+        changed since it was last read.
+        '''
+        key = self.__filekey(path)
+        record = self.files.get(path)
+        if record is not None and record['key'] == key:
+            return record
+        lines = []
+        if key is not None:
+            try:
+                rhandle = open(path, 'r')
+                try:
+                    lines = rhandle.readlines()
+                finally:
+                    rhandle.close()
+            except IOError:
+                if self.logger is not None:
+                    self.logger.log(LogPriority.DEBUG,
+                                    ['AccountDB', 'Unable to read ' + path +
+                                     ' ' + traceback.format_exc()])
+                lines = []
+        entries = []
+        byname = {}
+        byid = {}
+        for line in lines:
+            if line.startswith('#') or not line.strip():
+                continue
+            fields = line.rstrip('\n').split(':')
+            entries.append(fields)
+            if fields[0] not in byname:
+                byname[fields[0]] = fields
+            # passwd, group and master.passwd carry a numeric id in the
+            # third field, shadow does not.
+            if path != SHADOW and len(fields) > 2:
+                try:
+                    numid = int(fields[2])
+                except ValueError:
+                    continue
+                if numid not in byid:
+                    byid[numid] = fields
+        record = {'key': key, 'lines': lines, 'entries': entries,
+                  'byname': byname, 'byid': byid}
+        self.files[path] = record
+        return record
+
+    def getlines(self, path):
+        '''
+        Return the raw lines of an account database, newline terminated, in
+        the same form as stonixutilityfunctions.readFile(). The caller gets
+        its own copy of the list.
+
+        @param path: string - path of the database file
+        @return: list of strings
+        '''
+        with self.lock:
+            return list(self.__getfile(path)['lines'])
+
+    def getentries(self, path):
+        '''
+        Return the parsed entries of an account database. Comment and blank
+        lines are skipped, each entry is the list of colon separated fields.
+
+        @param path: string - path of the database file
+        @return: list of lists
+        '''
+        with self.lock:
+            return [list(fields) for fields in
+                    self.__getfile(path)['entries']]
+
+    def getbyname(self, path, name):
+        '''
+        Return the fields of the first entry in path whose first field is
+        name, or None.
+
+        @param path: string - path of the database file
+        @param name: string - account or group name
+        @return: list or None
+        '''
+        with self.lock:
+            fields = self.__getfile(path)['byname'].get(name)
+        if fields is None:
+            return None
+        return list(fields)
+
+    def getbyid(self, path, numid):
+        '''
+        Return the fields of the first entry in path whose third field is
+        the numeric id numid, or None. Not meaningful for the shadow file.
+
+        @param path: string - path of the database file
+        @param numid: int - uid or gid
+        @return: list or None
+        '''
+        with self.lock:
+            fields = self.__getfile(path)['byid'].get(int(numid))
+        if fields is None:
+            return None
+        return list(fields)
+
+    def __getnss(self, kind):
+        '''
+        Return the cache record for the name service view of users ('pwd')
+        or groups ('grp'). The record is tied to the local file so a change
+        to /etc/passwd or /etc/group refreshes it.
+        '''
+        if kind == 'pwd':
+            key = self.__filekey(PASSWD)
+        else:
+            key = self.__filekey(GROUP)
+        record = self.nss.get(kind)
+        if record is not None and record['key'] == key:
+            return record
+        if kind == 'pwd':
+            entries = pwd.getpwall()
+            idfield = 'pw_uid'
+            namefield = 'pw_name'
+        else:
+            entries = grp.getgrall()
+            idfield = 'gr_gid'
+            namefield = 'gr_name'
+        byname = {}
+        byid = {}
+        for entry in entries:
+            name = getattr(entry, namefield)
+            numid = getattr(entry, idfield)
+            if name not in byname:
+                byname[name] = entry
+            if numid not in byid:
+                byid[numid] = entry
+        record = {'key': key, 'entries': entries, 'byname': byname,
+                  'byid': byid}
+        self.nss[kind] = record
+        return record
+
+    def getpwall(self):
+        '''
+        Cached equivalent of pwd.getpwall().
+
+        @return: list of pwd.struct_passwd
+        '''
+        with self.lock:
+            return list(self.__getnss('pwd')['entries'])
+
+    def getpwnam(self, name):
+        '''
+        Cached equivalent of pwd.getpwnam(). Names that are not part of the
+        enumerated snapshot (e.g. directories that don't allow enumeration)
+        are looked up directly.
+
+        @param name: string
+        @return: pwd.struct_passwd
+        @raise KeyError: if the user does not exist
+        '''
+        with self.lock:
+            entry = self.__getnss('pwd')['byname'].get(name)
+        if entry is None:
+            entry = pwd.getpwnam(name)
+        return entry
+
+    def getpwuid(self, uid):
+        '''
+        Cached equivalent of pwd.getpwuid().
+
+        @param uid: int
+        @return: pwd.struct_passwd
+        @raise KeyError: if the uid does not exist
+        '''
+        with self.lock:
+            entry = self.__getnss('pwd')['byid'].get(uid)
+        if entry is None:
+            entry = pwd.getpwuid(uid)
+        return entry
+
+    def getgrall(self):
+        '''
+        Cached equivalent of grp.getgrall().
+
+        @return: list of grp.struct_group
+        '''
+        with self.lock:
+            return list(self.__getnss('grp')['entries'])
+
+    def getgrnam(self, name):
+        '''
+        Cached equivalent of grp.getgrnam().
+
+        @param name: string
+        @return: grp.struct_group
+        @raise KeyError: if the group does not exist
+        '''
+        with self.lock:
+            entry = self.__getnss('grp')['byname'].get(name)
+        if entry is None:
+            entry = grp.getgrnam(name)
+        return entry
+
+    def getgrgid(self, gid):
+        '''
+        Cached equivalent of grp.getgrgid().
+
+        @param gid: int
+        @return: grp.struct_group
+        @raise KeyError: if the gid does not exist
+        '''
+        with self.lock:
+            entry = self.__getnss('grp')['byid'].get(gid)
+        if entry is None:
+            entry = grp.getgrgid(gid)
+        return entry
+
+    def invalidate(self, path=None):
+        '''
+        Discard cached data. Rules that write to an account database should
+        call this with the path they wrote, or with no argument to discard
+        everything.
+
+        @param path: string - path of the database file, optional
+        '''
+        with self.lock:
+            if path is None:
+                self.files = {}
+                self.nss = {}
+                return
+            if path in self.files:
+                del self.files[path]
+            if path in [PASSWD, MASTERPASSWD] and 'pwd' in self.nss:
+                del self.nss['pwd']
+            if path == GROUP and 'grp' in self.nss:
+                del self.nss['grp']
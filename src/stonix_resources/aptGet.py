@@ -172,6 +172,123 @@ misspelled"
             self.detailedresults = traceback.format_exc()
             self.logger.log(LogPriority.INFO, self.detailedresults)
             raise
+###############################################################################
+    def installpackages(self, packages):
+        '''Install several packages with a single apt-get run so dependency
+        resolution and the dpkg lock happen only once. Return a bool
+        indicating success or failure of the whole run.
+
+        @param list packages : Names of the packages to be installed, must be
+            recognizable to the underlying package manager.
+        @return bool :'''
+        try:
+            self.ch.executeCommand(self.install + " ".join(packages))
+            if self.ch.getReturnCode() == 0:
+                self.detailedresults = " ".join(packages) + \
+                    " pkgs installed successfully"
+                self.logger.log(LogPriority.INFO,
+                                ["AptGet.install", self.detailedresults])
+                return True
+            else:
+                self.detailedresults = " ".join(packages) + \
+                    " pkgs not able to install"
+                self.logger.log(LogPriority.INFO,
+                                ["AptGet.install", self.detailedresults])
+                return False
+        except(KeyboardInterrupt,SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.INFO,
+                            ["AptGet.install", self.detailedresults])
+            raise(self.detailedresults)
+###############################################################################
+    def removepackages(self, packages):
+        '''Remove several packages with a single apt-get run. Return a bool
+        indicating success or failure of the whole run.
+
+        @param list packages : Names of the packages to be removed, must be
+            recognizable to the underlying package manager.
+        @return bool :'''
+        try:
+            self.ch.executeCommand(self.remove + " ".join(packages))
+            if self.ch.getReturnCode() == 0:
+                self.detailedresults = " ".join(packages) + \
+                    " pkgs removed successfully"
+                self.logger.log(LogPriority.INFO, self.detailedresults)
+                return True
+            else:
+                self.detailedresults = " ".join(packages) + \
+                    " pkgs not able to be removed"
+                self.logger.log(LogPriority.INFO, self.detailedresults)
+                return False
+        except(KeyboardInterrupt,SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.INFO, self.detailedresults)
+            raise(self.detailedresults)
+###############################################################################
+    def checkInstalls(self, packages):
+        '''Check the installation status of several packages with a single
+        dpkg-query call. Packages dpkg has never heard of are simply left
+        out of its output.
+
+        @param list packages : Names of the packages whose installation
+            status is to be checked.
+        @return dict : package name -> bool, True if the package is
+            installed'''
+        try:
+            found = dict.fromkeys(packages, False)
+            self.ch.executeCommand(["/usr/bin/dpkg-query", "-W",
+                                    "-f=${Package} ${Status}\\n"] + packages)
+            for line in self.ch.getOutput():
+                parts = line.split()
+                # Status is "<want> <error> <state>", e.g. "install ok
+                # installed"; removed packages end in "config-files"
+                if len(parts) == 4 and parts[0] in found and \
+                   parts[3] == "installed":
+                    found[parts[0]] = True
+            self.detailedresults = str(found.values().count(True)) + \
+                " of " + str(len(found)) + " pkgs found and installed\n"
+            self.logger.log(LogPriority.INFO, self.detailedresults)
+            return found
+        except(KeyboardInterrupt,SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.INFO, self.detailedresults)
+            raise(self.detailedresults)
+###############################################################################
+    def listInstalled(self):
+        '''Return the names of all installed packages read with a single
+        dpkg-query call, None if the dpkg database could not be read. Every
+        package is listed as name and name:arch.
+
+        @return list :'''
+        try:
+            self.ch.executeCommand(["/usr/bin/dpkg-query", "-W",
+                                    "-f=${Package} ${Architecture} " +
+                                    "${Status}\\n"],
+                                   pure=True)
+            if self.ch.getReturnCode() != 0:
+                self.detailedresults = "unable to list installed pkgs\n"
+                self.logger.log(LogPriority.INFO, self.detailedresults)
+                return None
+            packages = []
+            for line in self.ch.getOutput():
+                parts = line.split()
+                # Status is "<want> <error> <state>", only "installed"
+                # counts, removed packages end in "config-files"
+                if len(parts) == 5 and parts[4] == "installed":
+                    packages.extend([parts[0], parts[0] + ":" + parts[1]])
+            return packages
+        except(KeyboardInterrupt,SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.INFO, self.detailedresults)
+            raise(self.detailedresults)
 ###############################################################################
     def getInstall(self):
         return self.install
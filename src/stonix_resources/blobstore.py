@@ -0,0 +1,339 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+
+
+Created on Oct 18, 2026
+
+The BlobStore is a content addressed, deduplicated file store. Blobs are
+keyed by the sha256 of their content and kept gzip compressed under
+<root>/objects/<first two hex digits>/<digest>.gz, so identical content is
+only ever stored once and any blob can be read back with zcat. Named
+references to blobs (for example every archived version of /etc/pam.d/sshd,
+or the undo patch recorded for a change event) are kept in an SQLite index
+at <root>/index.sqlite.
+
+Blobs that are no longer referenced, for example the patches of a deleted
+change event (see dropref()), are removed by gc(). prune() keeps the
+store within a size budget by dropping the oldest intermediate versions of
+archived files; the first and the newest version of every file and all
+patches are always kept.
+
+Used by the StateChgLogger for the file archive and undo diffs.
+'''
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from logdispatcher import LogPriority
+
+SCHEMA = ['''CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL)''',
+          '''CREATE TABLE IF NOT EXISTS refs (
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    tag TEXT NOT NULL DEFAULT '',
+    stamp REAL NOT NULL,
+    digest TEXT NOT NULL)''',
+          '''CREATE INDEX IF NOT EXISTS refs_name
+    ON refs (kind, name, tag, stamp)''',
+          '''CREATE INDEX IF NOT EXISTS refs_digest ON refs (digest)''']
+
+
+class BlobStore(object):
+    '''
+    Content addressed store of compressed blobs with named references.
+    '''
+
+    def __init__(self, root, logger=None, budget=None):
+        '''
+        Constructor. The store directory and index are created if needed.
+
+        @param root: string - directory of the store
+        @param logger: logdispatcher object, optional
+        @param budget: int - maximum stored size in bytes, optional
+        '''
+        self.root = root
+        self.logger = logger
+        self.budget = budget
+        self.lock = threading.RLock()
+        self.objects = os.path.join(root, 'objects')
+        if not os.path.exists(self.objects):
+            os.makedirs(self.objects, 0700)
+        indexpath = os.path.join(root, 'index.sqlite')
+        if not os.path.exists(indexpath):
+            os.close(os.open(indexpath, os.O_WRONLY | os.O_CREAT, 0600))
+        self.conn = sqlite3.connect(indexpath, check_same_thread=False)
+        self.conn.text_factory = str
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        for statement in SCHEMA:
+            self.conn.execute(statement)
+        self.conn.commit()
+
+    def debug(self, message):
+        '''
+        Log a debug message if we have a logger.
+
+        @param message: string
+        '''
+        if self.logger is not None:
+            self.logger.log(LogPriority.DEBUG, ['BlobStore', message])
+
+    def blobpath(self, digest):
+        '''
+        Return the path a blob is stored at.
+
+        @param digest: string - sha256 hex digest
+        @return: string
+        '''
+        return os.path.join(self.objects, digest[0:2], digest + '.gz')
+
+    def putdata(self, data):
+        '''
+        Store data and return its digest. Storing content that is already in
+        the store costs only the hash.
+
+        @param data: string
+        @return: string - sha256 hex digest
+        '''
+        digest = hashlib.sha256(data).hexdigest()
+        with self.lock:
+            if self.conn.execute('SELECT 1 FROM blobs WHERE digest = ?',
+                                 (digest,)).fetchone() is not None and \
+               os.path.exists(self.blobpath(digest)):
+                return digest
+            blobpath = self.blobpath(digest)
+            blobdir = os.path.dirname(blobpath)
+            if not os.path.exists(blobdir):
+                os.makedirs(blobdir, 0700)
+            tmppath = blobpath + '.tmp'
+            fd = os.open(tmppath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                         0600)
+            whandle = os.fdopen(fd, 'wb')
+            try:
+                gzhandle = gzip.GzipFile(filename='', mode='wb',
+                                         fileobj=whandle, mtime=0)
+                try:
+                    gzhandle.write(data)
+                finally:
+                    gzhandle.close()
+            finally:
+                whandle.close()
+            os.rename(tmppath, blobpath)
+            self.conn.execute('INSERT OR REPLACE INTO blobs (digest, size) '
+                              'VALUES (?, ?)',
+                              (digest, os.path.getsize(blobpath)))
+            self.conn.commit()
+        return digest
+
+    def putfile(self, path):
+        '''
+        Store the content of a file and return its digest.
+
+        @param path: string
+        @return: string - sha256 hex digest
+        '''
+        rhandle = open(path, 'rb')
+        try:
+            data = rhandle.read()
+        finally:
+            rhandle.close()
+        return self.putdata(data)
+
+    def getdata(self, digest):
+        '''
+        Return the content of a blob.
+
+        @param digest: string - sha256 hex digest
+        @return: string
+        @raise KeyError: if the blob is not in the store
+        '''
+        try:
+            gzhandle = gzip.open(self.blobpath(digest), 'rb')
+        except IOError:
+            raise KeyError(digest)
+        try:
+            return gzhandle.read()
+        finally:
+            gzhandle.close()
+
+    def addref(self, kind, name, digest, tag='', replace=False):
+        '''
+        Add a named reference to a blob.
+
+        @param kind: string - reference namespace, e.g. 'archive' or 'patch'
+        @param name: string - e.g. the path of the file
+        @param digest: string - blob digest
+        @param tag: string - optional qualifier, e.g. an event id
+        @param replace: bool - drop existing references with the same kind,
+            name and tag first
+        '''
+        with self.lock:
+            if replace:
+                self.conn.execute('DELETE FROM refs WHERE kind = ? AND '
+                                  'name = ? AND tag = ?', (kind, name, tag))
+            self.conn.execute('INSERT INTO refs (kind, name, tag, stamp, '
+                              'digest) VALUES (?, ?, ?, ?, ?)',
+                              (kind, name, tag, time.time(), digest))
+            self.conn.commit()
+
+    def dropref(self, kind, tag):
+        '''
+        Drop every reference of a kind carrying the given tag, e.g. all the
+        patches recorded for a change event. The blobs are left for gc().
+
+        @param kind: string
+        @param tag: string
+        @return: int - number of references dropped
+        '''
+        with self.lock:
+            cursor = self.conn.execute('DELETE FROM refs WHERE kind = ? AND '
+                                       'tag = ?', (kind, tag))
+            self.conn.commit()
+            return cursor.rowcount
+
+    def getrefs(self, kind, name, tag=''):
+        '''
+        Return the references with the given kind, name and tag, oldest
+        first.
+
+        @param kind: string
+        @param name: string
+        @param tag: string
+        @return: list of (stamp, digest) tuples
+        '''
+        with self.lock:
+            return self.conn.execute('SELECT stamp, digest FROM refs WHERE '
+                                     'kind = ? AND name = ? AND tag = ? '
+                                     'ORDER BY stamp, rowid',
+                                     (kind, name, tag)).fetchall()
+
+    def latest(self, kind, name, tag=''):
+        '''
+        Return the digest of the newest reference with the given kind, name
+        and tag, or None.
+
+        @param kind: string
+        @param name: string
+        @param tag: string
+        @return: string or None
+        '''
+        refs = self.getrefs(kind, name, tag)
+        if not refs:
+            return None
+        return refs[-1][1]
+
+    def getsize(self):
+        '''
+        Return the total stored (compressed) size of all blobs.
+
+        @return: int - bytes
+        '''
+        with self.lock:
+            return self.conn.execute('SELECT COALESCE(SUM(size), 0) '
+                                     'FROM blobs').fetchone()[0]
+
+    def gc(self):
+        '''
+        Remove every blob that is not referenced.
+
+        @return: int - number of blobs removed
+        '''
+        with self.lock:
+            rows = self.conn.execute('SELECT digest FROM blobs WHERE digest '
+                                     'NOT IN (SELECT digest FROM '
+                                     'refs)').fetchall()
+            for row in rows:
+                self.__removeblob(row[0])
+            self.conn.commit()
+        if rows:
+            self.debug('Removed ' + str(len(rows)) + ' unreferenced blobs')
+        return len(rows)
+
+    def prune(self):
+        '''
+        Collect garbage and, if the store is over its budget, drop the
+        oldest intermediate archive versions until it fits. The first and
+        newest version of each archived file and all other references are
+        kept.
+
+        @return: int - stored size in bytes after pruning
+        '''
+        if self.conn is None:
+            return 0
+        self.gc()
+        size = self.getsize()
+        if self.budget is None or size <= self.budget:
+            return size
+        with self.lock:
+            rows = self.conn.execute('''SELECT r.rowid, r.digest FROM refs r
+                WHERE r.kind = 'archive'
+                AND r.stamp > (SELECT MIN(stamp) FROM refs o
+                               WHERE o.kind = r.kind AND o.name = r.name)
+                AND r.stamp < (SELECT MAX(stamp) FROM refs o
+                               WHERE o.kind = r.kind AND o.name = r.name)
+                ORDER BY r.stamp''').fetchall()
+            for rowid, digest in rows:
+                if size <= self.budget:
+                    break
+                self.conn.execute('DELETE FROM refs WHERE rowid = ?',
+                                  (rowid,))
+                if self.conn.execute('SELECT 1 FROM refs WHERE digest = ?',
+                                     (digest,)).fetchone() is None:
+                    size -= self.__removeblob(digest)
+            self.conn.commit()
+        if size > self.budget:
+            self.debug('Store is still over budget after pruning: ' +
+                       str(size) + ' bytes')
+        return size
+
+    def __removeblob(self, digest):
+        '''
+        Remove a blob file and its row. The caller commits.
+
+        @param digest: string
+        @return: int - stored size of the removed blob
+        '''
+        row = self.conn.execute('SELECT size FROM blobs WHERE digest = ?',
+                                (digest,)).fetchone()
+        self.conn.execute('DELETE FROM blobs WHERE digest = ?', (digest,))
+        try:
+            os.remove(self.blobpath(digest))
+        except OSError:
+            pass
+        if row is None:
+            return 0
+        return row[0]
+
+    def close(self):
+        '''
+        Close the index.
+        '''
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
@@ -0,0 +1,176 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+Created on Oct 18, 2026
+
+The ConfCache keeps configuration files (sshd_config, sysctl.conf,
+login.defs, pam.d/*) read and parsed once per run however many rules look
+at them. Entries are keyed by path and by what kind of parse was done, and
+are only handed out while the file's (mtime, size, inode) still match what
+was read, so a file replaced by a rename or edited in place is read again.
+The editors also drop a path explicitly when they write it.
+
+Parsed documents are shared between callers and must be treated as read
+only; getlines() hands out a fresh copy of the raw lines for callers that
+edit them in place.
+
+There is one cache per stonix process, get it with getconfcache().
+'''
+import os
+import threading
+from logdispatcher import LogPriority
+
+
+class ConfCache(object):
+    '''
+    Run scoped, thread safe cache of parsed configuration files.
+    '''
+
+    def __init__(self, maxentries=256):
+        '''
+        Constructor
+
+        @param maxentries: int - number of documents held before the cache
+            is emptied and starts over
+        '''
+        self.maxentries = maxentries
+        self.lock = threading.Lock()
+        self.documents = {}
+        self.hits = 0
+        self.misses = 0
+
+    def signature(self, path):
+        '''
+        Return the (mtime, size, inode) of path, None if it cannot be
+        stat'ed.
+
+        @param path: string
+        @return: tuple or None
+        '''
+        try:
+            info = os.stat(path)
+        except OSError:
+            return None
+        return (info.st_mtime, info.st_size, info.st_ino)
+
+    def get(self, path, kind, parser):
+        '''
+        Return parser(lines) for the current contents of path, calling the
+        parser only if the file changed since it was last parsed for this
+        kind. None if the file cannot be read.
+
+        @param path: string
+        @param kind: string naming the parse, callers parsing differently
+            must use different kinds
+        @param parser: callable taking the list of lines of the file
+        @return: whatever parser returns, or None
+        '''
+        signature = self.signature(path)
+        if signature is None:
+            return None
+        key = (path, kind)
+        self.lock.acquire()
+        try:
+            entry = self.documents.get(key)
+            if entry is not None and entry[0] == signature:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        finally:
+            self.lock.release()
+        try:
+            handle = open(path, 'r')
+        except IOError:
+            return None
+        try:
+            lines = handle.readlines()
+        finally:
+            handle.close()
+        document = parser(lines)
+        self.lock.acquire()
+        try:
+            if len(self.documents) >= self.maxentries:
+                self.documents = {}
+            self.documents[key] = (signature, document)
+        finally:
+            self.lock.release()
+        return document
+
+    def getlines(self, path):
+        '''
+        Return a copy of the lines of path, None if it cannot be read.
+
+        @param path: string
+        @return: list or None
+        '''
+        lines = self.get(path, 'lines', tuple)
+        if lines is None:
+            return None
+        return list(lines)
+
+    def invalidate(self, path=None):
+        '''
+        Drop every document for path, or the whole cache if path is None.
+
+        @param path: string or None
+        '''
+        self.lock.acquire()
+        try:
+            if path is None:
+                self.documents = {}
+            else:
+                for key in self.documents.keys():
+                    if key[0] == path:
+                        del self.documents[key]
+        finally:
+            self.lock.release()
+
+    def getstats(self):
+        '''
+        Return the hit and miss counters.
+
+        @return: tuple of (hits, misses)
+        '''
+        return self.hits, self.misses
+
+    def logstats(self, logger):
+        '''
+        Write the hit/miss counters to the debug log.
+
+        @param logger: LogDispatcher instance
+        '''
+        logger.log(LogPriority.DEBUG,
+                   ['ConfCache', 'hits: ' + str(self.hits) + ' misses: ' +
+                    str(self.misses)])
+
+
+CONFCACHE = ConfCache()
+
+
+def getconfcache():
+    '''
+    Return the ConfCache for this stonix process.
+
+    @return: ConfCache
+    '''
+    return CONFCACHE
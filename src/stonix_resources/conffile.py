@@ -29,7 +29,9 @@ Created on Dec 13, 2011
 
 import os
 import re
+from tempfile import mkstemp
 from logdispatcher import LogPriority
+from confcache import getconfcache
 
 
 class ConfFile(object):
@@ -73,11 +75,12 @@ class ConfFile(object):
         self.logger = logdispatcher
         self.present = os.path.exists(filename)
         self.filedata = []
+        self.index = None
         if self.present:
             try:
-                rhandle = open(self.filename, 'r')
-                self.filedata = rhandle.readlines()
-                rhandle.close()
+                self.filedata = getconfcache().getlines(self.filename)
+                if self.filedata is None:
+                    raise IOError(self.filename)
             except(IOError, OSError):
                 self.logger.log(LogPriority.INFO,
                                 ['ConfFile',
@@ -88,6 +91,58 @@ class ConfFile(object):
                 self.present = False
                 self.filedata = []
 
+    def makeline(self, directive):
+        '''
+        Return the line that sets directive to its required value in this
+        file's format.
+
+        @param directive: String, key from the directives dictionary
+        @return: String
+        '''
+        if self.filetype == 'openeq':
+            return directive + ' = ' + self.directives[directive] + '\n'
+        if self.filetype == 'closedeq':
+            return directive + '=' + self.directives[directive] + '\n'
+        return directive + ' ' + self.directives[directive] + '\n'
+
+    def getkey(self, line):
+        '''
+        Return the key a line of file data sets, None for comments and
+        lines that set nothing.
+
+        @param line: String
+        @return: String or None
+        '''
+        if self.comment.match(line):
+            return None
+        if self.filetype == 'openeq':
+            key, sep, _ = line.partition(' = ')
+        elif self.filetype == 'closedeq':
+            key, sep, _ = line.partition('=')
+        else:
+            if not line.strip() or line[0].isspace():
+                return None
+            return line.split(None, 1)[0]
+        if not sep:
+            return None
+        return key
+
+    def getindex(self):
+        '''
+        Return a dictionary of key to the positions in the file data of the
+        lines setting that key. It is built in one pass over the file data
+        and kept until the file data is replaced.
+
+        @return: Dict of String to list of int
+        '''
+        if self.index is None:
+            self.index = {}
+            for lineno, line in enumerate(self.filedata):
+                key = self.getkey(line)
+                if key is not None:
+                    self.index.setdefault(key, []).append(lineno)
+        return self.index
+
     def audit(self):
         '''
         Audit() This method will check the currently loaded file data for all
@@ -97,19 +152,10 @@ class ConfFile(object):
         @author: D. Kennel
         '''
         compliant = True
-        pattern = 'BOGUSdefaultPATTERN'
-        patternlist = []
+        lines = set(self.filedata)
         for directive in self.directives:
-            pattern = 'BOGUSdefaultPATTERN'
-            if self.filetype == 'openeq':
-                pattern = directive + ' = ' + self.directives[directive] + '\n'
-            if self.filetype == 'closedeq':
-                pattern = directive + '=' + self.directives[directive] + '\n'
-            if self.filetype == 'space':
-                pattern = directive + ' ' + self.directives[directive] + '\n'
-            patternlist.append(pattern)
-        for pattern in patternlist:
-            if pattern not in self.filedata:
+            pattern = self.makeline(directive)
+            if pattern not in lines:
                 compliant = False
                 self.logger.log(LogPriority.INFO,
                                 ['ConfFile', 'Directive not found: ' + pattern])
@@ -122,39 +168,22 @@ class ConfFile(object):
         does not change the file on disk. The writefile method must be called
         to change the file on disk.
 
+        Every line setting a directive is replaced in place, directives not
+        set anywhere in the file are appended.
+
         @author: D. Kennel
         '''
+        index = self.getindex()
+        # Work on our own copy, the list may have come from setfiledata
+        self.filedata = list(self.filedata)
         for directive in self.directives:
-            newconf = []
-            found = False
-            # Set up a pattern match to find the config item
-            pattern = '^' + directive + ' = '
-            if self.filetype == 'openeq':
-                pattern = '^' + directive + ' = '
-            if self.filetype == 'closedeq':
-                pattern = '^' + directive + '='
-            if self.filetype == 'space':
-                pattern = '^' + directive
-
-            # Set up the line we want
-            if self.filetype == 'openeq':
-                newline = directive + ' = ' + self.directives[directive] + '\n'
-            if self.filetype == 'closedeq':
-                newline = directive + '=' + self.directives[directive] + '\n'
-            if self.filetype == 'space':
-                newline = directive + ' ' + self.directives[directive] + '\n'
-
-            for line in self.filedata:
-                if self.comment.match(line):
-                    pass
-                elif re.search(pattern, line):
-                    found = True
-                    if line != newline:
-                        line = newline
-                newconf.append(line)
-            if not found:
-                newconf.append(newline)
-            self.filedata = newconf
+            newline = self.makeline(directive)
+            if directive in index:
+                for lineno in index[directive]:
+                    self.filedata[lineno] = newline
+            else:
+                index[directive] = [len(self.filedata)]
+                self.filedata.append(newline)
 
     def reread(self):
         '''
@@ -162,9 +191,9 @@ class ConfFile(object):
         '''
         if self.present:
             try:
-                rhandle = open(self.filename, 'r')
-                self.filedata = rhandle.readlines()
-                rhandle.close()
+                self.filedata = getconfcache().getlines(self.filename)
+                if self.filedata is None:
+                    raise IOError(self.filename)
             except(IOError, OSError):
                 self.logger.log(LogPriority.INFO,
                                 ['ConfFile',
@@ -174,6 +203,7 @@ class ConfFile(object):
                                  'Setting file present to false and using null file data'])
                 self.present = False
                 self.filedata = []
+        self.index = None
 
     def ispresent(self):
         '''
@@ -194,6 +224,7 @@ class ConfFile(object):
         @param filedata: List with embedded newlines
         '''
         self.filedata = filedata
+        self.index = None
 
     def setDirectives(self, directives):
         '''
@@ -209,9 +240,35 @@ class ConfFile(object):
 
     def writefile(self):
         '''
-        WriteFile
+        WriteFile writes the file data to the temp file in one go. The data
+        is written to a new file next to it that is then renamed over the
+        temp file, so the temp file is never seen half written. It gets the
+        permissions of the config file, if there is one, so that it can be
+        renamed into place as is, otherwise the ones open() would have given
+        it.
         '''
-        whandle = open(self.tempfile, 'w')
-        for line in self.filedata:
-            whandle.write(line)
-        whandle.close()
+        tmpdir = os.path.dirname(os.path.abspath(self.tempfile))
+        fd, tmppath = mkstemp(dir=tmpdir,
+                              prefix='.' + os.path.basename(self.tempfile))
+        try:
+            whandle = os.fdopen(fd, 'w')
+            try:
+                whandle.write(''.join(self.filedata))
+            finally:
+                whandle.close()
+            if os.path.exists(self.filename):
+                mode = os.stat(self.filename).st_mode & 07777
+            else:
+                # mkstemp creates 0600, a new config file gets 0666 less
+                # the umask
+                umask = os.umask(0)
+                os.umask(umask)
+                mode = 0666 & ~umask
+            os.chmod(tmppath, mode)
+            os.rename(tmppath, self.tempfile)
+        except:
+            if os.path.exists(tmppath):
+                os.remove(tmppath)
+            raise
+        getconfcache().invalidate(self.tempfile)
+        getconfcache().invalidate(self.filename)
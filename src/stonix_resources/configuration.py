@@ -51,11 +51,15 @@ type and it is up to the rule to validate the contents.
 ruleconfiguc = "string"
 Each directive has a user comment (uc) directive associated with it.
 Calls to getconfvalue for non-existent entries will generate a KeyError.
+
+The parsed configuration is kept in the STONIX cache directory keyed by the
+config file's mtime, size and inode, so that launches after the first skip
+ConfigParser until the file changes.
 '''
 import ConfigParser
+import json
 import sys
 import os
-import re
 
 
 class Configuration:
@@ -69,6 +73,11 @@ class Configuration:
     def __init__(self, environment):
         self.environment = environment
         self.configpath = self.environment.get_config_path()
+        cachepath = self.environment.get_cache_path()
+        if cachepath:
+            self.compiledpath = os.path.join(cachepath, 'stonixconf')
+        else:
+            self.compiledpath = ''
         # print 'DEBUG: CONFIGURATION: Config_path: ' + self.configpath
         self.programconfig = self.__loadconfig()
         # print self.programconfig
@@ -160,53 +169,40 @@ class Configuration:
 [MAIN]
 version = 100
 """
-        conf = ''
+        # Collect the pieces and join them once at the end, building the
+        # string up as we go is quadratic in the size of the config
+        conf = []
         newline = '\n'
-        conf = conf + confheader
+        conf.append(confheader)
         for rule in ruledata:
             sectionhead = '[' + rule + ']' + newline
-            helptext = ruledata[rule][0]
-            helptext = re.sub('^', '# ', helptext)
-            helptext = re.sub('\\n', '\n# ', helptext)
-            conf = conf + sectionhead
-            conf = conf + helptext + newline
+            helptext = self.__commentblock(ruledata[rule][0])
+            conf.append(sectionhead)
+            conf.append(helptext + newline)
             for item in ruledata[rule]:
                 try:
                     key = item.getkey()
                     value = item.getcurrvalue()
                     datatype = item.getdatatype()
                     defvalue = item.getdefvalue()
-                    instruct = item.getinstructions()
-                    instruct = re.sub('^', '# ', instruct)
-                    instruct = re.sub('\\n', '\n# ', instruct)
+                    instruct = self.__commentblock(item.getinstructions())
                     usrcomment = item.getusercomment()
                     if datatype == 'list':
-                        newval = ''
-                        for element in value:
-                            newval = newval + element + ' '
-                        value = newval
+                        value = ''.join([element + ' ' for element in value])
                 except(AttributeError):
                     continue
                 uckey = 'UC' + key
                 kvline = key + ' = ' + str(value) + newline
                 instruct = instruct + newline
                 ucline = uckey + ' = ' + usrcomment + newline
-                if not simpleconf:
-                    conf = conf + instruct
-                    conf = conf + kvline
-                    conf = conf + ucline
-                elif simpleconf and item.insimple():
-                    conf = conf + instruct
-                    conf = conf + kvline
-                    conf = conf + ucline
-                elif value != defvalue:
-                    conf = conf + instruct
-                    conf = conf + kvline
-                    conf = conf + ucline
-            conf = conf + newline
+                if not simpleconf or item.insimple() or value != defvalue:
+                    conf.append(instruct)
+                    conf.append(kvline)
+                    conf.append(ucline)
+            conf.append(newline)
         try:
             fhandle = open(self.configpath, 'w')
-            fhandle.write(conf)
+            fhandle.write(''.join(conf))
             fhandle.close()
             os.chmod(self.configpath, 0644)
         except (IOError):
@@ -214,6 +210,15 @@ version = 100
             print "Check path to " + self.configpath
             sys.exit(1)
 
+    def __commentblock(self, text):
+        """
+        Return text with every line turned into a config file comment.
+
+        @param string text : help text or instructions
+        @return string :
+        """
+        return '# ' + text.replace('\n', '\n# ')
+
     def setusercomment(self, rulename, confkey, keycomment):
         """
 
@@ -250,11 +255,16 @@ version = 100
     def __loadconfig(self):
         """
         Private method to read in the current config file and return the values
-        as a list of dictionaries.
+        as a list of dictionaries. The compiled copy from the cache directory
+        is used instead of parsing the file when the file has not changed.
 
         @return  list of dictionaries :
         @author D. Kennel
         """
+        signature = self.__getsignature()
+        progconfig = self.__loadcompiled(signature)
+        if progconfig is not None:
+            return progconfig
         progconfig = {}
         config = ConfigParser.SafeConfigParser()
         try:
@@ -273,4 +283,83 @@ version = 100
                 value = config.get(section, key)
                 # print 'Value: ' + value
                 progconfig[section][key] = value
+        self.__savecompiled(signature, progconfig)
         return progconfig
+
+    def __getsignature(self):
+        """
+        Return what the compiled config must match to be used: the path,
+        mtime, size and inode of the config file. None if the file cannot
+        be stat'ed.
+
+        @return dict :
+        """
+        try:
+            cstat = os.stat(self.configpath)
+        except OSError:
+            return None
+        return {'path': self.configpath, 'mtime': cstat.st_mtime,
+                'size': cstat.st_size, 'inode': cstat.st_ino}
+
+    def __loadcompiled(self, signature):
+        """
+        Return the compiled config if it matches the signature and is safe
+        to use, otherwise None.
+
+        @param dict signature : from __getsignature
+        @return dict :
+        """
+        if signature is None or not self.compiledpath or \
+           not os.path.exists(self.compiledpath):
+            return None
+        try:
+            # Only trust a file that belongs to us and nobody else can write
+            cstat = os.stat(self.compiledpath)
+            if cstat.st_uid != os.geteuid() or cstat.st_mode & 022:
+                return None
+            rhandle = open(self.compiledpath, 'r')
+            try:
+                data = json.load(rhandle)
+            finally:
+                rhandle.close()
+            if data.get('signature') != signature:
+                return None
+            progconfig = {}
+            for section, values in data['config'].items():
+                progconfig[section.encode('utf-8')] = \
+                    dict((key.encode('utf-8'), value.encode('utf-8'))
+                         for key, value in values.items())
+            return progconfig
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            return None
+
+    def __savecompiled(self, signature, progconfig):
+        """
+        Write the compiled config to the cache directory. Failure to write
+        is ignored, the compiled config is only an optimization.
+
+        @param dict signature : from __getsignature
+        @param dict progconfig : parsed config
+        """
+        if signature is None or not self.compiledpath:
+            return
+        try:
+            cachedir = os.path.dirname(self.compiledpath)
+            if not os.path.exists(cachedir):
+                os.makedirs(cachedir, 0700)
+            tmppath = self.compiledpath + '.tmp'
+            fd = os.open(tmppath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                         0600)
+            whandle = os.fdopen(fd, 'w')
+            try:
+                json.dump({'signature': signature, 'config': progconfig},
+                          whandle)
+            finally:
+                whandle.close()
+            os.rename(tmppath, self.compiledpath)
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            pass
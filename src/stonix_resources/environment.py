@@ -50,6 +50,10 @@ import platform
 import pwd
 import time
 from localize import CORPORATENETWORKSERVERS, STONIXVERSION
+from accountdb import AccountDB
+from packagedb import PackageDB
+from hostfacts import HostFacts
+from netfacts import NetFacts
 if os.geteuid() == 0:
     try:
         import dmidecode
@@ -89,6 +93,8 @@ class Environment:
         self.verbosemode = False
         self.debugmode = False
         self.runtime = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+        self.accountdb = None
+        self.packagedb = None
         self.collectinfo()
 
     def setinstallmode(self, installmode):
@@ -265,20 +271,41 @@ class Environment:
         @return: void
         @author D. Kennel
         """
+        self.collectpaths()
+        if self.cache_path and self.geteuid() == 0:
+            self.hostfacts = HostFacts(os.path.join(self.cache_path,
+                                                    'hostfacts'))
+        else:
+            self.hostfacts = HostFacts()
+        self.hostfacts.register('os', self.probeos)
+        self.hostfacts.register('hardware', self.probehardware)
+        self.netfacts = NetFacts()
         # print 'Environment Running discoveros'
         self.discoveros()
         # print 'Environment running setosfamily'
         self.setosfamily()
         # print 'Environment running guessnetwork'
         self.guessnetwork()
-        self.collectpaths()
 
     def discoveros(self):
         """
-        Discover the operating system type and version
+        Discover the operating system type and version. The answer comes
+        from the host facts, see probeos() for how it is found.
         @return : void
         @author: D. Kennel
         """
+        self.operatingsystem = self.hostfacts.get('os', 'operatingsystem', '')
+        self.osreportstring = self.hostfacts.get('os', 'osreportstring', '')
+        self.osversion = self.hostfacts.get('os', 'osversion', '')
+
+    def probeos(self):
+        """
+        Collect the operating system type, report string and version with
+        lsb_release, the release files or sw_vers. Collector for the 'os'
+        host facts.
+        @return: dict
+        """
+        facts = {}
         # Alternative (better) implementation for Linux
         if os.path.exists('/usr/bin/lsb_release'):
             proc = subprocess.Popen('/usr/bin/lsb_release -dr',
@@ -290,11 +317,11 @@ class Environment:
             # print description
             del description[0]
             description = " ".join(description)
-            self.operatingsystem = description
-            self.osreportstring = description
+            facts['operatingsystem'] = description
+            facts['osreportstring'] = description
             release = release.split()
             release = release[1]
-            self.osversion = release
+            facts['osversion'] = release
         elif os.path.exists('/etc/redhat-release'):
             relfile = open('/etc/redhat-release')
             release = relfile.read()
@@ -306,8 +333,8 @@ class Environment:
                     break
                 else:
                     opsys = opsys + " " + element
-            self.operatingsystem = opsys
-            self.osreportstring = opsys
+            facts['operatingsystem'] = opsys
+            facts['osreportstring'] = opsys
             index = 0
             for element in release:
                 if re.search('release', element):
@@ -315,7 +342,7 @@ class Environment:
                     osver = release[index]
                 else:
                     index = index + 1
-            self.osversion = osver
+            facts['osversion'] = osver
         elif os.path.exists('/etc/gentoo-release'):
             relfile = open('/etc/gentoo-release')
             release = relfile.read()
@@ -327,8 +354,8 @@ class Environment:
                     break
                 else:
                     opsys = opsys + " " + element
-            self.operatingsystem = opsys
-            self.osreportstring = opsys
+            facts['operatingsystem'] = opsys
+            facts['osreportstring'] = opsys
             index = 0
             for element in release:
                 if re.search('release', element):
@@ -336,7 +363,7 @@ class Environment:
                     osver = release[index]
                 else:
                     index = index + 1
-            self.osversion = osver
+            facts['osversion'] = osver
         elif os.path.exists('/usr/bin/sw_vers'):
             proc1 = subprocess.Popen('/usr/bin/sw_vers -productName',
                                      shell=True, stdout=subprocess.PIPE,
@@ -348,15 +375,16 @@ class Environment:
                                      close_fds=True)
             release = proc2.stdout.readline()
             release = release.strip()
-            self.operatingsystem = description
-            self.osversion = release
+            facts['operatingsystem'] = description
+            facts['osversion'] = release
             proc3 = subprocess.Popen('/usr/bin/sw_vers -buildVersion',
                                      shell=True, stdout=subprocess.PIPE,
                                      close_fds=True)
             build = proc3.stdout.readline()
             build = build.strip()
             opsys = description + ' ' + release + ' ' + build
-            self.osreportstring = opsys
+            facts['osreportstring'] = opsys
+        return facts
 
     def setosfamily(self):
         """
@@ -379,16 +407,8 @@ class Environment:
         make an educated guess as to the correct network data. self.ipaddress
         and self.macaddress will be updated by this method.
         """
-        # regex to match mac addresses
-        macre = '(([0-9A-Fa-f]{2}[:-]){5}[0-9A-Fa-f]{2})'
-
-        ipaddress = ''
-        macaddress = '00:00:00:00:00:00'
-
-        hostname = socket.getfqdn()
-        try:
-            ipdata = socket.gethostbyname_ex(hostname)
-            iplist = ipdata[2]
+        hostname, iplist = self.netfacts.lookuphost()
+        if iplist is not None:
             try:
                 iplist.remove('127.0.0.1')
             except (ValueError):
@@ -398,32 +418,14 @@ class Environment:
                 ipaddress = iplist[0]
             else:
                 ipaddress = '127.0.0.1'
-        except(socket.gaierror):
-            # If we're here it's because socket.getfqdn did not in fact return
-            # a valid hostname and gethostbyname errored.
+        else:
+            # If we're here the host name could not be resolved, or DNS
+            # did not answer in time.
             ipaddress = self.getdefaultip()
 
-        # In ifconfig output macaddresses are always one line before the ip
-        # address.
-        if sys.platform == 'linux2':
-            cmd = '/sbin/ifconfig'
-        elif os.path.exists('/usr/sbin/ifconfig'):
-            cmd = '/usr/sbin/ifconfig -a'
-        else:
-            cmd = '/sbin/ifconfig -a'
-        proc = subprocess.Popen(cmd, shell=True,
-                                stdout=subprocess.PIPE, close_fds=True)
-        netdata = proc.stdout.readlines()
-
-        for line in netdata:
-            # print "processing: " + line
-            match = re.search(macre, line)
-            if match is not None:
-                # print 'Matched MAC address'
-                macaddress = match.group()
-            if re.search(ipaddress, line):
-                # print 'Found ipaddress'
-                break
+        macaddress = self.netfacts.getmacaddr(ipaddress)
+        if not macaddress:
+            macaddress = '00:00:00:00:00:00'
 
         self.hostname = hostname
         self.ipaddress = ipaddress
@@ -437,42 +439,11 @@ class Environment:
         @return: string - ipaddress
         @author: dkennel
         """
+        ipaddr = self.netfacts.getdefaultip()
+        if ipaddr:
+            return ipaddr
         ipaddr = '127.0.0.1'
-        gateway = ''
-        if sys.platform == 'linux2':
-            try:
-                routecmd = subprocess.Popen('/sbin/route -n', shell=True,
-                                            stdout=subprocess.PIPE,
-                                            close_fds=True)
-                routedata = routecmd.stdout.readlines()
-            except(OSError):
-                return ipaddr
-            for line in routedata:
-                if re.search('^default', line):
-                    line = line.split()
-                    try:
-                        gateway = line[1]
-                    except(IndexError):
-                        return ipaddr
-        else:
-            try:
-                if os.path.exists('/usr/sbin/route'):
-                    cmd = '/usr/sbin/route -n get default'
-                else:
-                    cmd = '/sbin/route -n get default'
-                routecmd = subprocess.Popen(cmd, shell=True,
-                                            stdout=subprocess.PIPE,
-                                            close_fds=True)
-                routedata = routecmd.stdout.readlines()
-            except(OSError):
-                return ipaddr
-            for line in routedata:
-                if re.search('gateway:', line):
-                    line = line.split()
-                    try:
-                        gateway = line[1]
-                    except(IndexError):
-                        return ipaddr
+        gateway = self.netfacts.getgateway()
         if gateway:
             iplist = self.getallips()
             for level in [1, 2, 3, 4]:
@@ -519,46 +490,7 @@ class Environment:
         @return: list of strings
         @author: dkennel
         """
-        iplist = []
-        if sys.platform == 'linux2':
-            try:
-                ifcmd = subprocess.Popen('/sbin/ifconfig', shell=True,
-                                         stdout=subprocess.PIPE,
-                                         close_fds=True)
-                ifdata = ifcmd.stdout.readlines()
-            except(OSError):
-                return iplist
-            for line in ifdata:
-                if re.search('inet addr:', line):
-                    try:
-                        line = line.split()
-                        addr = line[1]
-                        addr = addr.split(':')
-                        addr = addr[1]
-                        iplist.append(addr)
-                    except(IndexError):
-                        continue
-        else:
-            try:
-                if os.path.exists('/usr/sbin/ifconfig'):
-                    cmd = '/usr/sbin/ifconfig -a'
-                else:
-                    cmd = '/sbin/ifconfig -a'
-                ifcmd = subprocess.Popen(cmd, shell=True,
-                                         stdout=subprocess.PIPE,
-                                         close_fds=True)
-                ifdata = ifcmd.stdout.readlines()
-            except(OSError):
-                return iplist
-            for line in ifdata:
-                if re.search('inet ', line):
-                    try:
-                        line = line.split()
-                        addr = line[1]
-                        iplist.append(addr)
-                    except(IndexError):
-                        continue
-        return iplist
+        return self.netfacts.getallips()
 
     def get_property_number(self):
         """
@@ -571,26 +503,14 @@ class Environment:
         """
         propnum = 0
         try:
-            if os.path.exists('/etc/property-number'):
+            if os.path.exists('/etc/property-number') and \
+               platform.system() != 'Darwin':
                 propertynumberfile = open('/etc/property-number', 'r')
                 propnum = propertynumberfile.readline()
                 propnum = propnum.strip()
                 propertynumberfile.close()
-            elif DMI and self.euid == 0:
-                chassis = dmidecode.chassis()
-                for key in chassis:
-                    propnum = chassis[key]['data']['Asset Tag']
-            if platform.system() == 'Darwin':
-                pnfetch = '/usr/sbin/nvram asset_id 2>/dev/null'
-                cmd = subprocess.Popen(pnfetch, shell=True,
-                                       stdout=subprocess.PIPE,
-                                       close_fds=True)
-                cmdout = cmd.stdout.readline()
-                cmdout = cmdout.split()
-                try:
-                    propnum = cmdout[1]
-                except(IndexError, KeyError):
-                    propnum = 0
+            else:
+                propnum = self.hostfacts.get('hardware', 'propertynumber', 0)
         except:
             pass
             # Failed to obtain property number
@@ -603,33 +523,7 @@ class Environment:
         @author: dkennel
         @return: string
         """
-        systemserial = '0'
-        if DMI and self.euid == 0:
-            try:
-                system = dmidecode.system()
-                for key in system:
-                    try:
-                        systemserial = system[key]['data']['Serial Number']
-                    except(IndexError, KeyError):
-                        continue
-            except(IndexError, KeyError):
-                # got unexpected data back from dmidecode
-                pass
-        elif os.path.exists('/usr/sbin/system_profiler'):
-            profilerfetch = '/usr/sbin/system_profiler SPHardwareDataType'
-            cmd3 = subprocess.Popen(profilerfetch, shell=True,
-                                    stdout=subprocess.PIPE,
-                                    close_fds=True)
-            cmd3output = cmd3.stdout.readlines()
-            for line in cmd3output:
-                if re.search('Serial Number (system):', line):
-                    line = line.split(':')
-                    try:
-                        systemserial = line[1]
-                    except(IndexError, KeyError):
-                        pass
-        systemserial = systemserial.strip()
-        return systemserial
+        return self.hostfacts.get('hardware', 'systemserial', '0')
 
     def get_chassis_serial_number(self):
         """
@@ -638,17 +532,7 @@ class Environment:
         @author: dkennel
         @requires: string
         """
-        chassisserial = '0'
-        if DMI and self.euid == 0:
-            try:
-                chassis = dmidecode.chassis()
-                for key in chassis:
-                    chassisserial = chassis[key]['data']['Serial Number']
-            except(IndexError, KeyError):
-                # got unexpected data back from dmidecode
-                pass
-        chassisserial = chassisserial.strip()
-        return chassisserial
+        return self.hostfacts.get('hardware', 'chassisserial', '0')
 
     def get_system_manufacturer(self):
         """
@@ -657,20 +541,7 @@ class Environment:
         @author: D. Kennel
         @return: string
         """
-        systemmfr = 'Unk'
-        if DMI and self.euid == 0:
-            try:
-                system = dmidecode.system()
-                for key in system:
-                    try:
-                        systemmfr = system[key]['data']['Manufacturer']
-                    except(IndexError, KeyError):
-                        continue
-            except(IndexError, KeyError):
-                # got unexpected data back from dmidecode
-                pass
-        systemmfr = systemmfr.strip()
-        return systemmfr
+        return self.hostfacts.get('hardware', 'systemmfr', 'Unk')
 
     def get_chassis_manfacturer(self):
         """
@@ -679,17 +550,7 @@ class Environment:
         @author: D. Kennel
         @return: string
         """
-        chassismfr = 'Unk'
-        if DMI and self.euid == 0:
-            try:
-                chassis = dmidecode.chassis()
-                for key in chassis:
-                    chassismfr = chassis[key]['data']['Manufacturer']
-            except(IndexError, KeyError):
-                # got unexpected data back from dmidecode
-                pass
-        chassismfr = chassismfr.strip()
-        return chassismfr
+        return self.hostfacts.get('hardware', 'chassismfr', 'Unk')
 
     def get_sys_uuid(self):
         """
@@ -700,58 +561,113 @@ class Environment:
         @author: D. Kennel
         @return: string
         """
+        return self.hostfacts.get('hardware', 'uuid', '0')
+
+    def probehardware(self):
+        """
+        Collect the asset tag, serial numbers, manufacturers and UUID of the
+        system in one pass, reading the DMI tables, system_profiler or the
+        platform's own tool at most once each. Collector for the 'hardware'
+        host facts.
+        @return: dict
+        """
+        propnum = 0
+        systemserial = '0'
+        chassisserial = '0'
+        systemmfr = 'Unk'
+        chassismfr = 'Unk'
         uuid = '0'
         if DMI and self.euid == 0:
+            try:
+                chassis = dmidecode.chassis()
+                for key in chassis:
+                    data = chassis[key]['data']
+                    propnum = data.get('Asset Tag', propnum)
+                    chassisserial = data.get('Serial Number', chassisserial)
+                    chassismfr = data.get('Manufacturer', chassismfr)
+            except(IndexError, KeyError):
+                # got unexpected data back from dmidecode
+                pass
             try:
                 system = dmidecode.system()
                 for key in system:
                     try:
-                        uuid = system[key]['data']['UUID']
+                        data = system[key]['data']
                     except(IndexError, KeyError):
                         continue
+                    systemserial = data.get('Serial Number', systemserial)
+                    systemmfr = data.get('Manufacturer', systemmfr)
+                    uuid = data.get('UUID', uuid)
             except(IndexError, KeyError):
                 # got unexpected data back from dmidecode
                 pass
-        elif os.path.exists('/usr/sbin/dmidecode') and self.euid == 0:
-            uuidfetch = '/usr/sbin/dmidecode -s system-uuid'
-            cmd1 = subprocess.Popen(uuidfetch, shell=True,
-                                    stdout=subprocess.PIPE,
-                                    close_fds=True)
-            uuid = cmd1.stdout.readline()
-        elif os.path.exists('/usr/sbin/smbios'):
-            smbiosfetch = '/usr/sbin/smbios -t SMB_TYPE_SYSTEM 2>/dev/null'
-            cmd2 = subprocess.Popen(smbiosfetch, shell=True,
-                                    stdout=subprocess.PIPE,
-                                    close_fds=True)
-            cmdoutput = cmd2.stdout.readlines()
-            for line in cmdoutput:
-                if re.search('UUID:', line):
-                    line = line.split()
-                    try:
-                        uuid = line[1]
-                    except(IndexError, KeyError):
-                        pass
-        elif os.path.exists('/usr/sbin/system_profiler'):
-            profilerfetch = '/usr/sbin/system_profiler SPHardwareDataType'
-            cmd3 = subprocess.Popen(profilerfetch, shell=True,
-                                    stdout=subprocess.PIPE,
-                                    close_fds=True)
-            cmd3output = cmd3.stdout.readlines()
-            for line in cmd3output:
-                if re.search('UUID:', line):
-                    line = line.split()
+        else:
+            profiler = []
+            if os.path.exists('/usr/sbin/system_profiler'):
+                profilerfetch = '/usr/sbin/system_profiler SPHardwareDataType'
+                cmd3 = subprocess.Popen(profilerfetch, shell=True,
+                                        stdout=subprocess.PIPE,
+                                        close_fds=True)
+                profiler = cmd3.stdout.readlines()
+            for line in profiler:
+                if re.search(re.escape('Serial Number (system):'), line):
+                    line = line.split(':')
                     try:
-                        uuid = line[2]
+                        systemserial = line[1]
                     except(IndexError, KeyError):
                         pass
-        elif platform.system() == 'SunOS':
-            fetchhostid = '/usr/bin/hostid'
-            cmd1 = subprocess.Popen(fetchhostid, shell=True,
-                                    stdout=subprocess.PIPE,
-                                    close_fds=True)
-            uuid = cmd1.stdout.readline()
-        uuid = uuid.strip()
-        return uuid
+            if os.path.exists('/usr/sbin/dmidecode') and self.euid == 0:
+                uuidfetch = '/usr/sbin/dmidecode -s system-uuid'
+                cmd1 = subprocess.Popen(uuidfetch, shell=True,
+                                        stdout=subprocess.PIPE,
+                                        close_fds=True)
+                uuid = cmd1.stdout.readline()
+            elif os.path.exists('/usr/sbin/smbios'):
+                smbiosfetch = '/usr/sbin/smbios -t SMB_TYPE_SYSTEM 2>/dev/null'
+                cmd2 = subprocess.Popen(smbiosfetch, shell=True,
+                                        stdout=subprocess.PIPE,
+                                        close_fds=True)
+                cmdoutput = cmd2.stdout.readlines()
+                for line in cmdoutput:
+                    if re.search('UUID:', line):
+                        line = line.split()
+                        try:
+                            uuid = line[1]
+                        except(IndexError, KeyError):
+                            pass
+            elif profiler:
+                for line in profiler:
+                    if re.search('UUID:', line):
+                        line = line.split()
+                        try:
+                            uuid = line[2]
+                        except(IndexError, KeyError):
+                            pass
+            elif platform.system() == 'SunOS':
+                fetchhostid = '/usr/bin/hostid'
+                cmd1 = subprocess.Popen(fetchhostid, shell=True,
+                                        stdout=subprocess.PIPE,
+                                        close_fds=True)
+                uuid = cmd1.stdout.readline()
+        if platform.system() == 'Darwin':
+            pnfetch = '/usr/sbin/nvram asset_id 2>/dev/null'
+            cmd = subprocess.Popen(pnfetch, shell=True,
+                                   stdout=subprocess.PIPE,
+                                   close_fds=True)
+            cmdout = cmd.stdout.readline()
+            cmdout = cmdout.split()
+            try:
+                propnum = cmdout[1]
+            except(IndexError, KeyError):
+                propnum = 0
+        if isinstance(propnum, basestring):
+            propnum = propnum.strip()
+        return {'propertynumber': propnum,
+                'systemserial': systemserial.strip(),
+                'chassisserial': chassisserial.strip(),
+                'systemmfr': systemmfr.strip(),
+                'chassismfr': chassismfr.strip(),
+                'uuid': uuid.strip()}
 
     def ismobile(self):
         '''
@@ -906,6 +822,18 @@ class Environment:
             if userpath == '/dev/null':
                 self.log_path = '/tmp'
 
+        #####
+        # Set the cache path. Caches are only kept for privileged runs and
+        # for users that have a real home directory.
+        if self.geteuid() == 0:
+            self.cache_path = '/usr/share/stonix/cache'
+        else:
+            userpath = self.geteuidhome()
+            if userpath == '/dev/null':
+                self.cache_path = ''
+            else:
+                self.cache_path = os.path.join(userpath, '.stonix', 'cache')
+
         #####
         # Set the icon path
         self.icon_path = os.path.join(self.resources_path, 'gfx')
@@ -989,6 +917,36 @@ class Environment:
         """
         return self.resources_path
 
+    def get_cache_path(self):
+        """
+        Getter for the directory where run to run caches are kept. Returns an
+        empty string if no cache directory is available for this user.
+        """
+        return self.cache_path
+
+    def getaccountdb(self):
+        '''
+        Return the run scoped AccountDB snapshot of the passwd, shadow and
+        group databases, creating it on first use.
+
+        @return: AccountDB instance
+        '''
+        if self.accountdb is None:
+            self.accountdb = AccountDB()
+        return self.accountdb
+
+    def getpackagedb(self):
+        '''
+        Return the run scoped PackageDB map of package owned files, creating
+        it on first use. The package database itself is only queried the
+        first time a lookup is made.
+
+        @return: PackageDB instance
+        '''
+        if self.packagedb is None:
+            self.packagedb = PackageDB()
+        return self.packagedb
+
     def getruntime(self):
         '''
         Return the runtime recorded.
@@ -0,0 +1,217 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+
+
+Created on Oct 18, 2026
+
+The EventStore is the SQLite backed change event database used by the
+StateChgLogger. Events are kept in a single table keyed by event id with an
+index on the four digit rule id prefix, so looking up the events of one rule
+is an indexed query rather than a scan of every key. The database runs in
+WAL mode and writes are committed in batches: a pending batch is committed
+when an event for a different rule is recorded, or when commit() or
+close() is called.
+
+An existing shelve event log can be migrated with migrate(). The old files
+are renamed with a .migrated suffix rather than deleted.
+'''
+import cPickle
+import os
+import shelve
+import sqlite3
+import threading
+import whichdb
+from logdispatcher import LogPriority
+
+SCHEMA = ['''CREATE TABLE IF NOT EXISTS events (
+    eventid TEXT PRIMARY KEY,
+    ruleid TEXT NOT NULL,
+    event BLOB NOT NULL)''',
+          '''CREATE INDEX IF NOT EXISTS events_ruleid
+    ON events (ruleid, eventid)''']
+SHELVESUFFIXES = ['', '.db', '.dat', '.dir', '.bak']
+
+
+class EventStore(object):
+    '''
+    Transactional, indexed store of change event dictionaries.
+    '''
+
+    def __init__(self, path, logger=None):
+        '''
+        Constructor. The database file is created with mode 0600 if it does
+        not exist.
+
+        @param path: string - path of the SQLite database
+        @param logger: logdispatcher object, optional
+        '''
+        self.path = path
+        self.logger = logger
+        self.lock = threading.RLock()
+        self.pendingrule = None
+        if not os.path.exists(path):
+            os.close(os.open(path, os.O_WRONLY | os.O_CREAT, 0600))
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.text_factory = str
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        for statement in SCHEMA:
+            self.conn.execute(statement)
+        self.conn.commit()
+
+    def debug(self, message):
+        '''
+        Log a debug message if we have a logger.
+
+        @param message: string
+        '''
+        if self.logger is not None:
+            self.logger.log(LogPriority.DEBUG, ['EventStore', message])
+
+    def get(self, eventid):
+        '''
+        Return the event dictionary stored for eventid.
+
+        @param eventid: string
+        @return: dict
+        @raise KeyError: if there is no such event
+        '''
+        with self.lock:
+            row = self.conn.execute('SELECT event FROM events '
+                                    'WHERE eventid = ?',
+                                    (eventid,)).fetchone()
+        if row is None:
+            raise KeyError(eventid)
+        return cPickle.loads(str(row[0]))
+
+    def put(self, eventid, eventdict):
+        '''
+        Store an event, replacing any event with the same id. The write is
+        part of the pending batch.
+
+        @param eventid: string
+        @param eventdict: dict
+        '''
+        ruleid = eventid[0:4]
+        data = sqlite3.Binary(cPickle.dumps(eventdict, 2))
+        with self.lock:
+            if self.pendingrule is not None and self.pendingrule != ruleid:
+                self.conn.commit()
+            self.conn.execute('INSERT OR REPLACE INTO events '
+                              '(eventid, ruleid, event) VALUES (?, ?, ?)',
+                              (eventid, ruleid, data))
+            self.pendingrule = ruleid
+
+    def delete(self, eventid):
+        '''
+        Delete an event. The delete is part of the pending batch.
+
+        @param eventid: string
+        @raise KeyError: if there is no such event
+        '''
+        with self.lock:
+            cursor = self.conn.execute('DELETE FROM events '
+                                       'WHERE eventid = ?', (eventid,))
+            if cursor.rowcount == 0:
+                raise KeyError(eventid)
+            if self.pendingrule is None:
+                self.pendingrule = eventid[0:4]
+
+    def findrule(self, ruleid):
+        '''
+        Return the ids of all events recorded for a rule, in event id order.
+
+        @param ruleid: string - four digit zero padded rule id
+        @return: list of strings
+        '''
+        with self.lock:
+            rows = self.conn.execute('SELECT eventid FROM events '
+                                     'WHERE ruleid = ? ORDER BY eventid',
+                                     (ruleid,)).fetchall()
+        return [row[0] for row in rows]
+
+    def keys(self):
+        '''
+        Return the ids of all stored events.
+
+        @return: list of strings
+        '''
+        with self.lock:
+            rows = self.conn.execute('SELECT eventid FROM events '
+                                     'ORDER BY eventid').fetchall()
+        return [row[0] for row in rows]
+
+    def commit(self):
+        '''
+        Commit the pending batch of writes.
+        '''
+        with self.lock:
+            self.conn.commit()
+            self.pendingrule = None
+
+    def close(self):
+        '''
+        Commit the pending batch and close the database.
+        '''
+        with self.lock:
+            if self.conn is None:
+                return
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
+
+    def migrate(self, legacypath):
+        '''
+        Copy every event from a shelve event log into the store in a single
+        transaction, then rename the shelve files so the migration is only
+        done once. Events already present in the store are not overwritten.
+
+        @param legacypath: string - path passed to shelve.open()
+        @return: int - number of events migrated
+        '''
+        if not whichdb.whichdb(legacypath):
+            return 0
+        legacy = shelve.open(legacypath, 'r')
+        try:
+            rows = []
+            for key in legacy.keys():
+                rows.append((key, key[0:4],
+                             sqlite3.Binary(cPickle.dumps(legacy[key], 2))))
+        finally:
+            legacy.close()
+        with self.lock:
+            self.conn.commit()
+            self.conn.executemany('INSERT OR IGNORE INTO events '
+                                  '(eventid, ruleid, event) VALUES (?, ?, ?)',
+                                  rows)
+            self.conn.commit()
+            self.pendingrule = None
+        for suffix in SHELVESUFFIXES:
+            if os.path.exists(legacypath + suffix):
+                os.rename(legacypath + suffix,
+                          legacypath + suffix + '.migrated')
+        self.debug('Migrated ' + str(len(rows)) + ' events from ' +
+                   legacypath)
+        return len(rows)
@@ -138,6 +138,104 @@ to be removed"
         except Exception:
             self.detailedresults += traceback.format_exc()
             self.logger.log(LogPriority.INFO, self.detailedresults)
+###############################################################################
+    def installpackages(self, packages):
+        '''
+         Install several packages with a single pkg_add run. Return a bool
+         indicating success or failure of the whole run.
+
+        @param list packages : Names of the packages to be installed, must be
+            recognizable to the underlying package manager.
+        @return bool :'''
+        try:
+            installed = False
+            self.ch.executeCommand(self.install + " ".join(packages))
+            if self.ch.getReturnCode() == 0:
+                self.detailedresults += " ".join(packages) + \
+                    " pkgs installed successfully"
+                installed = True
+            else:
+                self.detailedresults += " ".join(packages) + \
+                    " pkgs not able to install"
+            self.logger.log(LogPriority.INFO, self.detailedresults)
+            return installed
+        except(KeyboardInterrupt,SystemExit):
+            raise
+        except Exception:
+            self.detailedresults += traceback.format_exc()
+            self.logger.log(LogPriority.INFO, self.detailedresults)
+###############################################################################
+    def removepackages(self, packages):
+        '''
+         Remove several packages with a single pkg_delete run. pkg_delete
+         wants the versioned names, which are looked up in one pkg_info
+         listing. Return a bool indicating success or failure of the run.
+
+        @param list packages : Names of the packages to be removed, must be
+            recognizable to the underlying package manager.
+        @return : bool
+        '''
+        try:
+            self.detailedresults = ""
+            removed = False
+            self.ch.executeCommand(["/usr/sbin/pkg_info"])
+            names = [cell.split(" ")[0] for cell in self.ch.getOutput()]
+            targets = []
+            for package in packages:
+                stringToMatch = package + "(.*)"
+                for name in names:
+                    if re.search(stringToMatch, name) and \
+                       name not in targets:
+                        targets.append(name)
+            if targets:
+                self.ch.executeCommand(self.remove + " ".join(targets))
+                if self.ch.getReturnCode() == 0:
+                    self.detailedresults += " ".join(packages) + \
+                        " pkgs removed successfully"
+                    removed = True
+                else:
+                    self.detailedresults += " ".join(packages) + \
+                        " pkgs not able to be removed"
+            else:
+                self.detailedresults += " ".join(packages) + \
+                    " pkgs not found to remove"
+            self.logger.log(LogPriority.INFO, self.detailedresults)
+            return removed
+        except(KeyboardInterrupt,SystemExit):
+            raise
+        except Exception:
+            self.detailedresults += traceback.format_exc()
+            self.logger.log(LogPriority.INFO, self.detailedresults)
+###############################################################################
+    def checkInstalls(self, packages):
+        '''Check the installation status of several packages against a
+        single pkg_info listing.
+
+        @param list packages : Names of the packages whose installation
+            status is to be checked.
+        @return : dict package name -> bool, True if the package is
+            installed'''
+        try:
+            self.detailedresults = ""
+            self.ch.executeCommand(["/usr/sbin/pkg_info"])
+            names = [cell.split(" ")[0] for cell in self.ch.getOutput()]
+            found = {}
+            for package in packages:
+                stringToMatch = package + "(.*)"
+                found[package] = False
+                for name in names:
+                    if re.search(stringToMatch, name):
+                        found[package] = True
+                        break
+            self.detailedresults += str(found.values().count(True)) + \
+                " of " + str(len(found)) + " pkgs found"
+            self.logger.log(LogPriority.INFO, self.detailedresults)
+            return found
+        except(KeyboardInterrupt,SystemExit):
+            raise
+        except Exception:
+            self.detailedresults += traceback.format_exc()
+            self.logger.log(LogPriority.INFO, self.detailedresults)
 ###############################################################################
     def getInstall(self):
         return self.install
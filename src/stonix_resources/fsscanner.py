@@ -0,0 +1,501 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+
+
+Created on Oct 18, 2026
+
+The FSScanner makes a single pass over one or more local file systems and
+collects world writable files and directories, SUID/SGID files and files
+whose owner or group does not resolve. Each directory entry costs one
+lstat (plus a stat of the target for symlinks), uid and gid lookups
+are memoized and mount points are detected by comparing device numbers
+rather than calling os.path.ismount on every directory. Directory subtrees
+are spread over a small pool of worker threads.
+
+The scanner can also keep an index of every directory it has listed,
+keyed by (dev, inode, mtime, ctime), together with the findings in that
+directory. When a previous index is loaded, directories whose metadata has
+not changed are not listed again, their findings are taken from the index
+and only their subdirectories are examined.
+
+@note: A chmod or chown of an existing file does not change its parent
+directory, so an incremental scan will not notice it. Callers should
+force a full scan periodically (see loadindex()) and discard the index
+after changing file modes themselves.
+
+Used by the FilePermissions rule.
+'''
+import grp
+import json
+import os
+import pwd
+import Queue
+import stat
+import threading
+import time
+import traceback
+from logdispatcher import LogPriority
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+DEFAULTTHREADS = 4
+DEFAULTLIMIT = 25000
+INDEXVERSION = 1
+FINDINGS = ['ww', 'suid', 'unowned']
+
+
+class FSScanner(object):
+    '''
+    Multi-threaded scanner for world writable, SUID/SGID and unowned files.
+    '''
+
+    def __init__(self, logger, threads=DEFAULTTHREADS, limit=DEFAULTLIMIT):
+        '''
+        Constructor
+
+        @param logger: logdispatcher object
+        @param threads: int - number of worker threads
+        @param limit: int - the scan is abandoned once any result set grows
+            past this many entries
+        '''
+        self.logger = logger
+        if threads < 1:
+            threads = 1
+        self.threads = threads
+        self.limit = limit
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.queue = None
+        self.pending = 0
+        self.overrun = False
+        self.results = {'ww': set(), 'suid': set(), 'unowned': set()}
+        self.uids = {}
+        self.gids = {}
+        self.oldindex = {}
+        self.index = {}
+        self.fullscan = None
+        self.listed = 0
+        self.reused = 0
+
+    def isoverrun(self):
+        '''
+        Return True if the last scan was abandoned because a result set grew
+        past the limit.
+
+        @return: bool
+        '''
+        return self.overrun
+
+    def getcounts(self):
+        '''
+        Return the number of directories listed and the number of
+        directories taken from the index during the last scan.
+
+        @return: tuple of ints (listed, reused)
+        '''
+        return self.listed, self.reused
+
+    def loadindex(self, path, maxage=None):
+        '''
+        Load the directory index written by a previous scan. The index is
+        ignored if it is not owned by the current user, is writable by
+        anyone else, or if the full scan it descends from is older than
+        maxage seconds.
+
+        @param path: string - path of the index file
+        @param maxage: int - seconds, optional
+        @return: bool - True if an index was loaded
+        '''
+        self.oldindex = {}
+        self.fullscan = None
+        if not os.path.exists(path):
+            return False
+        try:
+            istat = os.stat(path)
+            if istat.st_uid != os.geteuid() or istat.st_mode & 022:
+                self.logger.log(LogPriority.DEBUG,
+                                ['FSScanner', 'Ignoring unsafe index ' +
+                                 path])
+                return False
+            rhandle = open(path, 'r')
+            try:
+                data = json.load(rhandle)
+            finally:
+                rhandle.close()
+            if data.get('version') != INDEXVERSION:
+                return False
+            fullscan = float(data['fullscan'])
+            if maxage is not None and time.time() - fullscan > maxage:
+                self.logger.log(LogPriority.DEBUG,
+                                ['FSScanner', 'Index is due for a full scan'])
+                return False
+            oldindex = {}
+            for dirpath, entry in data['dirs'].iteritems():
+                newentry = {'key': entry['key']}
+                for field in ['dirs'] + FINDINGS:
+                    if field in entry:
+                        newentry[field] = [name.encode('utf-8') for name in
+                                           entry[field]]
+                oldindex[dirpath.encode('utf-8')] = newentry
+            self.oldindex = oldindex
+            self.fullscan = fullscan
+            return True
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            self.logger.log(LogPriority.DEBUG,
+                            ['FSScanner', 'Could not read index: ' +
+                             traceback.format_exc()])
+            return False
+
+    def saveindex(self, path):
+        '''
+        Write the directory index built by the last scan. Nothing is written
+        after an overrun since the index is incomplete. Failure to write is
+        logged and otherwise ignored, the index is only an optimization.
+
+        @param path: string - path of the index file
+        '''
+        if self.overrun:
+            return
+        fullscan = self.fullscan
+        if fullscan is None:
+            fullscan = time.time()
+        try:
+            tmppath = path + '.tmp'
+            fd = os.open(tmppath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                         0600)
+            whandle = os.fdopen(fd, 'w')
+            try:
+                json.dump({'version': INDEXVERSION,
+                           'fullscan': fullscan,
+                           'dirs': self.index}, whandle)
+            finally:
+                whandle.close()
+            os.rename(tmppath, path)
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            self.logger.log(LogPriority.DEBUG,
+                            ['FSScanner', 'Could not write index: ' +
+                             traceback.format_exc()])
+
+    def uidexists(self, uid):
+        '''
+        Return True if the passed uid resolves to a user. Answers are
+        memoized for the life of the scanner.
+
+        @param uid: int
+        @return: bool
+        '''
+        try:
+            return self.uids[uid]
+        except KeyError:
+            pass
+        try:
+            pwd.getpwuid(uid)
+            exists = True
+        except KeyError:
+            exists = False
+        self.uids[uid] = exists
+        return exists
+
+    def gidexists(self, gid):
+        '''
+        Return True if the passed gid resolves to a group. Answers are
+        memoized for the life of the scanner.
+
+        @param gid: int
+        @return: bool
+        '''
+        try:
+            return self.gids[gid]
+        except KeyError:
+            pass
+        try:
+            grp.getgrgid(gid)
+            exists = True
+        except KeyError:
+            exists = False
+        self.gids[gid] = exists
+        return exists
+
+    def scan(self, roots):
+        '''
+        Scan the passed file system roots. Directories on a different device
+        from their parent are mount points and are not descended into.
+
+        @param roots: list of directory paths
+        @return: dict with the keys 'ww', 'suid' and 'unowned', each a set
+            of paths
+        '''
+        self.results = {'ww': set(), 'suid': set(), 'unowned': set()}
+        self.overrun = False
+        self.done.clear()
+        self.queue = Queue.Queue()
+        self.pending = 0
+        self.index = {}
+        self.listed = 0
+        self.reused = 0
+        for root in roots:
+            try:
+                rootstat = os.lstat(root)
+            except OSError:
+                continue
+            if not stat.S_ISDIR(rootstat.st_mode):
+                continue
+            self.logger.log(LogPriority.DEBUG,
+                            ['FSScanner', 'Walking Filesystem: ' + str(root)])
+            self.__enqueue(root, rootstat)
+        if self.pending == 0:
+            return self.results
+
+        workers = []
+        for _ in range(self.threads):
+            worker = threading.Thread(target=self.__worker)
+            worker.daemon = True
+            worker.start()
+            workers.append(worker)
+        try:
+            # Wait with a timeout so that KeyboardInterrupt is delivered to
+            # the main thread.
+            while not self.done.is_set():
+                self.done.wait(0.5)
+        finally:
+            if not self.done.is_set():
+                self.overrun = True
+            for _ in workers:
+                self.queue.put(None)
+        if not self.overrun:
+            for worker in workers:
+                worker.join()
+        self.logger.log(LogPriority.DEBUG,
+                        ['FSScanner', 'Listed ' + str(self.listed) +
+                         ' directories, ' + str(self.reused) +
+                         ' unchanged directories taken from the index'])
+        return self.results
+
+    def __enqueue(self, path, dirstat):
+        '''
+        Add a directory to the work queue.
+
+        @param path: string - directory path
+        @param dirstat: lstat result of the directory
+        '''
+        with self.lock:
+            self.pending += 1
+        self.queue.put((path, dirstat))
+
+    def __worker(self):
+        '''
+        Worker thread body. Scans directories off the queue until it receives
+        the None sentinel.
+        '''
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            path, dirstat = item
+            try:
+                if not self.overrun:
+                    self.__scandir(path, dirstat)
+            except Exception:
+                self.logger.log(LogPriority.DEBUG,
+                                ['FSScanner', 'Error scanning ' + str(path) +
+                                 '\n' + traceback.format_exc()])
+            with self.lock:
+                self.pending -= 1
+                if self.pending == 0:
+                    self.done.set()
+
+    def __listdir(self, path):
+        '''
+        Return a list of (name, path, lstat) tuples for the entries of a
+        directory. Symlinks are returned with a None lstat. Entries that
+        vanish while being examined are skipped.
+
+        @param path: string - directory path
+        @return: list of tuples
+        '''
+        entries = []
+        if scandir is not None:
+            for entry in scandir(path):
+                try:
+                    if entry.is_symlink():
+                        entries.append((entry.name, entry.path, None))
+                        continue
+                    entries.append((entry.name, entry.path,
+                                    entry.stat(follow_symlinks=False)))
+                except OSError:
+                    continue
+        else:
+            for name in os.listdir(path):
+                fpath = os.path.join(path, name)
+                try:
+                    entries.append((name, fpath, os.lstat(fpath)))
+                except OSError:
+                    continue
+        return entries
+
+    def __subdir(self, fpath, fstat, dev):
+        '''
+        Handle a subdirectory: report it if it is world writable and queue
+        it unless it is a mount point.
+
+        @param fpath: string - directory path
+        @param fstat: lstat result of the directory
+        @param dev: int - device number of the parent directory
+        @return: bool - True if the directory was queued
+        '''
+        if fstat.st_dev != dev:
+            # mount point
+            return False
+        if fstat.st_mode & stat.S_IWOTH:
+            self.__add('ww', fpath, 'Found WW Dir: ')
+        self.__enqueue(fpath, fstat)
+        return True
+
+    def __scandir(self, path, dirstat):
+        '''
+        Examine every entry of one directory and queue its subdirectories.
+        If the directory is unchanged since the loaded index was written the
+        findings recorded in the index are used instead.
+
+        @param path: string - directory path
+        @param dirstat: lstat result of the directory
+        '''
+        dev = dirstat.st_dev
+        key = [dev, dirstat.st_ino, dirstat.st_mtime, dirstat.st_ctime]
+        old = self.oldindex.get(path)
+        if old is not None and old['key'] == key:
+            self.__reuse(path, dev, old)
+            return
+        try:
+            entries = self.__listdir(path)
+        except OSError:
+            return
+        record = {'key': key}
+        for name, fpath, fstat in entries:
+            if fstat is None or stat.S_ISLNK(fstat.st_mode):
+                # Symlinks are never followed, but a link to a world
+                # writable directory is reported as one.
+                try:
+                    target = os.stat(fpath)
+                except OSError:
+                    continue
+                if stat.S_ISDIR(target.st_mode) and \
+                   target.st_mode & stat.S_IWOTH:
+                    self.__add('ww', fpath, 'Found WW Dir: ', record, name)
+                continue
+            mode = fstat.st_mode
+            if stat.S_ISDIR(mode):
+                if self.__subdir(fpath, fstat, dev):
+                    record.setdefault('dirs', []).append(name)
+                continue
+            if mode & stat.S_IWOTH:
+                self.__add('ww', fpath, 'Found WW File: ', record, name)
+            if mode & (stat.S_ISUID | stat.S_ISGID):
+                self.__add('suid', fpath, 'Found SUID File: ', record, name)
+            if not self.uidexists(fstat.st_uid):
+                self.__add('unowned', fpath, 'Found unowned File: ',
+                           record, name)
+            elif not self.gidexists(fstat.st_gid):
+                self.__add('unowned', fpath,
+                           'Found unowned File, bad group: ', record, name)
+        self.__record(path, record)
+        with self.lock:
+            self.listed += 1
+
+    def __reuse(self, path, dev, old):
+        '''
+        Take the findings for an unchanged directory from the loaded index
+        and examine its recorded subdirectories.
+
+        @param path: string - directory path
+        @param dev: int - device number of the directory
+        @param old: dict - index entry for the directory
+        '''
+        for field in FINDINGS:
+            for name in old.get(field, []):
+                self.__add(field, os.path.join(path, name),
+                           'Found (indexed): ')
+        for name in old.get('dirs', []):
+            fpath = os.path.join(path, name)
+            try:
+                fstat = os.lstat(fpath)
+            except OSError:
+                continue
+            if stat.S_ISDIR(fstat.st_mode):
+                self.__subdir(fpath, fstat, dev)
+        self.__record(path, old)
+        with self.lock:
+            self.reused += 1
+
+    def __record(self, path, record):
+        '''
+        Store the index entry for a directory. Paths that are not valid UTF-8
+        can't be written to the JSON index and are simply listed again on the
+        next scan.
+
+        @param path: string - directory path
+        @param record: dict - index entry
+        '''
+        try:
+            path.decode('utf-8')
+            for field in ['dirs'] + FINDINGS:
+                for name in record.get(field, []):
+                    name.decode('utf-8')
+        except UnicodeError:
+            return
+        with self.lock:
+            self.index[path] = record
+
+    def __add(self, key, path, message, record=None, name=None):
+        '''
+        Record a path in one of the result sets and flag an overrun if the
+        set has grown past the limit.
+
+        @param key: string - 'ww', 'suid' or 'unowned'
+        @param path: string
+        @param message: string - debug message prefix
+        @param record: dict - index entry of the parent directory, optional
+        @param name: string - name of the entry in its parent directory
+        '''
+        if record is not None:
+            record.setdefault(key, []).append(name)
+        with self.lock:
+            self.results[key].add(path)
+            if len(self.results[key]) > self.limit and not self.overrun:
+                self.overrun = True
+                self.done.set()
+                self.logger.log(LogPriority.DEBUG,
+                                ['FSScanner', key + ' overflow!'])
+        self.logger.log(LogPriority.DEBUG, ['FSScanner', message + str(path)])
@@ -0,0 +1,263 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+Created on Oct 18, 2026
+
+HostFacts collects facts about the host that are slow to discover and do
+not change while it is up: the OS description and version (lsb_release,
+sw_vers) and the hardware identity (serial numbers, manufacturers, UUID,
+asset tag from dmidecode, system_profiler, smbios, hostid). Facts are
+grouped by how they are collected and a group is only collected, in one
+pass, the first time one of its facts is asked for.
+
+For root runs the facts are kept in a root only file under the STONIX
+cache directory together with the boot id and the time each group was
+collected. Later runs reuse them without probing the hardware again until
+the host reboots, the STONIX version changes or the group's time to live
+runs out.
+'''
+import json
+import os
+import subprocess
+import threading
+import time
+import traceback
+from localize import STONIXVERSION
+from logdispatcher import LogPriority
+
+
+class HostFacts(object):
+    '''
+    Lazily collected, optionally persisted facts about the host.
+    '''
+
+    def __init__(self, path='', ttl=86400, logger=None):
+        '''
+        Constructor
+
+        @param path: string - file to persist the facts to, '' to keep them
+            in memory only
+        @param ttl: int - seconds persisted facts may be reused for
+        @param logger: LogDispatcher instance or None
+        '''
+        self.path = path
+        self.ttl = ttl
+        self.logger = logger
+        self.lock = threading.RLock()
+        self.collectors = {}
+        self.facts = None
+        self.collected = {}
+        self.loaded = False
+
+    def register(self, group, collector):
+        '''
+        Register the callable that collects a group of facts. The collector
+        takes no arguments and returns a dict of fact name to value; values
+        must be strings or numbers.
+
+        @param group: string
+        @param collector: callable
+        '''
+        self.collectors[group] = collector
+
+    def get(self, group, name, default=None):
+        '''
+        Return a fact, collecting its whole group first if that has not been
+        done on this boot.
+
+        @param group: string
+        @param name: string
+        @param default: returned if the collector did not provide the fact
+        @return: the fact's value
+        '''
+        self.lock.acquire()
+        try:
+            if self.facts is None:
+                self.facts = self.load()
+            if group not in self.facts:
+                self.facts[group] = self.collectors[group]()
+                self.collected[group] = time.time()
+                self.save()
+            return self.facts[group].get(name, default)
+        finally:
+            self.lock.release()
+
+    def getbootid(self):
+        '''
+        Return a string that changes every time the host boots.
+
+        @return: string
+        '''
+        try:
+            if os.path.exists('/proc/sys/kernel/random/boot_id'):
+                rhandle = open('/proc/sys/kernel/random/boot_id', 'r')
+                try:
+                    return rhandle.read().strip()
+                finally:
+                    rhandle.close()
+            for sysctl in ['/usr/sbin/sysctl', '/sbin/sysctl']:
+                if os.path.exists(sysctl):
+                    proc = subprocess.Popen([sysctl, '-n', 'kern.boottime'],
+                                            stdout=subprocess.PIPE,
+                                            stderr=subprocess.PIPE,
+                                            close_fds=True)
+                    return proc.communicate()[0].strip()
+        except (OSError, IOError):
+            pass
+        return ''
+
+    def getkey(self):
+        '''
+        Return what persisted facts must match to be reused.
+
+        @return: dict
+        '''
+        return {'bootid': self.getbootid(), 'stonixversion': STONIXVERSION}
+
+    def load(self):
+        '''
+        Return the persisted facts that are safe to use and still current.
+        A group is dropped once its own time to live has run out, the
+        whole file once the boot id or STONIX version no longer match.
+
+        @return: dict of group to dict of facts
+        '''
+        self.loaded = False
+        self.collected = {}
+        if not self.path or os.geteuid() != 0 or \
+           not os.path.exists(self.path):
+            return {}
+        try:
+            # Only trust a file that root owns and nobody else can write
+            fstat = os.stat(self.path)
+            if fstat.st_uid != 0 or fstat.st_mode & 022:
+                self.log(LogPriority.DEBUG,
+                         'Ignoring unsafe host facts ' + self.path)
+                return {}
+            rhandle = open(self.path, 'r')
+            try:
+                data = json.load(rhandle)
+            finally:
+                rhandle.close()
+            if data.get('key') != self.getkey():
+                self.log(LogPriority.DEBUG, 'Host facts are stale')
+                return {}
+            collected = data.get('collected')
+            if not isinstance(collected, dict):
+                collected = {}
+            now = time.time()
+            facts = {}
+            for group, values in data['facts'].items():
+                when = collected.get(group, 0)
+                age = now - when
+                if age < 0 or age > self.ttl:
+                    self.log(LogPriority.DEBUG,
+                             'Host facts for ' + group + ' are stale')
+                    continue
+                facts[str(group)] = dict((str(name), self.native(value))
+                                         for name, value in values.items())
+                self.collected[str(group)] = when
+            self.loaded = bool(facts)
+            return facts
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            self.log(LogPriority.DEBUG,
+                     'Could not read host facts: ' + traceback.format_exc())
+            return {}
+
+    def native(self, value):
+        '''
+        Turn a value read back from json into the str/int it was collected
+        as.
+
+        @param value: json value
+        @return: str, int or float
+        '''
+        if isinstance(value, unicode):
+            return value.encode('utf-8')
+        return value
+
+    def save(self):
+        '''
+        Persist the facts. Failure to write is logged and otherwise
+        ignored, persisting is only an optimization.
+        '''
+        if not self.path or os.geteuid() != 0:
+            return
+        try:
+            cachedir = os.path.dirname(self.path)
+            if not os.path.exists(cachedir):
+                os.makedirs(cachedir, 0700)
+            tmppath = self.path + '.tmp'
+            fd = os.open(tmppath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                         0600)
+            whandle = os.fdopen(fd, 'w')
+            try:
+                json.dump({'key': self.getkey(),
+                           'collected': self.collected,
+                           'facts': self.facts}, whandle)
+            finally:
+                whandle.close()
+            os.rename(tmppath, self.path)
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            self.log(LogPriority.DEBUG,
+                     'Could not write host facts: ' + traceback.format_exc())
+
+    def invalidate(self):
+        '''
+        Forget all facts, in memory and on disk, so that they are collected
+        again when next asked for.
+        '''
+        self.lock.acquire()
+        try:
+            self.facts = None
+            self.collected = {}
+            if self.path and os.path.exists(self.path):
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+        finally:
+            self.lock.release()
+
+    def isloaded(self):
+        '''
+        Return True if the facts in use were read back from the persisted
+        file rather than collected by this run.
+
+        @return: bool
+        '''
+        return self.loaded
+
+    def log(self, priority, message):
+        '''
+        Log to the logger if there is one.
+
+        @param priority: LogPriority
+        @param message: string
+        '''
+        if self.logger is not None:
+            self.logger.log(priority, ['HostFacts', message])
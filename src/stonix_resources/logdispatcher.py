@@ -40,19 +40,23 @@ Created on Aug 24, 2010
 '''
 
 from observable import Observable
+import atexit
 import logging
 import localize
 import logging.handlers
 import os.path
 import os
+import Queue
 import socket
-import inspect
+import sys
 import traceback
 import weakref
 import smtplib
 import subprocess
+import threading
 import xml.etree.ElementTree as ET
 import localize
+from rulemetrics import getrulemetrics
 from shutil import move
 
 
@@ -70,6 +74,14 @@ class LogDispatcher (Observable):
         self.environment = environment
         self.debug = self.environment.getdebugmode()
         self.verbose = self.environment.getverbosemode()
+        # Priorities that the configured logging level throws away. These
+        # match the levels set up in __initializelogs.
+        if self.debug:
+            self.discarded = frozenset()
+        elif self.verbose:
+            self.discarded = frozenset([LogPriority.DEBUG])
+        else:
+            self.discarded = frozenset([LogPriority.DEBUG, LogPriority.INFO])
         reportfile = 'stonix-report.log'
         xmlfile = 'stonix-xmlreport.xml'
         self.logpath = self.environment.get_log_path()
@@ -90,6 +102,9 @@ class LogDispatcher (Observable):
                 print traceback.format_exc()
                 print err
         self.xmlreport = xmlReport(self.xmllog, self.debug)
+        self.loglock = threading.RLock()
+        self.writer = LogWriter(self.xmlreport, self.__notify)
+        atexit.register(closewriter, weakref.ref(self.writer))
         self.metadataopen = False
         self.__initializelogs()
         self.last_message_received = ""
@@ -115,6 +130,8 @@ class LogDispatcher (Observable):
         """
         if self.environment.geteuid() != 0:
             return
+        self.flush()
+        self.xmlreport.writeMetrics(getrulemetrics().getrecords())
         self.xmlreport.closeReport()
         xmlreport = self.xmllog
         resolvable = True
@@ -158,6 +175,18 @@ class LogDispatcher (Observable):
             self.log(LogPriority.ERROR,
                      ['LogDispatcher.postreport', trace])
 
+    def isenabled(self, priority):
+        """
+        Return True if a message at the passed priority would be written
+        given the current debug and verbose settings. Callers that need to do
+        real work to build a DEBUG or INFO message may use this to skip that
+        work entirely.
+
+        @param priority: LogPriority value
+        @return: bool
+        """
+        return priority not in self.discarded
+
     def log(self, priority, msg_data):
         """
         Handles all writing of logger data to files. `msg_data` should be
@@ -168,6 +197,11 @@ class LogDispatcher (Observable):
 
         If msg_data is passed as only a string then it will be tagged as "None"
 
+        message_details (or msg_data itself) may also be a callable taking no
+        arguments that returns the message. It is only called if the message
+        is actually written, which keeps expensive DEBUG output free when
+        stonix is not running in debug mode.
+
         For STONIX logging purposes all essential notifications should come in
         on the "WARNING" channel. All informational notifications should come
         in on the "INFO" channel. Debug messages should use "DEBUG". Program
@@ -180,68 +214,72 @@ class LogDispatcher (Observable):
         @author scmcleni
         @author: dkennel
         """
+        # Messages below the configured level are dropped before any
+        # formatting, locking or frame inspection is done.
+        if priority in self.discarded:
+            return
 
-        entry = self.format_message_data(msg_data)
-
-        self.last_message_received = entry
-        self.last_prio = priority
         if isinstance(msg_data, list):
-            msg = str(msg_data[0]).strip() + ':' + str(msg_data[1]).strip()
+            if callable(msg_data[1]):
+                msg_data = [msg_data[0], msg_data[1]()]
+        elif callable(msg_data):
+            msg_data = msg_data()
+
+        #####
+        # Caller information for the message prefix. Message to be in the
+        # format:
+        # DEBUG:<name_of_module>:<name of function>(<line number>): <message to print>
+        caller = sys._getframe(1)
+        modname = caller.f_globals.get('__name__')
+        if modname:
+            prefix = modname + ":" + caller.f_code.co_name
         else:
-            # msg = 'none' + ':' + msg_data.strip()
-            msg = msg_data.strip()
+            prefix = caller.f_code.co_name
         if self.debug:
-            #####
-            # Set up inspect to use stack variables to log file and
-            # method/function that is being called. Message to be in the
-            # format:
-            # DEBUG:<name_of_module>:<name of function>(<line number>): <message to print>
-            stack1 = inspect.stack()[1]
-            mod = inspect.getmodule(stack1[0])
-            if mod:
-                prefix = mod.__name__ + \
-                      ":" + stack1[3] + \
-                      "(" + str(stack1[2]) + "): "
-            else:
-                prefix = stack1[3] + \
-                      "(" + str(stack1[2]) + "): "
+            prefix = prefix + "(" + str(caller.f_lineno) + "): "
         else:
-            stack1 = inspect.stack()[1]
-            mod = inspect.getmodule(stack1[0])
-            if mod:
-                prefix = mod.__name__ + \
-                      ":" + stack1[3] + ":"
+            prefix = prefix + ":"
+        del caller
+
+        # Rules may be run on worker threads (see rulescheduler), keep each
+        # message and its observer notification together.
+        self.loglock.acquire()
+        try:
+            entry = self.format_message_data(msg_data)
+
+            self.last_message_received = entry
+            self.last_prio = priority
+            if isinstance(msg_data, list):
+                msg = str(msg_data[0]).strip() + ':' + str(msg_data[1]).strip()
             else:
-                prefix = stack1[3] + ":"
-
-        if priority == LogPriority.INFO:
-            logging.info('INFO:' + prefix + msg)
-            # self.write_xml_log(priority, entry)
-        elif priority == LogPriority.WARNING:
-            logging.warning('WARNING:' + msg)
-            if self.metadataopen:
-                # self.writemetadataentry(entry)
-                self.xmlreport.writeMetadata(entry)
+                # msg = 'none' + ':' + msg_data.strip()
+                msg = msg_data.strip()
+
+            if priority == LogPriority.INFO:
+                self.writer.put(logging.INFO, 'INFO:' + prefix + msg)
+            elif priority == LogPriority.WARNING:
+                if self.metadataopen:
+                    self.writer.put(logging.WARNING, 'WARNING:' + msg,
+                                    'metadata', entry)
+                else:
+                    self.writer.put(logging.WARNING, 'WARNING:' + msg,
+                                    'finding', entry)
+            elif priority == LogPriority.ERROR:
+                self.writer.put(logging.ERROR, 'ERROR:' + prefix + msg)
+                self.reporterr(msg, prefix)
+            elif priority == LogPriority.CRITICAL:
+                self.writer.put(logging.CRITICAL,
+                                'CRITICAL:' + prefix + msg)
+                # stonix is about to stop, get everything on disk first.
+                self.writer.flush()
+                self.reporterr(msg, prefix)
+            elif priority == LogPriority.DEBUG:
+                self.writer.put(logging.DEBUG, 'DEBUG:' + prefix + msg)
             else:
-                # self.write_xml_log(entry)
-                self.xmlreport.writeFinding(entry)
-        elif priority == LogPriority.ERROR:
-            logging.error('ERROR:' + prefix + msg)
-            # self.write_xml_log(priority, entry)
-            self.reporterr(msg, prefix)
-        elif priority == LogPriority.CRITICAL:
-            logging.critical('CRITICAL:' + prefix + msg)
-            # self.write_xml_log(priority, entry)
-            self.reporterr(msg, prefix)
-        elif priority == LogPriority.DEBUG:
-            logging.debug('DEBUG:' + prefix + msg)
-            # self.write_xml_log(priority, entry)
-        else:
-            # Invalid log priority
-            pass
-
-        self.set_dirty()
-        self.notify_check()
+                # Invalid log priority
+                pass
+        finally:
+            self.loglock.release()
 
     def reporterr(self, errmsg, prefix):
         """reporterr(errmsg)
@@ -320,10 +358,27 @@ Subject: STONIX Error Report: ''' + prefix + '''
         @author: dkennel
         '''
         try:
+            self.flush()
+            self.xmlreport.writeMetrics(getrulemetrics().getrecords())
             self.xmlreport.closeReport()
         except Exception:
             pass
 
+    def flush(self):
+        '''
+        Wait until every message logged so far has been written to the log
+        files and the XML report.
+        '''
+        self.writer.flush()
+
+    def __notify(self):
+        '''
+        Observer notification, run by the LogWriter once per batch of
+        messages rather than once per message.
+        '''
+        self.set_dirty()
+        self.notify_check()
+
     def displaylastrun(self):
         """
         Read through the entirety of the stonix_last.log file and return it.
@@ -403,15 +458,19 @@ Subject: STONIX Error Report: ''' + prefix + '''
         # Configure the python logging utility. Set the minimum reported log
         # data to warning or higher. (INFO and DEBUG messages will be ignored)
 
-        if self.environment.getdebugmode():
-            logging.basicConfig(filename=self.reportlog,
-                                level=logging.DEBUG)
-        elif self.environment.getverbosemode():
-            logging.basicConfig(filename=self.reportlog,
-                                level=logging.INFO)
-        else:
-            logging.basicConfig(filename=self.reportlog,
-                                level=logging.WARNING)
+        # This is what logging.basicConfig() would do, but with a file
+        # handler that leaves flushing to the LogWriter.
+        rootlogger = logging.getLogger('')
+        if not rootlogger.handlers:
+            reporthandler = ReportFileHandler(self.reportlog)
+            reporthandler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+            rootlogger.addHandler(reporthandler)
+            if self.environment.getdebugmode():
+                rootlogger.setLevel(logging.DEBUG)
+            elif self.environment.getverbosemode():
+                rootlogger.setLevel(logging.INFO)
+            else:
+                rootlogger.setLevel(logging.WARNING)
         console = logging.StreamHandler()
         if self.environment.getdebugmode():
             console.setLevel(logging.DEBUG)
@@ -477,6 +536,174 @@ Subject: STONIX Error Report: ''' + prefix + '''
         # --- End machine specific information
 
 
+def closewriter(writerref):
+    '''
+    atexit hook. Write out anything still queued on the LogWriter referenced
+    by writerref and close its XML report if that has not been done yet.
+
+    @param writerref: weakref to a LogWriter
+    '''
+    writer = writerref()
+    if writer is not None:
+        writer.flush()
+        writer.xmlreport.closeReport()
+
+
+class ReportFileHandler(logging.FileHandler):
+    '''
+    FileHandler for the stonix report log. logging flushes a stream after
+    every record, this handler only flushes when the LogWriter has finished
+    a batch (or when the handler is closed).
+    '''
+
+    def flush(self):
+        '''
+        Flushing is done by sync(), see the LogWriter.
+        '''
+        pass
+
+    def sync(self):
+        '''
+        Flush buffered records to the report log.
+        '''
+        logging.FileHandler.flush(self)
+
+
+class LogWriter(object):
+    '''
+    Background writer for the LogDispatcher. Messages are put on a bounded
+    queue and written to the python logging handlers and the XML report by a
+    single worker thread. The thread writes whatever has queued up as one
+    batch, flushes the report log once and notifies observers once per
+    batch.
+
+    @note: Observer notifications are delivered on the writer thread.
+    '''
+
+    def __init__(self, xmlreport, notify, maxqueue=10000, batchsize=500):
+        '''
+        Constructor
+
+        @param xmlreport: xmlReport instance
+        @param notify: callable run after each batch has been written
+        @param maxqueue: int - messages held before log() blocks
+        @param batchsize: int - maximum messages written per batch
+        '''
+        self.xmlreport = xmlreport
+        self.notify = notify
+        self.batchsize = batchsize
+        self.queue = Queue.Queue(maxqueue)
+        self.thread = threading.Thread(target=self.__run,
+                                       name='LogWriter')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def put(self, level, text, xmlkind=None, entry=None):
+        '''
+        Queue a message for writing.
+
+        @param level: int - python logging level
+        @param text: string - formatted log line
+        @param xmlkind: None, 'metadata' or 'finding'
+        @param entry: MessageData for the XML report
+        '''
+        item = (level, text, xmlkind, entry)
+        if self.__inline():
+            self.__write([item])
+        else:
+            self.queue.put(item)
+
+    def flush(self):
+        '''
+        Block until everything queued before this call has been written.
+        '''
+        if self.__inline():
+            self.__drain()
+            return
+        done = threading.Event()
+        self.queue.put(done)
+        # Poll so that a writer thread that has gone away (interpreter
+        # shutdown) cannot hang us.
+        while not done.is_set():
+            if not self.thread.is_alive():
+                self.__drain()
+                return
+            done.wait(0.5)
+
+    def __inline(self):
+        '''
+        Write directly instead of queueing when called from the writer
+        thread itself (an observer logging during notification) or when the
+        writer thread is gone.
+        '''
+        return threading.current_thread() is self.thread or \
+            not self.thread.is_alive()
+
+    def __drain(self):
+        '''
+        Write anything left on the queue from the calling thread.
+        '''
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except Queue.Empty:
+                break
+        self.__write(batch)
+
+    def __run(self):
+        '''
+        Writer thread body.
+        '''
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batchsize:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except Queue.Empty:
+                    break
+            self.__write(batch)
+
+    def __write(self, batch):
+        '''
+        Write a batch of queued items, then flush and notify once.
+
+        @param batch: list of queued items and flush events
+        '''
+        events = []
+        written = False
+        for item in batch:
+            if not isinstance(item, tuple):
+                # threading.Event queued by flush()
+                events.append(item)
+                continue
+            level, text, xmlkind, entry = item
+            try:
+                logging.log(level, text)
+                if xmlkind == 'metadata':
+                    self.xmlreport.writeMetadata(entry)
+                elif xmlkind == 'finding':
+                    self.xmlreport.writeFinding(entry)
+            except Exception:
+                print 'logdispatcher: '
+                print traceback.format_exc()
+            written = True
+        if written:
+            for handler in logging.getLogger('').handlers:
+                if isinstance(handler, ReportFileHandler):
+                    try:
+                        handler.sync()
+                    except Exception:
+                        pass
+            try:
+                self.notify()
+            except Exception:
+                print 'logdispatcher: '
+                print traceback.format_exc()
+        for event in events:
+            event.set()
+
+
 class MessageData:
     """
     Simple object for handling Message Data in a concrete fashion.
@@ -508,6 +735,10 @@ class xmlReport:
     '''
     Simple class to manage the STONIX XML report formatting.
 
+    Metadata is small and kept in memory. Findings are streamed to a spool
+    file next to the report as they arrive so that memory use does not grow
+    with the number of findings. closeReport() assembles the final report.
+
     @author: dkennel
     '''
     def __init__(self, path, debug=False):
@@ -522,9 +753,11 @@ class xmlReport:
         '''
         self.path = path
         self.debug = debug
-        self.root = ET.Element('run')
-        self.meta = ET.SubElement(self.root, 'metadata')
-        self.findings = ET.SubElement(self.root, 'findings')
+        self.meta = ET.Element('metadata')
+        self.metrics = []
+        self.spoolpath = path + '.findings'
+        self.spool = None
+        self.numfindings = 0
         self.closed = False
 
     def __del__(self):
@@ -563,11 +796,40 @@ class xmlReport:
         @param entry: Formatted version of the log data.
         @author: dkennel
         '''
-        ET.SubElement(self.findings, entry.Tag, val=entry.Detail)
+        if self.closed:
+            return
+        if self.spool is None:
+            self.spool = open(self.spoolpath, 'w')
+        self.spool.write(ET.tostring(ET.Element(entry.Tag,
+                                                val=entry.Detail)))
+        self.numfindings += 1
         if self.debug:
             print 'xmlReport.writeFinding: Added entry ' + entry.Tag + \
             ' ' + entry.Detail
 
+    def writeMetrics(self, records):
+        '''
+        xmlReport.writeMetrics(records): The xmlReport method to add the per
+        rule performance measurements to the report, one metrics element per
+        rule and phase. See RuleMetrics.getrecords.
+
+        @param records: list of dicts
+        '''
+        if self.closed:
+            return
+        self.metrics = []
+        for record in records:
+            attributes = {}
+            for key, value in record.items():
+                if isinstance(value, float):
+                    attributes[key] = '%.3f' % value
+                else:
+                    attributes[key] = str(value)
+            self.metrics.append(ET.Element('metrics', attributes))
+        if self.debug:
+            print 'xmlReport.writeMetrics: Added ' + str(len(records)) + \
+            ' entries'
+
     def closeReport(self):
         '''
         xmlReport.closeReport(): This method will write the xmlReport to disk.
@@ -576,11 +838,35 @@ class xmlReport:
         '''
         try:
             if not self.closed:
-                ET.ElementTree(self.root).write(self.path)
                 self.closed = True
+                report = open(self.path, 'w')
+                try:
+                    report.write('<run>')
+                    report.write(ET.tostring(self.meta))
+                    if self.numfindings:
+                        report.write('<findings>')
+                        self.spool.close()
+                        spool = open(self.spoolpath, 'r')
+                        try:
+                            while True:
+                                chunk = spool.read(65536)
+                                if not chunk:
+                                    break
+                                report.write(chunk)
+                        finally:
+                            spool.close()
+                        os.remove(self.spoolpath)
+                        report.write('</findings>')
+                    else:
+                        report.write('<findings />')
+                    for metrics in self.metrics:
+                        report.write(ET.tostring(metrics))
+                    report.write('</run>')
+                finally:
+                    report.close()
             if self.debug:
                 print 'xmlReport.closeReport: dumping the ElementTree: '
-                ET.dump(self.root)
+                print open(self.path, 'r').read()
         except Exception, err:
             if self.debug:
                 print 'logdispatcher.xmlReport.closeReport: Error encountered processing xml'
@@ -0,0 +1,448 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+Created on Oct 18, 2026
+
+NetFacts reads the host's network configuration once and answers the
+Environment's questions about it (interfaces, IP and MAC addresses, default
+route) from tables built in a single pass.
+
+On Linux the tables come straight from the kernel: /proc/net/route for the
+routes, /proc/net/fib_trie for the local IPv4 addresses, /proc/net/if_inet6
+for the IPv6 addresses and /sys/class/net/*/address for the MAC addresses.
+Elsewhere ifconfig -a and route -n get default are each run once. The
+tables are rebuilt after the run's ProbeCache is invalidated, a fix may
+have changed the network configuration.
+
+The host name lookup is done in a helper thread and given up on after a
+timeout so that slow or broken DNS cannot stall startup.
+
+A NetFacts whose root is not / reads the files below that directory
+instead and never runs a command, tests use this with sample /proc trees.
+'''
+import binascii
+import os
+import re
+import socket
+import struct
+import subprocess
+import threading
+from probecache import getprobecache
+
+
+class NetFacts(object):
+    '''
+    Interface, address and route tables for the host, built once.
+    '''
+
+    def __init__(self, root='/', dnstimeout=5):
+        '''
+        Constructor
+
+        @param root: string - directory holding the proc and sys trees to
+            read, anything but / puts the NetFacts in fixture mode
+        @param dnstimeout: int - seconds to wait for the host name lookup
+        '''
+        self.root = root
+        self.dnstimeout = dnstimeout
+        self.lock = threading.Lock()
+        self.tables = None
+        self.generation = None
+        self.hostinfo = None
+
+    def isfixture(self):
+        '''
+        Return True if the tables are read from a sample tree rather than
+        from the running system.
+
+        @return: bool
+        '''
+        return self.root != '/'
+
+    def readlines(self, *parts):
+        '''
+        Return the lines of a file below the root, an empty list if it
+        cannot be read.
+
+        @param parts: path components below the root
+        @return: list of strings
+        '''
+        try:
+            rhandle = open(os.path.join(self.root, *parts), 'r')
+            try:
+                return rhandle.readlines()
+            finally:
+                rhandle.close()
+        except (IOError, OSError):
+            return []
+
+    def gettables(self):
+        '''
+        Return the network tables, building them if they have not been
+        built since the ProbeCache was last invalidated.
+
+        @return: dict with 'interfaces' (name to dict with 'mac', 'ipv4' and
+            'ipv6'), 'defaultif' and 'gateway'
+        '''
+        generation = getprobecache().getgeneration()
+        self.lock.acquire()
+        try:
+            if self.tables is None or self.generation != generation:
+                if os.path.exists(os.path.join(self.root, 'proc', 'net',
+                                               'route')):
+                    self.tables = self.collectproc()
+                elif self.isfixture():
+                    self.tables = self.newtables()
+                else:
+                    self.tables = self.collectcommands()
+                self.generation = generation
+            return self.tables
+        finally:
+            self.lock.release()
+
+    def invalidate(self):
+        '''
+        Forget the tables so that they are built again when next needed.
+        '''
+        self.lock.acquire()
+        try:
+            self.tables = None
+        finally:
+            self.lock.release()
+
+    def newtables(self):
+        '''
+        Return empty network tables.
+
+        @return: dict
+        '''
+        return {'interfaces': {}, 'defaultif': '', 'gateway': ''}
+
+    def getinterface(self, tables, name):
+        '''
+        Return the entry for an interface, adding it if it is new.
+
+        @param tables: dict
+        @param name: string
+        @return: dict
+        '''
+        interfaces = tables['interfaces']
+        if name not in interfaces:
+            interfaces[name] = {'mac': '', 'ipv4': [], 'ipv6': []}
+        return interfaces[name]
+
+    def collectproc(self):
+        '''
+        Build the tables from the Linux proc and sys trees.
+
+        @return: dict
+        '''
+        tables = self.newtables()
+        # Destination, gateway and mask are 32 bit hex numbers in host
+        # byte order
+        routes = []
+        for line in self.readlines('proc', 'net', 'route')[1:]:
+            fields = line.split()
+            try:
+                iface = fields[0]
+                dest = int(fields[1], 16)
+                gateway = int(fields[2], 16)
+                flags = int(fields[3], 16)
+                mask = int(fields[7], 16)
+            except (IndexError, ValueError):
+                continue
+            # RTF_UP
+            if not flags & 1:
+                continue
+            self.getinterface(tables, iface)
+            if dest == 0 and mask == 0:
+                if not tables['defaultif']:
+                    tables['defaultif'] = iface
+                    tables['gateway'] = \
+                        socket.inet_ntoa(struct.pack('=L', gateway))
+            else:
+                routes.append((mask, dest, iface))
+        # Most specific route first
+        routes.sort(key=lambda route: bin(route[0]).count('1'),
+                    reverse=True)
+
+        netdir = os.path.join(self.root, 'sys', 'class', 'net')
+        try:
+            names = sorted(os.listdir(netdir))
+        except OSError:
+            names = []
+        for name in names:
+            entry = self.getinterface(tables, name)
+            for line in self.readlines('sys', 'class', 'net', name,
+                                       'address'):
+                entry['mac'] = line.strip()
+                break
+
+        # The local addresses are the /32 host LOCAL leaves of the trie,
+        # listed once per routing table
+        seen = set()
+        previous = ''
+        for line in self.readlines('proc', 'net', 'fib_trie'):
+            line = line.strip()
+            if line.startswith('|--'):
+                previous = line[3:].strip()
+                continue
+            if line != '/32 host LOCAL' or previous in seen:
+                continue
+            seen.add(previous)
+            try:
+                addr = struct.unpack('=L', socket.inet_aton(previous))[0]
+            except (socket.error, struct.error):
+                continue
+            iface = ''
+            if previous.startswith('127.'):
+                iface = 'lo'
+            else:
+                for mask, dest, name in routes:
+                    if addr & mask == dest:
+                        iface = name
+                        break
+            self.getinterface(tables, iface)['ipv4'].append(previous)
+
+        for line in self.readlines('proc', 'net', 'if_inet6'):
+            fields = line.split()
+            try:
+                addr = socket.inet_ntop(socket.AF_INET6,
+                                        binascii.unhexlify(fields[0]))
+                iface = fields[5]
+            except (IndexError, TypeError, ValueError, socket.error):
+                continue
+            self.getinterface(tables, iface)['ipv6'].append(addr)
+        return tables
+
+    def runcommand(self, command):
+        '''
+        Run a command and return its output, an empty list if it could not
+        be run.
+
+        @param command: list - argv
+        @return: list of strings
+        '''
+        if not os.path.exists(command[0]):
+            return []
+        try:
+            proc = subprocess.Popen(command, stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE, close_fds=True)
+            return proc.communicate()[0].splitlines()
+        except OSError:
+            return []
+
+    def collectcommands(self):
+        '''
+        Build the tables from one run each of ifconfig -a and
+        route -n get default.
+
+        @return: dict
+        '''
+        tables = self.newtables()
+        for sbin in ['/sbin', '/usr/sbin']:
+            ifconfig = os.path.join(sbin, 'ifconfig')
+            if os.path.exists(ifconfig):
+                self.parseifconfig(tables, self.runcommand([ifconfig, '-a']))
+                break
+        for sbin in ['/sbin', '/usr/sbin']:
+            route = os.path.join(sbin, 'route')
+            if os.path.exists(route):
+                self.parseroute(tables, self.runcommand([route, '-n', 'get',
+                                                         'default']))
+                break
+        return tables
+
+    def parseifconfig(self, tables, lines):
+        '''
+        Add the interfaces listed in ifconfig -a output to the tables. Both
+        the Linux net-tools and the BSD/Solaris formats are understood.
+
+        @param tables: dict
+        @param lines: list of strings
+        '''
+        macre = re.compile(r'(?:ether|HWaddr|lladdr)\s+' +
+                           r'((?:[0-9A-Fa-f]{1,2}[:-]){5}[0-9A-Fa-f]{1,2})')
+        inetre = re.compile(r'\binet (?:addr:)?(\d+\.\d+\.\d+\.\d+)')
+        inet6re = re.compile(r'\binet6 (?:addr: ?)?([0-9A-Fa-f:.]+)')
+        entry = None
+        for line in lines:
+            if not line.strip():
+                continue
+            if not line[0].isspace():
+                name = line.split()[0].rstrip(':')
+                entry = self.getinterface(tables, name)
+            if entry is None:
+                continue
+            match = macre.search(line)
+            if match is not None:
+                entry['mac'] = match.group(1)
+            match = inetre.search(line)
+            if match is not None and match.group(1) not in entry['ipv4']:
+                entry['ipv4'].append(match.group(1))
+            match = inet6re.search(line)
+            if match is not None and match.group(1) not in entry['ipv6']:
+                entry['ipv6'].append(match.group(1))
+
+    def parseroute(self, tables, lines):
+        '''
+        Add the default route from route -n get default output to the
+        tables.
+
+        @param tables: dict
+        @param lines: list of strings
+        '''
+        for line in lines:
+            fields = line.split()
+            if len(fields) < 2:
+                continue
+            if fields[0] == 'gateway:':
+                tables['gateway'] = fields[1]
+            elif fields[0] == 'interface:':
+                tables['defaultif'] = fields[1]
+
+    def getinterfaces(self):
+        '''
+        Return the names of all network interfaces.
+
+        @return: list of strings
+        '''
+        return sorted([name for name in self.gettables()['interfaces']
+                       if name])
+
+    def getallips(self):
+        '''
+        Return every IPv4 address configured on the host, loopback
+        included.
+
+        @return: list of strings
+        '''
+        interfaces = self.gettables()['interfaces']
+        iplist = []
+        for name in sorted(interfaces):
+            iplist.extend(interfaces[name]['ipv4'])
+        return iplist
+
+    def getallipv6(self):
+        '''
+        Return every IPv6 address configured on the host.
+
+        @return: list of strings
+        '''
+        interfaces = self.gettables()['interfaces']
+        iplist = []
+        for name in sorted(interfaces):
+            iplist.extend(interfaces[name]['ipv6'])
+        return iplist
+
+    def getdefaultinterface(self):
+        '''
+        Return the interface of the default route, '' if there is none.
+
+        @return: string
+        '''
+        return self.gettables()['defaultif']
+
+    def getgateway(self):
+        '''
+        Return the gateway of the default route, '' if there is none.
+
+        @return: string
+        '''
+        return self.gettables()['gateway']
+
+    def getdefaultip(self):
+        '''
+        Return the first IPv4 address of the default route's interface, ''
+        if that is not known.
+
+        @return: string
+        '''
+        tables = self.gettables()
+        entry = tables['interfaces'].get(tables['defaultif'])
+        if entry and entry['ipv4']:
+            return entry['ipv4'][0]
+        return ''
+
+    def getmacaddr(self, ipaddress=''):
+        '''
+        Return the MAC address of the interface holding ipaddress, or of
+        the default route's interface if no interface holds it. '' if
+        neither has one.
+
+        @param ipaddress: string
+        @return: string
+        '''
+        tables = self.gettables()
+        interfaces = tables['interfaces']
+        for name in sorted(interfaces):
+            entry = interfaces[name]
+            if ipaddress in entry['ipv4'] or ipaddress in entry['ipv6']:
+                if self.isrealmac(entry['mac']):
+                    return entry['mac']
+                break
+        entry = interfaces.get(tables['defaultif'])
+        if entry and self.isrealmac(entry['mac']):
+            return entry['mac']
+        return ''
+
+    def isrealmac(self, mac):
+        '''
+        Return True unless mac is empty or all zeros (loopback).
+
+        @param mac: string
+        @return: bool
+        '''
+        return bool(mac.replace(':', '').replace('-', '').strip('0'))
+
+    def lookuphost(self):
+        '''
+        Return the fully qualified host name and the IPv4 addresses DNS
+        gives for it. If the lookup fails or takes longer than the timeout
+        the local host name and None are returned. The answer is kept for
+        the rest of the run.
+
+        @return: tuple of (string, list of strings or None)
+        '''
+        if self.hostinfo is not None:
+            return self.hostinfo
+        result = {}
+
+        def resolve():
+            try:
+                hostname = socket.getfqdn()
+                result['hostname'] = hostname
+                result['iplist'] = socket.gethostbyname_ex(hostname)[2]
+            except (socket.gaierror, socket.herror):
+                pass
+
+        resolver = threading.Thread(target=resolve, name='NetFacts DNS')
+        resolver.daemon = True
+        resolver.start()
+        resolver.join(self.dnstimeout)
+        if resolver.isAlive():
+            self.hostinfo = (socket.gethostname(), None)
+        else:
+            self.hostinfo = (result.get('hostname', socket.gethostname()),
+                             result.get('iplist'))
+        return self.hostinfo
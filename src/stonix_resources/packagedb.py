@@ -0,0 +1,272 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+
+
+Created on Oct 18, 2026
+
+The PackageDB answers "which package owns this file and what mode and
+digest does the package expect it to have" for any number of paths from a
+single bulk query of the package database, instead of one rpm -Vf per
+path.
+
+On rpm systems one rpm -qa query lists every installed file with its
+expected mode and digest. On dpkg systems the *.list and *.md5sums files
+under /var/lib/dpkg/info are read; dpkg does not record file modes so mode
+checks are not available there. A manifest file in the same tab separated
+format as the rpm query (path, octal mode, digest, package) may be passed
+instead, which is how the unit tests run without a real package database.
+
+Rules get the shared instance from Environment.getpackagedb().
+'''
+import glob
+import hashlib
+import os
+import subprocess
+import threading
+import traceback
+from logdispatcher import LogPriority
+
+RPM = '/bin/rpm'
+DPKGINFO = '/var/lib/dpkg/info'
+RPMQUERY = '[%{FILENAMES}\t%{FILEMODES:octal}\t%{FILEMD5S}\t%{NAME}\n]'
+DIGESTS = {32: hashlib.md5, 40: hashlib.sha1, 64: hashlib.sha256,
+           128: hashlib.sha512}
+
+
+class PackageDB(object):
+    '''
+    Lazily loaded, run scoped map of package owned files.
+    '''
+
+    def __init__(self, logger=None, manifest=None):
+        '''
+        Constructor
+
+        @param logger: logdispatcher object, optional
+        @param manifest: string - path of a manifest file to load instead of
+            the system package database, optional
+        '''
+        self.logger = logger
+        self.manifest = manifest
+        self.lock = threading.RLock()
+        self.loaded = False
+        self.manager = None
+        self.files = {}
+
+    def debug(self, message):
+        '''
+        Log a debug message if we have a logger.
+
+        @param message: string
+        '''
+        if self.logger is not None:
+            self.logger.log(LogPriority.DEBUG, ['PackageDB', message])
+
+    def getmanager(self):
+        '''
+        Return the source the database was loaded from: 'rpm', 'dpkg',
+        'manifest' or None if no package database is available.
+
+        @return: string or None
+        '''
+        self.load()
+        return self.manager
+
+    def load(self):
+        '''
+        Load the package database if it has not been loaded yet.
+        '''
+        with self.lock:
+            if self.loaded:
+                return
+            try:
+                if self.manifest is not None:
+                    rhandle = open(self.manifest, 'r')
+                    try:
+                        self.parse(rhandle)
+                    finally:
+                        rhandle.close()
+                    self.manager = 'manifest'
+                elif os.path.exists(RPM):
+                    self.loadrpm()
+                elif os.path.isdir(DPKGINFO):
+                    self.loaddpkg()
+            except (KeyboardInterrupt, SystemExit):
+                raise
+            except Exception:
+                self.files = {}
+                self.manager = None
+                self.debug('Could not load package database: ' +
+                           traceback.format_exc())
+            self.loaded = True
+            self.debug('Loaded ' + str(len(self.files)) + ' files from ' +
+                       str(self.manager))
+
+    def parse(self, lines):
+        '''
+        Add the entries of an rpm query or manifest to the database. Each
+        line holds a path, octal mode, digest and package name separated by
+        tabs. Empty modes and digests are allowed.
+
+        @param lines: iterable of strings
+        '''
+        for line in lines:
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) != 4 or not fields[0].startswith('/'):
+                continue
+            path, mode, digest, package = fields
+            try:
+                mode = int(mode, 8)
+            except ValueError:
+                mode = None
+            self.add(path, package, mode, digest or None)
+
+    def add(self, path, package, mode=None, digest=None):
+        '''
+        Record that package owns path.
+
+        @param path: string
+        @param package: string - package name
+        @param mode: int - expected st_mode, or None if unknown
+        @param digest: string - expected hex digest, or None if unknown
+        '''
+        self.files.setdefault(path, []).append((package, mode, digest))
+
+    def loadrpm(self):
+        '''
+        Load every installed file from one rpm query.
+        '''
+        proc = subprocess.Popen([RPM, '-qa', '--qf', RPMQUERY],
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, close_fds=True)
+        output, errout = proc.communicate()
+        if proc.returncode != 0:
+            self.debug('rpm query failed: ' + str(errout))
+            return
+        self.parse(output.splitlines())
+        self.manager = 'rpm'
+
+    def loaddpkg(self):
+        '''
+        Load every installed file from the dpkg info directory.
+        '''
+        for listfile in glob.glob(os.path.join(DPKGINFO, '*.list')):
+            package = os.path.basename(listfile)[:-len('.list')]
+            digests = {}
+            md5file = listfile[:-len('.list')] + '.md5sums'
+            if os.path.exists(md5file):
+                rhandle = open(md5file, 'r')
+                try:
+                    for line in rhandle:
+                        fields = line.rstrip('\n').split(None, 1)
+                        if len(fields) == 2:
+                            digests['/' + fields[1]] = fields[0]
+                finally:
+                    rhandle.close()
+            rhandle = open(listfile, 'r')
+            try:
+                for line in rhandle:
+                    path = line.rstrip('\n')
+                    if path.startswith('/'):
+                        self.add(path, package.split(':')[0], None,
+                                 digests.get(path))
+            finally:
+                rhandle.close()
+        self.manager = 'dpkg'
+
+    def getpackages(self, path):
+        '''
+        Return the names of the packages that own path.
+
+        @param path: string
+        @return: list of strings, empty if no package owns path
+        '''
+        self.load()
+        return [entry[0] for entry in self.files.get(path, [])]
+
+    def isowned(self, path):
+        '''
+        Return True if any package owns path.
+
+        @param path: string
+        @return: bool
+        '''
+        self.load()
+        return path in self.files
+
+    def checkmode(self, path, mode=None):
+        '''
+        Compare the mode of path with the mode recorded by the owning
+        package(s).
+
+        @param path: string
+        @param mode: int - st_mode of path if already known, optional
+        @return: True if the mode matches, False if it differs, None if path
+            is not owned or no package records a mode for it
+        '''
+        self.load()
+        expected = [entry[1] for entry in self.files.get(path, [])
+                    if entry[1] is not None]
+        if not expected:
+            return None
+        if mode is None:
+            try:
+                mode = os.lstat(path).st_mode
+            except OSError:
+                return False
+        return mode in expected
+
+    def checkdigest(self, path):
+        '''
+        Compare the content of path with the digest recorded by the owning
+        package(s).
+
+        @param path: string
+        @return: True if the digest matches, False if it differs, None if
+            path is not owned or no package records a digest for it
+        '''
+        self.load()
+        expected = [entry[2] for entry in self.files.get(path, [])
+                    if entry[2] is not None and len(entry[2]) in DIGESTS]
+        if not expected:
+            return None
+        digests = {}
+        try:
+            for digest in expected:
+                algo = DIGESTS[len(digest)]
+                if algo not in digests:
+                    hasher = algo()
+                    rhandle = open(path, 'rb')
+                    try:
+                        for chunk in iter(lambda: rhandle.read(65536), ''):
+                            hasher.update(chunk)
+                    finally:
+                        rhandle.close()
+                    digests[algo] = hasher.hexdigest()
+                if digests[algo] == digest.lower():
+                    return True
+        except (IOError, OSError):
+            return False
+        return False
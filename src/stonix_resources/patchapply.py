@@ -0,0 +1,166 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+
+
+Created on Oct 18, 2026
+
+Pure Python application of unified diffs, as written by difflib for the
+StateChgLogger. This replaces calls to /usr/bin/patch so that undo works in
+process, without a fork per file and on systems that have no patch
+utility.
+
+Hunks are applied exactly (no fuzz). A hunk whose context has moved is
+searched for above and below its recorded position, nearest first, the way
+patch reports an offset.
+'''
+import re
+
+HUNKHEADER = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+
+class PatchError(Exception):
+    '''
+    Raised when a patch can't be parsed or doesn't apply.
+    '''
+    pass
+
+
+class UnifiedPatch(object):
+    '''
+    A parsed unified diff for a single file.
+    '''
+
+    def __init__(self, text):
+        '''
+        Constructor
+
+        @param text: string - the unified diff
+        @raise PatchError: if the diff is malformed
+        '''
+        self.hunks = []
+        self.parse(text)
+
+    def parse(self, text):
+        '''
+        Parse the hunks of a unified diff. Each hunk is stored as a tuple of
+        (old start line, old lines, new lines). Hunk bodies are read by line
+        count so removed lines that look like file headers are handled.
+
+        @param text: string - the unified diff
+        @raise PatchError: if the diff is malformed
+        '''
+        lines = text.splitlines(True)
+        index = 0
+        while index < len(lines):
+            match = HUNKHEADER.match(lines[index])
+            index += 1
+            if not match:
+                # file headers and anything else between hunks
+                continue
+            oldstart = int(match.group(1))
+            oldcount = int(match.group(2) or 1)
+            newcount = int(match.group(4) or 1)
+            oldlines = []
+            newlines = []
+            last = []
+            while len(oldlines) < oldcount or len(newlines) < newcount or \
+                  (index < len(lines) and lines[index].startswith('\\')):
+                if index >= len(lines):
+                    raise PatchError('Truncated hunk at line ' + str(index))
+                line = lines[index]
+                index += 1
+                tag, body = line[0], line[1:]
+                if tag == ' ':
+                    last = [oldlines, newlines]
+                elif tag == '-':
+                    last = [oldlines]
+                elif tag == '+':
+                    last = [newlines]
+                elif tag == '\\':
+                    # "\ No newline at end of file" applies to the line
+                    # before it
+                    for target in last:
+                        target[-1] = target[-1].rstrip('\r\n')
+                    continue
+                elif line in ('\n', '\r\n'):
+                    # empty context line with its leading space stripped
+                    body = line
+                    last = [oldlines, newlines]
+                else:
+                    raise PatchError('Bad hunk line: ' + repr(line))
+                for target in last:
+                    target.append(body)
+            self.hunks.append((oldstart, oldlines, newlines))
+
+    def apply(self, lines):
+        '''
+        Apply the patch to a list of lines and return the patched list. The
+        passed list is not modified.
+
+        @param lines: list of strings, as returned by readlines()
+        @return: list of strings
+        @raise PatchError: if a hunk does not apply
+        '''
+        result = []
+        cursor = 0
+        for oldstart, oldlines, newlines in self.hunks:
+            if oldlines:
+                expected = oldstart - 1
+            else:
+                # pure insertion, oldstart is the line to insert after
+                expected = oldstart
+            pos = self.find(lines, oldlines, expected, cursor)
+            if pos is None:
+                raise PatchError('Hunk at line ' + str(oldstart) +
+                                 ' does not apply')
+            result.extend(lines[cursor:pos])
+            result.extend(newlines)
+            cursor = pos + len(oldlines)
+        result.extend(lines[cursor:])
+        return result
+
+    def find(self, lines, oldlines, expected, start):
+        '''
+        Return the index at which oldlines occur in lines, searching from
+        the expected index outwards but never before start.
+
+        @param lines: list of strings
+        @param oldlines: list of strings
+        @param expected: int - index recorded in the hunk header
+        @param start: int - first index that may be used
+        @return: int or None
+        '''
+        size = len(oldlines)
+        last = len(lines) - size
+        expected = max(start, min(expected, last))
+        for offset in range(0, len(lines) + 1):
+            for pos in (expected - offset, expected + offset):
+                if pos < start or pos > last:
+                    continue
+                if lines[pos:pos + size] == oldlines:
+                    return pos
+            if expected - offset < start and expected + offset > last:
+                break
+        return None
@@ -25,6 +25,8 @@ import re
 import yum,aptGet,portage,zypper,freebsd,solaris
 import traceback
 from logdispatcher import LogPriority
+from probecache import getprobecache
+from pkginventory import getinventory
 
 class Pkghelper(object):
         
@@ -46,6 +48,7 @@ class Pkghelper(object):
                              'freebsd':'freebsd','solaris':'solaris'}
         self.manager = self.determineMgr()
         self.detailedresults = ''
+        self.queue = []
         '''FOR YUM (RHEL,CENTOS,FEDORA)'''
         if self.manager is "yum":
             self.pckgr = yum.Yum(self.logger)
@@ -131,6 +134,9 @@ install command"
             info = traceback.format_exc()
             self.logger.log(LogPriority.ERROR,info)
             raise
+        finally:
+            # Installed packages changed, cached probes are stale
+            getprobecache().invalidate()
 ###############################################################################
     def remove(self, package):
         '''Remove a package. Return a bool indicating success or failure.
@@ -155,6 +161,9 @@ remove command"
             info = traceback.format_exc()
             self.logger.log(LogPriority.ERROR,info)
             raise
+        finally:
+            # Installed packages changed, cached probes are stale
+            getprobecache().invalidate()
 ###############################################################################
     def check(self, package):
         '''Check for the existence of a package in the package manager. 
@@ -166,6 +175,9 @@ remove command"
         @return bool :
         @author Derek T Walker July 2012'''
         try:
+            packages = self.getInventory()
+            if packages is not None:
+                return package in packages
             if self.pckgr.checkInstall(package):
                 return True
             else:
@@ -176,6 +188,132 @@ remove command"
             info = traceback.format_exc()
             self.logger.log(LogPriority.ERROR,info)
             raise
+###############################################################################
+    def getInventory(self):
+        '''Return the names of all installed packages from the inventory
+        shared by every Pkghelper in this process, loading it with one query
+        of the package database if it is missing or stale. None if the
+        backend cannot list its installed packages, in which case callers
+        query the backend per package.
+
+        @return frozenset :'''
+        inventory = getinventory(getattr(self.pckgr, "listInstalled", None))
+        if inventory is None:
+            return None
+        return inventory.getpackages()
+###############################################################################
+    def checkInstalled(self, packages):
+        '''Check the installation status of several packages with a single
+        query of the installed package database. Return a dict of package
+        name to bool; True if the package is installed.
+
+        @param list packages : Names of the packages whose installation status
+            is to be checked. Must be recognizable to the underlying package
+            manager.
+        @return dict :'''
+        packages = list(packages)
+        if not packages:
+            return {}
+        try:
+            results = {}
+            installed = self.getInventory()
+            if installed is not None:
+                for package in packages:
+                    results[package] = package in installed
+                return results
+            found = self.pckgr.checkInstalls(packages)
+            if found is None:
+                found = {}
+            for package in packages:
+                results[package] = bool(found.get(package, False))
+            return results
+        except (KeyboardInterrupt,SystemExit):
+            raise
+        except Exception:
+            info = traceback.format_exc()
+            self.logger.log(LogPriority.ERROR,info)
+            raise
+###############################################################################
+    def queueInstall(self, package):
+        '''Queue the named package to be installed by the next commit().
+        Replaces any intent already queued for the same package.
+
+        @param string package : Name of the package to be installed, must be
+            recognizable to the underlying package manager.'''
+        self.__enqueue("install", package)
+###############################################################################
+    def queueRemove(self, package):
+        '''Queue the named package to be removed by the next commit().
+        Replaces any intent already queued for the same package.
+
+        @param string package : Name of the package to be removed, must be
+            recognizable to the underlying package manager.'''
+        self.__enqueue("remove", package)
+###############################################################################
+    def __enqueue(self, action, package):
+        self.queue = [intent for intent in self.queue if intent[1] != package]
+        self.queue.append((action, package))
+###############################################################################
+    def getQueue(self):
+        '''Return the queued (action, package) intents in the order they
+        will be applied by commit().
+
+        @return list :'''
+        removes = [intent for intent in self.queue if intent[0] == "remove"]
+        installs = [intent for intent in self.queue if intent[0] == "install"]
+        return removes + installs
+###############################################################################
+    def commit(self):
+        '''Apply every queued intent, removals first, with one package
+        manager call for all removals and one for all installs. Dependency
+        resolution, repo metadata loading and the package database lock are
+        paid once per call instead of once per package. If a combined call
+        fails its packages are retried one at a time so that the result says
+        exactly which ones failed. The queue is empty afterwards.
+
+        @return dict : package name -> bool, True if the intent was applied'''
+        results = {}
+        if not self.queue:
+            return results
+        try:
+            if self.enviro.geteuid() == 0:
+                intents = self.getQueue()
+                self.queue = []
+                removes = [pkg for action, pkg in intents if action == "remove"]
+                installs = [pkg for action, pkg in intents
+                            if action == "install"]
+                results.update(self.__resolve(removes,
+                                              self.pckgr.removepackages,
+                                              self.pckgr.removepackage))
+                results.update(self.__resolve(installs,
+                                              self.pckgr.installpackages,
+                                              self.pckgr.installpackage))
+                return results
+            else:
+                msg = "Not running as root, only root can use the pkghelper \
+commit command"
+                raise Exception(msg)
+        except(KeyboardInterrupt,SystemExit):
+            raise
+        except Exception:
+            info = traceback.format_exc()
+            self.logger.log(LogPriority.ERROR,info)
+            raise
+        finally:
+            # Installed packages changed, cached probes are stale
+            getprobecache().invalidate()
+###############################################################################
+    def __resolve(self, packages, batch, single):
+        '''Run batch over all packages, falling back to single per package
+        when there is only one or the batch fails.'''
+        if not packages:
+            return {}
+        if len(packages) > 1 and batch(packages):
+            return dict.fromkeys(packages, True)
+        results = {}
+        for package in packages:
+            results[package] = bool(single(package))
+        return results
 ###############################################################################
     def checkAvailable(self,package):
         try:
@@ -0,0 +1,175 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+Created on Oct 18, 2026
+
+The PackageInventory holds the names of every installed package, read with
+one query of the package database (rpm -qa, dpkg-query -W) the first time
+any Pkghelper needs it. All Pkghelper instances in the process share it, so
+check() and checkInstalled() become set lookups instead of one rpm or dpkg
+process per question.
+
+The inventory reloads itself after the run's ProbeCache is invalidated,
+which happens on every Pkghelper install, remove and commit and whenever a
+rule's fix() runs a command that is not marked pure. The backends run the
+inventory query itself as a pure probe so that reading the inventory during
+a fix does not invalidate it again.
+
+Tests can swap in a fixed package list with
+setinventory(fixtureinventory(path)).
+'''
+import threading
+from probecache import getprobecache
+
+
+class PackageInventory(object):
+    '''
+    Shared, lazily loaded set of installed package names.
+    '''
+
+    def __init__(self, loader):
+        '''
+        Constructor
+
+        @param loader: callable returning an iterable of installed package
+            names, or None if the package database could not be read
+        '''
+        self.loader = loader
+        self.lock = threading.Lock()
+        self.packages = None
+        self.generation = None
+        self.loads = 0
+
+    def getpackages(self):
+        '''
+        Return the installed package names, reloading them if anything may
+        have changed the installed packages since they were read. None if
+        the package database could not be read.
+
+        @return: frozenset or None
+        '''
+        generation = getprobecache().getgeneration()
+        self.lock.acquire()
+        try:
+            if self.packages is None or self.generation != generation:
+                packages = self.loader()
+                self.loads += 1
+                if packages is None:
+                    self.packages = None
+                    self.generation = None
+                else:
+                    self.packages = frozenset(packages)
+                    self.generation = generation
+            return self.packages
+        finally:
+            self.lock.release()
+
+    def isinstalled(self, package):
+        '''
+        Return True if package is installed, False if it is not, None if
+        the package database could not be read.
+
+        @param package: string
+        @return: bool or None
+        '''
+        packages = self.getpackages()
+        if packages is None:
+            return None
+        return package in packages
+
+    def invalidate(self):
+        '''
+        Drop the package names so that the next lookup reloads them.
+        '''
+        self.lock.acquire()
+        try:
+            self.packages = None
+            self.generation = None
+        finally:
+            self.lock.release()
+
+    def getloads(self):
+        '''
+        Return how many times the package database has been read.
+
+        @return: int
+        '''
+        return self.loads
+
+
+def fixtureinventory(path):
+    '''
+    Return a PackageInventory that reads package names, one per line, from
+    a fixture file instead of the package database. Blank lines and lines
+    starting with # are ignored.
+
+    @param path: string
+    @return: PackageInventory
+    '''
+    def loader():
+        packages = []
+        fixture = open(path, 'r')
+        try:
+            for line in fixture:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    packages.append(line)
+        finally:
+            fixture.close()
+        return packages
+    return PackageInventory(loader)
+
+
+INVENTORY = {'inventory': None}
+INVENTORYLOCK = threading.Lock()
+
+
+def getinventory(loader):
+    '''
+    Return the process wide PackageInventory, creating it with loader the
+    first time. None if there is none yet and no loader was given.
+
+    @param loader: callable, see PackageInventory, or None
+    @return: PackageInventory or None
+    '''
+    INVENTORYLOCK.acquire()
+    try:
+        if INVENTORY['inventory'] is None and loader is not None:
+            INVENTORY['inventory'] = PackageInventory(loader)
+        return INVENTORY['inventory']
+    finally:
+        INVENTORYLOCK.release()
+
+
+def setinventory(inventory):
+    '''
+    Replace the process wide PackageInventory. Passing None makes the next
+    getinventory() call create a fresh one.
+
+    @param inventory: PackageInventory or None
+    '''
+    INVENTORYLOCK.acquire()
+    try:
+        INVENTORY['inventory'] = inventory
+    finally:
+        INVENTORYLOCK.release()
@@ -145,6 +145,87 @@ misspelled"
         except Exception:
             self.detailedresults = traceback.format_exc()
             self.logger.log(LogPriority.ERROR, self.detailedresults)
+###############################################################################
+    def installpackages(self, packages):
+        '''Install several packages with a single emerge run. Return a bool
+        indicating success or failure of the whole run.
+
+        @param list packages : Names of the packages to be installed, must be
+            recognizable to the underlying package manager.
+        @return bool :'''
+        try:
+            installed = False
+            self.ch.executeCommand(self.install + " ".join(packages))
+            if self.ch.getReturnCode() == 0:
+                installed = True
+                self.detailedresults += " ".join(packages) + \
+                    " pkgs installed successfully\n"
+            else:
+                self.detailedresults += " ".join(packages) + \
+                    " pkgs not able to install\n"
+            self.logger.log(LogPriority.INFO, self.detailedresults)
+            return installed
+        except(KeyboardInterrupt,SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.ERROR, self.detailedresults)
+###############################################################################
+    def removepackages(self, packages):
+        '''Remove several packages with a single emerge --unmerge run. Return
+        a bool indicating success or failure of the whole run.
+
+        @param list packages : Names of the packages to be removed, must be
+            recognizable to the underlying package manager.
+        @return bool :'''
+        try:
+            removed = False
+            self.ch.executeCommand(self.remove + " ".join(packages))
+            if self.ch.getReturnCode() == 0:
+                removed = True
+                self.detailedresults = " ".join(packages) + \
+                    " pkgs removed successfully\n"
+            else:
+                self.detailedresults = " ".join(packages) + \
+                    " pkgs not able to be removed\n"
+            self.logger.log(LogPriority.INFO, self.detailedresults)
+            return removed
+        except(KeyboardInterrupt,SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.ERROR, self.detailedresults)
+###############################################################################
+    def checkInstalls(self, packages):
+        '''Check the installation status of several packages with a single
+        listing of the installed package database. Entries there are named
+        /var/db/pkg/<category>/<name>-<version>; a package matches on either
+        "name" or "category/name".
+
+        @param list packages : Names of the packages whose installation
+            status is to be checked.
+        @return dict : package name -> bool, True if the package is
+            installed'''
+        try:
+            installed = set()
+            for item in glob.glob('/var/db/pkg/*/*'):
+                category, entry = item.split('/')[-2:]
+                match = re.match(r'^(.+?)-\d', entry)
+                if match:
+                    installed.add(match.group(1))
+                    installed.add(category + '/' + match.group(1))
+            found = {}
+            for package in packages:
+                found[package] = package in installed
+            self.detailedresults += str(found.values().count(True)) + \
+                " of " + str(len(found)) + " pkgs found and installed"
+            self.logger.log(LogPriority.INFO, self.detailedresults)
+            return found
+        except(KeyboardInterrupt,SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.ERROR, self.detailedresults)
 ###############################################################################
     def getInstall(self):
         return self.install
@@ -0,0 +1,183 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+Created on Oct 18, 2026
+
+The ProbeCache remembers the results of read only probe commands (uname -r,
+lsb_release -dr, chkconfig --list, rpm -q and the like) for the rest of the
+run so that rules and helpers asking the same question do not each fork a
+new process for it. Callers opt in per command, see the pure argument of
+CommandHelper.executeCommand().
+
+Anything that may change system state clears the cache: the Controller
+switches the cache into fix mode around each rule's fix() and undo(), any
+command run through CommandHelper that is not marked pure while in fix mode
+clears it, as do the state changing ServiceHelper and Pkghelper methods.
+
+There is one cache per stonix process, get it with getprobecache().
+'''
+import threading
+from logdispatcher import LogPriority
+
+
+class ProbeCache(object):
+    '''
+    Run scoped, thread safe cache of command results keyed by the command.
+    '''
+
+    def __init__(self, maxentries=512, maxbytes=1048576):
+        '''
+        Constructor
+
+        @param maxentries: int - number of results held before the cache is
+            emptied and starts over
+        @param maxbytes: int - results with more output than this are not
+            cached
+        '''
+        self.maxentries = maxentries
+        self.maxbytes = maxbytes
+        self.lock = threading.Lock()
+        self.results = {}
+        self.fixmode = False
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # bumped on every invalidate() so that derived data (see
+        # servicesnapshot) can tell it has gone stale
+        self.generation = 0
+
+    def key(self, command):
+        '''
+        Return the cache key for a command as accepted by CommandHelper, a
+        string (run through the shell) or an argv list.
+
+        @param command: string or list
+        @return: tuple
+        '''
+        if isinstance(command, list):
+            return tuple(command)
+        return ('/bin/sh', '-c', command)
+
+    def get(self, command):
+        '''
+        Return the cached (returncode, stdout, stderr) for command or None.
+        stdout and stderr are fresh lists the caller may modify.
+
+        @param command: string or list
+        @return: tuple or None
+        '''
+        key = self.key(command)
+        with self.lock:
+            result = self.results.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        returncode, stdout, stderr = result
+        return returncode, list(stdout), list(stderr)
+
+    def put(self, command, returncode, stdout, stderr):
+        '''
+        Remember the result of command.
+
+        @param command: string or list
+        @param returncode: int
+        @param stdout: list of lines
+        @param stderr: list of lines
+        '''
+        size = sum([len(line) for line in stdout]) + \
+            sum([len(line) for line in stderr])
+        if size > self.maxbytes:
+            return
+        key = self.key(command)
+        with self.lock:
+            if len(self.results) >= self.maxentries:
+                self.results.clear()
+            self.results[key] = (returncode, tuple(stdout), tuple(stderr))
+
+    def invalidate(self):
+        '''
+        Forget every cached result.
+        '''
+        with self.lock:
+            self.generation += 1
+            if self.results:
+                self.invalidations += 1
+                self.results.clear()
+
+    def setfixmode(self, fixmode):
+        '''
+        Enter or leave fix mode. The cache is cleared on both transitions,
+        while in fix mode commands that are not marked pure clear it too.
+
+        @param fixmode: bool
+        '''
+        self.invalidate()
+        self.fixmode = bool(fixmode)
+
+    def getfixmode(self):
+        '''
+        Return True while a rule's fix() or undo() is running.
+
+        @return: bool
+        '''
+        return self.fixmode
+
+    def getgeneration(self):
+        '''
+        Return a counter that changes every time the cache is invalidated.
+
+        @return: int
+        '''
+        return self.generation
+
+    def getstats(self):
+        '''
+        Return the hit, miss and invalidation counters.
+
+        @return: tuple of (hits, misses, invalidations)
+        '''
+        return self.hits, self.misses, self.invalidations
+
+    def logstats(self, logger):
+        '''
+        Write the hit/miss counters to the debug log.
+
+        @param logger: LogDispatcher instance
+        '''
+        logger.log(LogPriority.DEBUG,
+                   ['ProbeCache', 'hits: ' + str(self.hits) + ' misses: ' +
+                    str(self.misses) + ' invalidations: ' +
+                    str(self.invalidations)])
+
+
+PROBECACHE = ProbeCache()
+
+
+def getprobecache():
+    '''
+    Return the ProbeCache for this stonix process.
+
+    @return: ProbeCache
+    '''
+    return PROBECACHE
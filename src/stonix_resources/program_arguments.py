@@ -99,6 +99,14 @@ class ProgramArguments(object):
                           default=False,
                           help="List all installed rules that stonix will run on this platform.")
 
+        self.parser.add_option("-j", "--jobs", action="store", type="int",
+                          dest="jobs", default=1,
+                          help="Number of rules to report on concurrently. Fix passes are always run one rule at a time.")
+
+        self.parser.add_option("-M", "--metrics", action="store_true",
+                          dest="metrics", default=False,
+                          help="Also write the per rule performance metrics from the XML report to stonix-metrics.json in the log directory and count the files each rule stats.")
+
         #####
         # The Self Update test will look to a development/test environment
         # to test Self Update rather than testing self update
@@ -124,6 +132,9 @@ class ProgramArguments(object):
         if self.opts.list and (self.opts.fix or self.opts.report or self.opts.rollback or self.opts.pcf or self.opts.update):
             self.parser.error('The -l --list option may not be used with the fix, report, rollback, update or GUI options')
 
+        if self.opts.jobs < 1:
+            self.parser.error('The -j --jobs option must be 1 or greater.')
+
         if self.opts.debug:
             print "Selected options: "
             print self.opts
@@ -264,3 +275,21 @@ class ProgramArguments(object):
         @author: D. Kennel
         """
         return self.opts.list
+
+    def getJobs(self):
+        """
+        Return the number of rules that may be run concurrently during
+        report passes.
+
+        @return: int
+        """
+        return self.opts.jobs
+
+    def getMetrics(self):
+        """
+        Return a bool for whether or not the per rule performance metrics
+        should also be written to a JSON file.
+
+        @return: bool
+        """
+        return self.opts.metrics
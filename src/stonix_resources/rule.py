@@ -44,7 +44,6 @@ from observable import Observable
 from configurationitem import ConfigurationItem
 from logdispatcher import LogPriority
 from types import *
-import os
 import re
 from distutils.version import LooseVersion
 
@@ -54,7 +53,7 @@ from localize import DRINITIAL
 from localize import DRREPORTCOMPIANT, DRREPORTNOTCOMPIANT, DRREPORTNOTAVAILABLE
 from localize import DRFIXSUCCESSFUL, DRFIXFAILED, DRFIXNOTAVAILABLE
 from localize import DRUNDOSUCCESSFUL, DRUNDOFAILED, DRUNDONOTAVAILABLE
-from CommandHelper import CommandHelper
+from undoplanner import UndoPlanner
 import traceback
 
 
@@ -95,6 +94,9 @@ LANL-stonix."""
         self.currstate = "notconfigured"
         self.targetstate = "configured"
         self.guidance = []
+        # Files and services this rule reads or modifies. Rules that share
+        # an entry are never run at the same time by the parallel scheduler.
+        self.sharedresources = []
 
     def fix(self):
         """
@@ -149,38 +151,10 @@ LANL-stonix."""
                 self.formatDetailedResults("undo", None, self.detailedresults)
                 self.logdispatch.log(LogPriority.INFO, self.detailedresults)
                 return undosuccessful
-            for entry in eventlist:
-                try:
-                    event = self.statechglogger.getchgevent(entry)
-                    if event["eventtype"] == "perm":
-                        perms = event["startstate"]
-                        os.chmod(event["filepath"], perms[2])
-                        os.chown(event["filepath"], perms[0], perms[1])
-                        
-                    elif event["eventtype"] == "conf":
-                        self.statechglogger.revertfilechanges(event["filepath"], entry)
-                        
-                    elif event["eventtype"] == "comm":
-                        ch = CommandHelper(self.logger)
-                        command = event["command"]
-                        ch.executeCommand(command)
-                        if ch.getReturnCode() != 0:
-                            self.detailedresults = "couldn\'t run the command \
-to undo\n"
-                            self.logger.log(LogPriority.DEBUG, self.detailedresults)
-                    elif event["eventtype"] == "commandstring":
-                        ch = CommandHelper(self.logger)
-                        command = event["command"]
-                        ch.executeCommand(command)
-                        if ch.getReturnCode() != 0:
-                            self.detailedresults = "couldn\'t run the command \
-to undo\n"
-                            self.logger.log(LogPriority.DEBUG, self.detailedresults)
-                    elif event["eventtype"] == "creation":
-                        os.remove(event["filepath"])
-                except(IndexError, KeyError):
-                    self.detailedresults = "EventID " + entry + " not found"
-                    self.logdispatch.log(LogPriority.DEBUG, self.detailedresults)
+            planner = UndoPlanner(self.statechglogger, self.logger)
+            messages = planner.run(eventlist)
+            if messages:
+                self.detailedresults = "\n".join(messages) + "\n"
         except(KeyboardInterrupt, SystemExit):
             raise
         except Exception:
@@ -275,6 +249,16 @@ to undo\n"
         """
         return self.confitems
 
+    def getsharedresources(self):
+        """
+        Return the list of files and services that this rule reads or
+        modifies. Used by the Controller to avoid running two rules that
+        touch the same resource at the same time.
+
+        @return list : strings naming files or services
+        """
+        return self.sharedresources
+
     def getdetailedresults(self):
         """
         Return the detailed results string.
@@ -0,0 +1,241 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+
+Created on Oct 18, 2026
+
+The RuleIndex keeps a small on disk summary of every rule module: the rule
+name and number, whether the rule applies to this platform and whether it
+requires root. The index lets the Controller import and instantiate only the
+rules that will actually be run. It is keyed by the OS family, type and
+version, the STONIX version, the contents of the rules directory and the
+template classes the rules derive from so that an upgrade of either the OS or
+STONIX rebuilds it.
+
+Rules that override isapplicable() are flagged as dynamic in the index. Their
+applicability can depend on more than the platform so they are always loaded
+and asked again.
+'''
+import json
+import os
+import re
+import traceback
+from logdispatcher import LogPriority
+
+
+class RuleIndex(object):
+    '''
+    Persisted index of rule metadata used to avoid importing every rule
+    module on each launch.
+    '''
+
+    def __init__(self, environ, logger):
+        '''
+        Constructor
+
+        @param environ: environment object
+        @param logger: logdispatcher object
+        '''
+        self.environ = environ
+        self.logger = logger
+        self.initlist = ['__init__.py', '__init__.pyc', '__init__.pyo']
+        # Template classes in stonix_resources whose defaults (applicable
+        # dict handling, root requirement) feed into the index entries
+        self.basemodules = ['rule', 'ruleKVEditor']
+        cachepath = self.environ.get_cache_path()
+        if cachepath:
+            self.indexpath = os.path.join(cachepath, 'ruleindex')
+        else:
+            self.indexpath = ''
+
+    def getmodulenames(self):
+        '''
+        Return the sorted names of the rule modules found in the rules
+        directory.
+
+        @return: list of strings
+        '''
+        rulefiles = os.listdir(str(self.environ.get_rules_path()))
+        modulenames = [mod.replace('.py', '') for mod in rulefiles
+                       if re.search("\.py$", mod) and
+                       mod not in self.initlist]
+        modulenames.sort()
+        return modulenames
+
+    def getfilestats(self, path, modules):
+        '''
+        Return the name, mtime and size of each module's source file.
+
+        @param path: string - directory holding the modules
+        @param modules: list of module names
+        @return: list of [name, mtime, size] lists
+        '''
+        stats = []
+        for module in modules:
+            try:
+                fstat = os.stat(os.path.join(path, module + '.py'))
+                stats.append([module, int(fstat.st_mtime), fstat.st_size])
+            except OSError:
+                stats.append([module, 0, 0])
+        return stats
+
+    def getsignature(self):
+        '''
+        Return the key that a stored index must match to be reused. Any
+        change to the platform, the STONIX version, the rule files or the
+        rule template classes yields a different signature.
+
+        @return: dict
+        '''
+        return {'osfamily': self.environ.getosfamily(),
+                'ostype': self.environ.getostype(),
+                'osversion': self.environ.getosver(),
+                'stonixversion': self.environ.getstonixversion(),
+                'rulefiles': self.getfilestats(self.environ.get_rules_path(),
+                                               self.getmodulenames()),
+                'basefiles': self.getfilestats(
+                    self.environ.get_resources_path(), self.basemodules)}
+
+    def load(self):
+        '''
+        Return the stored index entries if a valid index matching the
+        current signature exists, otherwise None.
+
+        @return: list of dicts or None
+        '''
+        if not self.indexpath or not os.path.exists(self.indexpath):
+            return None
+        try:
+            # The index decides which rules run. Only trust it if it belongs
+            # to us and nobody else can write to it.
+            istat = os.stat(self.indexpath)
+            if istat.st_uid != self.environ.geteuid() or \
+               istat.st_mode & 022:
+                self.logger.log(LogPriority.DEBUG,
+                                ['RuleIndex', 'Ignoring unsafe index ' +
+                                 self.indexpath])
+                return None
+            rhandle = open(self.indexpath, 'r')
+            try:
+                data = json.load(rhandle)
+            finally:
+                rhandle.close()
+            if data.get('signature') != self.getsignature():
+                self.logger.log(LogPriority.DEBUG,
+                                ['RuleIndex', 'Index is stale'])
+                return None
+            entries = []
+            for entry in data['rules']:
+                entries.append({'module': str(entry['module']),
+                                'name': str(entry['name']),
+                                'number': int(entry['number']),
+                                'applicable': bool(entry['applicable']),
+                                'dynamic': bool(entry['dynamic']),
+                                'rootrequired': bool(entry['rootrequired'])})
+            return entries
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            self.logger.log(LogPriority.DEBUG,
+                            ['RuleIndex', 'Could not read index: ' +
+                             traceback.format_exc()])
+            return None
+
+    def build(self, rules, failed=None):
+        '''
+        Create index entries from a list of instantiated rules and store
+        them. Modules that failed to load are recorded as dynamic so that
+        they are retried, and their errors reported, on every run.
+
+        @param rules: list of instantiated rule objects
+        @param failed: list of rule module names that could not be loaded
+        @return: list of dicts
+        '''
+        entries = []
+        for rule in rules:
+            try:
+                applicable = bool(rule.isapplicable())
+            except (KeyboardInterrupt, SystemExit):
+                raise
+            except Exception:
+                applicable = False
+            entries.append({'module': rule.__class__.__module__.split('.')[-1],
+                            'name': rule.getrulename(),
+                            'number': rule.getrulenum(),
+                            'applicable': applicable,
+                            'dynamic': self.isdynamic(rule),
+                            'rootrequired': bool(rule.getisrootrequired())})
+        if failed:
+            for module in failed:
+                entries.append({'module': module,
+                                'name': module,
+                                'number': 0,
+                                'applicable': False,
+                                'dynamic': True,
+                                'rootrequired': False})
+        self.save(entries)
+        return entries
+
+    def isdynamic(self, rule):
+        '''
+        Return True if the rule provides its own isapplicable() instead of
+        the data driven one in the Rule template class.
+
+        @param rule: instantiated rule object
+        @return: bool
+        '''
+        for cls in type(rule).__mro__:
+            if 'isapplicable' in cls.__dict__:
+                return cls.__name__ != 'Rule'
+        return False
+
+    def save(self, entries):
+        '''
+        Write the index to disk. Failure to write is logged and otherwise
+        ignored, the index is only an optimization.
+
+        @param entries: list of dicts
+        '''
+        if not self.indexpath:
+            return
+        try:
+            cachedir = os.path.dirname(self.indexpath)
+            if not os.path.exists(cachedir):
+                os.makedirs(cachedir, 0700)
+            tmppath = self.indexpath + '.tmp'
+            fd = os.open(tmppath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                         0600)
+            whandle = os.fdopen(fd, 'w')
+            try:
+                json.dump({'signature': self.getsignature(),
+                           'rules': entries}, whandle)
+            finally:
+                whandle.close()
+            os.rename(tmppath, self.indexpath)
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            self.logger.log(LogPriority.DEBUG,
+                            ['RuleIndex', 'Could not write index: ' +
+                             traceback.format_exc()])
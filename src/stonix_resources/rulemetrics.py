@@ -0,0 +1,325 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+Created on Oct 18, 2026
+
+RuleMetrics records what each rule costs, per rule and phase (report, fix
+or undo): wall and CPU time (the stonix process and the commands it ran),
+processes spawned, commands run through CommandHelper and how many of those
+the ProbeCache answered, files stat'ed, bytes read and written and the
+peak resident set size.
+
+Processes are counted by wrapping subprocess.Popen between install() and
+uninstall(), so rules that use subprocess directly are counted as well.
+Stat calls are only counted when install() is asked to wrap os.stat and
+os.lstat too, which stonix does for --metrics runs; the wrappers sit on the
+FilePermissions hot path. Counts are charged to the measurement running on
+the calling thread. Threads without one (CommandHelper.executeBatch and
+file system scanner workers) keep their own counters, and what they counted
+is charged to a measurement when it ends if it was the only one running.
+Counting never takes a lock. CPU time, I/O and RSS are process wide; with
+--jobs greater than one concurrently running report passes share them.
+
+The LogDispatcher writes the results as <metrics> elements of the XML
+report. There is one RuleMetrics per stonix process, get it with
+getrulemetrics().
+'''
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+try:
+    import resource
+except ImportError:
+    resource = None
+
+COUNTERS = ['subprocesses', 'commands', 'probehits', 'stats']
+
+
+class RuleMetrics(object):
+    '''
+    Run scoped, thread safe per rule and phase performance counters.
+    '''
+
+    def __init__(self):
+        '''
+        Constructor
+        '''
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.records = {}
+        self.order = []
+        self.active = []
+        self.threadcounts = []
+        self.retired = dict.fromkeys(COUNTERS, 0)
+        self.installed = False
+        self.originals = {}
+
+    def install(self, stats=False):
+        '''
+        Start counting process spawns and, if asked to, stat calls. Safe to
+        call more than once.
+
+        @param stats: bool - also wrap os.stat and os.lstat
+        '''
+        with self.lock:
+            if self.installed:
+                return
+            self.installed = True
+        executechild = subprocess.Popen.__dict__['_execute_child']
+        self.originals['_execute_child'] = executechild
+
+        def countedexecutechild(*args, **kwargs):
+            result = executechild(*args, **kwargs)
+            self.count('subprocesses')
+            return result
+        subprocess.Popen._execute_child = countedexecutechild
+
+        if stats:
+            for name in ['stat', 'lstat']:
+                self.__wrapstat(name)
+
+    def uninstall(self):
+        '''
+        Stop counting process spawns and stat calls, putting back what
+        install() replaced.
+        '''
+        with self.lock:
+            if not self.installed:
+                return
+            self.installed = False
+        subprocess.Popen._execute_child = \
+            self.originals.pop('_execute_child')
+        for name in ['stat', 'lstat']:
+            if name in self.originals:
+                setattr(os, name, self.originals.pop(name))
+
+    def __wrapstat(self, name):
+        '''
+        Replace os.<name> with a version that counts its calls.
+
+        @param name: string - 'stat' or 'lstat'
+        '''
+        original = getattr(os, name)
+        self.originals[name] = original
+
+        def countedstat(*args, **kwargs):
+            self.count('stats')
+            return original(*args, **kwargs)
+        countedstat.__name__ = original.__name__
+        countedstat.__doc__ = original.__doc__
+        setattr(os, name, countedstat)
+
+    def snapshot(self):
+        '''
+        Return the process wide counters measurements are taken against.
+
+        @return: dict
+        '''
+        times = os.times()
+        snap = {'wall': time.time(),
+                'cpu': times[0] + times[1],
+                'childcpu': times[2] + times[3],
+                'bytesread': 0,
+                'byteswritten': 0}
+        try:
+            rhandle = open('/proc/self/io', 'r')
+            try:
+                for line in rhandle:
+                    key, _, value = line.partition(':')
+                    if key == 'rchar':
+                        snap['bytesread'] = int(value)
+                    elif key == 'wchar':
+                        snap['byteswritten'] = int(value)
+            finally:
+                rhandle.close()
+        except (IOError, ValueError):
+            if resource is not None:
+                # Block counts are all other platforms offer
+                usage = resource.getrusage(resource.RUSAGE_SELF)
+                snap['bytesread'] = usage.ru_inblock * 512
+                snap['byteswritten'] = usage.ru_oublock * 512
+        return snap
+
+    def getmaxrss(self):
+        '''
+        Return the peak resident set size of the process so far in
+        kilobytes, 0 if it is not known.
+
+        @return: int
+        '''
+        if resource is None:
+            return 0
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            # bytes on OS X, kilobytes elsewhere
+            maxrss = maxrss / 1024
+        return maxrss
+
+    @contextmanager
+    def measure(self, rulename, phase):
+        '''
+        Context manager charging everything done inside it to the rule and
+        phase. A rule measured more than once in the same phase, as the
+        report pass of a fix run is, has its measurements added up.
+
+        @param rulename: string
+        @param phase: string - 'report', 'fix' or 'undo'
+        '''
+        counts = dict.fromkeys(COUNTERS, 0)
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        stack.append(counts)
+        measurement = {'shared': False}
+        with self.lock:
+            if self.active:
+                measurement['shared'] = True
+                for other in self.active:
+                    other['shared'] = True
+            self.active.append(measurement)
+            unmeasured = self.__unmeasured()
+        start = self.snapshot()
+        try:
+            yield
+        finally:
+            end = self.snapshot()
+            stack.pop()
+            with self.lock:
+                self.active.remove(measurement)
+                totals = self.__unmeasured()
+                if not measurement['shared']:
+                    for name in COUNTERS:
+                        counts[name] += totals[name] - unmeasured[name]
+                self.__record(rulename, phase, start, end, counts)
+
+    def __unmeasured(self):
+        '''
+        Return the totals of what threads counted outside of a measurement
+        of their own. Counters of threads that have ended are folded into
+        the retired totals. Called with the lock held.
+
+        @return: dict
+        '''
+        totals = dict(self.retired)
+        live = []
+        for thread, counts in self.threadcounts:
+            for name in COUNTERS:
+                totals[name] += counts[name]
+            if thread.is_alive():
+                live.append((thread, counts))
+            else:
+                for name in COUNTERS:
+                    self.retired[name] += counts[name]
+        self.threadcounts = live
+        return totals
+
+    def __record(self, rulename, phase, start, end, counts):
+        '''
+        Add a finished measurement to its rule and phase. Called with the
+        lock held.
+        '''
+        key = (rulename, phase)
+        record = self.records.get(key)
+        if record is None:
+            record = {'rule': rulename, 'phase': phase, 'runs': 0,
+                      'wall': 0.0, 'cpu': 0.0, 'childcpu': 0.0,
+                      'bytesread': 0, 'byteswritten': 0, 'maxrss': 0}
+            record.update(dict.fromkeys(COUNTERS, 0))
+            self.records[key] = record
+            self.order.append(key)
+        record['runs'] += 1
+        for name in ['wall', 'cpu', 'childcpu', 'bytesread',
+                     'byteswritten']:
+            record[name] += end[name] - start[name]
+        for name in COUNTERS:
+            record[name] += counts[name]
+        record['maxrss'] = max(record['maxrss'], self.getmaxrss())
+
+    def count(self, counter, amount=1):
+        '''
+        Add to one of the counters of the measurement running on this
+        thread. Without one the count goes to this thread's own counters,
+        see measure().
+
+        @param counter: string - one of COUNTERS
+        @param amount: int
+        '''
+        stack = getattr(self.local, 'stack', None)
+        if stack:
+            stack[-1][counter] += amount
+            return
+        counts = getattr(self.local, 'counts', None)
+        if counts is None:
+            counts = self.local.counts = dict.fromkeys(COUNTERS, 0)
+            with self.lock:
+                self.threadcounts.append((threading.current_thread(),
+                                          counts))
+        counts[counter] += amount
+
+    def getrecords(self):
+        '''
+        Return the measurements, one dict per rule and phase in the order
+        they were first taken.
+
+        @return: list of dicts
+        '''
+        with self.lock:
+            return [dict(self.records[key]) for key in self.order]
+
+    def reset(self):
+        '''
+        Forget all measurements.
+        '''
+        with self.lock:
+            self.records = {}
+            self.order = []
+
+    def writejson(self, path):
+        '''
+        Write the measurements to path as a JSON list.
+
+        @param path: string
+        '''
+        tmppath = path + '.tmp'
+        whandle = open(tmppath, 'w')
+        try:
+            json.dump(self.getrecords(), whandle, indent=1, sort_keys=True)
+        finally:
+            whandle.close()
+        os.rename(tmppath, path)
+
+
+RULEMETRICS = RuleMetrics()
+
+
+def getrulemetrics():
+    '''
+    Return the process wide RuleMetrics.
+
+    @return: RuleMetrics
+    '''
+    return RULEMETRICS
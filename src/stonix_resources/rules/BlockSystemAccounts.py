@@ -48,7 +48,7 @@ import traceback
 from ..rule import Rule
 from ..configurationitem import ConfigurationItem
 from ..logdispatcher import LogPriority
-from ..stonixutilityfunctions import readFile, writeFile, iterate, checkPerms
+from ..stonixutilityfunctions import writeFile, iterate, checkPerms
 from ..stonixutilityfunctions import setPerms, resetsecon
 
 
@@ -111,7 +111,7 @@ shells set the value of this to False, or No.'''
         try:
             self.detailedresults = ""
             retval = True
-            contents = readFile("/etc/passwd", self.logger)
+            contents = self.environ.getaccountdb().getlines("/etc/passwd")
             if contents:
                 for line in contents:
                     if re.search("^#", line) or re.match("^\s*$", line):
@@ -172,7 +172,7 @@ in bad format"
                 
             success = True
             path = "/etc/passwd"
-            contents = readFile(path, self.logger)
+            contents = self.environ.getaccountdb().getlines(path)
             tempstring = ""
             tmpfile = path + ".tmp"
             if contents:
@@ -233,6 +233,7 @@ in bad format"
                     self.statechglogger.recordchgevent(myid, event)
                     self.statechglogger.recordfilechange(path, tmpfile, myid)
                     os.rename(tmpfile, path)
+                    self.environ.getaccountdb().invalidate(path)
                     os.chown(path, 0, 0)
                     os.chmod(path, 420)
                     resetsecon(path)
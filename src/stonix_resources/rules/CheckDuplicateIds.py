@@ -193,7 +193,9 @@ class CheckDuplicateIds(Rule):
                                      "Checking : " + adb])
                     namelist = []
                     idlist = []
-                    fdata = open(adb, 'r')
+                    seennames = set()
+                    seenids = set()
+                    fdata = self.environ.getaccountdb().getlines(adb)
                     for line in fdata:
                         line = line.split(':')
                         try:
@@ -205,13 +207,15 @@ class CheckDuplicateIds(Rule):
                                 uid = line[2]
                                 self.logger.log(LogPriority.DEBUG,
                                                 "Checking account: " + name + ' ' + uid)
-                                if name not in namelist:
+                                if name not in seennames:
+                                    seennames.add(name)
                                     namelist.append(name)
                                 else:
                                     issue = "Duplicate Name: NAME('" + name + "'; UID('" + uid + "')"
                                     self.issuelist.append(issue)
                                     retval = False
-                                if uid not in idlist:
+                                if uid not in seenids:
+                                    seenids.add(uid)
                                     idlist.append(uid)
                                 else:
                                     issue = "Duplicate UID: NAME('" + name + "'; UID('" + uid + "')"
@@ -225,7 +229,6 @@ class CheckDuplicateIds(Rule):
                                     "NAMELIST: " + str(namelist))
                     self.logger.log(LogPriority.DEBUG,
                                     "IDLIST: " + str(idlist))
-                    fdata.close()
             return retval
 
         except (KeyboardInterrupt, SystemExit):
@@ -109,9 +109,7 @@ permission.'''
 
         try:
             self.detailedresults = ""
-            f = open('/etc/passwd', 'r')
-            contentlines = f.readlines()
-            f.close()
+            contentlines = self.environ.getaccountdb().getlines('/etc/passwd')
 
             try:
 
@@ -170,9 +168,8 @@ permission.'''
         if self.ConfigureDotFiles.getcurrvalue():
             try:
                 self.detailedresults = ""
-                f = open('/etc/passwd', 'r')
-                contentlines = f.readlines()
-                f.close()
+                accountdb = self.environ.getaccountdb()
+                contentlines = accountdb.getlines('/etc/passwd')
 
                 for line in contentlines:
 
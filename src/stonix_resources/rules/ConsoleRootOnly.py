@@ -67,6 +67,7 @@ class ConsoleRootOnly(Rule):
         "on to console only"
         self.formatDetailedResults("initialize")
         self.guidance = ['CIS, NSA(2.3.1.1), cce3820-8, 3485-0, 4111-1']
+        self.sharedresources = ['/etc/ssh/sshd_config', 'sshd']
         self.applicable = {'type': 'white',
                            'family': ['linux', 'solaris', 'freebsd']}
 
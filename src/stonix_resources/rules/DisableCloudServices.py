@@ -126,9 +126,9 @@ dictionary
 
             self.ph = Pkghelper(self.logdispatch, self.environ)
 
-            for package in self.debianpkglist:
-                if self.ph.check(package):
-                    self.compliant = False
+            installed = self.ph.checkInstalled(self.debianpkglist)
+            if True in installed.values():
+                self.compliant = False
 
         except (KeyboardInterrupt, SystemExit):
             raise
@@ -166,10 +166,14 @@ dictionary
 
         try:
 
+            installed = self.ph.checkInstalled(self.debianpkglist)
             for package in self.debianpkglist:
-                if self.ph.check(package):
-                    self.ph.remove(package)
+                if installed[package]:
+                    self.ph.queueRemove(package)
+            removed = self.ph.commit()
 
+            for package in self.debianpkglist:
+                if removed.get(package):
                     cmd = self.ph.getInstall() + package
 
                     event = {'eventtype': 'commandstring',
@@ -56,6 +56,7 @@ class DisableIPV6(Rule):
         self.helptext = "Disables IPV6 functionality.  For solaris " + \
         "systems only the report will be run"
         self.guidance = ["NSA 2.5.3.1"]
+        self.sharedresources = ['/etc/sysctl.conf']
         self.applicable = {'type': 'white',
                            'family': ['linux', 'solaris', 'freebsd'],
                            'os': {'Mac OS X': ['10.9', 'r', '10.10.10']}}
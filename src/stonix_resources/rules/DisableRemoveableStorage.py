@@ -154,7 +154,7 @@ class DisableRemoveableStorage(Rule):
 
                 # check if usb kernel module exists, non compliant if yes
                 self.ch.wait = False
-                self.ch.executeCommand("uname -r")
+                self.ch.executeCommand("uname -r", pure=True)
                 self.ch.wait = True
                 output = self.ch.getOutput()
                 if output:
@@ -294,51 +294,23 @@ class DisableRemoveableStorage(Rule):
         self.ch = CommandHelper(self.logger)
         
         
-        usb = "IOUSBMassStorageClass"
-        cmd = check + "| grep " + usb
-        self.ch.executeCommand(cmd)
-        
-        #if return code is 0, the kernel module is loaded, thus we need
-        #to disable it
-        if self.ch.getReturnCode() == 0:
-            compliant = False
-            debug += "Usb Kernel module is loaded\n"
-            self.detailedresults += "Usb Kernel module is loaded\n"
-        
-        fw = "IOFireWireSerialBusProtocolTransport"
-        cmd = check + "| grep " + fw
-        self.ch.executeCommand(cmd)
-        
-        #if return code is 0, the kernel module is loaded, thus we need
-        #to disable it
-        if self.ch.getReturnCode() == 0:
-            compliant = False
-            debug += "Firewire kernel module is loaded\n"
-            self.detailedresults += "Firewire kernel module is loaded\n"
-            
-        tb = "AppleThunderboltUTDM"
-        cmd = check + "| grep " + tb
-        self.ch.executeCommand(cmd)
-        
-        #if return code is 0, the kernel module is loaded, thus we need
-        #to disable it
-        if self.ch.getReturnCode() == 0: 
-            compliant = False
-            debug += "Thunderbolt kernel module is loaded\n"
-            self.detailedresults += "Thunderbolt kernel module is loaded\n"
-        
-        sd = "AppleSDXC"
-        cmd = check + "| grep " + sd
-        self.ch.executeCommand(cmd)
-        
-        #if return code is 0, the kernel module is loaded, thus we need
-        #to disable it
-        if self.ch.getReturnCode() == 0:
-            compliant = False
-            debug += "SD card kernel module is loaded\n"
-            self.detailedresults += "SD card kernel module is loaded\n"
-            
-            
+        # The kernel module checks are independent, run them together.
+        # If the return code is 0, the kernel module is loaded, thus we need
+        # to disable it
+        kexts = [("IOUSBMassStorageClass", "Usb Kernel module is loaded\n"),
+                 ("IOFireWireSerialBusProtocolTransport",
+                  "Firewire kernel module is loaded\n"),
+                 ("AppleThunderboltUTDM",
+                  "Thunderbolt kernel module is loaded\n"),
+                 ("AppleSDXC", "SD card kernel module is loaded\n")]
+        results = self.ch.executeBatch([check + "| grep " + kext
+                                        for kext, _ in kexts], pure=True)
+        for (kext, loaded), result in zip(kexts, results):
+            if result.returncode == 0:
+                compliant = False
+                debug += loaded
+                self.detailedresults += loaded
+
         if debug:
             self.logger.log(LogPriority.DEBUG, debug)
         return compliant
@@ -487,7 +459,7 @@ class DisableRemoveableStorage(Rule):
                             resetsecon(blacklistf)
                 # get the current version of the kernel
                 self.wait = False
-                self.ch.executeCommand("uname -r")
+                self.ch.executeCommand("uname -r", pure=True)
                 self.wait = True
                 output = self.ch.getOutput()
                 if output:
@@ -88,10 +88,8 @@ class DisableWeakAuthentication(Rule):
         try:
             self.helper = Pkghelper(self.logger, self.environ)
             compliant = True
-            for item in self.rsh:
-                if self.helper.check(item):
-                    compliant = False
-                    break
+            if True in self.helper.checkInstalled(self.rsh).values():
+                compliant = False
             for item in self.pams:
                 found = False
                 if os.path.exists(item):
@@ -162,10 +160,12 @@ class DisableWeakAuthentication(Rule):
             if not self.ci.getcurrvalue():
                 return
             success = True
+            installed = self.helper.checkInstalled(self.rsh)
             for item in self.rsh:
-                if self.helper.check(item):
-                    if not self.helper.remove(item):
-                        success = False
+                if installed[item]:
+                    self.helper.queueRemove(item)
+            if False in self.helper.commit().values():
+                success = False
             if self.incorrects:
                 for item in self.incorrects:
                     tempstring = ""
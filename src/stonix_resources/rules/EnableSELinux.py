@@ -256,7 +256,7 @@ enter (inside the terminal or window, whichever is available) is done'''
                             if conf1 or conf2:
                                 self.detailedresults += "Grub file is non compliant\n"
                                 compliant = False
-                    if self.ch.executeCommand(["/usr/sbin/sestatus"]):
+                    if self.ch.executeCommand(["/usr/sbin/sestatus"], pure=True):
                         output = self.ch.getOutput()
                         error = self.ch.getError()
                         if output:
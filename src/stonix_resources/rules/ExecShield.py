@@ -70,6 +70,7 @@ va_randomize which randomizes the locations of various memory regions.'''
         self.tmpPath = '/etc/sysctl.conf.tmp'
         self.comment = re.compile('^#|^;')
         self.guidance = ['CCE-27007-4', 'CCE-26999-3']
+        self.sharedresources = ['/etc/sysctl.conf']
         self.applicable = {'type': 'white',
                            'family': ['linux']}
         self.varandomcompliant = False
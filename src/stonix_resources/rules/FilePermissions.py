@@ -38,18 +38,16 @@ rule class
 from __future__ import absolute_import
 import os
 import traceback
-import subprocess
 import random
 import shutil
 import stat
 import re
-import pwd
-import grp
 
 from ..rule import Rule
 from ..stonixutilityfunctions import *
 from ..logdispatcher import LogPriority
 from ..localize import SITELOCALWWWDIRS
+from ..fsscanner import FSScanner
 
 
 class FilePermissions(Rule):
@@ -143,6 +141,25 @@ users path are very dangerous.'''
         ww_default = True
         self.fixww = self.initCi(ww_datatype, ww_key, ww_instructions,
                                  ww_default)
+        datatype = 'bool'
+        key = 'incrementalscan'
+        instructions = '''If set to yes or true the FilePermissions rule will keep an
+index of the directories it has scanned and on later runs will only list the
+directories that have changed. This makes repeated runs much faster. A chmod or
+chown of an existing file does not change its directory and will not be seen
+by an incremental scan, so a full scan is still done every FULLSCANDAYS
+days.'''
+        default = False
+        self.incrementalscan = self.initCi(datatype, key, instructions,
+                                           default)
+        datatype = 'int'
+        key = 'fullscandays'
+        instructions = '''When INCREMENTALSCAN is enabled, the number of days
+after which the FilePermissions rule discards its directory index and scans
+every file again.'''
+        default = 7
+        self.fullscandays = self.initCi(datatype, key, instructions, default)
+        self.scanindex = os.path.join(self.infodir, 'scanindex.json')
         self.hasrunalready = False
         self.wwresults = ''
         self.suidresults = ''
@@ -189,10 +206,9 @@ users path are very dangerous.'''
 
     def multifind(self):
         '''
-        Private method that runs the find command on the file system to create
-        lists of world writable, suid/sgid, and unowned files. The invocation
-        of the find shell command is a bit complex to do all of this in one
-        shot.
+        Private method that scans the local file systems to create lists of
+        world writable, suid/sgid, and unowned files. The scan itself is done
+        in one pass by an FSScanner.
 
         @author: dkennel
         '''
@@ -226,128 +242,27 @@ users path are very dangerous.'''
                     os.rename(dbsets[set]['db'], dbsets[set]['last'])
 
             fslist = self.getfilesystems()
+            roots = []
             for filesystem in fslist:
                 if filesystem in self.bypassfs.getcurrvalue():
                     self.logger.log(LogPriority.DEBUG,
                                     ['FilePermissions.multifind',
                                      'Skipping Filesystem: ' + str(filesystem)])
                     continue
-                self.logger.log(LogPriority.DEBUG,
-                                ['FilePermissions.multifind',
-                                 'Walking Filesystem: ' + str(filesystem)])
-                if self.findoverrun:
-                        break
-                for root, dirs, files in os.walk(filesystem):
-                    # check the number of hits we have if we've got 30,000
-                    # hits then this FS is so bad we don't want to continue
-                    try:
-                        if len(dbsets['ww']['results']) > 25000:
-                            self.logger.log(LogPriority.DEBUG,
-                                            ['FilePermissions.multifind',
-                                            'WW overflow!'])
-                            self.findoverrun = True
-                    except TypeError:
-                        pass
-                    try:
-                        if len(dbsets['suid']['results']) > 25000:
-                            self.logger.log(LogPriority.DEBUG,
-                                            ['FilePermissions.multifind',
-                                            'SUID overflow!'])
-                            self.findoverrun = True
-                    except TypeError:
-                        pass
-                    try:
-                        if len(dbsets['unowned']['results']) > 25000:
-                            self.logger.log(LogPriority.DEBUG,
-                                            ['FilePermissions.multifind',
-                                            'Unowned overflow!'])
-                            self.findoverrun = True
-                    except TypeError:
-                        pass
-
-                    if self.findoverrun:
-                        break
-
-                    # This wacky looking snippet filters out directories that
-                    # are actually file system mount points
-                    dirs[:] = [dirname for dirname in dirs if not
-                               os.path.ismount(os.path.join(root, dirname))]
-                    for dirname in dirs:
-                        path = os.path.join(root, dirname)
-                        try:
-                            mode = os.stat(path)
-                        except OSError:
-                            continue
-                        worldwrite = mode.st_mode & stat.S_IWOTH
-                        # sticky = mode.st_mode & stat.S_ISVTX
-                        if worldwrite:
-                            dbsets['ww']['results'].append(path)
-                            self.logger.log(LogPriority.DEBUG,
-                                            ['FilePermissions.multifind',
-                                             'Found WW Dir: ' + str(path)])
-                    for name in files:
-                        try:
-                            if len(dbsets['ww']['results']) > 25000:
-                                self.logger.log(LogPriority.DEBUG,
-                                                ['FilePermissions.multifind',
-                                                'WW overflow!'])
-                                self.findoverrun = True
-                        except TypeError:
-                            pass
-                        try:
-                            if len(dbsets['suid']['results']) > 25000:
-                                self.logger.log(LogPriority.DEBUG,
-                                                ['FilePermissions.multifind',
-                                                'SUID overflow!'])
-                                self.findoverrun = True
-                        except TypeError:
-                            pass
-                        try:
-                            if len(dbsets['unowned']['results']) > 25000:
-                                self.logger.log(LogPriority.DEBUG,
-                                                ['FilePermissions.multifind',
-                                                'Unowned overflow!'])
-                                self.findoverrun = True
-                        except TypeError:
-                            pass
-
-                        if self.findoverrun:
-                            break
-
-                        fpath = os.path.join(root, name)
-                        if os.path.islink(fpath):
-                            continue
-                        try:
-                            fmode = os.stat(fpath)
-                        except OSError:
-                            continue
-                        worldwrite = fmode.st_mode & stat.S_IWOTH
-                        if worldwrite:
-                            dbsets['ww']['results'].append(fpath)
-                            self.logger.log(LogPriority.DEBUG,
-                                            ['FilePermissions.multifind',
-                                             'Found WW File: ' + str(fpath)])
-                        suid = fmode.st_mode & stat.S_ISUID
-                        sgid = fmode.st_mode & stat.S_ISGID
-                        if suid or sgid:
-                            dbsets['suid']['results'].append(fpath)
-                            self.logger.log(LogPriority.DEBUG,
-                                            ['FilePermissions.multifind',
-                                             'Found SUID File: ' + str(fpath)])
-                        try:
-                            uname = pwd.getpwuid(fmode.st_uid)[0]
-                        except KeyError:
-                            dbsets['unowned']['results'].append(fpath)
-                            self.logger.log(LogPriority.DEBUG,
-                                            ['FilePermissions.multifind',
-                                             'Found unowned File: ' + str(fpath)])
-                        try:
-                            gname = grp.getgrgid(fmode.st_gid)[0]
-                        except KeyError:
-                            dbsets['unowned']['results'].append(fpath)
-                            self.logger.log(LogPriority.DEBUG,
-                                            ['FilePermissions.multifind',
-                                             'Found unowned File, bad group: ' + str(fpath)])
+                roots.append(filesystem)
+            scanner = FSScanner(self.logger)
+            if self.incrementalscan.getcurrvalue():
+                maxage = self.fullscandays.getcurrvalue() * 86400
+                scanner.loadindex(self.scanindex, maxage)
+            elif os.path.exists(self.scanindex):
+                os.remove(self.scanindex)
+            results = scanner.scan(roots)
+            if scanner.isoverrun():
+                self.findoverrun = True
+            elif self.incrementalscan.getcurrvalue():
+                scanner.saveindex(self.scanindex)
+            for myset in dbsets:
+                dbsets[myset]['results'] = sorted(results[myset])
             for myset in dbsets:
                 data = '\n'.join(dbsets[myset]['results'])
                 whandle = open(dbsets[myset]['db'], 'w')
@@ -368,6 +283,23 @@ users path are very dangerous.'''
                              self.detailedresults])
             raise
 
+    def readdb(self, path):
+        '''
+        Return the paths listed in one of the result db files as a set. A
+        missing file is treated as empty.
+
+        @param path: string - path of the db file
+        @return: set of strings
+        '''
+        try:
+            rhandle = open(path, 'r')
+        except IOError:
+            return set()
+        try:
+            return set([line.strip() for line in rhandle if line.strip()])
+        finally:
+            rhandle.close()
+
     def wwreport(self):
         '''Public method to report on installed WorldWritable files.
         @author: dkennel
@@ -394,39 +326,26 @@ users path are very dangerous.'''
                   '/private/var/tmp', '/Library/Caches']
         for pathelement in SITELOCALWWWDIRS:
             wwlist.append(pathelement)
-        try:
-            lastrun = open(self.wwdbfile, 'r').readlines()
-        except(IOError):
-            lastrun = []
+        wwlist = set(wwlist)
+        lastrun = self.readdb(self.wwdbfile)
         self.logger.log(LogPriority.DEBUG,
                         ['WorldWritables.report',
-                         'lastrun: ' + str(lastrun)])
-        prevrun = []
-        if os.path.exists(self.wwlast):
-            prevrun = open(self.wwlast, 'r').readlines()
-        firstrun = []
-        if os.path.exists(self.wworigin):
-            firstrun = open(self.wworigin, 'r').readlines()
-        newfilessincelast = []
-        newfilessinceorigin = []
+                         'lastrun: ' + str(sorted(lastrun))])
+        prevrun = self.readdb(self.wwlast)
+        firstrun = self.readdb(self.wworigin)
+        newfilessincelast = sorted(lastrun - prevrun)
+        newfilessinceorigin = sorted(lastrun - firstrun)
         notsticky = []
         notknown = []
-        # Important! lines coming from the files will have newlines unless
-        # they are stripped.
-        for wwfile in lastrun:
-            wwpath = wwfile.strip()
-            if wwfile not in prevrun:
-                newfilessincelast.append(wwpath)
-            if wwfile not in firstrun:
-                newfilessinceorigin.append(wwpath)
+        for wwpath in sorted(lastrun):
             try:
                 mode = os.stat(wwpath)[stat.ST_MODE]
-                if os.path.isdir(wwpath) and not bool(mode & stat.S_ISVTX):
-                    notsticky.append(wwpath)
-                if wwpath not in wwlist:
-                    notknown.append(wwpath)
             except OSError:
                 continue
+            if stat.S_ISDIR(mode) and not bool(mode & stat.S_ISVTX):
+                notsticky.append(wwpath)
+            if wwpath not in wwlist:
+                notknown.append(wwpath)
         if len(newfilessincelast) > 15:
             self.logger.log(LogPriority.DEBUG,
                             ['WorldWritables.report',
@@ -749,31 +668,17 @@ find / -xdev -type f \( -perm -0002 -a ! -perm -1000 \) -print'''
                     '/usr/bin/ping',
                     '/usr/bin/ping6',
                     '/usr/bin/mount']
+        suidlist = set(suidlist)
         compliant = False
-        try:
-            lastrun = open(self.suiddbfile, 'r').readlines()
-        except(IOError):
-            # Probably first run and the db doesn't exist yet.
-            lastrun = []
-        prevrun = []
-        if os.path.exists(self.suidlast):
-            prevrun = open(self.suidlast, 'r').readlines()
-        firstrun = []
-        if os.path.exists(self.suidorigin):
-            firstrun = open(self.suidorigin, 'r').readlines()
-        newfilessincelast = []
-        newfilessinceorigin = []
+        lastrun = self.readdb(self.suiddbfile)
+        prevrun = self.readdb(self.suidlast)
+        firstrun = self.readdb(self.suidorigin)
+        newfilessincelast = sorted(lastrun - prevrun)
+        newfilessinceorigin = sorted(lastrun - firstrun)
         notknown = []
         wrongmode = []
-        # Important! lines coming from the files will have newlines unless
-        # they are stripped.
-        for suidfile in lastrun:
-            suidpath = suidfile.strip()
-            if suidfile not in prevrun:
-                newfilessincelast.append(suidpath)
-            if suidfile not in firstrun:
-                newfilessinceorigin.append(suidpath)
-            rpmchkval = self.rpmcheck(suidfile)
+        for suidpath in sorted(lastrun):
+            rpmchkval = self.rpmcheck(suidpath)
             if rpmchkval > 3:
                 if suidpath not in suidlist:
                     notknown.append(suidpath)
@@ -863,26 +768,11 @@ find / -xdev \( -perm -04000 -o -perm -02000 \) -print
         @author: dkennel
         '''
         compliant = False
-        try:
-            lastrun = open(self.nodbfile, 'r').readlines()
-        except(IOError):
-            lastrun = []
-        prevrun = []
-        if os.path.exists(self.nolast):
-            prevrun = open(self.nolast, 'r').readlines()
-        firstrun = []
-        if os.path.exists(self.noorigin):
-            firstrun = open(self.noorigin, 'r').readlines()
-        newfilessincelast = []
-        newfilessinceorigin = []
-        # Important! lines coming from the files will have newlines unless
-        # they are stripped.
-        for suidfile in lastrun:
-            suidpath = suidfile.strip()
-            if suidfile not in prevrun:
-                newfilessincelast.append(suidpath)
-            if suidfile not in firstrun:
-                newfilessinceorigin.append(suidpath)
+        lastrun = self.readdb(self.nodbfile)
+        prevrun = self.readdb(self.nolast)
+        firstrun = self.readdb(self.noorigin)
+        newfilessincelast = sorted(lastrun - prevrun)
+        newfilessinceorigin = sorted(lastrun - firstrun)
         strnewfilessincelast = ''
         if len(newfilessincelast) > 15:
             strnewfilessincelast = str(len(newfilessincelast))
@@ -946,32 +836,28 @@ find / -xdev \( -nouser -o -nogroup \) -print
         found in the RPM database but the mode has changed we return 0. If the
         file was found and the mode has not changed we return 1. If the file
         was not found we return 3. If the system does not use RPM then we
-        return 4. If something weird happens we return 5.
+        return 4. If something weird happens we return 5. The lookups are
+        made against the PackageDB which queries rpm once per run.
 
         @return: int
         @author: dkennel
         '''
         path = path.strip()
-        if not os.path.exists('/bin/rpm'):
-            return 4
-        cmd = '/bin/rpm -Vf ' + path
         try:
-            proc = subprocess.Popen(cmd, shell=True, close_fds=True,
-                                    stdout=subprocess.PIPE,
-                                    stderr=subprocess.PIPE)
-            output = proc.stdout.readlines()
-            errout = proc.stderr.readlines()
+            packagedb = self.environ.getpackagedb()
+            manager = packagedb.getmanager()
+            # dpkg does not record file modes
+            if manager is None or manager == 'dpkg':
+                return 4
+            if not packagedb.isowned(path):
+                return 3
+            modeok = packagedb.checkmode(path)
             self.logger.log(LogPriority.DEBUG,
                             ['AuditSUID.rpmcheck',
-                             'rpm -Vf Results: ' + str(output) + str(errout)])
-            if len(output) == 0:
-                for line in errout:
-                    if re.search('No such file or directory', line):
-                        return 3
-                return 5
-            for line in output:
-                if re.search('M', line):
-                    return 0
+                             'Packages: ' + str(packagedb.getpackages(path)) +
+                             ' mode matches: ' + str(modeok)])
+            if modeok is False:
+                return 0
             return 1
         except (KeyboardInterrupt, SystemExit):
             # User initiated exit
@@ -1092,6 +978,11 @@ has been called a second time. The previous results are displayed. '''
                         except (OSError):
                             # catch OSError because we may be NFS or RO
                             continue
+                        # The directory index can't see mode changes of
+                        # existing files, force the next scan to be a full
+                        # one.
+                        if os.path.exists(self.scanindex):
+                            os.remove(self.scanindex)
         except (KeyboardInterrupt, SystemExit):
             # User initiated exit
             raise
@@ -77,6 +77,7 @@ class InstallBanners(RuleKVEditor):
                          'CCE 4222-6', 'CCE 4103-8', 'CCE 4870-2',
                          'CCE 4896-7']
         self.iditerator = 0
+        self.sharedresources = ['/etc/ssh/sshd_config', 'sshd']
         self.applicable = {'type': 'white',
                            'family': ['linux', 'solaris', 'freebsd'],
                            'os': {'Mac OS X': ['10.9', 'r', '10.10.10']}}
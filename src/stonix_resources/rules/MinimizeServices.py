@@ -397,6 +397,7 @@ should be space separated.'''
         compliant = True
         myresults = "Unauthorized running services detected: "
         try:
+            self.servicehelper.snapshot()
             servicelist = self.servicehelper.listservices()
             allowedlist = self.svcslistci.getcurrvalue()
             corelist = self.svcslistci.getdefvalue()
@@ -455,6 +456,9 @@ should be space separated.'''
         if not self.minimizeci.getcurrvalue():
             return True
         try:
+            # Audit everything from one snapshot before disabling anything,
+            # the first change invalidates the snapshot.
+            self.servicehelper.snapshot()
             servicelist = self.servicehelper.listservices()
             allowedlist = self.svcslistci.getcurrvalue()
             for service in servicelist:
@@ -467,7 +471,8 @@ should be space separated.'''
                                      "Audit: " + service + str(running)])
                     if running and service not in self.specials:
                         changes.append(service)
-                        self.servicehelper.disableservice(service)
+            for service in changes:
+                self.servicehelper.disableservice(service)
             mytype = 'command'
             mystart = []
             myend = changes
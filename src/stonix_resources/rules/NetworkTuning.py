@@ -78,6 +78,7 @@ class NetworkTuning(Rule):
             self.networkTuning1 = self.__InitializeNetworkTuning1()
             self.networkTuning2 = self.__InitializeNetworkTuning2()
         self.guidance = ["NSA 2.5.1.1", "NSA 2.5.1.2"]
+        self.sharedresources = ['/etc/sysctl.conf']
         self.applicable = {'type': 'white',
                            'family': ['linux', 'solaris', 'freebsd'],
                            'os': {'Mac OS X': ['10.9', 'r', '10.10.10']}}
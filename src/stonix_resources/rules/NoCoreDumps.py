@@ -55,6 +55,7 @@ class NoCoreDumps(Rule):
         self.helptext = "This rule disables the ability of the system to " + \
         "produce core dump images"
         self.guidance = ["NSA 2.2.4.2"]
+        self.sharedresources = ['/etc/sysctl.conf']
         self.applicable = {'type': 'white',
                            'family': ['linux', 'solaris', 'freebsd'],
                            'os': {'Mac OS X': ['10.9', 'r', '10.10.10']}}
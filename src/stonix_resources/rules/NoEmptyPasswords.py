@@ -30,7 +30,7 @@ Created on Oct 29, 2012
 '''
 
 from __future__ import absolute_import
-from ..stonixutilityfunctions import setPerms, checkPerms, readFile, writeFile
+from ..stonixutilityfunctions import setPerms, checkPerms, writeFile
 from ..stonixutilityfunctions import getUserGroupName
 from ..rule import Rule
 from ..logdispatcher import LogPriority
@@ -97,7 +97,7 @@ class NoEmptyPasswords(Rule):
 /etc/passwd file\n"
                 compliant = False
             else:
-                contents = readFile(self.passwd, self.logger)
+                contents = self.environ.getaccountdb().getlines(self.passwd)
                 if not contents:
                     self.detailedresults += "This system contains an \
 /etc/passwd file but it's blank\n"
@@ -120,26 +120,22 @@ class NoEmptyPasswords(Rule):
             if not self.users:
                 self.detailedresults += "There are no local accounts on this \
 system that need to be checked for empty passwords\n"
-            contents = readFile(self.shadow, self.logger)
-            if not contents:
+            entries = self.environ.getaccountdb().getentries(self.shadow)
+            if not entries:
                 self.detailedresults += "Your system contains an \
 /etc/shadow file or /etc/master.passwd file but it's blank\n"
                 compliant = False
             else:
                 try:
+                    # Collect the accounts with an empty hash once instead of
+                    # rescanning the whole file for every user.
+                    emptyhash = set([fields[0] for fields in entries
+                                     if len(fields) > 1 and
+                                     fields[1].strip() == ""])
                     for user in self.users:
-                        for line in contents:
-                            if re.search(":", line):
-                                line = line.split(":")
-                                if line[0] == user:
-                                    # if line[1].isdigit():
-                                    #    compliant = False
-                                    # elif line[1].strip() == "":
-                                    if line[1].strip() == "":
-                                        if line[0] not in self.empty:
-                                            self.empty.append(line[0])
-                                            compliant = False
-                                            break
+                        if user in emptyhash and user not in self.empty:
+                            self.empty.append(user)
+                            compliant = False
                 except IndexError:
                     self.detailedresults += traceback.format_exc() + "\n"
                     self.detailedresults += "Index out of range\n"
@@ -273,7 +269,7 @@ cannot perform fix"
             permswrong = True
             if not setPerms(self.shadow, [0, 0, 256], self.logger):
                 success = False
-        contents = readFile(self.shadow, self.logger)
+        contents = self.environ.getaccountdb().getlines(self.shadow)
         if not contents:
             return False
         if self.empty:
@@ -306,6 +302,7 @@ not continue to complete fix"
             if not writeFile(self.tempfile, config, self.logger):
                 success = False
             os.rename(tempfile, self.shadow)
+            self.environ.getaccountdb().invalidate(self.shadow)
             if permswrong:
                 os.chown(self.shadow, 0, 0)
                 os.chmod(self.shadow, 256)
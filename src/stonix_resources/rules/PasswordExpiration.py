@@ -42,7 +42,6 @@ from ..KVEditorStonix import KVEditorStonix
 from ..CommandHelper import CommandHelper
 from ..pkghelper import Pkghelper
 from time import strftime
-from subprocess import Popen, PIPE
 import traceback
 import re
 import os
@@ -79,6 +78,23 @@ class PasswordExpiration(Rule):
         self.fixable, self.shadow = True, True
         self.editor1, self.editor2 = "", ""
         self.fixusers = []
+        self.shadowresults = {}
+        # (field index, result key, default for blank fields, test for a
+        # non compliant value, debug message)
+        self.shadowagingchecks = [
+            (3, "min", 0, lambda val: val < 7,
+             "field 4 not equal to 7 in shadow\n"),
+            (4, "max", 0, lambda val: val > 180,
+             "expiration is not 180 or less\n"),
+            (5, "warn", 0, lambda val: val < 28,
+             "warnings not set to 28 days\n"),
+            (6, "inactive", 99, lambda val: val > 7,
+             "Account lock is not set to 7\n")]
+        self.bsdagingchecks = [
+            (5, "change", 0, lambda val: val > 180,
+             "expiration is not 180 or less\n"),
+            (6, "expire", 0, lambda val: val > 7,
+             "Account lock is not set to 7\n")]
 
 ###############################################################################
 
@@ -219,8 +235,20 @@ class PasswordExpiration(Rule):
 ###############################################################################
 
     def chkShadow(self):
+        '''
+        Check the permissions of the shadow file and the password aging
+        fields of every unlocked account with a uid of 500 or greater. Every
+        uid is resolved in one pass over the account database rather than
+        one id command per account. Per account results are kept in
+        self.shadowresults, keyed by account name, and the accounts needing
+        a fix are kept in self.fixusers.
+
+        @return: bool
+        '''
         debug = ""
         compliant = True
+        self.fixusers = []
+        self.shadowresults = {}
         if os.path.exists(self.shadowfile):
             if self.ph.manager == "apt-get":
                 statdata = os.stat(self.shadowfile)
@@ -233,123 +261,100 @@ class PasswordExpiration(Rule):
             elif not checkPerms(self.shadowfile, [0, 0, 256], self.logger) and \
                 not checkPerms(self.shadowfile, [0, 0, 0], self.logger):
                 compliant = False
-            contents = readFile(self.shadowfile, self.logger)
-            if self.environ.getosfamily() == "solaris" or \
-                self.environ.getosfamily() == "linux":
-                if self.environ.getosfamily() == "linux":
-                    whichid = "/usr/bin/id"
-                elif self.environ.getosfamily() == "solaris":
-                    whichid = "/usr/xpg4/bin/id"
-                for line in contents:
-                    badacct = False
-                    debug = ""
-                    if re.search("^\#", line) or re.match("^\s*$", line):
-                        continue
-                    if re.search(":", line):
-                        field = line.split(":")
-                        cmd = [whichid, "-u", field[0]]
-                        self.ch.executeCommand(cmd)
-                        output = self.ch.getOutputString().strip()
-                        error = self.ch.getError()
-                        if error:
-                            continue
-                        if output:
-                            if output.isdigit():
-                                uid = int(output)
-                            else:
-                                uid = 100
-                        else:
-                            continue
-                        try:
-                            if uid >= 500 and not re.search(self.lockedpwds, field[1]):
-                                for i in [3, 4, 5, 6]:
-                                    if field[i]:
-                                        val = field[i]
-                                        if val.isdigit():
-                                            field[i] = int(field[i])
-                                        elif i == 6:
-                                            field[i] = 99
-                                        else:
-                                            field[i] = 0
-                                    elif i == 6:
-                                        field[i] = 99
-                                    else:
-                                        field[i] = 0
-                                if field[3] < 7 or field[3] == "":
-                                    compliant = False
-                                    debug += "field 4 not equal to 7 in shadow\n"
-                                    badacct = True
-                                if field[4] > 180 or field[4] == "":
-                                    compliant = False
-                                    debug += "expiration is not 180 or less\n"
-                                    badacct = True
-                                if field[5] < 28 or field[5] == "":
-                                    compliant = False
-                                    debug += "warnings not set to 28 days\n"
-                                    badacct = True
-                                if field[6] > 7 or field[6] == "":
-                                    compliant = False
-                                    debug += "Account lock is not set to 7\n"
-                                    badacct = True
-                        except IndexError:
-                            compliant = False
-                            debug = traceback.format_exc()
-                            debug += ' Index out of range\n'
-                            badacct = True
-                        if debug:
-                            self.logger.log(LogPriority.DEBUG, debug)
-                    if badacct:
-                        self.fixusers.append(field[0])
-            if self.environ.getosfamily() == 'freebsd':
-                for line in contents:
-                    debug = ""
-                    if re.search("^\#", line) or re.match('^\s*$', line):
-                        continue
-                    if re.search(':', line):
-                        field = line.split(':')
-                        message = Popen(['/usr/bin/id', '-u', field[0]],
-                                           stderr=PIPE, stdout=PIPE, shell=False)
-                        uid = message.stdout.readline()
-                        uid = uid.strip()
-                        message.stdout.close()
-                        if uid.isdigit():
-                            uid = int(uid)
-                        else:
-                            uid = 100
-                        try:
-                            if uid >= 500 and not re.search(self.lockedpwds, field[1]):
-                                for i in [5, 6]:
-                                    if field[i]:
-                                        val = field[i]
-                                        if not val.isdigit():
-                                            field[i] = 0
-                                    else:
-                                        field[i] = 0
-
-                                if int(field[5]) > 180 or field[5] == "":
-                                    self.shadow = False
-                                    compliant = False
-                                    debug += "expiration is not 180 or less"
-                                if int(field[6]) > 7 or field[6] == "":
-                                    self.shadow = False
-                                    compliant = False
-                                    debug += "Account lock is not set to 7"
-                        except IndexError:
-                            self.shadow = False
-                            compliant = False
-                            debug = traceback.format_exc()
-                            debug += ' Index out of range'
-                            self.logger.log(LogPriority.DEBUG, debug)
-                        if debug:
-                            self.logger.log(LogPriority.DEBUG, debug)
+            entries = self.environ.getaccountdb().getentries(self.shadowfile)
+            entries = [field for field in entries if len(field) > 1]
+            uids = self.getUids([field[0] for field in entries])
+            if self.environ.getosfamily() == "freebsd":
+                checks = self.bsdagingchecks
+            else:
+                checks = self.shadowagingchecks
+            for field in entries:
+                name = field[0]
+                if name not in uids:
+                    continue
+                uid = uids[name]
+                if uid < 500 or re.search(self.lockedpwds, field[1]):
+                    continue
+                result = self.chkAging(field, checks)
+                result["uid"] = uid
+                self.shadowresults[name] = result
+                if not result["compliant"]:
+                    compliant = False
+                    self.fixusers.append(name)
+                    debug = name + ": " + "".join(result["issues"])
+                    self.logger.log(LogPriority.DEBUG, debug)
+            if self.environ.getosfamily() == "freebsd":
+                if self.fixusers:
+                    self.shadow = False
+                # The freebsd fix is made through login.conf not per account
+                self.fixusers = []
+            else:
+                if self.fixusers:
+                    self.detailedresults += "The following accounts do " + \
+                        "not have compliant password aging settings: " + \
+                        ", ".join(self.fixusers) + "\n"
         else:
             self.detailedresults += self.shadowfile + " doesn't exist\n"
             compliant = False
         debug = "chkShadow method is returning " + str(compliant) + " compliance\n"
         self.logger.log(LogPriority.DEBUG, debug)
         return compliant
-    
-###############################################################################
+
+    def getUids(self, names):
+        '''
+        Resolve the uid of every account name passed in with a single
+        enumeration of the account database. Names that are not in the
+        enumeration are looked up individually and names that can't be
+        resolved are left out of the returned dictionary.
+
+        @param names: list of account names
+        @return: dict of name -> uid
+        '''
+        accountdb = self.environ.getaccountdb()
+        known = {}
+        for entry in accountdb.getpwall():
+            if entry.pw_name not in known:
+                known[entry.pw_name] = entry.pw_uid
+        uids = {}
+        for name in names:
+            if name in known:
+                uids[name] = known[name]
+            else:
+                try:
+                    uids[name] = accountdb.getpwnam(name).pw_uid
+                except KeyError:
+                    continue
+        return uids
+
+    def chkAging(self, field, checks):
+        '''
+        Evaluate the aging fields of one shadow (or master.passwd) entry
+        against a list of checks. Blank or non numeric fields take the
+        default value given in the check.
+
+        @param field: list - the colon separated fields of the entry
+        @param checks: list of (index, key, default, test, message) tuples.
+            test is called with the numeric value of the field and returns
+            True when the value is not compliant.
+        @return: dict with one key per check plus "compliant" and "issues"
+        '''
+        result = {"compliant": True, "issues": []}
+        for index, key, default, test, message in checks:
+            try:
+                val = field[index].strip()
+            except IndexError:
+                result["compliant"] = False
+                result["issues"].append("Index out of range\n")
+                break
+            if val.isdigit():
+                val = int(val)
+            else:
+                val = default
+            result[key] = val
+            if test(val):
+                result["compliant"] = False
+                result["issues"].append(message)
+        return result
 
     def chkUserAdd(self):
         compliant = True
@@ -640,7 +645,7 @@ self.logdeffile + "\n"
         success = True
         debug = ""
         date = ""
-        contents = readFile(self.shadowfile, self.logger)
+        contents = self.environ.getaccountdb().getlines(self.shadowfile)
         if not os.path.exists(self.shadowfile) or not contents:
             self.detailedresults += self.shadowfile + "doesn't exist. \
 Will not perform fix on shadow file\n"
@@ -678,6 +683,7 @@ Will not perform fix on shadow file\n"
             for item in self.fixusers:
                 cmd = ["chage", "-d", date, "-m", "7", "-M", "180", "-W", "28", "-I", "7", item]
                 self.ch.executeCommand(cmd)
+            self.environ.getaccountdb().invalidate(self.shadowfile)
         #put in sections for bsd and solaris which both use passwd command
         return success
     
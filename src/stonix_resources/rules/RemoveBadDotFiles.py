@@ -31,7 +31,6 @@ Created on Jul 13, 2012
 '''
 from __future__ import absolute_import
 
-import pwd
 import os
 import traceback
 
@@ -83,13 +82,14 @@ class RemoveBadDotFiles(Rule):
                            'os': {'Mac OS X': ['10.9', 'r', '10.10.10']}}
         self.homelist = ['/', '/root']
         try:
-            mypwd = pwd.getpwall()
+            mypwd = self.environ.getaccountdb().getpwall()
             for user in mypwd:
                 home = user[5]
                 if home not in self.homelist:
                     self.homelist.append(home)
             if self.environ.geteuid() != 0:
-                pwdsingle = pwd.getpwuid(self.environ.geteuid())
+                accountdb = self.environ.getaccountdb()
+                pwdsingle = accountdb.getpwuid(self.environ.geteuid())
                 self.homelist = pwdsingle[5]
         except(IndexError, OSError):
             pass
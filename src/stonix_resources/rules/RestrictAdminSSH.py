@@ -62,6 +62,7 @@ RESTRICTADMINSSH to False.'''
         self.guidance = []
         self.ssh = {"DenyGroups": "admin"}
         self.iditerator = 0
+        self.sharedresources = ['/etc/ssh/sshd_config', 'sshd']
         self.applicable = {'type': 'white',
                            'os': {'Mac OS X': ['10.9', 'r', '10.10.10']}}
 
@@ -64,6 +64,7 @@ automatically logged out. '''
         self.guidance = ['NSA 3.5.2.3']
         self.iditerator = 0
         self.editor = ""
+        self.sharedresources = ['/etc/ssh/sshd_config', 'sshd']
         self.applicable = {'type': 'white',
                            'family': ['linux', 'solaris', 'freebsd'],
                            'os': {'Mac OS X': ['10.9', 'r', '10.10.10']}}
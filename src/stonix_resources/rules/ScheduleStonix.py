@@ -47,7 +47,6 @@ from ..pkghelper import Pkghelper
 import random
 import os
 import re
-import pwd
 import traceback
 
 
@@ -103,7 +102,7 @@ and once in a user context per day"
 
         self.userlist = []
 
-        for p in pwd.getpwall():
+        for p in self.environ.getaccountdb().getpwall():
             if re.search('^/home/', p[5]) or re.search('^/Users/', p[5]):
                 self.userlist.append(p[0].strip())
 
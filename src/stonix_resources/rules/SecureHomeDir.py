@@ -40,7 +40,6 @@ import traceback
 import os
 import stat
 import re
-import pwd
 
 
 class SecureHomeDir(Rule):
@@ -125,7 +124,7 @@ False.'''
                 grpvals = ("7", "2", "3", "6")
                 for user in users:
                     templist = []
-                    currpwd = pwd.getpwnam(user)
+                    currpwd = self.environ.getaccountdb().getpwnam(user)
                     try:
                         homedir = currpwd[5]
                         if not os.path.exists(homedir):
@@ -167,7 +166,8 @@ False.'''
                         debug += "Not enough information to obtain home \
 directory for user: " + user + "\n"
         else:
-            currpwd = pwd.getpwuid(self.environ.geteuid())
+            accountdb = self.environ.getaccountdb()
+            currpwd = accountdb.getpwuid(self.environ.geteuid())
             try:
                 homedir = currpwd[5]
                 if not os.path.exists(homedir):
@@ -235,7 +235,7 @@ either group writeable or world readable:\n" + str(badhomes) + "\n"
         else:
             homebase = "/home/"
         #read in /etc/passwd
-        contents = readFile("/etc/passwd", self.logger)
+        contents = self.environ.getaccountdb().getlines("/etc/passwd")
         if not contents:
             self.detailedresults += "the /etc/passwd file is blank.  This \
 rule cannot be run at all.\n"
@@ -78,6 +78,7 @@ False.'''
                          "CCE 4221-8", "CCE 4137-6", "CCE 4159-0",
                          "CCE 3895-0", "CCE 4287-9", "CCE 4058-4",
                          "CCE 4128-5"]
+        self.sharedresources = ['/etc/sysctl.conf']
         self.applicable = {'type': 'white',
                            'family': ['linux']}
         self.iditerator = 0
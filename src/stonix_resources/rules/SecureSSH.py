@@ -63,6 +63,7 @@ class SecureSSH(Rule):
         self.mandatory = True
         self.helptext = '''The SecureSSH class makes a number of configuration\
  changes to SSH in order to ensure secure use of the functionality.'''
+        self.sharedresources = ['/etc/ssh/sshd_config', 'sshd']
         self.applicable = {'type': 'white',
                            'family': ['linux', 'solaris', 'freebsd'],
                            'os': {'Mac OS X': ['10.9', 'r', '10.10.10']}}
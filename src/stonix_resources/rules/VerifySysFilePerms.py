@@ -125,16 +125,17 @@ class VerifySysFilePerms(Rule):
                 self.compliant = False
                 return self.compliant
 
-            # run verify perms command and get output
-            self.cmdhelper.executeCommand('/usr/sbin/diskutil verifyPermissions ' + str(self.sysvol))
-            outputlist = self.cmdhelper.getOutput()
+            # run verify perms command, only the lines reporting a
+            # difference are kept out of what can be a very long listing
+            def checkline(line):
+                if re.search('differs on', line) or re.search('differ on', line):
+                    wrongperms.append(line)
+            self.cmdhelper.executeCommand('/usr/sbin/diskutil verifyPermissions ' + str(self.sysvol),
+                                          stdoutcallback=checkline)
             errout = self.cmdhelper.getErrorString()
             if errout:
                 self.compliant = False
                 self.detailedresults += '\nThere was an error verifying the system file permissions'
-            for line in outputlist:
-                if re.search('differs on', line) or re.search('differ on', line):
-                    wrongperms.append(line)
 
             # if any incorrect permissions or ownership found, return false
             if wrongperms:
@@ -0,0 +1,205 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+
+Created on Oct 18, 2026
+
+The RuleScheduler runs a unit of work for a list of rules on a bounded pool
+of worker threads. Rules may declare the files and services they touch (see
+Rule.getsharedresources()); two rules that share a resource are never run
+at the same time. All scheduling decisions and all completion callbacks
+happen on the calling thread so that the Controller's Observable progress
+counters are only ever updated from one place.
+
+@note: Intended for report() passes. fix() passes should continue to be run
+serially by the Controller.
+'''
+import Queue
+import threading
+import traceback
+from CommandHelper import setclosefds
+from logdispatcher import LogPriority
+
+
+class RuleScheduler(object):
+    '''
+    Bounded worker pool for running rules concurrently while honoring the
+    resources each rule declares.
+    '''
+
+    def __init__(self, logger, jobs=1):
+        '''
+        Constructor
+
+        @param logger: LogDispatcher instance
+        @param jobs: int - maximum number of rules to run at the same time
+        '''
+        self.logger = logger
+        try:
+            jobs = int(jobs)
+        except (TypeError, ValueError):
+            jobs = 1
+        if jobs < 1:
+            jobs = 1
+        self.jobs = jobs
+
+    def getjobs(self):
+        '''
+        Return the maximum number of rules that will be run concurrently.
+
+        @return: int
+        '''
+        return self.jobs
+
+    def getresources(self, rule):
+        '''
+        Return the set of resources declared by the passed rule. Rules that
+        do not implement getsharedresources() are treated as touching
+        nothing.
+
+        @param rule: rule instance
+        @return: set of strings
+        '''
+        try:
+            resources = rule.getsharedresources()
+        except AttributeError:
+            resources = []
+        if not resources:
+            return set()
+        return set(resources)
+
+    def conflicts(self, resources, held):
+        '''
+        Return True if any of the passed resources are currently held by a
+        running rule.
+
+        @param resources: set of strings
+        @param held: set of strings held by running rules
+        @return: bool
+        '''
+        return not resources.isdisjoint(held)
+
+    def run(self, rules, work, done=None):
+        '''
+        Run work(rule) for every rule in rules. work is executed on a worker
+        thread. done(rule, error) is executed on the calling thread as each
+        rule finishes, error being None or the formatted traceback of an
+        exception that escaped work. Rules are dispatched in list order, a
+        rule that conflicts with a running rule is held back until the
+        conflicting rule has finished. While rules run concurrently every
+        CommandHelper closes inherited descriptors in its children, see
+        CommandHelper.setclosefds.
+
+        @param rules: list of rule instances
+        @param work: callable taking a rule
+        @param done: optional callable taking a rule and an error string
+        '''
+        if self.jobs == 1 or len(rules) < 2:
+            for rule in rules:
+                error = self.__runone(work, rule)
+                if done is not None:
+                    done(rule, error)
+            return
+
+        numworkers = min(self.jobs, len(rules))
+        self.logger.log(LogPriority.DEBUG,
+                        ['RuleScheduler', 'Running ' + str(len(rules)) +
+                         ' rules on ' + str(numworkers) + ' workers'])
+        tasks = Queue.Queue()
+        results = Queue.Queue()
+        workers = []
+        for _ in range(numworkers):
+            worker = threading.Thread(target=self.__worker,
+                                      args=(work, tasks, results))
+            worker.daemon = True
+            worker.start()
+            workers.append(worker)
+
+        pending = list(rules)
+        held = set()
+        running = {}
+        closefds = setclosefds(True)
+        try:
+            while pending or running:
+                # Dispatch as many non-conflicting rules as we have free
+                # workers for. Order is preserved among rules that share
+                # resources.
+                blocked = set()
+                for rule in list(pending):
+                    if len(running) >= self.jobs:
+                        break
+                    resources = self.getresources(rule)
+                    if self.conflicts(resources, held) or \
+                       self.conflicts(resources, blocked):
+                        blocked.update(resources)
+                        continue
+                    pending.remove(rule)
+                    held.update(resources)
+                    running[id(rule)] = resources
+                    tasks.put(rule)
+                # Poll with a timeout so that KeyboardInterrupt is delivered
+                # to the main thread.
+                while True:
+                    try:
+                        rule, error = results.get(True, 0.5)
+                        break
+                    except Queue.Empty:
+                        continue
+                held.difference_update(running.pop(id(rule)))
+                if done is not None:
+                    done(rule, error)
+        finally:
+            for _ in workers:
+                tasks.put(None)
+            setclosefds(closefds)
+
+    def __worker(self, work, tasks, results):
+        '''
+        Worker thread body. Pulls rules off the task queue until it receives
+        the None sentinel.
+        '''
+        while True:
+            rule = tasks.get()
+            if rule is None:
+                return
+            try:
+                error = self.__runone(work, rule)
+            except (KeyboardInterrupt, SystemExit):
+                # Never let a worker die silently, the dispatcher is
+                # waiting on this result.
+                error = traceback.format_exc()
+            results.put((rule, error))
+
+    def __runone(self, work, rule):
+        '''
+        Run work(rule) and return None on success or the formatted traceback
+        on failure.
+        '''
+        try:
+            work(rule)
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            return traceback.format_exc()
+        return None
@@ -0,0 +1,92 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+Created on Oct 18, 2026
+
+A ServiceSnapshot holds the enabled and running state of every service as
+reported by one bulk query of the service manager (systemctl
+list-unit-files / list-units, chkconfig --list). Service helper backends
+that support it answer auditservice() and isrunning() from the snapshot
+instead of querying each service on its own.
+
+A snapshot is only valid until the run's ProbeCache is next invalidated,
+which happens whenever a service is enabled, disabled or reloaded, a
+package is installed or removed, or a rule's fix() runs a command that is
+not marked pure. After that the backends go back to per service queries
+until a new snapshot is taken.
+'''
+from probecache import getprobecache
+
+
+class ServiceSnapshot(object):
+    '''
+    Enabled/running state of all services at one point in time.
+    '''
+
+    def __init__(self, enabled=None, running=None, lines=None):
+        '''
+        Constructor
+
+        @param enabled: dict of service name to bool
+        @param running: dict of service name to bool
+        @param lines: list of the raw listing lines the backend may reuse
+        '''
+        self.generation = getprobecache().getgeneration()
+        if enabled is None:
+            enabled = {}
+        if running is None:
+            running = {}
+        if lines is None:
+            lines = []
+        self.enabled = enabled
+        self.running = running
+        self.lines = lines
+
+    def isvalid(self):
+        '''
+        Return True if nothing that may have changed service state has
+        happened since the snapshot was taken.
+
+        @return: bool
+        '''
+        return self.generation == getprobecache().getgeneration()
+
+    def isenabled(self, service):
+        '''
+        Return True or False if the snapshot knows whether service is
+        enabled, None if it does not.
+
+        @param service: string
+        @return: bool or None
+        '''
+        return self.enabled.get(service)
+
+    def isrunning(self, service):
+        '''
+        Return True or False if the snapshot knows whether service is
+        running, None if it does not.
+
+        @param service: string
+        @return: bool or None
+        '''
+        return self.running.get(service)
@@ -146,6 +146,100 @@ class Solaris(object):
 ###############################################################################
     def checkAvailable(self,package):
         pass
+###############################################################################
+    def installpackages(self, packages):
+        '''
+         Install several packages with a single pkgadd run. Return a bool
+         indicating success or failure of the whole run.
+
+        @param list packages : Names of the packages to be installed, must be
+            recognizable to the underlying package manager.
+        @return bool :'''
+        try:
+            self.ch.executeCommand(self.install + " ".join(packages))
+            if self.ch.getReturnCode() == 0:
+                self.detailedresults = " ".join(packages) + \
+                    " pkgs installed successfully"
+                self.logger.log(LogPriority.INFO,
+                                ["Solaris.install", self.detailedresults])
+                return True
+            else:
+                self.detailedresults = " ".join(packages) + \
+                    " pkgs not able to install"
+                self.logger.log(LogPriority.INFO,
+                                ["Solaris.install", self.detailedresults])
+                return False
+        except(KeyboardInterrupt,SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.INFO,
+                            ['Solaris.install', self.detailedresults])
+###############################################################################
+    def removepackages(self, packages):
+        '''Remove several packages with a single pkgrm run. Return a bool
+        indicating success or failure of the whole run.
+
+        @param list packages : Names of the packages to be removed, must be
+            recognizable to the underlying package manager.
+        @return bool :'''
+        try:
+            self.ch.executeCommand(self.remove + " ".join(packages))
+            if self.ch.getReturnCode() == 0:
+                self.detailedresults = " ".join(packages) + \
+                    " pkgs removed successfully"
+                self.logger.log(LogPriority.INFO,
+                                ["Solaris.remove", self.detailedresults])
+                return True
+            else:
+                self.detailedresults = " ".join(packages) + \
+                    " pkgs not able to be removed"
+                self.logger.log(LogPriority.INFO,
+                                ["Solaris.remove", self.detailedresults])
+                return False
+        except(KeyboardInterrupt,SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.INFO,
+                            ["Solaris.remove", self.detailedresults])
+###############################################################################
+    def checkInstalls(self, packages):
+        '''Check the installation status of several packages against a
+        single pkginfo listing. SUNW packages must match the package
+        instance exactly, other names are matched case insensitively
+        anywhere in the line, as checkInstall does.
+
+        @param list packages : Names of the packages whose installation
+            status is to be checked.
+        @return dict : package name -> bool, True if the package is
+            installed'''
+        try:
+            self.ch.executeCommand(self.info)
+            lines = self.ch.getOutput()
+            found = {}
+            for package in packages:
+                found[package] = False
+                for line in lines:
+                    if search("^SUNW", package):
+                        parts = line.split()
+                        if len(parts) > 1 and parts[1] == package:
+                            found[package] = True
+                            break
+                    elif package.lower() in line.lower():
+                        found[package] = True
+                        break
+            self.detailedresults = str(found.values().count(True)) + \
+                " of " + str(len(found)) + " pkgs found"
+            self.logger.log(LogPriority.INFO,
+                            ["Solaris.check", self.detailedresults])
+            return found
+        except(KeyboardInterrupt,SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.INFO,
+                            ["Solaris.check", self.detailedresults])
 ###############################################################################
     def getInstall(self):
         return self.install
@@ -0,0 +1,132 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+
+
+Created on Oct 18, 2026
+
+The UndoPlanner reverts a set of change events recorded by the
+StateChgLogger. Events are undone newest first. All 'conf' events for the
+same file are gathered into one step so that the file is read once, every
+recorded diff is applied in memory and the file is written once. Command
+events share a single CommandHelper.
+
+Used by Rule.undo().
+'''
+import os
+from CommandHelper import CommandHelper
+from logdispatcher import LogPriority
+
+
+class UndoPlanner(object):
+    '''
+    Batched undo of change events.
+    '''
+
+    def __init__(self, statechglogger, logger):
+        '''
+        Constructor
+
+        @param statechglogger: StateChgLogger instance
+        @param logger: logdispatcher object
+        '''
+        self.statechglogger = statechglogger
+        self.logger = logger
+        self.ch = None
+
+    def plan(self, eventids):
+        '''
+        Build the list of undo steps for the passed events. Each step is a
+        tuple of ('file', filepath, [eventids]) for file content reverts or
+        ('event', eventid, eventdict) for everything else, in the order they
+        should run.
+
+        @param eventids: list of event ids, oldest first
+        @return: tuple of (list of steps, list of problem messages)
+        '''
+        steps = []
+        messages = []
+        filesteps = {}
+        for eventid in reversed(eventids):
+            try:
+                event = self.statechglogger.getchgevent(eventid)
+                if event["eventtype"] == "conf":
+                    filepath = event["filepath"]
+                    if filepath in filesteps:
+                        filesteps[filepath][2].append(eventid)
+                    else:
+                        step = ('file', filepath, [eventid])
+                        filesteps[filepath] = step
+                        steps.append(step)
+                else:
+                    steps.append(('event', eventid, event))
+            except(IndexError, KeyError):
+                messages.append("EventID " + eventid + " not found")
+        return steps, messages
+
+    def run(self, eventids):
+        '''
+        Undo the passed events.
+
+        @param eventids: list of event ids, oldest first
+        @return: list of problem messages, empty if every event was undone
+        '''
+        steps, messages = self.plan(eventids)
+        for kind, target, data in steps:
+            if kind == 'file':
+                if not self.statechglogger.revertfilechain(target, data):
+                    messages.append("Unable to revert all changes to " +
+                                    target)
+                continue
+            try:
+                message = self.undoevent(data)
+            except(IndexError, KeyError):
+                message = "EventID " + target + " not found"
+            if message:
+                messages.append(message)
+        for message in messages:
+            self.logger.log(LogPriority.DEBUG, ['UndoPlanner', message])
+        return messages
+
+    def undoevent(self, event):
+        '''
+        Undo a single non file content event.
+
+        @param event: dict - the recorded event
+        @return: string problem message or None
+        '''
+        eventtype = event["eventtype"]
+        if eventtype == "perm":
+            perms = event["startstate"]
+            os.chmod(event["filepath"], perms[2])
+            os.chown(event["filepath"], perms[0], perms[1])
+        elif eventtype == "comm" or eventtype == "commandstring":
+            if self.ch is None:
+                self.ch = CommandHelper(self.logger)
+            self.ch.executeCommand(event["command"])
+            if self.ch.getReturnCode() != 0:
+                return "couldn't run the command to undo"
+        elif eventtype == "creation":
+            os.remove(event["filepath"])
+        return None
@@ -136,6 +136,120 @@ class Yum(object):
             self.detailedresults = traceback.format_exc()
             self.logger.log(LogPriority.ERROR, self.detailedresults)
             raise(self.detailedresults)
+###############################################################################
+    def installpackages(self, packages):
+        '''Install several packages in a single yum transaction so the repo
+        metadata is loaded and the rpm database locked only once. Return a
+        bool indicating success or failure of the whole transaction.
+        @param list packages : Names of the packages to be installed, must
+        be recognizable to the underlying package manager.
+        @return bool :'''
+        try:
+            installed = False
+            self.ch.executeCommand(self.install + " ".join(packages))
+            if self.ch.getReturnCode() == 0:
+                installed = True
+                self.detailedresults = " ".join(packages) + \
+                    " pkgs installed successfully\n"
+            else:
+                self.detailedresults = " ".join(packages) + \
+                    " pkgs not able to install\n"
+            self.logger.log(LogPriority.DEBUG, self.detailedresults)
+            return installed
+        except(KeyboardInterrupt,SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.ERROR, self.detailedresults)
+            raise(self.detailedresults)
+###############################################################################
+    def removepackages(self, packages):
+        '''Remove several packages in a single yum transaction. Return a bool
+        indicating success or failure of the whole transaction.
+        @param list packages : Names of the packages to be removed, must be
+        recognizable to the underlying package manager.
+        @return bool :'''
+        method = "yum.remove"
+        try:
+            removed = False
+            self.ch.executeCommand(self.remove + " ".join(packages))
+            if self.ch.getReturnCode() == 0:
+                removed = True
+                self.detailedresults += " ".join(packages) + \
+                    " pkgs removed successfully\n"
+            else:
+                self.detailedresults += " ".join(packages) + \
+                    " pkgs not able to be removed\n"
+            self.logger.log(LogPriority.DEBUG, [method, self.detailedresults])
+            return removed
+        except(KeyboardInterrupt,SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.ERROR, [method, self.detailedresults])
+            raise(self.detailedresults)
+###############################################################################
+    def checkInstalls(self, packages):
+        '''Check the installation status of several packages with a single
+        rpm query. rpm prints "package <name> is not installed" for each
+        missing package and exits with the number of missing packages.
+        @param list packages : Names of the packages whose installation
+            status is to be checked.
+        @return dict : package name -> bool, True if the package is
+            installed'''
+        try:
+            found = dict.fromkeys(packages, True)
+            missing = 0
+            self.ch.executeCommand(self.rpm + " ".join(packages))
+            for line in self.ch.getOutput():
+                match = re.match(r"^package (\S+) is not installed", line)
+                if match and match.group(1) in found:
+                    found[match.group(1)] = False
+                    missing += 1
+            if self.ch.getReturnCode() != 0 and missing == 0:
+                # rpm itself failed, nothing it said can be trusted
+                found = dict.fromkeys(packages, False)
+            self.detailedresults += str(found.values().count(True)) + \
+                " of " + str(len(found)) + " pkgs found\n"
+            self.logger.log(LogPriority.DEBUG, self.detailedresults)
+            return found
+        except(KeyboardInterrupt,SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.ERROR, self.detailedresults)
+            raise(self.detailedresults)
+###############################################################################
+    def listInstalled(self):
+        '''Return the names of all installed packages read with a single rpm
+        query, None if the rpm database could not be read. Every package is
+        listed as name, name.arch, name-version, name-version-release and
+        name-version-release.arch, the forms rpm -q accepts.
+        @return list :'''
+        try:
+            self.ch.executeCommand(["/bin/rpm", "-qa", "--qf",
+                                    "%{NAME} %{VERSION} %{RELEASE} %{ARCH}\\n"],
+                                   pure=True)
+            if self.ch.getReturnCode() != 0:
+                self.detailedresults = "unable to list installed pkgs\n"
+                self.logger.log(LogPriority.DEBUG, self.detailedresults)
+                return None
+            packages = []
+            for line in self.ch.getOutput():
+                parts = line.split()
+                if len(parts) != 4:
+                    continue
+                name, version, release, arch = parts
+                nvr = name + "-" + version + "-" + release
+                packages.extend([name, name + "." + arch,
+                                 name + "-" + version, nvr, nvr + "." + arch])
+            return packages
+        except(KeyboardInterrupt,SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.ERROR, self.detailedresults)
+            raise(self.detailedresults)
 ###############################################################################
     def getInstall(self):
         return self.install
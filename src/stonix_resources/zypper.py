@@ -49,6 +49,7 @@ class Zypper(object):
         self.remove = "/usr/bin/zypper --non-interactive remove "
         self.searchi = "/usr/bin/zypper --non-interactive search --match-exact -i "
         self.searchu = "/usr/bin/zypper --non-interactive search --match-exact -u "
+        self.rpm = "/bin/rpm -q "
 
 ###############################################################################
     def installpackage(self, package):
@@ -198,6 +199,138 @@ misspelled\n"
             self.detailedresults = traceback.format_exc()
             self.logger.log(LogPriority.ERROR, self.detailedresults)
 
+###############################################################################
+    def installpackages(self, packages):
+        '''Install several packages with a single zypper run so the repos
+        are refreshed and the rpm database locked only once. Return a bool
+        indicating success or failure of the whole run.
+
+        @param list packages : Names of the packages to be installed, must be
+            recognizable to the underlying package manager.
+        @return: bool
+        '''
+        try:
+            installed = False
+            self.ch.executeCommand(self.install + " ".join(packages))
+            output = self.ch.getOutputString()
+            if self.ch.getReturnCode() == 0:
+                if search("Abort, retry, ignore", output):
+                    self.detailedresults += "There is an error contacting " + \
+                    "one or more repos, aborting\n"
+                    return False
+                self.detailedresults += " ".join(packages) + \
+                    " pkgs installed successfully\n"
+                installed = True
+            else:
+                self.detailedresults += " ".join(packages) + \
+                    " pkgs not able to install\n"
+            self.logger.log(LogPriority.INFO, self.detailedresults)
+            return installed
+        except(KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.ERROR, self.detailedresults)
+
+###############################################################################
+    def removepackages(self, packages):
+        '''Remove several packages with a single zypper run. Return a bool
+        indicating success or failure of the whole run.
+
+        @param list packages : Names of the packages to be removed, must be
+            recognizable to the underlying package manager.
+        @return: bool
+        '''
+        removed = False
+        try:
+            self.ch.executeCommand(self.remove + " ".join(packages))
+            output = self.ch.getOutputString()
+            if self.ch.getReturnCode() == 0:
+                if search("Abort, retry, ignore", output):
+                    self.detailedresults += "There is an error contacting " + \
+                    "one or more repos, aborting\n"
+                    return False
+                self.detailedresults += " ".join(packages) + \
+                    " pkgs removed successfully\n"
+                removed = True
+            else:
+                self.detailedresults += " ".join(packages) + \
+                    " pkgs not able to be removed\n"
+            self.logger.log(LogPriority.INFO, self.detailedresults)
+            return removed
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.ERROR, self.detailedresults)
+
+###############################################################################
+    def checkInstalls(self, packages):
+        '''
+        Check the installation status of several packages with a single rpm
+        query instead of one zypper search per package. rpm prints "package
+        <name> is not installed" for each missing package.
+
+        @param list packages : Names of the packages whose installation
+            status is to be checked.
+        @return: dict package name -> bool, True if the package is installed
+        '''
+        try:
+            found = dict.fromkeys(packages, True)
+            missing = 0
+            self.ch.executeCommand(self.rpm + " ".join(packages))
+            for line in self.ch.getOutput():
+                match = search(r"^package (\S+) is not installed", line)
+                if match and match.group(1) in found:
+                    found[match.group(1)] = False
+                    missing += 1
+            if self.ch.getReturnCode() != 0 and missing == 0:
+                # rpm itself failed, nothing it said can be trusted
+                found = dict.fromkeys(packages, False)
+            self.detailedresults += str(found.values().count(True)) + \
+                " of " + str(len(found)) + " pkgs are installed\n"
+            self.logger.log(LogPriority.DEBUG, self.detailedresults)
+            return found
+        except(KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.ERROR, self.detailedresults)
+
+###############################################################################
+    def listInstalled(self):
+        '''
+        Return the names of all installed packages read with a single rpm
+        query, None if the rpm database could not be read. Every package is
+        listed as name, name.arch, name-version, name-version-release and
+        name-version-release.arch.
+
+        @return: list
+        '''
+        try:
+            self.ch.executeCommand(["/bin/rpm", "-qa", "--qf",
+                                    "%{NAME} %{VERSION} %{RELEASE} %{ARCH}\\n"],
+                                   pure=True)
+            if self.ch.getReturnCode() != 0:
+                self.detailedresults += "unable to list installed pkgs\n"
+                self.logger.log(LogPriority.DEBUG, self.detailedresults)
+                return None
+            packages = []
+            for line in self.ch.getOutput():
+                parts = line.split()
+                if len(parts) != 4:
+                    continue
+                name, version, release, arch = parts
+                nvr = name + "-" + version + "-" + release
+                packages.extend([name, name + "." + arch,
+                                 name + "-" + version, nvr, nvr + "." + arch])
+            return packages
+        except(KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            self.detailedresults = traceback.format_exc()
+            self.logger.log(LogPriority.ERROR, self.detailedresults)
+
 ###############################################################################
     def getInstall(self):
         '''
@@ -0,0 +1,166 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+Created on Oct 18, 2026
+
+Unit tests for the CommandHelper.
+'''
+import os
+import time
+import unittest
+from CommandHelper import CommandHelper, setclosefds
+from probecache import getprobecache
+
+
+class FakeLogger(object):
+
+    def log(self, priority, msg_data):
+        pass
+
+
+class zzzTestFrameworkCommandHelper(unittest.TestCase):
+
+    def setUp(self):
+        self.ch = CommandHelper(FakeLogger())
+        getprobecache().setfixmode(False)
+
+    def tearDown(self):
+        getprobecache().setfixmode(False)
+
+    def testReturnCode(self):
+        self.assertTrue(self.ch.executeCommand("echo out; echo err >&2; " +
+                                               "exit 3"))
+        self.assertEqual(self.ch.getReturnCode(), 3)
+        self.assertEqual(self.ch.getOutput(), ["out\n"])
+        self.assertEqual(self.ch.getError(), ["err\n"])
+        self.assertEqual(self.ch.getErrorOutput(), ["err\n", "out\n"])
+
+    def testPartialLastLine(self):
+        self.ch.executeCommand(["/usr/bin/printf", "one\ntwo"])
+        self.assertEqual(self.ch.getOutput(), ["one\n", "two"])
+
+    def testLargeOutputBothStreams(self):
+        # Well past the pipe buffer on both streams, this used to hang
+        self.ch.executeCommand("seq 1 100000 >&2; seq 1 100000")
+        self.assertEqual(self.ch.getReturnCode(), 0)
+        self.assertEqual(len(self.ch.getOutput()), 100000)
+        self.assertEqual(len(self.ch.getError()), 100000)
+        self.assertEqual(self.ch.getOutput()[-1], "100000\n")
+
+    def testCallback(self):
+        lines = []
+        self.ch.executeCommand(["seq", "1", "50000"],
+                               stdoutcallback=lines.append)
+        self.assertEqual(len(lines), 50000)
+        self.assertEqual(lines[0], "1\n")
+        self.assertEqual(self.ch.getOutput(), [])
+
+    def testOutputLimit(self):
+        self.ch.setOutputLimit(1000)
+        self.ch.executeCommand(["seq", "1", "50000"])
+        self.assertTrue(self.ch.getTruncated())
+        self.assertTrue(len(self.ch.getOutputString()) <= 1000)
+        self.assertEqual(self.ch.getOutput()[0], "1\n")
+        self.ch.executeCommand(["seq", "1", "5"])
+        self.assertFalse(self.ch.getTruncated())
+
+    def testTimeout(self):
+        self.ch.setTimeout(0.5)
+        start = time.time()
+        self.assertFalse(self.ch.executeCommand("sleep 30; echo done"))
+        self.assertTrue(time.time() - start < 5)
+        self.assertTrue(self.ch.getTimedOut())
+        self.assertNotEqual(self.ch.getReturnCode(), 0)
+        self.assertEqual(self.ch.getOutput(), [])
+
+    def testIterOutput(self):
+        total = 0
+        for line in self.ch.iterOutput(["seq", "1", "1000"]):
+            total += int(line)
+        self.assertEqual(total, 500500)
+        self.assertEqual(self.ch.getReturnCode(), 0)
+        for line in self.ch.iterOutput(["seq", "1", "1000000"]):
+            break
+        self.assertEqual(line, "1\n")
+
+    def testExecuteBatch(self):
+        commands = ["sleep 0.5; echo one", ["echo", "two"],
+                    "sleep 0.5; exit 2", "sleep 0.5; echo four >&2",
+                    ["/nonexistent/command"]]
+        start = time.time()
+        results = self.ch.executeBatch(commands, jobs=4)
+        self.assertTrue(time.time() - start < 1.4)
+        self.assertEqual([result.command for result in results], commands)
+        self.assertEqual(results[0].stdout, ["one\n"])
+        self.assertEqual(results[1].getOutputString(), "two\n")
+        self.assertEqual(results[2].returncode, 2)
+        self.assertEqual(results[3].stderr, ["four\n"])
+        self.assertTrue(results[4].error)
+        self.assertEqual(results[4].returncode, None)
+        self.assertTrue(results[0].elapsed >= 0.5)
+        self.assertEqual(self.ch.executeBatch([]), [])
+
+    def testPureCommandCached(self):
+        cache = getprobecache()
+        hits = cache.getstats()[0]
+        self.ch.executeCommand("date +%s%N", pure=True)
+        first = self.ch.getOutput()
+        self.ch.executeCommand("date +%s%N", pure=True)
+        self.assertEqual(self.ch.getOutput(), first)
+        self.assertEqual(cache.getstats()[0], hits + 1)
+        self.ch.executeCommand("date +%s%N")
+        self.assertNotEqual(self.ch.getOutput(), first)
+        # outside of fix mode other commands leave the cache alone
+        self.ch.executeCommand("date +%s%N", pure=True)
+        self.assertEqual(self.ch.getOutput(), first)
+
+    def testCloseFds(self):
+        if not os.path.isdir('/proc/self/fd'):
+            self.skipTest('requires /proc/self/fd')
+        reader, writer = os.pipe()
+        try:
+            self.ch.executeCommand(['/bin/ls', '/proc/self/fd'])
+            self.assertTrue(str(writer) + '\n' in self.ch.getOutput())
+            previous = setclosefds(True)
+            try:
+                self.ch.executeCommand(['/bin/ls', '/proc/self/fd'])
+            finally:
+                setclosefds(previous)
+            self.assertFalse(str(writer) + '\n' in self.ch.getOutput())
+        finally:
+            os.close(reader)
+            os.close(writer)
+
+    def testFixModeInvalidates(self):
+        cache = getprobecache()
+        cache.setfixmode(True)
+        self.ch.executeCommand("date +%s%N", pure=True)
+        first = self.ch.getOutput()
+        self.ch.executeCommand("date +%s%N", pure=True)
+        self.assertEqual(self.ch.getOutput(), first)
+        self.ch.executeCommand(["true"])
+        self.ch.executeCommand("date +%s%N", pure=True)
+        self.assertNotEqual(self.ch.getOutput(), first)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -27,8 +27,12 @@ Created on Jun 13, 2013
 
 @author: dwalker
 '''
+import os
+import shutil
+import tempfile
 import KVEditorStonix
 import KVEditor
+import KVAConf
 import unittest
 class zzzTestFrameworkKVAConf(unittest.TestCase):
 
@@ -67,6 +71,114 @@ class zzzTestFrameworkKVAConf(unittest.TestCase):
         self.failUnlessEqual(self.editor.fix(),True,
                               "Update Failed")
         
+
+
+class FakeLogger(object):
+
+    def log(self, priority, msg_data):
+        pass
+
+
+class zzzTestFrameworkKVAConfIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "sysctl.conf")
+        self.tmppath = self.path + ".tmp"
+        self.write(self.path, "# comment\n"
+                   "#net.ipv4.ip_forward = 1\n"
+                   "net.ipv4.ip_forward = 0\n"
+                   "\n"
+                   "kernel.sysrq=0\n"
+                   "net.ipv4.ip_forward = 0\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, path, text):
+        handle = open(path, "w")
+        handle.write(text)
+        handle.close()
+
+    def read(self, path):
+        handle = open(path, "r")
+        text = handle.read()
+        handle.close()
+        return text
+
+    def testIndex(self):
+        conf = KVAConf.KVAConf(self.path, self.tmppath, "present", "openeq",
+                               FakeLogger())
+        self.assertEqual(conf.index.keys(),
+                         ["net.ipv4.ip_forward", "kernel.sysrq"])
+        self.assertEqual(conf.index["net.ipv4.ip_forward"],
+                         [(2, "0"), (5, "0")])
+
+    def testValidateLiteralKeys(self):
+        conf = KVAConf.KVAConf(self.path, self.tmppath, "present", "openeq",
+                               FakeLogger())
+        self.assertTrue(conf.validate("net.ipv4.ip_forward", "0"))
+        self.assertFalse(conf.validate("net.ipv4.ip_forward", "1"))
+        self.assertTrue(conf.validate("kernel.sysrq", "0"))
+        # dots are not wildcards
+        self.assertFalse(conf.validate("net.ipv4.ip.forward", "0"))
+        conf.setIntent("notpresent")
+        self.assertTrue(conf.validate("kernel.sysrq", "1"))
+        self.assertFalse(conf.validate("kernel.sysrq.x", "1"))
+
+    def testUpdate(self):
+        conf = KVAConf.KVAConf(self.path, self.tmppath, "present", "openeq",
+                               FakeLogger())
+        conf.update({"net.ipv4.ip_forward": "1"}, {"kernel.sysrq": "0"})
+        self.assertTrue(conf.validate("net.ipv4.ip_forward", "1"))
+        self.assertTrue(conf.commit())
+        self.assertEqual(self.read(self.tmppath),
+                         "# comment\n"
+                         "#net.ipv4.ip_forward = 1\n"
+                         "\n"
+                         "\n" + conf.universal +
+                         "net.ipv4.ip_forward = 1\n")
+        self.assertTrue(conf.commit())
+        self.assertEqual(self.read(self.tmppath).count("ip_forward = 1\n"),
+                         2)
+
+    def testSpaceList(self):
+        path = os.path.join(self.tmpdir, "blacklist.conf")
+        self.write(path, "blacklist  bluetooth\nblacklist rivafb\n"
+                   "options foo bar=1\n")
+        conf = KVAConf.KVAConf(path, path + ".tmp", "present", "space",
+                               FakeLogger())
+        self.assertEqual(conf.validate("blacklist", ["bluetooth", "hisax"]),
+                         ["hisax"])
+        self.assertTrue(conf.validate("options", "foo bar=1"))
+        conf.setIntent("notpresent")
+        self.assertEqual(conf.validate("blacklist", ["rivafb", "hisax"]),
+                         ["rivafb"])
+        self.assertFalse(conf.validate("blacklist", ["hisax"]))
+        conf.update({"blacklist": ["hisax"]}, {"blacklist": ["rivafb"]})
+        self.assertEqual(conf.contents,
+                         ["blacklist  bluetooth\n", "options foo bar=1\n",
+                          "\n" + conf.universal, "blacklist hisax\n"])
+
+    def testValidateConfOnce(self):
+        editor = KVEditorStonix.KVEditorStonix(None, FakeLogger(), "conf",
+                                               self.path, self.tmppath,
+                                               {"net.ipv4.ip_forward": "1",
+                                                "kernel.sysrq": "0"},
+                                               "present", "closedeq")
+        calls = []
+        validate = editor.editor.validate
+
+        def counting(key, val):
+            calls.append(key)
+            return validate(key, val)
+        editor.editor.validate = counting
+        self.assertFalse(editor.validate())
+        self.assertEqual(editor.fixables, {"net.ipv4.ip_forward": "1"})
+        self.assertEqual(sorted(calls), ["kernel.sysrq",
+                                         "net.ipv4.ip_forward"])
+
+
 if __name__ == "__main__":
     #import sys;sys.argv = ['', 'Test.testName']
     unittest.main()
\ No newline at end of file
@@ -41,8 +41,9 @@ class zzzTestFrameworkStateChgLogger(unittest.TestCase):
         self.environ = environment.Environment()
         self.environ.setdebugmode(True)
         self.logger = logdispatcher.LogDispatcher(self.environ)
-        if os.path.exists('/usr/share/stonix/eventlog'):
-            os.remove('/usr/share/stonix/eventlog')
+        for suffix in ['', '-wal', '-shm']:
+            if os.path.exists('/usr/share/stonix/eventlog.sqlite' + suffix):
+                os.remove('/usr/share/stonix/eventlog.sqlite' + suffix)
         self.testobj = StateChgLogger.StateChgLogger(self.logger, self.environ)
         self.srcfile = '/etc/stonixtest.conf'
         self.dstfile = '/etc/stonixtest.conf.tmp'
@@ -92,12 +93,15 @@ key4 = True
     def testRevertFileChange(self):
         self.mktestfiles()
         eventid = '9999001'
-        patchpath = '/usr/share/stonix/diffdir/etc/stonixtest.conf.patch-' + eventid
         archivepath = '/usr/share/stonix/archive/etc/stonixtest.conf.ovf'
         self.failUnless(self.testobj.recordfilechange(self.srcfile,
                                                       self.dstfile, eventid))
-        self.failUnless(os.path.exists(patchpath), 'Patch not created')
-        self.failUnless(os.path.exists(archivepath), 'Archive not created')
+        store = self.testobj.archivestore
+        self.failUnless(store.latest('patch', self.srcfile, eventid),
+                        'Patch not created')
+        self.failUnless(store.latest('archive', self.srcfile),
+                        'Archive not created')
+        self.failUnless(os.path.exists(archivepath), 'Original not copied')
         shutil.copyfile(self.dstfile, self.srcfile)
         self.testobj.revertfilechanges(self.srcfile, eventid)
         rhandle = open(self.srcfile)
@@ -105,6 +109,25 @@ key4 = True
         self.failUnless(data == self.srcconf,
                         'Conf mismatch in' + self.srcfile)
 
+    def testRevertFileChain(self):
+        self.mktestfiles()
+        self.failUnless(self.testobj.recordfilechange(self.srcfile,
+                                                      self.dstfile, '9999006'))
+        shutil.copyfile(self.dstfile, self.srcfile)
+        whandle = open(self.dstfile, 'a')
+        whandle.write('key5 = False\n')
+        whandle.close()
+        self.failUnless(self.testobj.recordfilechange(self.srcfile,
+                                                      self.dstfile, '9999007'))
+        shutil.copyfile(self.dstfile, self.srcfile)
+        self.failUnless(self.testobj.revertfilechain(self.srcfile,
+                                                     ['9999007', '9999006']))
+        rhandle = open(self.srcfile)
+        data = rhandle.read()
+        rhandle.close()
+        self.failUnless(data == self.srcconf,
+                        'Conf mismatch in' + self.srcfile)
+
     def testRevertFileDelete(self):
         self.mktestfiles()
         eventid = '9999005'
@@ -130,6 +153,27 @@ key4 = True
         self.testobj.recordchgevent(myid, mydict)
         self.failUnless(self.testobj.deleteentry(myid))
 
+    def testDeleteEntryDropsPatch(self):
+        eventid = '9999008'
+        # Make the patch unique so no other event shares its blob
+        whandle = open(self.dstfile, 'a')
+        whandle.write('key6 = ' + os.urandom(8).encode('hex') + '\n')
+        whandle.close()
+        self.testobj.recordchgevent(eventid, {'eventtype': 'conf',
+                                              'filepath': self.srcfile})
+        self.failUnless(self.testobj.recordfilechange(self.srcfile,
+                                                      self.dstfile, eventid))
+        store = self.testobj.archivestore
+        digest = store.latest('patch', self.srcfile, eventid)
+        self.failUnless(os.path.exists(store.blobpath(digest)))
+        self.failUnless(self.testobj.deleteentry(eventid))
+        # Collection is left to the once per run prune()
+        self.failUnless(os.path.exists(store.blobpath(digest)))
+        store.prune()
+        self.assertEqual(store.latest('patch', self.srcfile, eventid), None)
+        self.failIf(os.path.exists(store.blobpath(digest)),
+                    'Patch blob not collected')
+
     def testEventSearch(self):
         mytype = 'perm'
         mystart = '0,0,420'
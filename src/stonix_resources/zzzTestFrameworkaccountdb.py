@@ -0,0 +1,103 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+
+Created on Oct 18, 2026
+
+Unit tests for the AccountDB snapshot cache.
+'''
+import os
+import pwd
+import shutil
+import tempfile
+import unittest
+from accountdb import AccountDB
+
+
+class zzzTestFrameworkaccountdb(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.passwd = os.path.join(self.tmpdir, 'passwd')
+        self.writepasswd("""# local accounts
+root:x:0:0:root:/root:/bin/bash
+
+daemon:x:1:1:daemon:/usr/sbin:/usr/sbin/nologin
+alice:x:1000:1000:Alice:/home/alice:/bin/bash
+""")
+        self.db = AccountDB()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def writepasswd(self, data):
+        whandle = open(self.passwd, 'w')
+        whandle.write(data)
+        whandle.close()
+
+    def testGetLines(self):
+        lines = self.db.getlines(self.passwd)
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(lines[0], '# local accounts\n')
+        # Callers get a copy they are free to modify
+        lines.append('junk')
+        self.assertEqual(len(self.db.getlines(self.passwd)), 5)
+
+    def testIndexes(self):
+        self.assertEqual(len(self.db.getentries(self.passwd)), 3)
+        self.assertEqual(self.db.getbyname(self.passwd, 'alice')[5],
+                         '/home/alice')
+        self.assertEqual(self.db.getbyid(self.passwd, 1)[0], 'daemon')
+        self.assertEqual(self.db.getbyname(self.passwd, 'bob'), None)
+
+    def testChangeDetected(self):
+        self.assertEqual(self.db.getbyname(self.passwd, 'bob'), None)
+        tmpfile = self.passwd + '.tmp'
+        whandle = open(tmpfile, 'w')
+        whandle.write('bob:x:1001:1001::/home/bob:/bin/sh\n')
+        whandle.close()
+        os.rename(tmpfile, self.passwd)
+        self.assertEqual(self.db.getbyid(self.passwd, 1001)[0], 'bob')
+
+    def testInvalidate(self):
+        self.db.getlines(self.passwd)
+        stat = os.stat(self.passwd)
+        self.writepasswd('carol:x:1002:1002::/home/carol:/bin/sh\n' +
+                         ' ' * (stat.st_size - 38))
+        os.utime(self.passwd, (stat.st_atime, stat.st_mtime))
+        self.db.invalidate(self.passwd)
+        self.assertEqual(self.db.getbyid(self.passwd, 1002)[0], 'carol')
+
+    def testMissingFile(self):
+        self.assertEqual(self.db.getlines(os.path.join(self.tmpdir, 'no')),
+                         [])
+
+    def testNSS(self):
+        self.assertEqual(self.db.getpwnam('root').pw_uid, 0)
+        self.assertEqual(self.db.getpwuid(0).pw_name, 'root')
+        self.assertEqual(len(self.db.getpwall()), len(pwd.getpwall()))
+        self.assertRaises(KeyError, self.db.getpwnam, 'nosuchstonixuser')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+
+
+Created on Oct 18, 2026
+
+Unit tests for the content addressed BlobStore.
+'''
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from blobstore import BlobStore
+
+
+class zzzTestFrameworkblobstore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.store = BlobStore(os.path.join(self.tmpdir, 'archive'))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmpdir)
+
+    def testDedupe(self):
+        digest1 = self.store.putdata('PermitRootLogin no\n')
+        size = self.store.getsize()
+        digest2 = self.store.putdata('PermitRootLogin no\n')
+        self.assertEqual(digest1, digest2)
+        self.assertEqual(self.store.getsize(), size)
+        self.assertEqual(self.store.getdata(digest1), 'PermitRootLogin no\n')
+        # Blobs are plain gzip files
+        gzhandle = gzip.open(self.store.blobpath(digest1))
+        self.assertEqual(gzhandle.read(), 'PermitRootLogin no\n')
+        gzhandle.close()
+        self.assertRaises(KeyError, self.store.getdata, '0' * 64)
+
+    def testRefs(self):
+        digest1 = self.store.putdata('version 1')
+        digest2 = self.store.putdata('version 2')
+        self.store.addref('archive', '/etc/ssh/sshd_config', digest1)
+        self.store.addref('archive', '/etc/ssh/sshd_config', digest2)
+        self.assertEqual(self.store.latest('archive', '/etc/ssh/sshd_config'),
+                         digest2)
+        self.assertEqual(len(self.store.getrefs('archive',
+                                                '/etc/ssh/sshd_config')), 2)
+        self.store.addref('patch', '/etc/ssh/sshd_config', digest1, '0042001')
+        self.store.addref('patch', '/etc/ssh/sshd_config', digest2, '0042001',
+                          True)
+        self.assertEqual(self.store.getrefs('patch', '/etc/ssh/sshd_config',
+                                            '0042001')[0][1], digest2)
+        self.assertEqual(self.store.latest('patch', '/etc/ssh/sshd_config'),
+                         None)
+
+    def testGc(self):
+        kept = self.store.putdata('referenced')
+        dropped = self.store.putdata('unreferenced')
+        self.store.addref('archive', '/etc/hosts', kept)
+        self.assertEqual(self.store.gc(), 1)
+        self.assertEqual(self.store.getdata(kept), 'referenced')
+        self.assertFalse(os.path.exists(self.store.blobpath(dropped)))
+
+    def testDropRef(self):
+        digest = self.store.putdata('patch for 0042001')
+        kept = self.store.putdata('patch for 0042002')
+        self.store.addref('patch', '/etc/hosts', digest, '0042001')
+        self.store.addref('patch', '/etc/motd', digest, '0042001')
+        self.store.addref('patch', '/etc/hosts', kept, '0042002')
+        self.assertEqual(self.store.dropref('patch', '0042001'), 2)
+        self.assertEqual(self.store.gc(), 1)
+        self.assertFalse(os.path.exists(self.store.blobpath(digest)))
+        self.assertEqual(self.store.latest('patch', '/etc/hosts', '0042002'),
+                         kept)
+
+    def testPrune(self):
+        versions = []
+        for num in range(5):
+            digest = self.store.putdata(os.urandom(4096))
+            self.store.addref('archive', '/etc/pam.d/sshd', digest)
+            versions.append(digest)
+        self.store.budget = self.store.getsize() / 2
+        self.assertTrue(self.store.prune() <= self.store.budget)
+        remaining = [ref[1] for ref in
+                     self.store.getrefs('archive', '/etc/pam.d/sshd')]
+        # The original and the newest version are always kept
+        self.assertEqual(remaining[0], versions[0])
+        self.assertEqual(remaining[-1], versions[-1])
+        self.assertTrue(len(remaining) < 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+Created on Oct 18, 2026
+
+Unit tests for the ConfCache.
+'''
+import os
+import shutil
+import tempfile
+import unittest
+import KVAConf
+from confcache import ConfCache, getconfcache
+
+
+class FakeLogger(object):
+
+    def log(self, priority, msg_data):
+        pass
+
+
+class zzzTestFrameworkconfcache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'sshd_config')
+        self.write(self.path, 'Protocol 2\nPermitRootLogin no\n')
+        self.cache = ConfCache()
+        self.parsed = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, path, text):
+        handle = open(path, 'w')
+        handle.write(text)
+        handle.close()
+
+    def parser(self, lines):
+        self.parsed.append(lines)
+        return len(lines)
+
+    def testCached(self):
+        self.assertEqual(self.cache.get(self.path, 'count', self.parser), 2)
+        self.assertEqual(self.cache.get(self.path, 'count', self.parser), 2)
+        self.assertEqual(len(self.parsed), 1)
+        self.assertEqual(self.cache.getstats(), (1, 1))
+
+    def testReplacedFile(self):
+        self.cache.get(self.path, 'count', self.parser)
+        newfile = self.path + '.tmp'
+        self.write(newfile, 'Protocol 2\n')
+        os.rename(newfile, self.path)
+        self.assertEqual(self.cache.get(self.path, 'count', self.parser), 1)
+        self.assertEqual(len(self.parsed), 2)
+
+    def testInvalidate(self):
+        self.cache.get(self.path, 'count', self.parser)
+        self.cache.get(self.path, 'other', self.parser)
+        self.cache.invalidate(self.path)
+        self.cache.get(self.path, 'count', self.parser)
+        self.assertEqual(len(self.parsed), 3)
+        self.cache.invalidate()
+        self.assertEqual(self.cache.documents, {})
+
+    def testMissing(self):
+        missing = os.path.join(self.tmpdir, 'nothere')
+        self.assertEqual(self.cache.get(missing, 'count', self.parser), None)
+        self.assertEqual(self.cache.getlines(missing), None)
+
+    def testLinesAreCopies(self):
+        lines = self.cache.getlines(self.path)
+        lines.append('Banner /etc/issue\n')
+        self.assertEqual(self.cache.getlines(self.path),
+                         ['Protocol 2\n', 'PermitRootLogin no\n'])
+
+    def testSharedByEditors(self):
+        hits, misses = getconfcache().getstats()
+        first = KVAConf.KVAConf(self.path, self.path + '.tmp', 'present',
+                                'space', FakeLogger())
+        second = KVAConf.KVAConf(self.path, self.path + '.tmp', 'present',
+                                 'space', FakeLogger())
+        self.assertEqual(getconfcache().getstats(), (hits + 1, misses + 1))
+        self.assertTrue(second.validate('Protocol', '2'))
+        first.update({'Protocol': '1'}, {})
+        self.assertTrue(first.validate('Protocol', '1'))
+        self.assertTrue(second.validate('Protocol', '2'))
+
+
+if __name__ == "__main__":
+    unittest.main()
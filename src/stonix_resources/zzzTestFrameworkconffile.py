@@ -88,6 +88,50 @@ class zzzTestFrameworkconffile(unittest.TestCase):
     def testSpaceAudit(self):
         self.failUnless( self.to_space.audit() )
 
+    def testOpenEqFix(self):
+        self.to_openeq.setDirectives(self.td2source)
+        self.failIf(self.to_openeq.audit())
+        self.to_openeq.fix()
+        self.failUnless(self.to_openeq.audit())
+        filedata = self.to_openeq.getfiledata()
+        # every line setting key3 is changed, nothing is appended
+        self.assertEqual(filedata.count('key3 = val6\n'), 2)
+        self.assertEqual(len(filedata), 6)
+
+    def testSpaceFix(self):
+        self.to_space.setfiledata(['# key1 old\n', 'key10 val10\n',
+                                   'key1 val0\n'])
+        self.to_space.setDirectives({'key1': 'val1', 'key4': 'val4'})
+        self.to_space.fix()
+        self.assertEqual(self.to_space.getfiledata(),
+                         ['# key1 old\n', 'key10 val10\n', 'key1 val1\n',
+                          'key4 val4\n'])
+        self.failUnless(self.to_space.audit())
+
+    def testWriteFile(self):
+        os.chmod('test2.conf', 0640)
+        self.to_closedeq.setDirectives(self.td2source)
+        self.to_closedeq.fix()
+        self.to_closedeq.writefile()
+        try:
+            rhandle = open('test2.conf.tmp', 'r')
+            self.assertEqual(rhandle.read(),
+                             ''.join(self.to_closedeq.getfiledata()))
+            rhandle.close()
+            self.assertEqual(os.stat('test2.conf.tmp').st_mode & 0777, 0640)
+        finally:
+            os.remove('test2.conf.tmp')
+
+    def testWriteNewFile(self):
+        self.to_closedeq.filename = 'test4.conf'
+        umask = os.umask(022)
+        try:
+            self.to_closedeq.writefile()
+            self.assertEqual(os.stat('test2.conf.tmp').st_mode & 0777, 0644)
+        finally:
+            os.umask(umask)
+            os.remove('test2.conf.tmp')
+
 
 if __name__ == "__main__":
     #import sys;sys.argv = ['', 'Test.testName']
@@ -26,18 +26,42 @@ Created on Jul 18, 2011
 
 @author: dkennel
 '''
+import json
+import os
+import shutil
+import tempfile
 import unittest
 import re
 import configuration
+from configurationitem import ConfigurationItem
+
+
+class FakeEnviron(object):
+
+    def __init__(self, configpath, cachepath=''):
+        self.configpath = configpath
+        self.cachepath = cachepath
+
+    def get_config_path(self):
+        return self.configpath
+
+    def get_cache_path(self):
+        return self.cachepath
+
 
 class zzzTestFrameworkconfiguration(unittest.TestCase):
 
 
     def setUp(self):
-        self.to = configuration.Configuration()
+        self.tmpdir = tempfile.mkdtemp()
+        configpath = os.path.join(self.tmpdir, 'stonix.conf')
+        whandle = open(configpath, 'w')
+        whandle.write('[MAIN]\nversion = 100\n')
+        whandle.close()
+        self.to = configuration.Configuration(FakeEnviron(configpath))
 
     def tearDown(self):
-        pass
+        shutil.rmtree(self.tmpdir)
     
     def testConfValueSetGet(self):
         self.to.setconfvalue('UnitTest', 'unit', True)
@@ -55,6 +79,92 @@ class zzzTestFrameworkconfiguration(unittest.TestCase):
         self.failUnless(self.to.getusercomment('UnitTest', 'unit'))
 
 
+
+class zzzTestFrameworkconfigurationcache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.configpath = os.path.join(self.tmpdir, 'stonix.conf')
+        self.cachepath = os.path.join(self.tmpdir, 'cache')
+        self.compiledpath = os.path.join(self.cachepath, 'stonixconf')
+        self.environ = FakeEnviron(self.configpath, self.cachepath)
+        self.writeconf('[MAIN]\nversion = 100\n[SecureSSH]\n' +
+                       'securessh = True\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def writeconf(self, text):
+        whandle = open(self.configpath, 'w')
+        whandle.write(text)
+        whandle.close()
+
+    def testCompiledConfig(self):
+        config = configuration.Configuration(self.environ)
+        self.assertEqual(config.getconfvalue('SecureSSH', 'securessh'),
+                         'True')
+        self.assertEqual(os.stat(self.compiledpath).st_mode & 0777, 0600)
+        # Tamper with the compiled copy to prove it is what gets used
+        rhandle = open(self.compiledpath, 'r')
+        data = json.load(rhandle)
+        rhandle.close()
+        data['config']['SecureSSH']['securessh'] = 'False'
+        whandle = open(self.compiledpath, 'w')
+        json.dump(data, whandle)
+        whandle.close()
+        os.chmod(self.compiledpath, 0600)
+        config = configuration.Configuration(self.environ)
+        value = config.getconfvalue('SecureSSH', 'securessh')
+        self.assertEqual(value, 'False')
+        self.assertTrue(isinstance(value, str))
+        # A changed config file is parsed again
+        self.writeconf('[MAIN]\nversion = 100\n[SecureSSH]\n' +
+                       'securessh = Maybe\n')
+        config = configuration.Configuration(self.environ)
+        self.assertEqual(config.getconfvalue('SecureSSH', 'securessh'),
+                         'Maybe')
+
+    def testUnsafeCompiledConfig(self):
+        configuration.Configuration(self.environ)
+        os.chmod(self.compiledpath, 0666)
+        rhandle = open(self.compiledpath, 'r')
+        data = json.load(rhandle)
+        rhandle.close()
+        data['config']['SecureSSH']['securessh'] = 'False'
+        whandle = open(self.compiledpath, 'w')
+        json.dump(data, whandle)
+        whandle.close()
+        config = configuration.Configuration(self.environ)
+        self.assertEqual(config.getconfvalue('SecureSSH', 'securessh'),
+                         'True')
+
+    def testWriteConfig(self):
+        config = configuration.Configuration(self.environ)
+        ruledata = {'SecureSSH': ['Secure the\nSSH daemon',
+                                  ConfigurationItem('bool', 'securessh',
+                                                    True, '', 'Set to\nFalse',
+                                                    True, False),
+                                  ConfigurationItem('list', 'ciphers',
+                                                    ['aes'], 'note', 'Ciphers',
+                                                    ['aes', 'ctr'], True)]}
+        config.writeconfig(False, ruledata)
+        rhandle = open(self.configpath, 'r')
+        written = rhandle.read()
+        rhandle.close()
+        self.assertTrue('[SecureSSH]\n# Secure the\n# SSH daemon\n' in
+                        written)
+        self.assertTrue('# Set to\n# False\nsecuressh = True\n' +
+                        'UCsecuressh = \n' in written)
+        self.assertTrue('ciphers = aes ctr \nUCciphers = note\n' in written)
+        # Simple config leaves out unchanged items that are not simple
+        config.writeconfig(True, ruledata)
+        config = configuration.Configuration(self.environ)
+        self.assertRaises(KeyError, config.getconfvalue, 'SecureSSH',
+                          'securessh')
+        self.assertEqual(config.getconfvalue('SecureSSH', 'ciphers'),
+                         'aes ctr')
+
+
 if __name__ == "__main__":
     #import sys;sys.argv = ['', 'Test.testName']
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,109 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+
+
+Created on Oct 18, 2026
+
+Unit tests for the SQLite backed EventStore.
+'''
+import os
+import shelve
+import shutil
+import sqlite3
+import stat
+import tempfile
+import unittest
+from eventstore import EventStore
+
+
+class zzzTestFrameworkeventstore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'eventlog.sqlite')
+        self.store = EventStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmpdir)
+
+    def committed(self):
+        '''Return the event ids visible to another connection.'''
+        conn = sqlite3.connect(self.path)
+        try:
+            return sorted([str(row[0]) for row in
+                           conn.execute('SELECT eventid FROM events')])
+        finally:
+            conn.close()
+
+    def testStoreFetch(self):
+        event = {'eventtype': 'perm', 'startstate': [0, 0, 420],
+                 'endstate': [0, 0, 416], 'filepath': '/etc/shadow'}
+        self.store.put('0042001', event)
+        self.assertEqual(self.store.get('0042001'), event)
+        self.assertRaises(KeyError, self.store.get, '0042002')
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0600)
+
+    def testFindRule(self):
+        for eventid in ['0042002', '0042001', '0888001', '1042001']:
+            self.store.put(eventid, {'eventtype': 'conf'})
+        self.assertEqual(self.store.findrule('0042'), ['0042001', '0042002'])
+        self.assertEqual(self.store.findrule('0888'), ['0888001'])
+        self.assertEqual(self.store.findrule('0001'), [])
+
+    def testBatchedCommits(self):
+        self.store.put('0042001', {'eventtype': 'conf'})
+        self.store.put('0042002', {'eventtype': 'conf'})
+        self.assertEqual(self.committed(), [])
+        # An event for another rule commits the previous rule's batch
+        self.store.put('0043001', {'eventtype': 'conf'})
+        self.assertEqual(self.committed(), ['0042001', '0042002'])
+        self.store.commit()
+        self.assertEqual(self.committed(), ['0042001', '0042002', '0043001'])
+
+    def testDelete(self):
+        self.store.put('0042001', {'eventtype': 'conf'})
+        self.store.delete('0042001')
+        self.assertRaises(KeyError, self.store.delete, '0042001')
+        self.assertEqual(self.store.keys(), [])
+
+    def testMigrate(self):
+        legacypath = os.path.join(self.tmpdir, 'eventlog')
+        legacy = shelve.open(legacypath, 'c')
+        legacy['0042001'] = {'eventtype': 'perm', 'startstate': '0,0,420'}
+        legacy['0888001'] = {'eventtype': 'del'}
+        legacy.close()
+        self.store.put('0042001', {'eventtype': 'newer'})
+        self.assertEqual(self.store.migrate(legacypath), 2)
+        self.assertEqual(self.store.keys(), ['0042001', '0888001'])
+        # Events already in the store win
+        self.assertEqual(self.store.get('0042001'), {'eventtype': 'newer'})
+        self.assertEqual(self.store.get('0888001'), {'eventtype': 'del'})
+        # The legacy log is only migrated once
+        self.assertEqual(self.store.migrate(legacypath), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
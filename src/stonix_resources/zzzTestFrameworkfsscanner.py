@@ -0,0 +1,138 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+
+
+Created on Oct 18, 2026
+
+Unit tests for the FSScanner.
+'''
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+from fsscanner import FSScanner
+
+
+class FakeLogger(object):
+
+    def log(self, priority, msg_data):
+        pass
+
+
+class zzzTestFrameworkfsscanner(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        os.chmod(self.tmpdir, 0755)
+        for sub in ['a', 'a/b', 'a/b/c', 'd']:
+            os.mkdir(os.path.join(self.tmpdir, sub))
+        self.wwdir = os.path.join(self.tmpdir, 'a/b')
+        os.chmod(self.wwdir, 01777)
+        self.wwfile = os.path.join(self.tmpdir, 'a/b/c/wwfile')
+        self.touch(self.wwfile, 0666)
+        self.suidfile = os.path.join(self.tmpdir, 'd/suidfile')
+        self.touch(self.suidfile, 04755)
+        self.touch(os.path.join(self.tmpdir, 'd/plain'), 0644)
+        os.symlink(self.wwfile, os.path.join(self.tmpdir, 'd/link'))
+        self.dirlink = os.path.join(self.tmpdir, 'd/dirlink')
+        os.symlink(self.wwdir, self.dirlink)
+        self.scanner = FSScanner(FakeLogger(), threads=3)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def touch(self, path, mode):
+        whandle = open(path, 'w')
+        whandle.close()
+        os.chmod(path, mode)
+
+    def testScan(self):
+        results = self.scanner.scan([self.tmpdir])
+        self.assertEqual(results['ww'], set([self.wwdir, self.wwfile,
+                                               self.dirlink]))
+        self.assertEqual(results['suid'], set([self.suidfile]))
+        self.assertEqual(results['unowned'], set())
+        self.assertFalse(self.scanner.isoverrun())
+
+    def testUnowned(self):
+        if os.geteuid() != 0:
+            return
+        unowned = os.path.join(self.tmpdir, 'a/unowned')
+        self.touch(unowned, 0644)
+        os.chown(unowned, 54321, 0)
+        badgroup = os.path.join(self.tmpdir, 'a/badgroup')
+        self.touch(badgroup, 0644)
+        os.chown(badgroup, 0, 54321)
+        results = self.scanner.scan([self.tmpdir])
+        self.assertEqual(results['unowned'], set([unowned, badgroup]))
+
+    def testOverrun(self):
+        scanner = FSScanner(FakeLogger(), threads=2, limit=1)
+        scanner.scan([self.tmpdir])
+        self.assertTrue(scanner.isoverrun())
+
+    def testMissingRoot(self):
+        results = self.scanner.scan([os.path.join(self.tmpdir, 'nothere')])
+        self.assertEqual(results['ww'], set())
+        self.assertFalse(self.scanner.isoverrun())
+
+    def testIncremental(self):
+        index = os.path.join(self.tmpdir, 'index.json')
+        scandir = os.path.join(self.tmpdir, 'a')
+        self.scanner.scan([scandir])
+        self.scanner.saveindex(index)
+        self.assertEqual(stat.S_IMODE(os.stat(index).st_mode), 0600)
+        newww = os.path.join(self.tmpdir, 'a/b/c/newww')
+        self.touch(newww, 0666)
+        scanner = FSScanner(FakeLogger())
+        self.assertTrue(scanner.loadindex(index, 3600))
+        results = scanner.scan([scandir])
+        self.assertEqual(results['ww'],
+                         set([self.wwdir, self.wwfile, newww]))
+        listed, reused = scanner.getcounts()
+        # Only a/b/c changed
+        self.assertEqual(listed, 1)
+        self.assertEqual(reused, 2)
+
+    def testIndexRejected(self):
+        index = os.path.join(self.tmpdir, 'index.json')
+        self.scanner.scan([self.tmpdir])
+        self.scanner.saveindex(index)
+        scanner = FSScanner(FakeLogger())
+        self.assertFalse(scanner.loadindex(index, -1))
+        os.chmod(index, 0666)
+        self.assertFalse(scanner.loadindex(index))
+        self.assertFalse(scanner.loadindex(index + '.missing'))
+
+    def testMemoizedLookups(self):
+        self.assertTrue(self.scanner.uidexists(0))
+        self.assertTrue(self.scanner.gidexists(0))
+        self.assertTrue(0 in self.scanner.uids)
+        self.assertTrue(0 in self.scanner.gids)
+
+
+if __name__ == "__main__":
+    unittest.main()
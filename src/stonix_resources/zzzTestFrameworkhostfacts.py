@@ -0,0 +1,159 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+Created on Oct 18, 2026
+
+Unit tests for HostFacts.
+'''
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from hostfacts import HostFacts
+
+
+class FakeLogger(object):
+
+    def log(self, priority, msg_data):
+        pass
+
+
+class zzzTestFrameworkhostfacts(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'cache', 'hostfacts')
+        self.calls = {'os': 0, 'hardware': 0}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def makefacts(self, path=''):
+        facts = HostFacts(path, logger=FakeLogger())
+        facts.register('os', lambda: self.collect('os', {'osversion': '7'}))
+        facts.register('hardware',
+                       lambda: self.collect('hardware',
+                                            {'systemserial': 'ABC123'}))
+        return facts
+
+    def collect(self, group, values):
+        self.calls[group] += 1
+        return values
+
+    def testLazyCollection(self):
+        facts = self.makefacts()
+        self.assertEqual(self.calls, {'os': 0, 'hardware': 0})
+        self.assertEqual(facts.get('os', 'osversion'), '7')
+        self.assertEqual(facts.get('os', 'osreportstring', ''), '')
+        self.assertEqual(self.calls, {'os': 1, 'hardware': 0})
+        self.assertEqual(facts.get('hardware', 'systemserial'), 'ABC123')
+        self.assertEqual(facts.get('hardware', 'systemserial'), 'ABC123')
+        self.assertEqual(self.calls, {'os': 1, 'hardware': 1})
+        self.assertFalse(facts.isloaded())
+
+    def testInvalidate(self):
+        facts = self.makefacts()
+        facts.get('os', 'osversion')
+        facts.invalidate()
+        facts.get('os', 'osversion')
+        self.assertEqual(self.calls['os'], 2)
+
+    def testPersisted(self):
+        if os.geteuid() != 0:
+            self.skipTest('requires root')
+        self.makefacts(self.path).get('hardware', 'systemserial')
+        self.assertEqual(os.stat(self.path).st_mode & 0777, 0600)
+        facts = self.makefacts(self.path)
+        value = facts.get('hardware', 'systemserial')
+        self.assertEqual(value, 'ABC123')
+        self.assertTrue(isinstance(value, str))
+        self.assertTrue(facts.isloaded())
+        self.assertEqual(self.calls['hardware'], 1)
+
+    def testStale(self):
+        if os.geteuid() != 0:
+            self.skipTest('requires root')
+        self.makefacts(self.path).get('os', 'osversion')
+        rhandle = open(self.path, 'r')
+        data = json.load(rhandle)
+        rhandle.close()
+        data['key']['bootid'] = 'someotherboot'
+        whandle = open(self.path, 'w')
+        json.dump(data, whandle)
+        whandle.close()
+        self.makefacts(self.path).get('os', 'osversion')
+        self.assertEqual(self.calls['os'], 2)
+        facts = self.makefacts(self.path)
+        facts.ttl = -1
+        facts.get('os', 'osversion')
+        self.assertEqual(self.calls['os'], 3)
+
+    def testGroupAge(self):
+        if os.geteuid() != 0:
+            self.skipTest('requires root')
+        self.makefacts(self.path).get('os', 'osversion')
+        data = self.readdata()
+        old = data['collected']['os'] - 3600
+        data['collected']['os'] = old
+        self.writedata(data)
+        # Collecting another group must not refresh the age of the first
+        facts = self.makefacts(self.path)
+        facts.get('hardware', 'systemserial')
+        self.assertEqual(self.calls, {'os': 1, 'hardware': 1})
+        self.assertEqual(self.readdata()['collected']['os'], old)
+        # Only the group that outlived the ttl is collected again
+        facts = self.makefacts(self.path)
+        facts.ttl = 1800
+        facts.get('hardware', 'systemserial')
+        facts.get('os', 'osversion')
+        self.assertTrue(facts.isloaded())
+        self.assertEqual(self.calls, {'os': 2, 'hardware': 1})
+
+    def readdata(self):
+        rhandle = open(self.path, 'r')
+        try:
+            return json.load(rhandle)
+        finally:
+            rhandle.close()
+
+    def writedata(self, data):
+        whandle = open(self.path, 'w')
+        try:
+            json.dump(data, whandle)
+        finally:
+            whandle.close()
+
+    def testUnsafeFile(self):
+        if os.geteuid() != 0:
+            self.skipTest('requires root')
+        self.makefacts(self.path).get('os', 'osversion')
+        os.chmod(self.path, 0666)
+        facts = self.makefacts(self.path)
+        facts.get('os', 'osversion')
+        self.assertFalse(facts.isloaded())
+        self.assertEqual(self.calls['os'], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -28,9 +28,13 @@ Created on Sep 21, 2011
 
 @author: scmcleni
 '''
+import os
+import shutil
+import tempfile
 import unittest
+import xml.etree.ElementTree as ET
 import logdispatcher
-from logdispatcher import LogDispatcher, LogPriority
+from logdispatcher import LogDispatcher, LogPriority, MessageData, xmlReport
 import environment
 
 
@@ -52,5 +56,106 @@ class zzzTestFrameworklogdispatcher(unittest.TestCase):
         except:
             self.fail("Failed to write ERROR to log file")
 
+    def testIsEnabled(self):
+        self.assertTrue(self.logger.isenabled(self.priority.DEBUG))
+        self.assertTrue(self.logger.isenabled(self.priority.WARNING))
+        self.environ.setdebugmode(False)
+        self.environ.setverbosemode(False)
+        quiet = LogDispatcher(self.environ)
+        self.assertFalse(quiet.isenabled(self.priority.DEBUG))
+        self.assertFalse(quiet.isenabled(self.priority.INFO))
+        self.assertTrue(quiet.isenabled(self.priority.WARNING))
+        quiet.closereports()
+
+    def testLazyMessage(self):
+        calls = []
+
+        def detail():
+            calls.append(1)
+            return 'lazy detail'
+        self.environ.setdebugmode(False)
+        self.environ.setverbosemode(False)
+        quiet = LogDispatcher(self.environ)
+        quiet.log(self.priority.DEBUG, ['Lazy', detail])
+        quiet.log(self.priority.DEBUG, detail)
+        self.assertEqual(calls, [])
+        self.logger.log(self.priority.DEBUG, ['Lazy', detail])
+        self.assertEqual(calls, [1])
+        entry = self.logger.getconsolemessage()
+        self.assertEqual(entry.Tag, 'Lazy')
+        self.assertEqual(entry.Detail, 'lazy detail')
+        quiet.closereports()
+
+    def testDiscardedMessageNotFormatted(self):
+        # A DEBUG message in a non debug run must be dropped before any
+        # work is done on it.
+        calls = []
+
+        class Detail(object):
+
+            def __str__(self):
+                calls.append('str')
+                return 'detail'
+
+        def detail():
+            calls.append('called')
+            return 'detail'
+
+        def record(*args, **kwargs):
+            calls.append('formatted')
+        self.environ.setdebugmode(False)
+        self.environ.setverbosemode(False)
+        quiet = LogDispatcher(self.environ)
+        quiet.format_message_data = record
+        quiet.writer.put = record
+        quiet.log(LogPriority.DEBUG, ['Discarded', detail])
+        quiet.log(LogPriority.DEBUG, ['Discarded', Detail()])
+        quiet.log(LogPriority.DEBUG, detail)
+        self.assertEqual(calls, [])
+        quiet.log(LogPriority.WARNING, ['Kept', Detail()])
+        self.assertTrue('formatted' in calls)
+        quiet.closereports()
+
+    def testFlush(self):
+        # Findings are only recorded once the metadata has been closed off
+        self.logger.logRuleCount()
+        self.logger.log(self.priority.WARNING, ['FlushTest', 'queued'])
+        self.logger.flush()
+        self.assertTrue(self.logger.writer.queue.empty())
+        self.assertEqual(self.logger.xmlreport.numfindings, 1)
+
+    def testStreamingReport(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'report.xml')
+            report = xmlReport(path)
+            entry = MessageData()
+            entry.Tag = 'Hostname'
+            entry.Detail = 'localhost'
+            report.writeMetadata(entry)
+            for num in range(1000):
+                entry = MessageData()
+                entry.Tag = 'Rule' + str(num)
+                entry.Detail = 'detail ' + str(num)
+                report.writeFinding(entry)
+            self.assertTrue(os.path.exists(report.spoolpath))
+            report.closeReport()
+            self.assertFalse(os.path.exists(report.spoolpath))
+            root = ET.parse(path).getroot()
+            self.assertEqual(root.tag, 'run')
+            self.assertEqual(root.find('metadata/Hostname').get('val'),
+                             'localhost')
+            findings = root.find('findings')
+            self.assertEqual(len(findings), 1000)
+            self.assertEqual(findings[999].tag, 'Rule999')
+            self.assertEqual(findings[999].get('val'), 'detail 999')
+
+            empty = xmlReport(os.path.join(tmpdir, 'empty.xml'))
+            empty.closeReport()
+            self.assertEqual(open(os.path.join(tmpdir, 'empty.xml')).read(),
+                             '<run><metadata /><findings /></run>')
+        finally:
+            shutil.rmtree(tmpdir)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,172 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+Created on Oct 18, 2026
+
+Unit tests for NetFacts, run against sample proc and sys trees.
+'''
+import os
+import shutil
+import socket
+import tempfile
+import time
+import unittest
+import netfacts
+from netfacts import NetFacts
+
+ROUTE = '''Iface\tDestination\tGateway \tFlags\tRefCnt\tUse\tMetric\tMask\t\tMTU\tWindow\tIRTT
+eth0\t00000000\t0102000A\t0003\t0\t0\t100\t00000000\t0\t0\t0
+eth0\t0000000A\t00000000\t0001\t0\t0\t100\t0000FFFF\t0\t0\t0
+eth1\t0010A8C0\t00000000\t0001\t0\t0\t100\t00FFFFFF\t0\t0\t0
+'''
+
+FIBTRIE = '''Main:
+  +-- 0.0.0.0/0 3 0 5
+     |-- 0.0.0.0
+        /0 universe UNICAST
+     +-- 127.0.0.0/8 2 0 2
+        +-- 127.0.0.0/31 1 0 0
+           |-- 127.0.0.0
+              /8 host LOCAL
+           |-- 127.0.0.1
+              /32 host LOCAL
+     |-- 10.0.5.7
+        /32 host LOCAL
+     |-- 10.0.255.255
+        /32 link BROADCAST
+     |-- 192.168.16.4
+        /32 host LOCAL
+Local:
+     |-- 10.0.5.7
+        /32 host LOCAL
+'''
+
+IFINET6 = '''00000000000000000000000000000001 01 80 10 80       lo
+fe80000000000000021122fffe334455 02 40 20 80     eth0
+'''
+
+IFCONFIG = '''en0: flags=8863<UP,BROADCAST,SMART,RUNNING,SIMPLEX,MULTICAST> mtu 1500
+\tether 00:11:22:33:44:55
+\tinet6 fe80::211:22ff:fe33:4455%en0 prefixlen 64 scopeid 0x4
+\tinet 10.0.5.7 netmask 0xffff0000 broadcast 10.0.255.255
+lo0: flags=8049<UP,LOOPBACK,RUNNING,MULTICAST> mtu 16384
+\tinet 127.0.0.1 netmask 0xff000000
+eth1      Link encap:Ethernet  HWaddr 66:77:88:99:AA:BB
+          inet addr:192.168.16.4  Bcast:192.168.16.255  Mask:255.255.255.0
+'''
+
+
+class zzzTestFrameworknetfacts(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.write('proc/net/route', ROUTE)
+        self.write('proc/net/fib_trie', FIBTRIE)
+        self.write('proc/net/if_inet6', IFINET6)
+        self.write('sys/class/net/lo/address', '00:00:00:00:00:00\n')
+        self.write('sys/class/net/eth0/address', '00:11:22:33:44:55\n')
+        self.write('sys/class/net/eth1/address', '66:77:88:99:aa:bb\n')
+        self.facts = NetFacts(self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, path, text):
+        path = os.path.join(self.root, path)
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        whandle = open(path, 'w')
+        whandle.write(text)
+        whandle.close()
+
+    def testProcTables(self):
+        self.assertTrue(self.facts.isfixture())
+        self.assertEqual(self.facts.getinterfaces(), ['eth0', 'eth1', 'lo'])
+        self.assertEqual(self.facts.getallips(),
+                         ['10.0.5.7', '192.168.16.4', '127.0.0.1'])
+        self.assertEqual(self.facts.getallipv6(),
+                         ['fe80::211:22ff:fe33:4455', '::1'])
+        self.assertEqual(self.facts.getdefaultinterface(), 'eth0')
+        self.assertEqual(self.facts.getgateway(), '10.0.2.1')
+        self.assertEqual(self.facts.getdefaultip(), '10.0.5.7')
+
+    def testMacAddr(self):
+        self.assertEqual(self.facts.getmacaddr('192.168.16.4'),
+                         '66:77:88:99:aa:bb')
+        # loopback has no real MAC, the default interface's is used
+        self.assertEqual(self.facts.getmacaddr('127.0.0.1'),
+                         '00:11:22:33:44:55')
+        self.assertEqual(self.facts.getmacaddr('fe80::211:22ff:fe33:4455'),
+                         '00:11:22:33:44:55')
+
+    def testTablesBuiltOnce(self):
+        tables = self.facts.gettables()
+        self.assertTrue(self.facts.gettables() is tables)
+        self.facts.invalidate()
+        self.assertFalse(self.facts.gettables() is tables)
+
+    def testEmptyFixture(self):
+        facts = NetFacts(os.path.join(self.root, 'nothere'))
+        self.assertEqual(facts.getallips(), [])
+        self.assertEqual(facts.getdefaultip(), '')
+        self.assertEqual(facts.getmacaddr('10.0.5.7'), '')
+
+    def testParseCommands(self):
+        tables = self.facts.newtables()
+        self.facts.parseifconfig(tables, IFCONFIG.splitlines())
+        self.facts.parseroute(tables, ['   route to: default',
+                                       'destination: default',
+                                       '    gateway: 10.0.2.1',
+                                       '  interface: en0'])
+        interfaces = tables['interfaces']
+        self.assertEqual(sorted(interfaces), ['en0', 'eth1', 'lo0'])
+        self.assertEqual(interfaces['en0']['mac'], '00:11:22:33:44:55')
+        self.assertEqual(interfaces['en0']['ipv4'], ['10.0.5.7'])
+        self.assertEqual(interfaces['en0']['ipv6'],
+                         ['fe80::211:22ff:fe33:4455'])
+        self.assertEqual(interfaces['eth1']['mac'], '66:77:88:99:AA:BB')
+        self.assertEqual(interfaces['eth1']['ipv4'], ['192.168.16.4'])
+        self.assertEqual(interfaces['lo0']['ipv4'], ['127.0.0.1'])
+        self.assertEqual(tables['defaultif'], 'en0')
+        self.assertEqual(tables['gateway'], '10.0.2.1')
+
+    def testDNSTimeout(self):
+        savedfqdn = netfacts.socket.getfqdn
+
+        def slowfqdn(name=''):
+            time.sleep(2)
+            return 'slow.example.com'
+        netfacts.socket.getfqdn = slowfqdn
+        try:
+            facts = NetFacts(self.root, dnstimeout=0.1)
+            start = time.time()
+            hostname, iplist = facts.lookuphost()
+            self.assertTrue(time.time() - start < 1)
+            self.assertEqual(hostname, socket.gethostname())
+            self.assertEqual(iplist, None)
+        finally:
+            netfacts.socket.getfqdn = savedfqdn
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+
+
+Created on Oct 18, 2026
+
+Unit tests for the PackageDB, run against a synthetic package manifest.
+'''
+import hashlib
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+from packagedb import PackageDB
+
+
+class zzzTestFrameworkpackagedb(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.suidfile = os.path.join(self.tmpdir, 'passwd')
+        self.writefile(self.suidfile, 'passwd binary', 04755)
+        self.changed = os.path.join(self.tmpdir, 'ping')
+        self.writefile(self.changed, 'ping binary', 0755)
+        self.shared = os.path.join(self.tmpdir, 'shared')
+        self.writefile(self.shared, 'shared file', 0644)
+        self.unowned = os.path.join(self.tmpdir, 'local')
+        self.writefile(self.unowned, 'local binary', 04755)
+        md5 = hashlib.md5('passwd binary').hexdigest()
+        sha256 = hashlib.sha256('not the ping binary').hexdigest()
+        self.manifest = os.path.join(self.tmpdir, 'manifest')
+        self.writefile(self.manifest, '\n'.join([
+            self.tmpdir + '\t40755\t\tfilesystem',
+            self.suidfile + '\t104755\t' + md5 + '\tpasswd',
+            self.changed + '\t104755\t' + sha256 + '\tiputils',
+            self.shared + '\t100600\t\tlib-x86',
+            self.shared + '\t100644\t\tlib-i686',
+            'garbage line']) + '\n', 0644)
+        self.db = PackageDB(manifest=self.manifest)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def writefile(self, path, data, mode):
+        whandle = open(path, 'w')
+        whandle.write(data)
+        whandle.close()
+        os.chmod(path, mode)
+
+    def testOwnership(self):
+        self.assertEqual(self.db.getmanager(), 'manifest')
+        self.assertTrue(self.db.isowned(self.suidfile))
+        self.assertFalse(self.db.isowned(self.unowned))
+        self.assertEqual(self.db.getpackages(self.suidfile), ['passwd'])
+        self.assertEqual(sorted(self.db.getpackages(self.shared)),
+                         ['lib-i686', 'lib-x86'])
+        self.assertEqual(self.db.getpackages(self.unowned), [])
+
+    def testCheckMode(self):
+        self.assertTrue(self.db.checkmode(self.suidfile))
+        self.assertFalse(self.db.checkmode(self.changed))
+        # Any owning package's mode is accepted
+        self.assertTrue(self.db.checkmode(self.shared))
+        self.assertEqual(self.db.checkmode(self.unowned), None)
+        self.assertTrue(self.db.checkmode(self.tmpdir,
+                                          stat.S_IFDIR | 0755))
+
+    def testCheckDigest(self):
+        self.assertTrue(self.db.checkdigest(self.suidfile))
+        self.assertFalse(self.db.checkdigest(self.changed))
+        self.assertEqual(self.db.checkdigest(self.shared), None)
+        self.assertEqual(self.db.checkdigest(self.unowned), None)
+
+    def testMissingManifest(self):
+        db = PackageDB(manifest=os.path.join(self.tmpdir, 'nothere'))
+        self.assertEqual(db.getmanager(), None)
+        self.assertFalse(db.isowned(self.suidfile))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+
+
+Created on Oct 18, 2026
+
+Unit tests for the in process unified diff applier.
+'''
+import difflib
+import random
+import unittest
+from patchapply import UnifiedPatch, PatchError
+
+
+class zzzTestFrameworkpatchapply(unittest.TestCase):
+
+    def setUp(self):
+        self.old = ['# sshd_config\n', 'Port 22\n', 'Protocol 2\n',
+                    '-- not a header\n', 'PermitRootLogin yes\n',
+                    'X11Forwarding yes\n', 'UsePAM yes\n']
+        self.new = ['# sshd_config\n', 'Port 22\n', 'Protocol 2\n',
+                    'PermitRootLogin no\n', 'X11Forwarding yes\n',
+                    'UsePAM yes\n', 'Banner /etc/issue\n']
+
+    def mkpatch(self, fromlines, tolines):
+        return ''.join(difflib.unified_diff(fromlines, tolines,
+                                            fromfile='new', tofile='old'))
+
+    def testRevert(self):
+        patch = UnifiedPatch(self.mkpatch(self.new, self.old))
+        self.assertEqual(patch.apply(self.new), self.old)
+
+    def testOffset(self):
+        patch = UnifiedPatch(self.mkpatch(self.new, self.old))
+        shifted = ['# local\n', '# additions\n'] + self.new
+        self.assertEqual(patch.apply(shifted),
+                         ['# local\n', '# additions\n'] + self.old)
+
+    def testInsertAndDelete(self):
+        for fromlines, tolines in [([], ['a\n', 'b\n']),
+                                   (['a\n', 'b\n'], []),
+                                   (['b\n'], ['a\n', 'b\n']),
+                                   (['a\n'], ['a\n', 'b\n'])]:
+            patch = UnifiedPatch(self.mkpatch(fromlines, tolines))
+            self.assertEqual(patch.apply(fromlines), tolines)
+
+    def testNoNewlineAtEnd(self):
+        text = '''--- new
++++ old
+@@ -1,2 +1,2 @@
+ a
+-b
+\\ No newline at end of file
++c
+\\ No newline at end of file
+'''
+        self.assertEqual(UnifiedPatch(text).apply(['a\n', 'b']),
+                         ['a\n', 'c'])
+
+    def testRandomRoundTrip(self):
+        rand = random.Random(1234)
+        for _ in range(50):
+            old = ['line %d\n' % rand.randint(0, 20) for _ in range(30)]
+            new = [line for line in old if rand.random() > 0.2]
+            for _ in range(5):
+                new.insert(rand.randint(0, len(new)),
+                           'added %d\n' % rand.randint(0, 20))
+            patch = UnifiedPatch(self.mkpatch(new, old))
+            self.assertEqual(patch.apply(new), old)
+
+    def testConflict(self):
+        patch = UnifiedPatch(self.mkpatch(self.new, self.old))
+        changed = list(self.new)
+        changed[3] = 'PermitRootLogin without-password\n'
+        self.assertRaises(PatchError, patch.apply, changed)
+
+    def testTruncated(self):
+        self.assertRaises(PatchError, UnifiedPatch, '@@ -1,3 +1,3 @@\n a\n')
+
+
+if __name__ == "__main__":
+    unittest.main()
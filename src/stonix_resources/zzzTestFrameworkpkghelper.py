@@ -30,6 +30,9 @@ Created on Jul 31, 2012
 
 import unittest
 import pkghelper
+from aptGet import AptGet
+from CommandHelper import CommandHelper
+from pkginventory import setinventory
 from logdispatcher import LogPriority,LogDispatcher
 import environment
 class zzzTestFrameworkpkghelper(unittest.TestCase):
@@ -55,5 +58,144 @@ class zzzTestFrameworkpkghelper(unittest.TestCase):
         self.failUnless(self.helper.check("php"))
         self.helper.remove("php")
         self.failIf(self.helper.check("php"))
+
+
+class FakeEnviron(object):
+
+    def getosfamily(self):
+        return "linux"
+
+    def getostype(self):
+        return "debian"
+
+    def geteuid(self):
+        return 0
+
+
+class FakeLogger(object):
+
+    def log(self, priority, msg_data):
+        pass
+
+
+class FakePckgr(object):
+    '''Package manager backend that records its calls'''
+
+    def __init__(self, installed, broken=()):
+        self.installed = set(installed)
+        self.broken = set(broken)
+        self.calls = []
+
+    def checkInstalls(self, packages):
+        self.calls.append(("check", list(packages)))
+        return dict((pkg, pkg in self.installed) for pkg in packages)
+
+    def installpackages(self, packages):
+        self.calls.append(("install", list(packages)))
+        if self.broken.intersection(packages):
+            return False
+        self.installed.update(packages)
+        return True
+
+    def installpackage(self, package):
+        return self.installpackages([package])
+
+    def removepackages(self, packages):
+        self.calls.append(("remove", list(packages)))
+        if self.broken.intersection(packages):
+            return False
+        self.installed.difference_update(packages)
+        return True
+
+    def removepackage(self, package):
+        return self.removepackages([package])
+
+
+class zzzTestFrameworkpkgtransaction(unittest.TestCase):
+
+    def setUp(self):
+        setinventory(None)
+        self.helper = pkghelper.Pkghelper(FakeLogger(), FakeEnviron())
+        self.pckgr = FakePckgr(["rsh", "talk"])
+        self.helper.pckgr = self.pckgr
+
+    def testCheckInstalled(self):
+        found = self.helper.checkInstalled(["rsh", "vlock", "talk"])
+        self.assertEqual(found, {"rsh": True, "vlock": False, "talk": True})
+        self.assertEqual(self.pckgr.calls,
+                         [("check", ["rsh", "vlock", "talk"])])
+        self.assertEqual(self.helper.checkInstalled([]), {})
+
+    def testCommitBatches(self):
+        self.helper.queueInstall("vlock")
+        self.helper.queueRemove("rsh")
+        self.helper.queueInstall("aide")
+        self.helper.queueRemove("talk")
+        self.assertEqual(self.helper.getQueue(),
+                         [("remove", "rsh"), ("remove", "talk"),
+                          ("install", "vlock"), ("install", "aide")])
+        results = self.helper.commit()
+        self.assertEqual(results, {"rsh": True, "talk": True,
+                                   "vlock": True, "aide": True})
+        self.assertEqual(self.pckgr.calls,
+                         [("remove", ["rsh", "talk"]),
+                          ("install", ["vlock", "aide"])])
+        self.assertEqual(self.helper.getQueue(), [])
+        self.assertEqual(self.helper.commit(), {})
+
+    def testLastIntentWins(self):
+        self.helper.queueInstall("rsh")
+        self.helper.queueRemove("rsh")
+        self.assertEqual(self.helper.getQueue(), [("remove", "rsh")])
+
+    def testCommitFallback(self):
+        self.pckgr.broken.add("bogus")
+        self.helper.queueInstall("vlock")
+        self.helper.queueInstall("bogus")
+        results = self.helper.commit()
+        self.assertEqual(results, {"vlock": True, "bogus": False})
+        self.assertEqual(self.pckgr.calls,
+                         [("install", ["vlock", "bogus"]),
+                          ("install", ["vlock"]), ("install", ["bogus"])])
+
+
+class FakeDpkgQuery(CommandHelper):
+    '''CommandHelper that takes the argv through the real setCommand and
+    answers like dpkg-query -W -f=<format> would'''
+
+    def __init__(self, logger, statuses):
+        CommandHelper.__init__(self, logger)
+        self.statuses = statuses
+
+    def executeCommand(self, command=None, stdoutcallback=None,
+                       stderrcallback=None, pure=False):
+        self.setCommand(command)
+        fmt = self.command[2][len("-f="):]
+        text = ""
+        for package in self.command[3:]:
+            if package in self.statuses:
+                record = fmt.replace("${Package}", package)
+                record = record.replace("${Status}", self.statuses[package])
+                # dpkg-query expands the \n escape itself
+                text += record.replace("\\n", "\n")
+        self.stdout = text.splitlines()
+        self.output = self.stdout
+        self.returncode = 0
+        return True
+
+
+class zzzTestFrameworkaptcheckinstalls(unittest.TestCase):
+
+    def testCheckInstalls(self):
+        apt = AptGet(FakeLogger())
+        apt.ch = FakeDpkgQuery(FakeLogger(),
+                               {"rsh-client": "install ok installed",
+                                "talk": "deinstall ok config-files",
+                                "vlock": "install ok installed"})
+        found = apt.checkInstalls(["rsh-client", "talk", "vlock", "nis"])
+        self.assertEqual(found, {"rsh-client": True, "talk": False,
+                                 "vlock": True, "nis": False})
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,147 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+Created on Oct 18, 2026
+
+Unit tests for the shared installed package inventory.
+'''
+import os
+import shutil
+import tempfile
+import unittest
+import pkghelper
+from aptGet import AptGet
+from pkginventory import PackageInventory, fixtureinventory, getinventory, \
+    setinventory
+from probecache import getprobecache
+
+
+class FakeLogger(object):
+
+    def log(self, priority, msg_data):
+        pass
+
+
+class FakeEnviron(object):
+
+    def getosfamily(self):
+        return "linux"
+
+    def getostype(self):
+        return "debian"
+
+    def geteuid(self):
+        return 0
+
+
+class FakePckgr(object):
+    '''Backend that installs by appending to the inventory fixture'''
+
+    def __init__(self, fixture):
+        self.fixture = fixture
+        self.checks = []
+
+    def checkInstall(self, package):
+        self.checks.append(package)
+        return False
+
+    def installpackage(self, package):
+        fixture = open(self.fixture, 'a')
+        fixture.write(package + '\n')
+        fixture.close()
+        return True
+
+
+class zzzTestFrameworkpkginventory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.fixture = os.path.join(self.tmpdir, 'installed')
+        fixture = open(self.fixture, 'w')
+        fixture.write('# installed packages\nrsh\ntalk\n\n')
+        fixture.close()
+        self.inventory = fixtureinventory(self.fixture)
+        setinventory(self.inventory)
+        self.helper = pkghelper.Pkghelper(FakeLogger(), FakeEnviron())
+        self.helper.pckgr = FakePckgr(self.fixture)
+
+    def tearDown(self):
+        setinventory(None)
+        shutil.rmtree(self.tmpdir)
+
+    def testLookups(self):
+        self.assertTrue(self.helper.check('rsh'))
+        self.assertFalse(self.helper.check('vlock'))
+        self.assertFalse(self.helper.check('# installed packages'))
+        self.assertEqual(self.helper.checkInstalled(['talk', 'vlock']),
+                         {'talk': True, 'vlock': False})
+        other = pkghelper.Pkghelper(FakeLogger(), FakeEnviron())
+        self.assertTrue(other.check('talk'))
+        self.assertEqual(self.inventory.getloads(), 1)
+        self.assertEqual(self.helper.pckgr.checks, [])
+
+    def testInstallInvalidates(self):
+        self.assertFalse(self.helper.check('vlock'))
+        self.assertTrue(self.helper.install('vlock'))
+        self.assertTrue(self.helper.check('vlock'))
+        self.assertEqual(self.inventory.getloads(), 2)
+
+    def testProbeCacheInvalidates(self):
+        self.assertTrue(self.helper.check('rsh'))
+        getprobecache().invalidate()
+        self.assertTrue(self.helper.check('rsh'))
+        self.assertEqual(self.inventory.getloads(), 2)
+        self.inventory.invalidate()
+        self.assertTrue(self.helper.check('rsh'))
+        self.assertEqual(self.inventory.getloads(), 3)
+
+    def testFixModeSingleLoad(self):
+        # Reading the inventory must not itself invalidate the ProbeCache,
+        # or every lookup during a fix would reload the package database
+        if not os.path.exists('/usr/bin/dpkg-query'):
+            self.skipTest('requires dpkg-query')
+        inventory = PackageInventory(AptGet(FakeLogger()).listInstalled)
+        setinventory(inventory)
+        getprobecache().setfixmode(True)
+        try:
+            for package in ['vlock', 'rsh', 'dpkg', 'talk']:
+                self.helper.check(package)
+            self.assertTrue(self.helper.check('dpkg'))
+            self.assertEqual(inventory.getloads(), 1)
+        finally:
+            getprobecache().setfixmode(False)
+
+    def testUnreadable(self):
+        setinventory(PackageInventory(lambda: None))
+        self.assertFalse(self.helper.check('rsh'))
+        self.assertEqual(self.helper.pckgr.checks, ['rsh'])
+
+    def testNoInventory(self):
+        setinventory(None)
+        self.assertEqual(getinventory(None), None)
+        self.assertFalse(self.helper.check('rsh'))
+        self.assertEqual(self.helper.pckgr.checks, ['rsh'])
+
+
+if __name__ == "__main__":
+    unittest.main()
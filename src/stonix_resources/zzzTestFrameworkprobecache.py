@@ -0,0 +1,74 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+Created on Oct 18, 2026
+
+Unit tests for the ProbeCache.
+'''
+import unittest
+from probecache import ProbeCache
+
+
+class zzzTestFrameworkprobecache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ProbeCache(maxentries=3, maxbytes=100)
+
+    def testGetPut(self):
+        self.assertEqual(self.cache.get(['uname', '-r']), None)
+        self.cache.put(['uname', '-r'], 0, ['3.10\n'], [])
+        returncode, stdout, stderr = self.cache.get(['uname', '-r'])
+        self.assertEqual(returncode, 0)
+        self.assertEqual(stdout, ['3.10\n'])
+        self.assertEqual(stderr, [])
+        # callers get their own copy
+        stdout.append('changed\n')
+        self.assertEqual(self.cache.get(['uname', '-r'])[1], ['3.10\n'])
+        self.assertEqual(self.cache.getstats(), (2, 1, 0))
+
+    def testShellAndArgvKeysDiffer(self):
+        self.cache.put('uname -r', 0, ['a\n'], [])
+        self.assertEqual(self.cache.get(['uname', '-r']), None)
+        self.assertEqual(self.cache.get('uname -r')[1], ['a\n'])
+
+    def testLimits(self):
+        self.cache.put('big', 0, ['x' * 101], [])
+        self.assertEqual(self.cache.get('big'), None)
+        for num in range(4):
+            self.cache.put(str(num), 0, [], [])
+        self.assertEqual(self.cache.get('0'), None)
+        self.assertNotEqual(self.cache.get('3'), None)
+
+    def testFixMode(self):
+        self.cache.put('probe', 0, [], [])
+        self.cache.setfixmode(True)
+        self.assertTrue(self.cache.getfixmode())
+        self.assertEqual(self.cache.get('probe'), None)
+        self.cache.put('probe', 0, [], [])
+        self.cache.setfixmode(False)
+        self.assertFalse(self.cache.getfixmode())
+        self.assertEqual(self.cache.get('probe'), None)
+        self.assertEqual(self.cache.getstats()[2], 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+
+Created on Oct 18, 2026
+
+Unit tests for the RuleIndex.
+'''
+import os
+import shutil
+import tempfile
+import unittest
+from ruleindex import RuleIndex
+
+
+class FakeLogger(object):
+
+    def log(self, priority, msg_data):
+        pass
+
+
+class FakeEnviron(object):
+
+    def __init__(self, resourcespath, rulespath, cachepath):
+        self.resourcespath = resourcespath
+        self.rulespath = rulespath
+        self.cachepath = cachepath
+        self.osver = '7.1'
+
+    def get_resources_path(self):
+        return self.resourcespath
+
+    def get_rules_path(self):
+        return self.rulespath
+
+    def get_cache_path(self):
+        return self.cachepath
+
+    def getosfamily(self):
+        return 'linux'
+
+    def getostype(self):
+        return 'Red Hat Enterprise Linux'
+
+    def getosver(self):
+        return self.osver
+
+    def getstonixversion(self):
+        return '0.8.17'
+
+    def geteuid(self):
+        return os.geteuid()
+
+
+class Rule(object):
+
+    def __init__(self, name, num, applicable=True, root=True):
+        self.rulename = name
+        self.rulenumber = num
+        self.applicable = applicable
+        self.rootrequired = root
+
+    def getrulename(self):
+        return self.rulename
+
+    def getrulenum(self):
+        return self.rulenumber
+
+    def getisrootrequired(self):
+        return self.rootrequired
+
+    def isapplicable(self):
+        return self.applicable
+
+
+class SecureThing(Rule):
+    pass
+
+
+class CustomThing(Rule):
+
+    def isapplicable(self):
+        return False
+
+
+class zzzTestFrameworkruleindex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.rulespath = os.path.join(self.tmpdir, 'rules')
+        os.mkdir(self.rulespath)
+        for name in ['__init__.py', 'SecureThing.py', 'CustomThing.py']:
+            open(os.path.join(self.rulespath, name), 'w').close()
+        for name in ['rule.py', 'ruleKVEditor.py']:
+            open(os.path.join(self.tmpdir, name), 'w').close()
+        self.environ = FakeEnviron(self.tmpdir, self.rulespath,
+                                   os.path.join(self.tmpdir, 'cache'))
+        self.index = RuleIndex(self.environ, FakeLogger())
+        self.rules = [SecureThing('SecureThing', 10),
+                      CustomThing('CustomThing', 20, root=False)]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def testModuleNames(self):
+        self.assertEqual(self.index.getmodulenames(),
+                         ['CustomThing', 'SecureThing'])
+
+    def testBuildAndLoad(self):
+        self.assertEqual(self.index.load(), None)
+        built = self.index.build(self.rules)
+        loaded = self.index.load()
+        self.assertEqual(built, loaded)
+        entries = dict([(entry['name'], entry) for entry in loaded])
+        self.assertEqual(entries['SecureThing']['number'], 10)
+        self.assertTrue(entries['SecureThing']['applicable'])
+        self.assertFalse(entries['SecureThing']['dynamic'])
+        self.assertTrue(entries['CustomThing']['dynamic'])
+        self.assertFalse(entries['CustomThing']['rootrequired'])
+
+    def testStaleOnOSChange(self):
+        self.index.build(self.rules)
+        self.environ.osver = '7.2'
+        self.assertEqual(self.index.load(), None)
+
+    def testStaleOnNewRule(self):
+        self.index.build(self.rules)
+        open(os.path.join(self.rulespath, 'NewThing.py'), 'w').close()
+        self.assertEqual(self.index.load(), None)
+
+    def testStaleOnTemplateChange(self):
+        self.index.build(self.rules)
+        whandle = open(os.path.join(self.tmpdir, 'rule.py'), 'w')
+        whandle.write('# changed\n')
+        whandle.close()
+        self.assertEqual(self.index.load(), None)
+
+    def testUnsafeIndexIgnored(self):
+        self.index.build(self.rules)
+        os.chmod(self.index.indexpath, 0666)
+        self.assertEqual(self.index.load(), None)
+
+    def testFailedModulesRetried(self):
+        self.index.build(self.rules[:1], ['CustomThing'])
+        entries = dict([(entry['name'], entry)
+                        for entry in self.index.load()])
+        self.assertTrue(entries['CustomThing']['dynamic'])
+        self.assertFalse(entries['SecureThing']['dynamic'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+Created on Oct 18, 2026
+
+Unit tests for RuleMetrics.
+'''
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import unittest
+import xml.etree.ElementTree as ET
+from logdispatcher import xmlReport
+from rulemetrics import RuleMetrics
+
+
+class zzzTestFrameworkrulemetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.metrics = RuleMetrics()
+        self.metrics.install(stats=True)
+
+    def tearDown(self):
+        self.metrics.uninstall()
+        shutil.rmtree(self.tmpdir)
+
+    def testMeasure(self):
+        with self.metrics.measure('TestRule', 'report'):
+            subprocess.call(['/bin/true'])
+            os.path.exists(self.tmpdir)
+            os.lstat(self.tmpdir)
+            self.metrics.count('commands')
+        with self.metrics.measure('TestRule', 'report'):
+            self.metrics.count('probehits')
+        with self.metrics.measure('TestRule', 'fix'):
+            pass
+        records = self.metrics.getrecords()
+        self.assertEqual([(record['rule'], record['phase'])
+                          for record in records],
+                         [('TestRule', 'report'), ('TestRule', 'fix')])
+        report = records[0]
+        self.assertEqual(report['runs'], 2)
+        self.assertEqual(report['subprocesses'], 1)
+        self.assertEqual(report['commands'], 1)
+        self.assertEqual(report['probehits'], 1)
+        self.assertTrue(report['stats'] >= 2)
+        self.assertTrue(report['wall'] > 0)
+        self.assertTrue(report['maxrss'] >= 0)
+        self.assertEqual(records[1]['subprocesses'], 0)
+
+    def testUninstall(self):
+        metrics = RuleMetrics()
+        stat = os.stat
+        lstat = os.lstat
+        executechild = subprocess.Popen.__dict__['_execute_child']
+        metrics.install(stats=True)
+        self.assertFalse(os.stat is stat)
+        metrics.uninstall()
+        metrics.uninstall()
+        self.assertTrue(os.stat is stat)
+        self.assertTrue(os.lstat is lstat)
+        self.assertTrue(subprocess.Popen.__dict__['_execute_child'] is
+                        executechild)
+        with metrics.measure('TestRule', 'report'):
+            subprocess.call(['/bin/true'])
+        self.assertEqual(metrics.getrecords()[0]['subprocesses'], 0)
+
+    def testUnmeasuredThread(self):
+        worker = threading.Thread(target=self.metrics.count,
+                                  args=('commands',))
+        with self.metrics.measure('TestRule', 'report'):
+            worker.start()
+            worker.join()
+        # Nothing running, the count is dropped
+        self.metrics.count('commands')
+        self.assertEqual(self.metrics.getrecords()[0]['commands'], 1)
+        self.metrics.reset()
+        self.assertEqual(self.metrics.getrecords(), [])
+
+    def testConcurrentMeasurements(self):
+        # With two measurements running an unmeasured thread's counts can
+        # not be attributed and are dropped
+        worker = threading.Thread(target=self.metrics.count,
+                                  args=('commands',))
+        with self.metrics.measure('FirstRule', 'report'):
+            with self.metrics.measure('SecondRule', 'report'):
+                worker.start()
+                worker.join()
+                self.metrics.count('probehits')
+        records = dict([(record['rule'], record)
+                        for record in self.metrics.getrecords()])
+        self.assertEqual(records['FirstRule']['commands'], 0)
+        self.assertEqual(records['SecondRule']['commands'], 0)
+        self.assertEqual(records['SecondRule']['probehits'], 1)
+        self.assertEqual(self.metrics.threadcounts, [])
+
+    def testStatsOptional(self):
+        self.metrics.uninstall()
+        stat = os.stat
+        metrics = RuleMetrics()
+        metrics.install()
+        try:
+            self.assertTrue(os.stat is stat)
+            with metrics.measure('TestRule', 'report'):
+                os.lstat(self.tmpdir)
+                subprocess.call(['/bin/true'])
+        finally:
+            metrics.uninstall()
+        record = metrics.getrecords()[0]
+        self.assertEqual(record['stats'], 0)
+        self.assertEqual(record['subprocesses'], 1)
+
+    def testReset(self):
+        with self.metrics.measure('TestRule', 'report'):
+            pass
+        self.metrics.reset()
+        self.assertEqual(self.metrics.getrecords(), [])
+
+    def testWriteJson(self):
+        with self.metrics.measure('TestRule', 'undo'):
+            pass
+        path = os.path.join(self.tmpdir, 'metrics.json')
+        self.metrics.writejson(path)
+        rhandle = open(path, 'r')
+        records = json.load(rhandle)
+        rhandle.close()
+        self.assertEqual(records[0]['rule'], 'TestRule')
+        self.assertEqual(records[0]['phase'], 'undo')
+
+    def testXmlReport(self):
+        with self.metrics.measure('TestRule', 'report'):
+            pass
+        path = os.path.join(self.tmpdir, 'report.xml')
+        report = xmlReport(path)
+        report.writeMetrics(self.metrics.getrecords())
+        report.closeReport()
+        run = ET.parse(path).getroot()
+        elements = run.findall('metrics')
+        self.assertEqual(len(elements), 1)
+        self.assertEqual(elements[0].get('rule'), 'TestRule')
+        self.assertEqual(elements[0].get('phase'), 'report')
+        self.assertEqual(elements[0].get('runs'), '1')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+
+Created on Oct 18, 2026
+
+Unit tests for the RuleScheduler.
+'''
+import threading
+import time
+import unittest
+import CommandHelper
+from rulescheduler import RuleScheduler
+
+
+class FakeLogger(object):
+
+    def log(self, priority, msg_data):
+        pass
+
+
+class FakeRule(object):
+
+    def __init__(self, name, resources=None):
+        self.name = name
+        self.sharedresources = resources or []
+
+    def getsharedresources(self):
+        return self.sharedresources
+
+
+class zzzTestFrameworkrulescheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = FakeLogger()
+        self.lock = threading.Lock()
+        self.active = set()
+        self.overlap = []
+
+    def work(self, rule):
+        with self.lock:
+            for name in self.active:
+                self.overlap.append((name, rule.name))
+            self.active.add(rule.name)
+        time.sleep(0.05)
+        with self.lock:
+            self.active.discard(rule.name)
+        if rule.name == 'die':
+            raise ValueError('rule died')
+
+    def testSerialOrder(self):
+        rules = [FakeRule(str(num)) for num in range(5)]
+        finished = []
+        scheduler = RuleScheduler(self.logger, 1)
+        scheduler.run(rules, self.work,
+                      lambda rule, error: finished.append(rule.name))
+        self.assertEqual(finished, ['0', '1', '2', '3', '4'])
+        self.assertEqual(self.overlap, [])
+
+    def testParallelRunsAll(self):
+        rules = [FakeRule(str(num)) for num in range(8)]
+        finished = []
+        callers = set()
+
+        def done(rule, error):
+            callers.add(threading.current_thread().name)
+            finished.append(rule.name)
+        scheduler = RuleScheduler(self.logger, 4)
+        scheduler.run(rules, self.work, done)
+        self.assertEqual(sorted(finished), sorted([r.name for r in rules]))
+        self.assertEqual(callers, set([threading.current_thread().name]))
+        self.assertTrue(self.overlap, 'Rules did not run concurrently')
+
+    def testConflictingRulesDoNotOverlap(self):
+        rules = [FakeRule('ssh1', ['/etc/ssh/sshd_config']),
+                 FakeRule('ssh2', ['/etc/ssh/sshd_config', 'sshd']),
+                 FakeRule('sysctl', ['/etc/sysctl.conf']),
+                 FakeRule('ssh3', ['sshd'])]
+        finished = []
+        scheduler = RuleScheduler(self.logger, 4)
+        scheduler.run(rules, self.work,
+                      lambda rule, error: finished.append(rule.name))
+        sshrules = ['ssh1', 'ssh2', 'ssh3']
+        for first, second in self.overlap:
+            self.assertFalse(first in sshrules and second in sshrules,
+                             'Conflicting rules overlapped: ' + first +
+                             ' ' + second)
+        self.assertEqual([name for name in finished if name in sshrules],
+                         sshrules)
+
+    def testCloseFds(self):
+        seen = []
+
+        def work(rule):
+            seen.append(CommandHelper.CLOSEFDS['closefds'])
+        rules = [FakeRule(str(num)) for num in range(4)]
+        RuleScheduler(self.logger, 1).run(rules, work)
+        self.assertEqual(seen, [False] * 4)
+        del seen[:]
+        RuleScheduler(self.logger, 2).run(rules, work)
+        self.assertEqual(seen, [True] * 4)
+        self.assertFalse(CommandHelper.CLOSEFDS['closefds'])
+
+    def testErrorReported(self):
+        rules = [FakeRule('ok'), FakeRule('die'), FakeRule('ok2')]
+        errors = {}
+
+        def done(rule, error):
+            errors[rule.name] = error
+        scheduler = RuleScheduler(self.logger, 2)
+        scheduler.run(rules, self.work, done)
+        self.assertEqual(errors['ok'], None)
+        self.assertEqual(errors['ok2'], None)
+        self.assertTrue('rule died' in errors['die'])
+
+if __name__ == "__main__":
+    unittest.main()
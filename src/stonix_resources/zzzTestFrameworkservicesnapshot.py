@@ -0,0 +1,119 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+Created on Oct 18, 2026
+
+Unit tests for the ServiceSnapshot and the snapshot support in the
+SHchkconfig and SHsystemctl service helper backends.
+'''
+import unittest
+from probecache import getprobecache
+from servicesnapshot import ServiceSnapshot
+from SHchkconfig import SHchkconfig
+from SHsystemctl import SHsystemctl
+
+
+class FakeLogger(object):
+
+    def log(self, priority, msg_data):
+        pass
+
+
+class FakeEnvironment(object):
+
+    def getinstallmode(self):
+        return False
+
+
+CHKCONFIGLIST = ['auditd         \t0:off\t1:off\t2:on\t3:on\t4:on\t5:on\t6:off\n',
+                 'cups           \t0:off\t1:off\t2:off\t3:off\t4:off\t5:off\t6:off\n',
+                 '\n',
+                 'xinetd based services:\n',
+                 '\tchargen-dgram:\toff\n',
+                 '\trsync:         \ton\n']
+
+UNITFILES = ['auditd.service                  enabled\n',
+             'cups.service                    disabled\n',
+             'systemd-journald.service        static\n',
+             'sshd.service                    masked\n']
+
+UNITS = ['auditd.service      loaded active running Security Auditing\n',
+         '* cups.service      loaded failed failed  CUPS Printing\n',
+         'systemd-journald.service loaded active running Journal\n']
+
+
+class FakeChkconfig(SHchkconfig):
+
+    def listall(self):
+        return list(CHKCONFIGLIST)
+
+
+class FakeSystemctl(SHsystemctl):
+
+    def query(self, args):
+        if 'list-unit-files' in args:
+            return list(UNITFILES)
+        return list(UNITS)
+
+
+class zzzTestFrameworkservicesnapshot(unittest.TestCase):
+
+    def testValidity(self):
+        snapshot = ServiceSnapshot({'a': True}, {'a': False})
+        self.assertTrue(snapshot.isvalid())
+        self.assertEqual(snapshot.isenabled('a'), True)
+        self.assertEqual(snapshot.isrunning('a'), False)
+        self.assertEqual(snapshot.isenabled('b'), None)
+        getprobecache().invalidate()
+        self.assertFalse(snapshot.isvalid())
+
+    def testChkconfig(self):
+        helper = FakeChkconfig(FakeEnvironment(), FakeLogger())
+        helper.snapshot()
+        self.assertTrue(helper.auditservice('auditd'))
+        self.assertFalse(helper.auditservice('cups'))
+        self.assertEqual(helper.getsnapshot().isenabled('rsync:'), None)
+        self.assertTrue('cups' in helper.listservices())
+        getprobecache().invalidate()
+        self.assertEqual(helper.getsnapshot(), None)
+
+    def testSystemctl(self):
+        try:
+            helper = FakeSystemctl(FakeEnvironment(), FakeLogger())
+        except IOError:
+            # no systemctl binary on this host
+            return
+        helper.snapshot()
+        self.assertTrue(helper.auditservice('auditd'))
+        self.assertTrue(helper.auditservice('auditd.service'))
+        self.assertFalse(helper.auditservice('cups'))
+        self.assertTrue(helper.auditservice('systemd-journald'))
+        self.assertFalse(helper.auditservice('sshd'))
+        self.assertTrue(helper.isrunning('auditd'))
+        self.assertFalse(helper.isrunning('cups'))
+        self.assertEqual(helper.listservices(),
+                         ['auditd.service', 'cups.service',
+                          'systemd-journald.service'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+'''
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+
+
+
+Created on Oct 18, 2026
+
+Unit tests for the batched UndoPlanner.
+'''
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+from undoplanner import UndoPlanner
+
+
+class FakeLogger(object):
+
+    def log(self, priority, msg_data):
+        pass
+
+
+class FakeStateChgLogger(object):
+
+    def __init__(self, events):
+        self.events = events
+        self.chains = []
+
+    def getchgevent(self, eventid):
+        return self.events[eventid]
+
+    def revertfilechain(self, filename, eventids):
+        self.chains.append((filename, eventids))
+        return True
+
+
+class zzzTestFrameworkundoplanner(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.permfile = os.path.join(self.tmpdir, 'shadow')
+        whandle = open(self.permfile, 'w')
+        whandle.close()
+        os.chmod(self.permfile, 0644)
+        self.events = {
+            '0042001': {'eventtype': 'conf', 'filepath': '/etc/a.conf'},
+            '0042002': {'eventtype': 'conf', 'filepath': '/etc/b.conf'},
+            '0042003': {'eventtype': 'perm', 'filepath': self.permfile,
+                        'startstate': [os.getuid(), os.getgid(), 0600],
+                        'endstate': [0, 0, 0644]},
+            '0042004': {'eventtype': 'conf', 'filepath': '/etc/a.conf'},
+            '0042005': {'eventtype': 'bogus'}}
+        self.chlogger = FakeStateChgLogger(self.events)
+        self.planner = UndoPlanner(self.chlogger, FakeLogger())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def testPlan(self):
+        steps, messages = self.planner.plan(sorted(self.events.keys()) +
+                                            ['0042099'])
+        self.assertEqual(messages, ['EventID 0042099 not found'])
+        self.assertEqual([step[0:2] for step in steps],
+                         [('event', '0042005'),
+                          ('file', '/etc/a.conf'),
+                          ('event', '0042003'),
+                          ('file', '/etc/b.conf')])
+        # All changes to a file in one step, newest first
+        self.assertEqual(steps[1][2], ['0042004', '0042001'])
+
+    def testRun(self):
+        messages = self.planner.run(sorted(self.events.keys()))
+        self.assertEqual(messages, [])
+        self.assertEqual(self.chlogger.chains,
+                         [('/etc/a.conf', ['0042004', '0042001']),
+                          ('/etc/b.conf', ['0042002'])])
+        self.assertEqual(stat.S_IMODE(os.stat(self.permfile).st_mode), 0600)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/usr/bin/python
+"""
+###############################################################################
+#                                                                             #
+# Copyright 2015.  Los Alamos National Security, LLC. This material was       #
+# produced under U.S. Government contract DE-AC52-06NA25396 for Los Alamos    #
+# National Laboratory (LANL), which is operated by Los Alamos National        #
+# Security, LLC for the U.S. Department of Energy. The U.S. Government has    #
+# rights to use, reproduce, and distribute this software.  NEITHER THE        #
+# GOVERNMENT NOR LOS ALAMOS NATIONAL SECURITY, LLC MAKES ANY WARRANTY,        #
+# EXPRESS OR IMPLIED, OR ASSUMES ANY LIABILITY FOR THE USE OF THIS SOFTWARE.  #
+# If software is modified to produce derivative works, such modified software #
+# should be clearly marked, so as not to confuse it with the version          #
+# available from LANL.                                                        #
+#                                                                             #
+# Additionally, this program is free software; you can redistribute it and/or #
+# modify it under the terms of the GNU General Public License as published by #
+# the Free Software Foundation; either version 2 of the License, or (at your  #
+# option) any later version. Accordingly, this program is distributed in the  #
+# hope that it will be useful, but WITHOUT ANY WARRANTY; without even the     #
+# implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.    #
+# See the GNU General Public License for more details.                        #
+#                                                                             #
+###############################################################################
+Created on Oct 18, 2026
+
+Micro-benchmark for LogDispatcher.log. Prints the cost of one call that
+logs a DEBUG message in a run that is neither verbose nor in debug mode,
+so that the message is discarded, for each kind of message log() accepts.
+Run it from the src directory:
+
+    python testinglib/benchlogdispatcher.py [-n count] [-r repeat]
+
+The numbers are only meaningful relative to each other and to the cost of
+an empty method call printed alongside them; nothing is asserted.
+"""
+import optparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from stonix_resources.environment import Environment
+from stonix_resources.logdispatcher import LogDispatcher, LogPriority
+
+
+class Empty(object):
+
+    def log(self, priority, msg_data):
+        pass
+
+
+def percall(function, count, repeat):
+    '''
+    Return the best time in seconds of one call to function.
+
+    @param function: callable taking no arguments
+    @param count: int - calls per timing
+    @param repeat: int - number of timings
+    @return: float
+    '''
+    return min(timeit.Timer(function).repeat(repeat, count)) / count
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-n', '--count', type='int', default=100000,
+                      help='calls per timing')
+    parser.add_option('-r', '--repeat', type='int', default=3,
+                      help='timings per message kind, the best is reported')
+    options = parser.parse_args()[0]
+
+    environ = Environment()
+    environ.setdebugmode(False)
+    environ.setverbosemode(False)
+    logger = LogDispatcher(environ)
+    empty = Empty()
+
+    def detail():
+        return 'discarded'
+
+    cases = [('empty method call',
+              lambda: empty.log(LogPriority.DEBUG, 'discarded')),
+             ('string',
+              lambda: logger.log(LogPriority.DEBUG, 'discarded')),
+             ('list',
+              lambda: logger.log(LogPriority.DEBUG, ['Bench', 'discarded'])),
+             ('callable',
+              lambda: logger.log(LogPriority.DEBUG, detail)),
+             ('list with callable',
+              lambda: logger.log(LogPriority.DEBUG, ['Bench', detail]))]
+    try:
+        print 'Discarded DEBUG message, best of %d x %d calls:' % \
+            (options.repeat, options.count)
+        for name, function in cases:
+            print '  %-20s %8.3f usec' % \
+                (name, percall(function, options.count,
+                               options.repeat) * 1000000)
+    finally:
+        logger.closereports()
+
+if __name__ == '__main__':
+    main()